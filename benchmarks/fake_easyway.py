@@ -0,0 +1,93 @@
+# benchmarks/fake_easyway.py
+"""Локальна заміна EasyWay API для бенчмарків: записані відповіді із заданою затримкою."""
+import asyncio
+import json
+import random
+from pathlib import Path
+
+from aiohttp import web
+
+FIXTURES_DIR = Path(__file__).resolve().parent / "fixtures" / "easyway"
+
+FUNCTION_FIXTURES = {
+    "cities.GetRoutesList": "routes_list.json",
+    "cities.GetPlacesByName": "places.json",
+    "stops.GetStopInfo": "stop_info.json",
+    "routes.GetRouteGPS": "route_gps.json",
+}
+# Параметри, що відрізняють запити однієї функції (id зупинки/маршруту, пошуковий рядок)
+KEY_PARAMS = ("id", "term")
+
+
+def request_key(function: str, params) -> tuple:
+    return (function,) + tuple(str(params.get(name, "")).strip().lower() for name in KEY_PARAMS)
+
+
+class FakeEasyWay:
+    def __init__(self, latency_ms: float = 80, jitter_ms: float = 40,
+                 fixtures_dir: Path = FIXTURES_DIR, seed: int = 1):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.requests = {}  # {function: кількість запитів}
+        self._random = random.Random(seed)
+        self._responses = {
+            function: (Path(fixtures_dir) / filename).read_bytes()
+            for function, filename in FUNCTION_FIXTURES.items()
+            if (Path(fixtures_dir) / filename).exists()
+        }
+        self._recorded = {}  # {request_key: [(тіло, затримка в мс), ...]}
+        self._recorded_next = {}
+        self._runner = None
+        self.url = None
+
+    def add_recorded(self, function: str, params: dict, body, duration_ms: float):
+        """Відповідь із запису трафіку; кілька відповідей на той самий запит віддаються по колу."""
+        key = request_key(function, params)
+        self._recorded.setdefault(key, []).append((json.dumps(body, ensure_ascii=False).encode(), duration_ms))
+
+    def _delay(self) -> float:
+        jitter = self._random.uniform(-self.jitter_ms, self.jitter_ms)
+        return max(0.0, self.latency_ms + jitter) / 1000
+
+    async def handle(self, request: web.Request) -> web.Response:
+        function = request.query.get("function", "")
+        self.requests[function] = self.requests.get(function, 0) + 1
+
+        key = request_key(function, request.query)
+        recorded = self._recorded.get(key)
+        if recorded:
+            index = self._recorded_next.get(key, 0)
+            self._recorded_next[key] = index + 1
+            body, duration_ms = recorded[index % len(recorded)]
+            await asyncio.sleep(duration_ms / 1000)
+            return web.Response(body=body, content_type="application/json")
+
+        await asyncio.sleep(self._delay())
+        body = self._responses.get(function)
+        if body is None:
+            return web.json_response({"error": f"unknown function {function}"}, status=404)
+        return web.Response(body=body, content_type="application/json")
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        app = web.Application()
+        app.router.add_get("/", self.handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f"http://{host}:{port}"
+        return self.url
+
+    async def stop(self):
+        if self._runner:
+            await self._runner.cleanup()
+
+
+if __name__ == "__main__":
+    async def _serve():
+        server = FakeEasyWay()
+        print(f"Fake EasyWay: {await server.start(port=8090)}")
+        await asyncio.Event().wait()
+
+    asyncio.run(_serve())
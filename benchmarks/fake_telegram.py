@@ -0,0 +1,91 @@
+# benchmarks/fake_telegram.py
+"""Мінімальний фейковий Telegram Bot API для бенчмарків."""
+import asyncio
+import json
+import random
+import time
+
+from aiohttp import web
+
+BOT_USER = {"id": 7000000001, "is_bot": True, "first_name": "Transport Bot", "username": "transport_bench_bot"}
+
+# Методи, які повертають Message; решта — True
+MESSAGE_METHODS = {
+    "sendMessage", "editMessageText", "editMessageReplyMarkup", "editMessageCaption",
+    "sendPhoto", "sendDocument", "sendLocation", "sendMediaGroup",
+}
+
+
+class FakeTelegram:
+    def __init__(self, latency_ms: float = 30, jitter_ms: float = 10, seed: int = 2):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.requests = {}  # {метод: кількість}
+        self.error_replies = 0  # відповіді бота, що починаються з "❌" (сценарій зламався)
+        self._random = random.Random(seed)
+        self._message_id = 100000
+        self._runner = None
+        self.url = None
+
+    def _delay(self) -> float:
+        jitter = self._random.uniform(-self.jitter_ms, self.jitter_ms)
+        return max(0.0, self.latency_ms + jitter) / 1000
+
+    @staticmethod
+    async def _params(request: web.Request) -> dict:
+        if request.content_type == "application/json":
+            return await request.json()
+        return dict(await request.post())
+
+    def _message(self, params: dict) -> dict:
+        if params.get("message_id"):
+            message_id = int(params["message_id"])
+        else:
+            self._message_id += 1
+            message_id = self._message_id
+        chat_id = int(params.get("chat_id") or 0)
+        message = {
+            "message_id": message_id,
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "from": BOT_USER,
+            "text": params.get("text") or "",
+        }
+        if params.get("reply_markup"):
+            markup = params["reply_markup"]
+            message["reply_markup"] = json.loads(markup) if isinstance(markup, str) else markup
+        return message
+
+    async def handle(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"]
+        self.requests[method] = self.requests.get(method, 0) + 1
+        params = await self._params(request)
+        if str(params.get("text", "")).startswith("❌"):
+            self.error_replies += 1
+        await asyncio.sleep(self._delay())
+
+        if method == "getMe":
+            result = BOT_USER
+        elif method in MESSAGE_METHODS:
+            result = self._message(params)
+        elif method == "copyMessage":
+            self._message_id += 1
+            result = {"message_id": self._message_id}
+        else:
+            result = True
+        return web.json_response({"ok": True, "result": result})
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        app = web.Application()
+        app.router.add_post(r"/bot{token}/{method}", self.handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f"http://{host}:{port}"
+        return self.url
+
+    async def stop(self):
+        if self._runner:
+            await self._runner.cleanup()
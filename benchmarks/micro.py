@@ -0,0 +1,372 @@
+# benchmarks/micro.py
+"""
+Мікробенчмарки CPU-важких частин бота (повністю офлайн): час і пам'ять на операцію.
+
+    python -m benchmarks.micro                        # прогін + порівняння з micro_baseline.json
+    python -m benchmarks.micro --save-baseline        # оновити micro_baseline.json
+    python -m benchmarks.micro --only stop_matcher_nearest format_stop_name
+"""
+import argparse
+import asyncio
+import csv
+import gc
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+# Імпорт хендлерів тягне за собою database.db — даємо йому SQLite, щоб не потрібен був Postgres
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite://")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+GTFS_DIR = ROOT_DIR / "gtfs_static_data"
+FIXTURES_DIR = Path(__file__).resolve().parent / "fixtures"
+FEED_FIXTURE = FIXTURES_DIR / "gtfs_rt" / "vehicles.pb"
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+BASELINE_FILE = Path(__file__).resolve().parent / "micro_baseline.json"
+
+VEHICLES_COUNT = 300
+SEED = 1
+
+
+# ================= ДАНІ =================
+
+def read_csv(name: str) -> list:
+    with open(GTFS_DIR / name, "r", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+
+def vehicle_positions(stops: list, count: int = VEHICLES_COUNT, seed: int = SEED) -> list:
+    """Детерміновані координати транспорту: біля випадкових зупинок зі зсувом до ~300м."""
+    rnd = random.Random(seed)
+    positions = []
+    for _ in range(count):
+        stop = rnd.choice(stops)
+        positions.append((float(stop["stop_lat"]) + rnd.uniform(-0.003, 0.003),
+                          float(stop["stop_lon"]) + rnd.uniform(-0.003, 0.003)))
+    return positions
+
+
+def trips_accessibility(trips: list) -> dict:
+    """
+    У gtfs_static_data/trips.txt немає колонки wheelchair_accessible, тож для бенчмарку
+    кожен другий рейс вважаємо інклюзивним — інакше парсер відкидав би весь фід.
+    """
+    return {row["trip_id"]: "1" if i % 2 == 0 else "2" for i, row in enumerate(trips)}
+
+
+def build_feed(trips: list, stops: list, count: int = VEHICLES_COUNT, seed: int = SEED) -> bytes:
+    """Синтетичний GTFS-RT VehiclePositions зі справжніми trip_id/route_id (для фікстури)."""
+    from google.transit import gtfs_realtime_pb2
+
+    rnd = random.Random(seed)
+    feed = gtfs_realtime_pb2.FeedMessage()
+    feed.header.gtfs_realtime_version = "2.0"
+    feed.header.timestamp = 1_760_000_000
+
+    for i, (lat, lon) in enumerate(vehicle_positions(stops, count, seed)):
+        trip = rnd.choice(trips)
+        entity = feed.entity.add()
+        entity.id = f"veh_{i}"
+        vehicle = entity.vehicle
+        vehicle.trip.trip_id = trip["trip_id"]
+        vehicle.trip.route_id = trip["route_id"]
+        vehicle.vehicle.id = str(4000 + i)
+        vehicle.vehicle.label = str(3000 + i) if i % 3 else ""
+        vehicle.vehicle.license_plate = f"ВН{1000 + i}" if i % 5 == 0 else ""
+        vehicle.position.latitude = lat
+        vehicle.position.longitude = lon
+        vehicle.timestamp = feed.header.timestamp - rnd.randint(0, 60)
+    return feed.SerializeToString()
+
+
+# ================= ОПЕРАЦІЇ =================
+# Кожна функція готує стан і повертає (операція, кількість викликів у раунді, кількість
+# одиниць роботи на виклик). Час і пам'ять у звіті — на одну одиницю роботи.
+
+def _fresh(cls, **attrs):
+    """Новий екземпляр сервісу-синглтона в обхід __new__ (глобальний стан не чіпаємо)."""
+    instance = object.__new__(cls)
+    instance.__dict__.update(attrs)
+    return instance
+
+
+def bench_gtfs_load_data(data: dict):
+    from services.gtfs_service import GTFSService
+
+    def op():
+        service = _fresh(GTFSService, routes_db=defaultdict(list), is_loaded=False)
+        service.load_data(str(GTFS_DIR))
+    return op, 1, 1
+
+
+def bench_gtfs_closest_stop(data: dict):
+    from services.gtfs_service import GTFSService
+
+    service = _fresh(GTFSService, routes_db=defaultdict(list), is_loaded=False)
+    service.load_data(str(GTFS_DIR))
+    keys = sorted(service.routes_db)
+    rnd = random.Random(SEED)
+    queries = []
+    for _ in range(VEHICLES_COUNT):
+        route_name, transport_type = rnd.choice(keys)
+        lat, lon, _ = rnd.choice(rnd.choice(service.routes_db[(route_name, transport_type)]))
+        queries.append((route_name, transport_type, lat + rnd.uniform(-0.002, 0.002),
+                        lon + rnd.uniform(-0.002, 0.002)))
+
+    def op():
+        for route_name, transport_type, lat, lon in queries:
+            service.get_closest_stop_name(route_name, transport_type, 1, lat, lon)
+    return op, 1, len(queries)
+
+
+def _stops_list(data: dict) -> list:
+    return [{"name": row["stop_name"], "lat": float(row["stop_lat"]), "lon": float(row["stop_lon"])}
+            for row in data["stops"]]
+
+
+def bench_stop_matcher_nearest(data: dict):
+    from services.stop_matcher import StopMatcher
+
+    matcher = _fresh(StopMatcher, stops=_stops_list(data))
+    positions = data["positions"]
+
+    def op():
+        for lat, lon in positions:
+            matcher.find_nearest_stop_name(lat, lon)
+    return op, 1, len(positions)
+
+
+def bench_monitoring_parse_feed(data: dict):
+    from services.monitoring_service import MonitoringService
+    from services.stop_matcher import stop_matcher
+
+    # _parse_feed шукає зупинки через глобальний stop_matcher
+    stop_matcher.stops = _stops_list(data)
+    service = _fresh(
+        MonitoringService, data={}, running=False,
+        routes_map={row["route_id"]: row["route_short_name"].strip() for row in data["routes"]},
+        trips_accessibility=trips_accessibility(data["trips"]),
+    )
+    content = FEED_FIXTURE.read_bytes()
+
+    def op():
+        service._parse_feed(content)
+    return op, 1, 1
+
+
+def bench_render_accessible_response(data: dict):
+    from handlers.accessible_transport_handlers import _build_accessible_message
+    from services.easyway_service import EasyWayService
+
+    parser = _fresh(EasyWayService)
+    easyway_dir = FIXTURES_DIR / "easyway"
+    stop_info = parser._parse_stop_info_v12(json.loads((easyway_dir / "stop_info.json").read_text()))
+    vehicles = parser._parse_route_gps(json.loads((easyway_dir / "route_gps.json").read_text()))
+
+    global_route_data, routes_meta = {}, {}
+    for route in stop_info.get("routes", []):
+        r_type = "trol" if route.get("transport_key") == "trolley" else route.get("transport_key")
+        key = f"{route.get('title')}_{r_type}"
+        global_route_data[key] = vehicles if len(global_route_data) % 2 == 0 else []
+        routes_meta[key] = {"name": route.get("title"), "type": r_type, "stop_direction": route.get("direction")}
+
+    # Саме форматування: кеш готових сторінок у _render_accessible_response тут би все приховав
+    def op():
+        _build_accessible_message(stop_info.get("title", ""), stop_info, global_route_data, routes_meta)
+    return op, 50, 1
+
+
+def bench_format_stop_name(data: dict):
+    from utils.text_formatter import format_stop_name
+
+    names = [row["stop_name"] for row in data["stops"]]
+
+    def op():
+        for name in names:
+            format_stop_name(name)
+    return op, 1, len(names)
+
+
+BENCHMARKS = {
+    "gtfs_load_data": bench_gtfs_load_data,
+    "gtfs_closest_stop": bench_gtfs_closest_stop,
+    "stop_matcher_nearest": bench_stop_matcher_nearest,
+    "monitoring_parse_feed": bench_monitoring_parse_feed,
+    "render_accessible_response": bench_render_accessible_response,
+    "format_stop_name": bench_format_stop_name,
+}
+
+
+# ================= ВИМІР =================
+
+def _run_batch(loop, op, number: int) -> float:
+    """Виконує op number разів; повертає час у секундах (async-операції — всередині loop)."""
+    if asyncio.iscoroutinefunction(op):
+        async def batch():
+            start_ts = time.perf_counter()
+            for _ in range(number):
+                await op()
+            return time.perf_counter() - start_ts
+        return loop.run_until_complete(batch())
+
+    start_ts = time.perf_counter()
+    for _ in range(number):
+        op()
+    return time.perf_counter() - start_ts
+
+
+def measure(loop, op, number: int, units: int, rounds: int) -> dict:
+    _run_batch(loop, op, number)  # прогрів: імпорти, кеші re, лінива ініціалізація
+
+    timings = []
+    for _ in range(rounds):
+        timings.append(_run_batch(loop, op, number) / (number * units))
+
+    # Пам'ять міряємо окремо: tracemalloc сам уповільнює код у рази
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        current_before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        _run_batch(loop, op, 1)
+        _, peak = tracemalloc.get_traced_memory()
+        gc.collect()
+        current_after, _ = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    retained_blocks = sum(stat.count_diff for stat in after.compare_to(before, "filename"))
+
+    return {
+        "units_per_op": units,
+        "rounds": rounds,
+        "min_us": round(min(timings) * 1e6, 3),
+        "median_us": round(statistics.median(timings) * 1e6, 3),
+        "peak_bytes": round((peak - current_before) / units),
+        "retained_bytes": round((current_after - current_before) / units),
+        "retained_blocks": round(retained_blocks / units, 2),
+    }
+
+
+def load_data() -> dict:
+    stops = read_csv("stops.txt")
+    return {
+        "stops": stops,
+        "trips": read_csv("trips.txt"),
+        "routes": read_csv("routes.txt"),
+        "positions": vehicle_positions(stops),
+    }
+
+
+def git_sha() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_DIR,
+                              capture_output=True, text=True, timeout=5).stdout.strip() or "unknown"
+    except (OSError, subprocess.SubprocessError):
+        return "unknown"
+
+
+def run(names: list, rounds: int) -> dict:
+    data = load_data()
+    loop = asyncio.new_event_loop()
+    results = {}
+    try:
+        for name in names:
+            op, number, units = BENCHMARKS[name](data)
+            # load_data читає ~100 тис. рядків — кількох раундів досить
+            results[name] = measure(loop, op, number, units, min(rounds, 3) if name == "gtfs_load_data" else rounds)
+            print(format_result(name, results[name]))
+    finally:
+        loop.close()
+
+    return {
+        "meta": {
+            "git_sha": git_sha(),
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(terse=True),
+            "vehicles": VEHICLES_COUNT,
+            "stops": len(data["stops"]),
+        },
+        "benchmarks": results,
+    }
+
+
+def format_result(name: str, result: dict) -> str:
+    return (f"{name:<28} median={result['median_us']:>12.2f}us min={result['min_us']:>12.2f}us  "
+            f"peak={result['peak_bytes'] / 1024:>9.1f}KiB retained={result['retained_bytes'] / 1024:>8.1f}KiB "
+            f"(x{result['units_per_op']})")
+
+
+def compare_with_baseline(report: dict, baseline: dict, tolerance: float) -> list:
+    """Регресії: медіанний час або пік пам'яті вище за baseline більш ніж на tolerance."""
+    regressions = []
+    for name, result in report["benchmarks"].items():
+        base = baseline.get("benchmarks", {}).get(name)
+        if not base:
+            continue
+        if result["median_us"] > base["median_us"] * (1 + tolerance):
+            regressions.append(f"{name}: median {result['median_us']}us > baseline {base['median_us']}us")
+        if result["peak_bytes"] > base["peak_bytes"] * (1 + tolerance) + 1024:
+            regressions.append(f"{name}: peak {result['peak_bytes']}B > baseline {base['peak_bytes']}B")
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Micro-benchmarks of TransportBot CPU-heavy code")
+    parser.add_argument("--only", nargs="+", default=list(BENCHMARKS), choices=list(BENCHMARKS))
+    parser.add_argument("--rounds", type=int, default=7)
+    parser.add_argument("--output", help="куди записати JSON-звіт (типово benchmarks/results/micro-<sha>.json)")
+    parser.add_argument("--baseline", default=str(BASELINE_FILE))
+    parser.add_argument("--save-baseline", action="store_true", help="записати результат як новий baseline")
+    parser.add_argument("--tolerance", type=float, default=0.3, help="допустиме погіршення (0.3 = 30%%)")
+    parser.add_argument("--regenerate-feed", action="store_true",
+                        help="перегенерувати fixtures/gtfs_rt/vehicles.pb і вийти")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    if args.regenerate_feed:
+        FEED_FIXTURE.parent.mkdir(parents=True, exist_ok=True)
+        FEED_FIXTURE.write_bytes(build_feed(read_csv("trips.txt"), read_csv("stops.txt")))
+        print(f"Feed fixture saved: {FEED_FIXTURE}")
+        return 0
+
+    report = run(args.only, args.rounds)
+    text = json.dumps(report, ensure_ascii=False, indent=2) + "\n"
+
+    output = Path(args.output) if args.output else RESULTS_DIR / f"micro-{report['meta']['git_sha']}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(text)
+    print(f"Results saved: {output}")
+
+    if args.save_baseline:
+        Path(args.baseline).write_text(text)
+        print(f"Baseline saved: {args.baseline}")
+        return 0
+
+    baseline_path = Path(args.baseline)
+    if not baseline_path.exists():
+        return 0
+    regressions = compare_with_baseline(report, json.loads(baseline_path.read_text()), args.tolerance)
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
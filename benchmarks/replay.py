@@ -0,0 +1,198 @@
+# benchmarks/replay.py
+"""
+Відтворення записаного трафіку (services/traffic_recorder.py) на локальному боті.
+
+    python -m benchmarks.replay recordings/traffic.jsonl                   # у реальному темпі
+    python -m benchmarks.replay recordings/traffic.jsonl --speed 10        # у 10 разів швидше
+    python -m benchmarks.replay recordings/traffic.jsonl --speed 0         # якнайшвидше
+    python -m benchmarks.replay recordings/traffic.jsonl --from-sec 3600 --to-sec 5400
+"""
+import argparse
+import asyncio
+import json
+import platform
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from benchmarks.fake_easyway import FakeEasyWay  # noqa: E402
+from benchmarks.fake_telegram import FakeTelegram  # noqa: E402
+from benchmarks.run_e2e import peak_rss_mb, percentile, rss_mb, start_bot  # noqa: E402
+
+
+def load_recording(path, from_sec: float = 0.0, to_sec: float = None) -> dict:
+    """Читає JSONL-запис: апдейти в межах вікна (час відлічується від його початку) і відповіді API."""
+    updates, upstream, meta = [], [], {}
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            event = json.loads(line)
+            kind = event.get("kind")
+            if kind == "meta":
+                meta = event
+            elif kind == "upstream":
+                upstream.append(event)
+            elif kind == "update":
+                if event["t"] < from_sec or (to_sec is not None and event["t"] > to_sec):
+                    continue
+                updates.append(event)
+
+    updates.sort(key=lambda event: event["t"])
+    for event in updates:
+        event["t"] = round(event["t"] - from_sec, 4)
+    return {"meta": meta, "updates": updates, "upstream": upstream}
+
+
+def load_profile(updates: list, speed: float, window_sec: float = 1.0) -> dict:
+    """Форма навантаження, яку подаємо: апдейтів за секунду (з урахуванням прискорення)."""
+    if not updates:
+        return {"duration_sec": 0.0, "avg_ups": 0.0, "peak_ups": 0.0}
+    scale = speed if speed > 0 else 1.0
+    per_window = Counter(int(event["t"] / scale / window_sec) for event in updates)
+    duration = updates[-1]["t"] / scale
+    return {
+        "duration_sec": round(duration, 3),
+        "avg_ups": round(len(updates) / duration, 1) if duration else float(len(updates)),
+        "peak_ups": round(max(per_window.values()) / window_sec, 1),
+    }
+
+
+def build_easyway(recording: dict, latency_ms: float, jitter_ms: float) -> FakeEasyWay:
+    easyway = FakeEasyWay(latency_ms=latency_ms, jitter_ms=jitter_ms)
+    for event in recording["upstream"]:
+        if event.get("upstream") == "easyway" and event.get("status") == 200:
+            easyway.add_recorded(event["function"], event.get("params", {}), event["body"], event["duration_ms"])
+    return easyway
+
+
+async def replay(bot, telegram: FakeTelegram, updates: list, speed: float) -> dict:
+    from telegram import Update
+
+    latencies = []
+    max_pending = 0
+    submit_lag = []
+    errors_before = telegram.error_replies
+    processor = bot.update_processor
+
+    def on_done(start_ts: float):
+        return lambda task: latencies.append(time.perf_counter() - start_ts)
+
+    wall_start = time.perf_counter()
+    for event in updates:
+        if speed > 0:
+            due = wall_start + event["t"] / speed
+            delay = due - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            submit_lag.append(max(0.0, time.perf_counter() - due))
+
+        update = Update.de_json(event["update"], bot.app.bot)
+        start_ts = time.perf_counter()
+        processor.submit(update).add_done_callback(on_done(start_ts))
+        max_pending = max(max_pending, processor.pending)
+        if speed <= 0:
+            await asyncio.sleep(0)  # даємо loop обробляти, а не лише приймати
+
+    await processor.join(timeout=600)
+    wall = time.perf_counter() - wall_start
+
+    return {
+        "updates": len(latencies),
+        "wall_sec": round(wall, 3),
+        "throughput_ups": round(len(latencies) / wall, 1) if wall else 0.0,
+        "latency": {
+            "p50_ms": round(percentile(latencies, 0.50) * 1000, 1),
+            "p95_ms": round(percentile(latencies, 0.95) * 1000, 1),
+            "p99_ms": round(percentile(latencies, 0.99) * 1000, 1),
+            "max_ms": round(max(latencies) * 1000, 1) if latencies else 0.0,
+        },
+        # Наскільки сам відтворювач відставав від розкладу (якщо велике — результат недостовірний)
+        "submit_lag_p95_ms": round(percentile(submit_lag, 0.95) * 1000, 1),
+        "max_pending": max_pending,
+        "error_replies": telegram.error_replies - errors_before,
+        "rss_mb": round(rss_mb(), 1),
+    }
+
+
+async def run(args) -> dict:
+    recording = load_recording(args.recording, args.from_sec, args.to_sec)
+    updates = recording["updates"][:args.limit] if args.limit else recording["updates"]
+    if not updates:
+        raise SystemExit(f"No updates in {args.recording} for the selected window")
+
+    easyway = build_easyway(recording, args.easyway_latency_ms, args.easyway_jitter_ms)
+    telegram = FakeTelegram(latency_ms=args.telegram_latency_ms, jitter_ms=args.telegram_jitter_ms)
+    easyway_url = await easyway.start()
+    telegram_url = await telegram.start()
+    bot = await start_bot(easyway_url, telegram_url, args.concurrency, args.log_level)
+
+    try:
+        result = await replay(bot, telegram, updates, args.speed)
+    finally:
+        await bot.app.shutdown()
+        await telegram.stop()
+        await easyway.stop()
+
+    return {
+        "meta": {
+            "recording": str(args.recording),
+            "recorded_at": recording["meta"].get("started_at"),
+            "speed": args.speed,
+            "from_sec": args.from_sec,
+            "to_sec": args.to_sec,
+            "concurrency": args.concurrency,
+            "python": platform.python_version(),
+            "peak_rss_mb": round(peak_rss_mb(), 1),
+        },
+        "offered_load": load_profile(updates, args.speed),
+        "upstream_requests": {"easyway": easyway.requests, "telegram": telegram.requests},
+        "result": result,
+    }
+
+
+def format_report(report: dict) -> str:
+    offered, result = report["offered_load"], report["result"]
+    lat = result["latency"]
+    return (f"offered avg={offered['avg_ups']} peak={offered['peak_ups']} upd/s over {offered['duration_sec']}s\n"
+            f"handled {result['updates']} updates in {result['wall_sec']}s ({result['throughput_ups']} upd/s)  "
+            f"p50={lat['p50_ms']}ms p95={lat['p95_ms']}ms p99={lat['p99_ms']}ms max={lat['max_ms']}ms  "
+            f"pending<={result['max_pending']} errors={result['error_replies']} "
+            f"submit_lag_p95={result['submit_lag_p95_ms']}ms")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Replay recorded Telegram traffic against a local bot")
+    parser.add_argument("recording", help="JSONL із TRAFFIC_RECORD_FILE")
+    parser.add_argument("--speed", type=float, default=1.0, help="прискорення; 0 — без пауз між апдейтами")
+    parser.add_argument("--from-sec", type=float, default=0.0, help="початок вікна в записі")
+    parser.add_argument("--to-sec", type=float, default=None, help="кінець вікна в записі")
+    parser.add_argument("--limit", type=int, default=0, help="не більше N апдейтів")
+    parser.add_argument("--concurrency", type=int, default=32, help="UPDATE_CONCURRENCY бота")
+    # Для запитів, яких немає в записі (напр. кеш був "гарячий" під час запису)
+    parser.add_argument("--easyway-latency-ms", type=float, default=80)
+    parser.add_argument("--easyway-jitter-ms", type=float, default=40)
+    parser.add_argument("--telegram-latency-ms", type=float, default=30)
+    parser.add_argument("--telegram-jitter-ms", type=float, default=10)
+    parser.add_argument("--log-level", default="WARNING")
+    parser.add_argument("--output", help="куди записати JSON-звіт")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    report = asyncio.run(run(args))
+    print(format_report(report))
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, ensure_ascii=False, indent=2) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
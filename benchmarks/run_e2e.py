@@ -0,0 +1,345 @@
+# benchmarks/run_e2e.py
+"""
+End-to-end бенчмарк справжніх хендлерів TransportBot з фейковими EasyWay і Telegram.
+
+    python -m benchmarks.run_e2e                          # прогін + порівняння з baseline.json
+    python -m benchmarks.run_e2e --save-baseline          # оновити baseline.json
+    python -m benchmarks.run_e2e --scenarios accessible_search --users 100
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from benchmarks.fake_easyway import FakeEasyWay  # noqa: E402
+from benchmarks.fake_telegram import FakeTelegram  # noqa: E402
+
+BASELINE_FILE = Path(__file__).resolve().parent / "baseline.json"
+# Параметри прогону, без збігу яких порівняння з baseline не має сенсу
+COMPARABLE_META = ("users", "iterations", "concurrency", "easyway_latency_ms", "easyway_jitter_ms",
+                   "telegram_latency_ms", "telegram_jitter_ms")
+BENCH_TOKEN = "7000000001:BENCHMARK-TOKEN"
+USER_ID_BASE = 900_000_000
+
+
+# ================= СЦЕНАРІЇ =================
+# Кожен крок — апдейт, який надсилає користувач; ("callback", data) або ("text", текст)
+
+SCENARIOS = {
+    # /start: реєстрація в БД + головне меню
+    "start": {"steps": [("text", "/start")]},
+    # Пошук інклюзивного транспорту текстом (кеші EasyWay спільні, як у продакшені)
+    "accessible_search": {
+        "steps": [("callback", "accessible_start"), ("text", "Привоз"), ("callback", "stop_1501")],
+    },
+    # Популярна зупинка кнопкою
+    "accessible_quick_search": {
+        "steps": [("callback", "accessible_start"), ("callback", "stop_search_Привоз"), ("callback", "stop_1501")],
+    },
+    # Той самий пошук, але без кешів EasyWay — кожен крок іде в API
+    "accessible_search_uncached": {
+        "steps": [("callback", "accessible_start"), ("text", "Привоз"), ("callback", "stop_1501")],
+        "uncached": True,
+    },
+}
+
+
+class _NoCache(dict):
+    """Кеш, який нічого не зберігає (для сценаріїв без кешування)."""
+
+    def __setitem__(self, key, value):
+        pass
+
+
+def percentile(values: list, q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(q * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+def rss_mb() -> float:
+    """Поточний RSS (Linux: /proc), інакше пік з getrusage."""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+    except (OSError, ValueError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+
+
+# ================= АПДЕЙТИ =================
+
+class UpdateFactory:
+    def __init__(self):
+        self._update_id = 0
+        self._message_id = 1000
+
+    def _user(self, user_id: int) -> dict:
+        return {"id": user_id, "is_bot": False, "first_name": f"Bench{user_id}", "language_code": "uk"}
+
+    def build(self, user_id: int, kind: str, value: str, menu_message_id: int) -> dict:
+        self._update_id += 1
+        chat = {"id": user_id, "type": "private"}
+        if kind == "text":
+            self._message_id += 1
+            message = {"message_id": self._message_id, "date": int(time.time()), "chat": chat,
+                       "from": self._user(user_id), "text": value}
+            if value.startswith("/"):
+                message["entities"] = [{"type": "bot_command", "offset": 0, "length": len(value.split()[0])}]
+            return {"update_id": self._update_id, "message": message}
+
+        return {
+            "update_id": self._update_id,
+            "callback_query": {
+                "id": f"bench_{self._update_id}",
+                "chat_instance": str(user_id),
+                "from": self._user(user_id),
+                "message": {"message_id": menu_message_id, "date": int(time.time()), "chat": chat, "text": "Меню"},
+                "data": value,
+            },
+        }
+
+
+# ================= ПРОГІН =================
+
+async def run_scenario(bot, telegram: FakeTelegram, spec: dict, users: int, iterations: int,
+                       factory: UpdateFactory, user_offset: int) -> dict:
+    from telegram import Update
+    from services.easyway_service import easyway_service
+
+    saved_caches = None
+    if spec.get("uncached"):
+        saved_caches = {attr: getattr(easyway_service, attr)
+                        for attr in ("stop_cache", "places_cache", "route_gps_cache")}
+        for attr in saved_caches:
+            setattr(easyway_service, attr, _NoCache())
+
+    latencies = []
+    per_step = {f"{i + 1}:{kind}:{value}": [] for i, (kind, value) in enumerate(spec["steps"])}
+    step_keys = list(per_step)
+
+    async def virtual_user(user_id: int):
+        menu_message_id = 1
+        for index, (kind, value) in enumerate(spec["steps"]):
+            data = factory.build(user_id, kind, value, menu_message_id)
+            update = Update.de_json(data, bot.app.bot)
+            start_ts = time.perf_counter()
+            await bot.update_processor.submit(update)
+            duration = time.perf_counter() - start_ts
+            latencies.append(duration)
+            per_step[step_keys[index]].append(duration)
+
+    rss_before = rss_mb()
+    errors_before = telegram.error_replies
+    wall_start = time.perf_counter()
+    try:
+        for iteration in range(iterations):
+            # Нові user_id на кожній ітерації: свіжий стан розмови і без антиспам-паузи 0.5с
+            base = USER_ID_BASE + user_offset + iteration * users
+            await asyncio.gather(*(virtual_user(base + i) for i in range(users)))
+    finally:
+        if saved_caches:
+            for attr, cache in saved_caches.items():
+                setattr(easyway_service, attr, cache)
+    wall = time.perf_counter() - wall_start
+
+    def summary(values: list) -> dict:
+        return {
+            "count": len(values),
+            "p50_ms": round(percentile(values, 0.50) * 1000, 1),
+            "p95_ms": round(percentile(values, 0.95) * 1000, 1),
+            "p99_ms": round(percentile(values, 0.99) * 1000, 1),
+            "max_ms": round(max(values) * 1000, 1) if values else 0.0,
+        }
+
+    result = {
+        "users": users,
+        "iterations": iterations,
+        "updates": len(latencies),
+        "wall_sec": round(wall, 3),
+        "throughput_ups": round(len(latencies) / wall, 1) if wall else 0.0,
+        "latency": summary(latencies),
+        "steps": {key: summary(values) for key, values in per_step.items()},
+        "error_replies": telegram.error_replies - errors_before,
+        "rss_mb": round(rss_mb(), 1),
+        "rss_growth_mb": round(rss_mb() - rss_before, 1),
+    }
+    return result
+
+
+async def start_bot(easyway_url: str, telegram_url: str, concurrency: int, log_level: str):
+    """TransportBot з тимчасовою SQLite, що ходить у фейкові EasyWay і Telegram."""
+    db_dir = tempfile.mkdtemp(prefix="tb_bench_")
+    # Налаштування читаються при імпорті, тож оточення задаємо ДО імпорту бота
+    os.environ.update({
+        "DATABASE_URL": f"sqlite+aiosqlite:///{db_dir}/bench.db",
+        "EASYWAY_API_URL": easyway_url,
+        "TELEGRAM_API_BASE_URL": f"{telegram_url}/bot",
+        "TELEGRAM_BOT_TOKEN": BENCH_TOKEN,
+        "LOG_LEVEL": log_level,
+        "UPDATE_CONCURRENCY": str(concurrency),
+        # Вимірюємо обробники, а не ліміти користувачів: ітерації одного користувача йдуть без пауз
+        "RATE_LIMIT_ENABLED": "False",
+    })
+
+    import warnings
+    from telegram.warnings import PTBUserWarning
+    warnings.filterwarnings("ignore", category=PTBUserWarning)
+
+    from bot.bot import TransportBot
+    from database.db import init_db
+    from handlers.accessible_transport_handlers import load_easyway_route_ids
+
+    await init_db()
+    bot = TransportBot(BENCH_TOKEN)
+    await load_easyway_route_ids(bot.app)
+    await bot.app.initialize()
+    return bot
+
+
+def git_sha() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_DIR,
+                              capture_output=True, text=True, timeout=5).stdout.strip() or "unknown"
+    except (OSError, subprocess.SubprocessError):
+        return "unknown"
+
+
+async def run(args) -> dict:
+    easyway = FakeEasyWay(latency_ms=args.easyway_latency_ms, jitter_ms=args.easyway_jitter_ms)
+    telegram = FakeTelegram(latency_ms=args.telegram_latency_ms, jitter_ms=args.telegram_jitter_ms)
+    easyway_url = await easyway.start()
+    telegram_url = await telegram.start()
+    bot = await start_bot(easyway_url, telegram_url, args.concurrency, args.log_level)
+
+    factory = UpdateFactory()
+    results = {}
+    try:
+        for offset, name in enumerate(args.scenarios):
+            spec = SCENARIOS[name]
+            # Прогрів: один користувач, щоб імпорти/пули/кеші не потрапили у вимір
+            await run_scenario(bot, telegram, spec, 1, 1, factory, user_offset=offset * 10_000_000 + 9_000_000)
+            results[name] = await run_scenario(
+                bot, telegram, spec, args.users, args.iterations, factory, user_offset=offset * 10_000_000
+            )
+            print(format_result(name, results[name]))
+    finally:
+        await bot.app.shutdown()
+        await telegram.stop()
+        await easyway.stop()
+
+    return {
+        "meta": {
+            "git_sha": git_sha(),
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(terse=True),
+            "users": args.users,
+            "iterations": args.iterations,
+            "concurrency": args.concurrency,
+            "easyway_latency_ms": args.easyway_latency_ms,
+            "easyway_jitter_ms": args.easyway_jitter_ms,
+            "telegram_latency_ms": args.telegram_latency_ms,
+            "telegram_jitter_ms": args.telegram_jitter_ms,
+            "peak_rss_mb": round(peak_rss_mb(), 1),
+        },
+        "upstream_requests": {"easyway": easyway.requests, "telegram": telegram.requests},
+        "scenarios": results,
+    }
+
+
+def format_result(name: str, result: dict) -> str:
+    lat = result["latency"]
+    return (f"{name:<28} {result['throughput_ups']:>8.1f} upd/s  "
+            f"p50={lat['p50_ms']:>7.1f}ms p95={lat['p95_ms']:>7.1f}ms p99={lat['p99_ms']:>7.1f}ms  "
+            f"rss={result['rss_mb']:.0f}MB errors={result['error_replies']}")
+
+
+def meta_mismatch(report: dict, baseline: dict) -> list:
+    """Параметри, якими прогін відрізняється від baseline."""
+    base_meta = baseline.get("meta", {})
+    return [f"{key}={report['meta'].get(key)} (baseline {base_meta.get(key)})"
+            for key in COMPARABLE_META if report["meta"].get(key) != base_meta.get(key)]
+
+
+def compare_with_baseline(report: dict, baseline: dict, tolerance: float) -> list:
+    """Регресії: p95 вище або throughput нижче за baseline більш ніж на tolerance."""
+    regressions = []
+    for name, result in report["scenarios"].items():
+        base = baseline.get("scenarios", {}).get(name)
+        if not base:
+            continue
+        if result["latency"]["p95_ms"] > base["latency"]["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {result['latency']['p95_ms']}ms > baseline {base['latency']['p95_ms']}ms")
+        if result["error_replies"] > base.get("error_replies", 0):
+            regressions.append(f"{name}: {result['error_replies']} error replies (baseline {base.get('error_replies', 0)})")
+        if result["throughput_ups"] < base["throughput_ups"] * (1 - tolerance):
+            regressions.append(f"{name}: throughput {result['throughput_ups']} < baseline {base['throughput_ups']}")
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="E2E benchmark of TransportBot handlers")
+    parser.add_argument("--scenarios", nargs="+", default=list(SCENARIOS), choices=list(SCENARIOS))
+    parser.add_argument("--users", type=int, default=50, help="віртуальних користувачів одночасно")
+    parser.add_argument("--iterations", type=int, default=3)
+    parser.add_argument("--concurrency", type=int, default=32, help="UPDATE_CONCURRENCY бота")
+    parser.add_argument("--easyway-latency-ms", type=float, default=80)
+    parser.add_argument("--easyway-jitter-ms", type=float, default=40)
+    parser.add_argument("--telegram-latency-ms", type=float, default=30)
+    parser.add_argument("--telegram-jitter-ms", type=float, default=10)
+    parser.add_argument("--log-level", default="WARNING")
+    parser.add_argument("--output", help="куди записати JSON-звіт")
+    parser.add_argument("--baseline", default=str(BASELINE_FILE))
+    parser.add_argument("--save-baseline", action="store_true", help="записати результат як новий baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="допустиме погіршення (0.25 = 25%%)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    report = asyncio.run(run(args))
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, ensure_ascii=False, indent=2))
+    if args.save_baseline:
+        Path(args.baseline).write_text(json.dumps(report, ensure_ascii=False, indent=2) + "\n")
+        print(f"Baseline saved: {args.baseline}")
+        return 0
+
+    baseline_path = Path(args.baseline)
+    if not baseline_path.exists():
+        return 0
+    baseline = json.loads(baseline_path.read_text())
+    mismatch = meta_mismatch(report, baseline)
+    if mismatch:
+        print(f"Baseline not comparable ({baseline_path}): {', '.join(mismatch)}")
+        print("Run with the baseline parameters or refresh it with --save-baseline.")
+        return 0
+    regressions = compare_with_baseline(report, baseline, args.tolerance)
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,8 +1,10 @@
 # bot/bot.py
+import asyncio
 
+from telegram import Update
 from telegram.ext import (
     Application, CommandHandler, CallbackQueryHandler,
-    MessageHandler, filters, ConversationHandler
+    MessageHandler, filters, ConversationHandler, Updater, TypeHandler
 )
 
 # --- Старі імпорти ---
@@ -74,17 +76,24 @@ from handlers.admin_handlers import (
     show_general_admin_menu, admin_museum_menu_show, admin_show_stats, # Нова функція зі списком
     admin_add_holiday_date_start, admin_add_holiday_date_save,
     admin_del_holiday_date_menu, admin_del_holiday_date_confirm,
-    admin_show_holiday_bookings, admin_export_users
+    admin_show_holiday_bookings, admin_export_users, admin_show_metrics,
+    admin_profile, admin_memory
 )
 
 from utils.logger import logger
-from config.settings import FEEDBACK_SYNC_INTERVAL_MIN
+from config.settings import FEEDBACK_SYNC_INTERVAL_MIN, UPDATE_CONCURRENCY, TELEGRAM_API_BASE_URL, PERSISTENCE_ENABLED
+from database.persistence import DatabasePersistence
+from bot.rate_limiter import PriorityRateLimiter
+from bot.telegram_request import build_bot_request, build_get_updates_request
 from services.tickets_service import TicketsService
+from bot.update_processor import UpdateProcessor
+from bot.middleware import setup_middleware, FLOOD_GUARD_GROUP
+from services.user_state import user_state_janitor
 
 from handlers.subscription_handlers import show_subscription_menu, handle_subscription_choice
 from handlers.common import dismiss_broadcast_message
 
-from handlers.common import handle_unexpected_message
+from handlers.common import handle_unexpected_message, flood_guard
 
 
 class TransportBot:
@@ -94,15 +103,48 @@ class TransportBot:
         self.token = token
         self.tickets_service = TicketsService()
 
-        # 1. ЗАЛИШАЄМО ТІЛЬКИ ОДИН РЯДОК Application.builder
-        #    з реєстрацією `post_init`.
-        self.app = Application.builder().token(token).build()
-
-        # Рядок (self.app = Application.builder().token(token).build()) ВИДАЛЕНО
+        # Вбудований Updater вимкнено: апдейти (і з polling, і з webhook)
+        # йдуть через UpdateProcessor — паралельно між юзерами, по черзі в межах юзера.
+        builder = Application.builder().token(token).updater(None)
+        if TELEGRAM_API_BASE_URL:
+            builder = builder.base_url(TELEGRAM_API_BASE_URL)
+        # Окремі пули з'єднань для getUpdates і для решти викликів (bot/telegram_request.py)
+        builder = builder.request(build_bot_request()).get_updates_request(build_get_updates_request())
+        # Усі виклики API йдуть через планувальник: ліміти Telegram, пріоритети, RetryAfter
+        builder = builder.rate_limiter(PriorityRateLimiter())
+        # user_data і стани діалогів переживають перезапуск (database/persistence.py)
+        if PERSISTENCE_ENABLED:
+            builder = builder.persistence(DatabasePersistence())
+        self.app = builder.build()
+        self.update_processor = UpdateProcessor(self.app, UPDATE_CONCURRENCY)
+
+        # Власний Updater лише для режиму polling
+        self.updater = Updater(bot=self.app.bot, update_queue=asyncio.Queue())
+        self._pump_task = None
 
         self._setup_handlers()
         self._setup_jobs()
 
+    async def start_polling(self):
+        """Polling: Updater кладе апдейти у свою чергу, а ми передаємо їх в UpdateProcessor."""
+        await self.updater.initialize()
+        await self.updater.start_polling()
+        self._pump_task = asyncio.create_task(self._pump_updates())
+
+    async def _pump_updates(self):
+        while True:
+            update = await self.updater.update_queue.get()
+            self.update_processor.submit(update)
+            self.updater.update_queue.task_done()
+
+    async def stop_polling(self):
+        if self.updater.running:
+            await self.updater.stop()
+        if self._pump_task:
+            self._pump_task.cancel()
+            self._pump_task = None
+        await self.updater.shutdown()
+
     def _setup_jobs(self):
         if not self.app.job_queue:
             logger.warning("⚠️ JobQueue is not configured. Auto-sync is disabled.")
@@ -132,8 +174,13 @@ class TransportBot:
         # --- КОМАНДИ ---
         self.app.add_handler(CommandHandler("start", cmd_start))
         self.app.add_handler(CommandHandler("help", cmd_help))
+        self.app.add_handler(CommandHandler("metrics", admin_show_metrics))
+        self.app.add_handler(CommandHandler("profile", admin_profile))
+        self.app.add_handler(CommandHandler("memory", admin_memory))
 
         admin_conv = ConversationHandler(
+            name="admin",
+            persistent=PERSISTENCE_ENABLED,
             entry_points=[
                 CommandHandler("admin_museum", admin_menu),
                 # ВХІД ЧЕРЕЗ НОВИЙ CALLBACK
@@ -213,6 +260,8 @@ class TransportBot:
 
         # CONVERSATION: СКАРГИ (Оновлений з підтвердженням)
         complaint_conv = ConversationHandler(
+            name="complaint",
+            persistent=PERSISTENCE_ENABLED,
             entry_points=[CallbackQueryHandler(complaint_start_simplified, pattern="^complaint$", block=False)],
             states={
                 States.COMPLAINT_CHOOSE_TYPE: [
@@ -267,6 +316,8 @@ class TransportBot:
 
         # 3. Створення ConversationHandler
         thanks_conv = ConversationHandler(
+            name="thanks",
+            persistent=PERSISTENCE_ENABLED,
             entry_points=[CallbackQueryHandler(ep[2], pattern=f"^{ep[1]}$") for ep in thanks_conf['entry_points']],
             states={
                 state: [
@@ -287,6 +338,8 @@ class TransportBot:
 
         # NEW CONVERSATION: ПРОПОЗИЦІЇ (Оновлено)
         suggestion_conv = ConversationHandler(
+            name="suggestion",
+            persistent=PERSISTENCE_ENABLED,
             entry_points=[CallbackQueryHandler(suggestion_start, pattern="^suggestion$")],
             states={
                 States.SUGGESTION_TEXT: [MessageHandler(filters.TEXT, suggestion_ask_contact)],
@@ -311,6 +364,8 @@ class TransportBot:
         )
 
         museum_conv = ConversationHandler(
+            name="museum",
+            persistent=PERSISTENCE_ENABLED,
             entry_points=[CallbackQueryHandler(museum_register_start, pattern="^museum:(holiday_)?register_start$")],
             states={
                 States.MUSEUM_DATE: [
@@ -358,6 +413,8 @@ class TransportBot:
 
 
         accessible_conv = ConversationHandler(
+            name="accessible",
+            persistent=PERSISTENCE_ENABLED,
             entry_points=[
                 # Вхід через кнопку "♿ Пошук інклюзивного транспорту" [cite: 16-17]
                 CallbackQueryHandler(accessible_start, pattern="^accessible_start$")
@@ -407,7 +464,8 @@ class TransportBot:
                 CallbackQueryHandler(accessible_start, pattern="^accessible_start$"),
                 MessageHandler(filters.TEXT & ~filters.COMMAND, accessible_text_cancel)
             ],
-            block=False
+            # Блокуючий: паралельність між користувачами дає UpdateProcessor,
+            # а неблокуючий ConversationHandler ламав би порядок апдейтів одного юзера
         )
 
         # Додавання всіх conversation handlers
@@ -415,7 +473,6 @@ class TransportBot:
         self.app.add_handler(thanks_conv)
         self.app.add_handler(suggestion_conv)
         self.app.add_handler(museum_conv)
-        self.app.add_handler(admin_conv)
         self.app.add_handler(accessible_conv)
 
         logger.info("✅ All handlers configured")
@@ -465,6 +522,14 @@ class TransportBot:
         # filters.ALL & ~filters.COMMAND означає "Все (текст, фото, відео), крім команд (/start)"
         self.app.add_handler(MessageHandler(filters.ALL & ~filters.COMMAND, handle_unexpected_message))
 
+        # Вимірювання латентності: обгортає всі зареєстровані вище хендлери
+        setup_middleware(self.app)
+        # Захист від флуду: раніше за всі групи, зайві апдейти далі не обробляються.
+        # Реєструється після setup_middleware — ApplicationHandlerStop не рахується помилкою хендлера
+        self.app.add_handler(TypeHandler(Update, flood_guard), group=FLOOD_GUARD_GROUP)
+        # Облік активності для прибирання user_data неактивних користувачів
+        user_state_janitor.setup(self.app)
+
 
 
     async def start(self):
@@ -0,0 +1,151 @@
+# bot/middleware.py
+"""Middleware для вимірювання хендлерів: латентність, помилки й час на зовнішні сервіси."""
+import functools
+import time
+
+from telegram import Update
+from telegram.ext import Application, BaseHandler, ConversationHandler, TypeHandler, CommandHandler
+
+from utils.metrics import REGISTRY, start_upstream_accumulator, reset_upstream_accumulator
+
+FLOOD_GUARD_GROUP = -3  # handlers.common.flood_guard: відсікає флуд раніше за облік активності (-2) і вимірювання
+PRE_GROUP = -1
+POST_GROUP = 1000
+
+HANDLER_DURATION = REGISTRY.histogram(
+    "bot_handler_duration_seconds", "Тривалість виконання хендлера", ("handler", "pattern")
+)
+HANDLER_UPSTREAM = REGISTRY.histogram(
+    "bot_handler_upstream_seconds", "Час хендлера, витрачений на зовнішні сервіси", ("handler", "pattern")
+)
+HANDLER_ERRORS = REGISTRY.counter(
+    "bot_handler_errors_total", "Винятки, що вилетіли з хендлера", ("handler", "pattern")
+)
+HANDLER_IN_FLIGHT = REGISTRY.gauge(
+    "bot_handler_in_flight", "Хендлери, що виконуються зараз", ("handler",)
+)
+UPDATES_TOTAL = REGISTRY.counter("bot_updates_total", "Отримані апдейти за типом", ("type",))
+UPDATE_DURATION = REGISTRY.histogram(
+    "bot_update_duration_seconds", "Час від початку до кінця обробки апдейта (блокуючі хендлери)", ("type",)
+)
+UPDATES_IN_FLIGHT = REGISTRY.gauge("bot_updates_in_flight", "Апдейти в обробці")
+
+_update_started = {}  # {id(update): (start_ts, type)}
+
+
+def update_type(update: object) -> str:
+    if not isinstance(update, Update):
+        return type(update).__name__
+    if update.callback_query:
+        return "callback_query"
+    if update.message:
+        return "command" if (update.message.text or "").startswith("/") else "message"
+    if update.edited_message:
+        return "edited_message"
+    if update.my_chat_member:
+        return "my_chat_member"
+    return "other"
+
+
+def handler_labels(handler: BaseHandler) -> tuple:
+    """(назва колбека, патерн) — для CallbackQueryHandler це regex, для команд — /команда."""
+    callback = handler.callback
+    name = getattr(callback, "__name__", type(callback).__name__)
+
+    pattern = getattr(handler, "pattern", None)
+    if pattern is not None:
+        pattern = getattr(pattern, "pattern", None) or getattr(pattern, "__name__", str(pattern))
+    elif isinstance(handler, CommandHandler):
+        pattern = "/" + ",".join(sorted(handler.commands))
+    else:
+        pattern = type(handler).__name__
+    return name, str(pattern)
+
+
+def instrument_callback(callback, name: str, pattern: str):
+    if getattr(callback, "_instrumented", False):
+        return callback
+
+    @functools.wraps(callback)
+    async def wrapper(update, context):
+        acc, token = start_upstream_accumulator()
+        HANDLER_IN_FLIGHT.inc(handler=name)
+        start_ts = time.perf_counter()
+        try:
+            return await callback(update, context)
+        except Exception:
+            HANDLER_ERRORS.inc(handler=name, pattern=pattern)
+            raise
+        finally:
+            HANDLER_DURATION.observe(time.perf_counter() - start_ts, handler=name, pattern=pattern)
+            HANDLER_UPSTREAM.observe(acc[0], handler=name, pattern=pattern)
+            HANDLER_IN_FLIGHT.dec(handler=name)
+            reset_upstream_accumulator(token)
+
+    wrapper._instrumented = True
+    return wrapper
+
+
+def _instrument_handler(handler: BaseHandler):
+    if isinstance(handler, ConversationHandler):
+        for child in handler.entry_points:
+            _instrument_handler(child)
+        for state_handlers in handler.states.values():
+            for child in state_handlers:
+                _instrument_handler(child)
+        for child in handler.fallbacks:
+            _instrument_handler(child)
+        return
+
+    name, pattern = handler_labels(handler)
+    handler.callback = instrument_callback(handler.callback, name, pattern)
+
+
+async def _on_update_start(update: object, context):
+    kind = update_type(update)
+    UPDATES_TOTAL.inc(type=kind)
+    UPDATES_IN_FLIGHT.inc()
+    _update_started[id(update)] = (time.perf_counter(), kind)
+
+
+async def _on_update_end(update: object, context):
+    started = _update_started.pop(id(update), None)
+    if started is None:
+        return
+    UPDATES_IN_FLIGHT.dec()
+    UPDATE_DURATION.observe(time.perf_counter() - started[0], type=started[1])
+
+
+def setup_middleware(application: Application):
+    """Викликати ПІСЛЯ реєстрації всіх хендлерів."""
+    for handlers in application.handlers.values():
+        for handler in handlers:
+            _instrument_handler(handler)
+
+    if any(h.callback is _on_update_start for h in application.handlers.get(PRE_GROUP, [])):
+        return
+    application.add_handler(TypeHandler(object, _on_update_start), group=PRE_GROUP)
+    application.add_handler(TypeHandler(object, _on_update_end), group=POST_GROUP)
+
+
+def handler_report(limit: int = 10) -> list:
+    """Топ хендлерів за сумарним часом: [(handler, pattern, count, total, p50, p95, errors, upstream_share)]."""
+    rows = []
+    for labels, count, total in HANDLER_DURATION.series():
+        if not count:
+            continue
+        upstream_total = next(
+            (s for l, c, s in HANDLER_UPSTREAM.series() if l == labels), 0.0
+        )
+        rows.append((
+            labels["handler"],
+            labels["pattern"],
+            count,
+            total,
+            HANDLER_DURATION.quantile(0.5, **labels),
+            HANDLER_DURATION.quantile(0.95, **labels),
+            HANDLER_ERRORS.value(**labels),
+            upstream_total / total if total else 0.0,
+        ))
+    rows.sort(key=lambda r: r[3], reverse=True)
+    return rows[:limit]
@@ -0,0 +1,165 @@
+# bot/rate_limiter.py
+"""Планувальник вихідних запитів до Telegram Bot API (rate limiter PTB) з пріоритетами і лімітами Telegram."""
+import asyncio
+import time
+from collections import deque
+
+from cachetools import TTLCache
+from telegram.error import RetryAfter
+from telegram.ext import BaseRateLimiter
+
+from config.settings import (
+    TELEGRAM_GLOBAL_RATE_PER_SEC,
+    TELEGRAM_INTERACTIVE_RESERVE,
+    TELEGRAM_CHAT_RATE_PER_SEC,
+    TELEGRAM_CHAT_BURST,
+    TELEGRAM_GROUP_RATE_PER_MIN,
+    TELEGRAM_RETRY_AFTER_MAX_RETRIES,
+)
+from utils.logger import logger
+from utils.metrics import REGISTRY
+
+INTERACTIVE = "interactive"
+BACKGROUND = {"priority": "background"}  # rate_limit_args для фонових запитів (розсилка)
+_PRIORITIES = (INTERACTIVE, "background")  # порядок обслуговування
+
+# Методи, що створюють повідомлення: саме на них поширюються ліміти Telegram
+LIMITED_ENDPOINTS = frozenset({"copyMessage", "forwardMessage", "copyMessages", "forwardMessages"})
+
+QUEUE_DEPTH = REGISTRY.gauge(
+    "bot_telegram_queue_depth", "Запити до Telegram, що чекають на ліміт", ("priority",)
+)
+QUEUE_WAIT = REGISTRY.histogram(
+    "bot_telegram_queue_wait_seconds", "Очікування запиту до Telegram у планувальнику", ("priority",)
+)
+RETRY_AFTERS = REGISTRY.counter("bot_telegram_retry_after_total", "Відповіді 429 (RetryAfter) від Telegram")
+
+
+class PriorityTokenBucket:
+    """
+    Token bucket з пріоритетними чергами: rate токенів/с, не більше burst.
+    Запит з меншим пріоритетом не бере токен, поки в черзі є вищий, і не чіпає останні reserve токенів.
+    """
+
+    def __init__(self, rate: float, burst: float, reserve: float = 0):
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.reserve = reserve
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._queues = {priority: deque() for priority in _PRIORITIES}
+        self._wakeup = asyncio.Event()
+        self._dispatcher = None
+
+    async def acquire(self, priority: str = INTERACTIVE):
+        ahead = _PRIORITIES[:_PRIORITIES.index(priority) + 1]
+        if not any(self._queues[p] for p in ahead) and self._take(priority):
+            return
+        future = asyncio.get_running_loop().create_future()
+        self._queues[priority].append(future)
+        self._wakeup.set()
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.create_task(self._dispatch())
+        await future
+
+    def _need(self, priority: str) -> float:
+        return 1 + (self.reserve if priority != INTERACTIVE else 0)
+
+    def _take(self, priority: str) -> bool:
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        if self._tokens >= self._need(priority):
+            self._tokens -= 1
+            return True
+        return False
+
+    async def _dispatch(self):
+        while True:
+            for priority in _PRIORITIES:
+                queue = self._queues[priority]
+                while queue and queue[0].done():  # скасовані (таймаут обробника)
+                    queue.popleft()
+                if queue:
+                    break
+            else:
+                return
+
+            if self._take(priority):
+                queue.popleft().set_result(None)
+                continue
+            # Чекаємо токен; новий запит з вищим пріоритетом будить раніше
+            self._wakeup.clear()
+            delay = (self._need(priority) - self._tokens) / self.rate
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=max(delay, 0.001))
+            except asyncio.TimeoutError:
+                pass
+
+
+class PriorityRateLimiter(BaseRateLimiter):
+    def __init__(self,
+                 global_rate: float = TELEGRAM_GLOBAL_RATE_PER_SEC,
+                 interactive_reserve: int = TELEGRAM_INTERACTIVE_RESERVE,
+                 chat_rate: float = TELEGRAM_CHAT_RATE_PER_SEC,
+                 chat_burst: int = TELEGRAM_CHAT_BURST,
+                 group_rate_per_min: float = TELEGRAM_GROUP_RATE_PER_MIN,
+                 max_retries: int = TELEGRAM_RETRY_AFTER_MAX_RETRIES):
+        self.global_bucket = PriorityTokenBucket(global_rate, global_rate, reserve=interactive_reserve)
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.group_rate = group_rate_per_min / 60
+        self.max_retries = max_retries
+        # Відро чату повністю наповнюється за кілька секунд — старі записи можна забувати
+        self._chats = TTLCache(maxsize=50000, ttl=max(60.0, chat_burst / chat_rate))
+        self._paused_until = 0.0
+
+    async def initialize(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        pass
+
+    def _chat_bucket(self, chat_id) -> PriorityTokenBucket:
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            try:
+                group = int(chat_id) < 0
+            except (TypeError, ValueError):
+                group = True  # @username каналу
+            rate = self.group_rate if group else self.chat_rate
+            bucket = self._chats[chat_id] = PriorityTokenBucket(rate, self.chat_burst)
+        return bucket
+
+    async def _wait_pause(self):
+        while (delay := self._paused_until - time.monotonic()) > 0:
+            await asyncio.sleep(delay)
+
+    async def process_request(self, callback, args, kwargs, endpoint, data, rate_limit_args):
+        priority = (rate_limit_args or {}).get("priority", INTERACTIVE)
+        chat_id = data.get("chat_id")
+        limited = chat_id is not None and (endpoint.startswith("send") or endpoint in LIMITED_ENDPOINTS)
+
+        for attempt in range(self.max_retries + 1):
+            started = time.monotonic()
+            QUEUE_DEPTH.inc(priority=priority)
+            try:
+                await self._wait_pause()
+                if limited:
+                    await self._chat_bucket(chat_id).acquire(priority)
+                    await self.global_bucket.acquire(priority)
+            finally:
+                QUEUE_DEPTH.dec(priority=priority)
+            QUEUE_WAIT.observe(time.monotonic() - started, priority=priority)
+
+            try:
+                return await callback(*args, **kwargs)
+            except RetryAfter as e:
+                RETRY_AFTERS.inc()
+                if attempt == self.max_retries:
+                    logger.error(f"🚦 {endpoint}: RetryAfter after {attempt} retries, giving up")
+                    raise
+                # Пауза для всіх запитів: Telegram рахує флуд на весь бот
+                self._paused_until = max(self._paused_until, time.monotonic() + e.retry_after + 0.1)
+                logger.warning(f"🚦 Telegram flood control on {endpoint}: pausing requests for {e.retry_after}s")
+        return None
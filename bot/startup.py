@@ -0,0 +1,165 @@
+# bot/startup.py
+"""Оркестратор старту: незалежні кроки йдуть паралельно, upstream не тримає запуск."""
+import asyncio
+import time
+
+from config.settings import STARTUP_REFRESH_RETRY_MAX_SEC, STARTUP_REFRESH_RETRY_MIN_SEC
+from database.db import init_db
+from database.snapshots import load_snapshot, save_snapshot
+from handlers.accessible_transport_handlers import load_easyway_route_ids
+from services.gtfs_service import gtfs_service
+from services.monitoring_service import monitoring_service
+from utils.logger import logger
+from utils.metrics import REGISTRY
+
+ROUTES_SNAPSHOT = "easyway_routes"
+GTFS_STATIC_SNAPSHOT = "gtfs_static"
+
+STARTUP_STEP_SECONDS = REGISTRY.gauge("bot_startup_step_seconds", "Тривалість кроків старту", ("step",))
+STARTUP_READY_SECONDS = REGISTRY.gauge("bot_startup_ready_seconds", "Час від старту до готовності обробляти апдейти")
+
+
+class StartupError(Exception):
+    pass
+
+
+class StartupOrchestrator:
+    def __init__(self):
+        self._steps = {}  # {name: (func, requires, critical, background)}
+        self._tasks = {}
+        self.timings = {}  # {name: секунди}
+
+    def add(self, name: str, func, requires: tuple = (), critical: bool = False, background: bool = False):
+        """func — корутинна функція без аргументів. Фонові кроки run() не чекає."""
+        unknown = [dep for dep in requires if dep not in self._steps]
+        if unknown:
+            raise ValueError(f"Step '{name}' requires unknown steps: {unknown}")
+        self._steps[name] = (func, tuple(requires), critical, background)
+
+    async def run(self) -> float:
+        """Запускає всі кроки й чекає на нефонові. Повертає час до готовності."""
+        started = time.perf_counter()
+        # Усі задачі створюються до першого await — кроки можуть чекати на задачі залежностей
+        self._tasks = {name: asyncio.create_task(self._run_step(name), name=f"startup:{name}")
+                       for name in self._steps}
+        foreground = [name for name, step in self._steps.items() if not step[3]]
+        results = await asyncio.gather(*(self._tasks[name] for name in foreground))
+
+        failed = [name for name, ok in zip(foreground, results) if not ok and self._steps[name][2]]
+        if failed:
+            self.cancel()
+            raise StartupError(f"Critical startup steps failed: {', '.join(failed)}")
+
+        ready = time.perf_counter() - started
+        STARTUP_READY_SECONDS.set(ready)
+        summary = ", ".join(f"{name}={self.timings[name]:.2f}s" for name in foreground if name in self.timings)
+        logger.info(f"⏱️ Startup ready in {ready:.2f}s ({summary})")
+        return ready
+
+    def cancel(self):
+        for task in self._tasks.values():
+            if not task.done():
+                task.cancel()
+
+    async def _run_step(self, name: str) -> bool:
+        func, requires, critical, background = self._steps[name]
+        for dep in requires:
+            if not await self._tasks[dep] and self._steps[dep][2]:
+                logger.warning(f"⏭️ Startup step '{name}' skipped: '{dep}' failed")
+                return False
+
+        started = time.perf_counter()
+        try:
+            await func()
+            ok = True
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            ok = False
+            log = logger.error if critical else logger.warning
+            log(f"❌ Startup step '{name}' failed: {e}", exc_info=critical)
+
+        duration = time.perf_counter() - started
+        self.timings[name] = duration
+        STARTUP_STEP_SECONDS.set(duration, step=name)
+        if background:
+            logger.info(f"⏱️ Background startup step '{name}' finished in {duration:.2f}s")
+        return ok
+
+
+async def retry_until_success(title: str, attempt):
+    """Повторює attempt() (-> bool) з експоненційною паузою, доки не вдасться."""
+    delay = STARTUP_REFRESH_RETRY_MIN_SEC
+    while True:
+        try:
+            if await attempt():
+                return
+        except Exception as e:
+            logger.warning(f"{title}: {e}")
+        logger.warning(f"⏳ {title}: upstream недоступний, повтор через {delay:.0f}с")
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, STARTUP_REFRESH_RETRY_MAX_SEC)
+
+
+async def _save_snapshot_quietly(name: str, obj):
+    try:
+        await save_snapshot(name, obj)
+    except Exception as e:
+        # Дані вже в пам'яті; знімок оновиться з наступним успішним завантаженням
+        logger.warning(f"📸 Snapshot '{name}' not saved: {e}")
+
+
+def build_startup(bot) -> StartupOrchestrator:
+    """Кроки старту TransportBot."""
+    app = bot.app
+
+    async def restore_routes():
+        snapshot = await load_snapshot(ROUTES_SNAPSHOT)
+        if snapshot is None:
+            logger.info("📸 No EasyWay routes snapshot yet — waiting for the first upstream load")
+            return
+        route_map, saved_at = snapshot
+        app.bot_data.setdefault("easyway_structured_map", route_map)
+        logger.info(f"📸 EasyWay routes restored from snapshot of {saved_at:%Y-%m-%d %H:%M}")
+
+    async def refresh_routes():
+        async def attempt() -> bool:
+            if not await load_easyway_route_ids(app):
+                return False
+            await _save_snapshot_quietly(ROUTES_SNAPSHOT, app.bot_data["easyway_structured_map"])
+            return True
+
+        await retry_until_success("EasyWay routes", attempt)
+
+    async def restore_gtfs_static():
+        snapshot = await load_snapshot(GTFS_STATIC_SNAPSHOT)
+        if snapshot is None:
+            logger.info("📸 No GTFS static snapshot yet — waiting for the first upstream load")
+            return
+        data, saved_at = snapshot
+        monitoring_service.restore_static(data)
+        logger.info(f"📸 GTFS static restored from snapshot of {saved_at:%Y-%m-%d %H:%M}")
+
+    async def refresh_gtfs_static():
+        async def attempt() -> bool:
+            if not await monitoring_service.refresh_static():
+                return False
+            await _save_snapshot_quietly(GTFS_STATIC_SNAPSHOT, monitoring_service.export_static())
+            return True
+
+        await retry_until_success("GTFS static", attempt)
+
+    async def load_local_gtfs():
+        # ~0.2с розбору CSV — у потоці, щоб не блокувати решту кроків
+        await asyncio.to_thread(gtfs_service.load_data)
+
+    startup = StartupOrchestrator()
+    startup.add("db", init_db, critical=True)
+    # initialize(): get_me і persistence (таблиці мають існувати)
+    startup.add("telegram", app.initialize, requires=("db",), critical=True)
+    startup.add("routes_snapshot", restore_routes, requires=("db",))
+    startup.add("gtfs_static_snapshot", restore_gtfs_static, requires=("db",))
+    startup.add("gtfs_local", load_local_gtfs, background=True)
+    startup.add("routes_refresh", refresh_routes, requires=("routes_snapshot",), background=True)
+    startup.add("gtfs_static_refresh", refresh_gtfs_static, requires=("gtfs_static_snapshot",), background=True)
+    return startup
@@ -0,0 +1,99 @@
+# bot/telegram_request.py
+"""HTTP-клієнти для Telegram Bot API: окремі пули для getUpdates і решти викликів, з метриками."""
+import time
+
+from telegram.error import TimedOut
+from telegram.request import HTTPXRequest
+
+from config.settings import (
+    TELEGRAM_POOL_SIZE,
+    TELEGRAM_POOL_TIMEOUT_SEC,
+    TELEGRAM_CONNECT_TIMEOUT_SEC,
+    TELEGRAM_READ_TIMEOUT_SEC,
+    TELEGRAM_WRITE_TIMEOUT_SEC,
+    TELEGRAM_UPDATES_POOL_SIZE,
+    TELEGRAM_HTTP_VERSION,
+)
+from utils.logger import logger
+from utils.metrics import REGISTRY
+
+POOL_WAIT = REGISTRY.histogram(
+    "bot_telegram_http_pool_wait_seconds", "Очікування вільного з'єднання до Telegram", ("pool",),
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+IN_FLIGHT = REGISTRY.gauge("bot_telegram_http_in_flight", "Запити до Telegram в дорозі", ("pool",))
+POOL_TIMEOUTS = REGISTRY.counter(
+    "bot_telegram_http_pool_timeouts_total", "Запити, що не дочекалися з'єднання з пулу", ("pool",)
+)
+
+# Перша подія httpcore після того, як запит отримав з'єднання з пулу
+_CONNECTION_ACQUIRED = (
+    "connection.connect_tcp.started",
+    "http11.send_request_headers.started",
+    "http2.send_request_headers.started",
+)
+
+
+class InstrumentedHTTPXRequest(HTTPXRequest):
+    def __init__(self, pool: str, **kwargs):
+        try:
+            super().__init__(**kwargs)
+        except RuntimeError as e:
+            if kwargs.get("http_version") != "2":
+                raise
+            logger.warning(f"⚠️ Telegram HTTP/2 unavailable ({e}), using HTTP/1.1 for '{pool}'")
+            super().__init__(**{**kwargs, "http_version": "1.1"})
+        self.pool = pool
+        self.pool_size = kwargs.get("connection_pool_size", 1)
+        self._client_kwargs["event_hooks"] = {"request": [self._trace_pool_wait]}
+        self._client = self._build_client()
+
+    async def _trace_pool_wait(self, request):
+        started = time.perf_counter()
+        measured = False
+
+        async def trace(event_name, info):
+            nonlocal measured
+            if not measured and event_name in _CONNECTION_ACQUIRED:
+                measured = True
+                POOL_WAIT.observe(time.perf_counter() - started, pool=self.pool)
+
+        request.extensions["trace"] = trace
+
+    async def do_request(self, *args, **kwargs):
+        IN_FLIGHT.inc(pool=self.pool)
+        try:
+            return await super().do_request(*args, **kwargs)
+        except TimedOut as e:
+            if str(e).startswith("Pool timeout"):
+                POOL_TIMEOUTS.inc(pool=self.pool)
+                logger.warning(f"⚠️ Telegram '{self.pool}' pool exhausted ({self.pool_size} connections)")
+            raise
+        finally:
+            IN_FLIGHT.dec(pool=self.pool)
+
+
+def build_bot_request() -> InstrumentedHTTPXRequest:
+    """Пул для всіх викликів, крім getUpdates."""
+    return InstrumentedHTTPXRequest(
+        "bot",
+        connection_pool_size=TELEGRAM_POOL_SIZE,
+        pool_timeout=TELEGRAM_POOL_TIMEOUT_SEC,
+        connect_timeout=TELEGRAM_CONNECT_TIMEOUT_SEC,
+        read_timeout=TELEGRAM_READ_TIMEOUT_SEC,
+        write_timeout=TELEGRAM_WRITE_TIMEOUT_SEC,
+        http_version=TELEGRAM_HTTP_VERSION,
+    )
+
+
+def build_get_updates_request() -> InstrumentedHTTPXRequest:
+    """Пул для довгого опитування; до read_timeout PTB сам додає timeout опитування."""
+    return InstrumentedHTTPXRequest(
+        "get_updates",
+        connection_pool_size=TELEGRAM_UPDATES_POOL_SIZE,
+        pool_timeout=TELEGRAM_POOL_TIMEOUT_SEC,
+        connect_timeout=TELEGRAM_CONNECT_TIMEOUT_SEC,
+        read_timeout=TELEGRAM_READ_TIMEOUT_SEC,
+        write_timeout=TELEGRAM_CONNECT_TIMEOUT_SEC,
+        http_version=TELEGRAM_HTTP_VERSION,
+    )
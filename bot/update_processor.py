@@ -0,0 +1,81 @@
+# bot/update_processor.py
+"""Конкурентна обробка апдейтів: різні користувачі — паралельно, апдейти одного користувача — по черзі."""
+import asyncio
+from typing import Optional
+
+from telegram import Update
+from telegram.ext import Application
+
+from services.traffic_recorder import traffic_recorder
+from utils.logger import logger
+
+
+class UpdateProcessor:
+    def __init__(self, application: Application, max_concurrency: int = 32):
+        self.application = application
+        self.max_concurrency = max(1, max_concurrency)
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._user_locks = {}  # {ключ: [asyncio.Lock, кількість апдейтів у черзі]}
+        self._tasks = set()
+        self.in_flight = 0
+
+    @property
+    def pending(self) -> int:
+        """Апдейти, які прийняті, але ще не оброблені (включно з тими, що в роботі)."""
+        return len(self._tasks)
+
+    @staticmethod
+    def _ordering_key(update: object) -> Optional[int]:
+        if isinstance(update, Update):
+            if update.effective_user:
+                return update.effective_user.id
+            if update.effective_chat:
+                return update.effective_chat.id
+        return None
+
+    def submit(self, update: object) -> asyncio.Task:
+        """Приймає апдейт і повертається одразу; обробка йде у фоні."""
+        traffic_recorder.record_update(update)
+        key = self._ordering_key(update)
+        if key is not None:
+            # Лок створюємо/резервуємо синхронно — так черговість збігається з порядком submit()
+            entry = self._user_locks.setdefault(key, [asyncio.Lock(), 0])
+            entry[1] += 1
+
+        task = asyncio.create_task(self._run(update, key))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def _run(self, update: object, key: Optional[int]):
+        try:
+            if key is None:
+                await self._process(update)
+                return
+
+            entry = self._user_locks[key]
+            try:
+                async with entry[0]:
+                    await self._process(update)
+            finally:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    self._user_locks.pop(key, None)
+        except Exception as e:
+            logger.error(f"❌ Update processing failed: {e}", exc_info=True)
+
+    async def _process(self, update: object):
+        async with self._semaphore:
+            self.in_flight += 1
+            try:
+                await self.application.process_update(update)
+            finally:
+                self.in_flight -= 1
+
+    async def join(self, timeout: float = 30):
+        """Чекає завершення прийнятих апдейтів (при зупинці бота)."""
+        if not self._tasks:
+            return
+        done, pending = await asyncio.wait(set(self._tasks), timeout=timeout)
+        if pending:
+            logger.warning(f"⚠️ {len(pending)} updates were not processed before shutdown")
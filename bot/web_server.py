@@ -0,0 +1,69 @@
+# bot/web_server.py
+"""Вбудований aiohttp-сервер бота: webhook Telegram, /healthz і /metrics."""
+import hmac
+import time
+
+from aiohttp import web
+from telegram import Update
+
+from config.settings import BOT_MODE, WEBHOOK_PATH, WEBHOOK_SECRET_TOKEN, WEB_SERVER_HOST, WEB_SERVER_PORT
+from utils.logger import logger
+from utils.metrics import REGISTRY
+
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+
+def create_web_app(application, processor, mode: str = BOT_MODE) -> web.Application:
+    web_app = web.Application()
+    started_at = time.time()
+
+    async def handle_webhook(request: web.Request) -> web.Response:
+        if WEBHOOK_SECRET_TOKEN:
+            received = request.headers.get(SECRET_HEADER, "")
+            if not hmac.compare_digest(received, WEBHOOK_SECRET_TOKEN):
+                logger.warning(f"⚠️ Webhook: invalid secret token from {request.remote}")
+                return web.Response(status=403, text="Forbidden")
+
+        try:
+            data = await request.json()
+        except Exception:
+            return web.Response(status=400, text="Bad Request")
+
+        update = Update.de_json(data, application.bot)
+        if not update:
+            return web.Response(status=400, text="Bad Update")
+
+        # Відповідаємо Telegram одразу, обробка йде у фоні з per-user порядком
+        processor.submit(update)
+        return web.Response(text="OK")
+
+    async def handle_health(request: web.Request) -> web.Response:
+        return web.json_response({
+            "status": "ok" if application.running else "starting",
+            "mode": mode,
+            "uptime_sec": int(time.time() - started_at),
+            "updates_in_flight": processor.in_flight,
+            "updates_pending": processor.pending,
+        })
+
+    async def handle_metrics(request: web.Request) -> web.Response:
+        return web.Response(
+            body=REGISTRY.render().encode("utf-8"),
+            headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"},
+        )
+
+    if mode == "webhook":
+        web_app.router.add_post(WEBHOOK_PATH, handle_webhook)
+    web_app.router.add_get("/healthz", handle_health)
+    web_app.router.add_get("/metrics", handle_metrics)
+    return web_app
+
+
+async def start_web_server(application, processor, mode: str = BOT_MODE,
+                           host: str = WEB_SERVER_HOST, port: int = WEB_SERVER_PORT) -> web.AppRunner:
+    runner = web.AppRunner(create_web_app(application, processor, mode), access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    logger.info(f"🌐 Web server started on {host}:{port} (mode={mode})")
+    return runner
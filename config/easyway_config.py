@@ -2,12 +2,14 @@
 
 from dataclasses import dataclass
 
+from config.settings import EASYWAY_API_URL
+
 
 @dataclass
 class EasyWayConfig:
     """Конфігурація API EasyWay v1.2"""
 
-    BASE_URL = "https://api.easyway.info"
+    BASE_URL = EASYWAY_API_URL
     LOGIN = "odesainclusive"
     PASSWORD = "ndHdy2Ytw2Ois"
 
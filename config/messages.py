@@ -205,5 +205,21 @@ MESSAGES = {
 ),
 "company_history": COMPANY_HISTORY,
 
+    # Заголовки меню (клавіатури до них — у handlers/keyboards.py)
+    "menu_main": "🚊 <b>Вас вітає бот Одеського міського електротранспорту!</b>\n\nОберіть потрібну опцію:",
+    "menu_tickets": "🎫 Розділ 'Квитки та тарифи'. Оберіть опцію:",
+    "menu_info": "ℹ️ Розділ 'Довідкова інформація'. Оберіть опцію:",
+    "menu_company": "🏢 Розділ 'Про підприємство'. Оберіть опцію:",
+    "menu_museum": "🏛️ Розділ 'Музей КП 'ОМЕТ''. Оберіть опцію:",
+    "menu_feedback": "✍️ Оберіть опцію зворотнього зв'язку:",
+    "menu_subscription": (
+        "🔔 <b>Налаштування сповіщень</b>\n\n"
+        "Чи бажаєте Ви отримувати важливі повідомлення про:\n"
+        "🚋 Зміни в роботі транспорту\n"
+        "🗞 Актуальні новини КП «ОМЕТ»\n"
+        "🚨 Екстрені ситуації\n\n"
+        "<i>Ми не надсилаємо спам, лише важливу інформацію!</i>"
+    ),
+    "menu_museum_admin": "👋 Вітаємо в адмін-панелі Музею!",
 
 }
\ No newline at end of file
@@ -25,6 +25,8 @@ if not DATABASE_URL:
 # ===============================================
 DEBUG = os.getenv("DEBUG", "False") == "True"
 TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
+# Інший Bot API сервер (локальний telegram-bot-api або фейковий для бенчмарків), напр. "http://127.0.0.1:8081/bot"
+TELEGRAM_API_BASE_URL = os.getenv("TELEGRAM_API_BASE_URL", "")
 DEVELOPER_ID = int(os.getenv("DEVELOPER_ID", 0))
 MUSEUM_ADMIN_ID = int(os.getenv("MUSEUM_ADMIN_ID", 0))
 MUSEUM_ADMIN_IDS = [
@@ -36,6 +38,16 @@ GENERAL_ADMIN_IDS = [
     384349401   # Тетяна
 ]
 
+# Режим отримання апдейтів: "polling" або "webhook"
+BOT_MODE = os.getenv("BOT_MODE", "polling").lower()
+WEBHOOK_URL = os.getenv("WEBHOOK_URL", "")  # Публічна адреса, напр. https://bot.example.com
+WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "/webhook")
+WEBHOOK_SECRET_TOKEN = os.getenv("WEBHOOK_SECRET_TOKEN", "")
+WEB_SERVER_HOST = os.getenv("WEB_SERVER_HOST", "0.0.0.0")
+WEB_SERVER_PORT = int(os.getenv("WEB_SERVER_PORT", "8001"))
+# Скільки апдейтів (різних користувачів) обробляються одночасно
+UPDATE_CONCURRENCY = int(os.getenv("UPDATE_CONCURRENCY", "32"))
+
 # ===============================================
 # 3. GOOGLE SHEETS НАЛАШТУВАННЯ
 # ===============================================
@@ -43,12 +55,18 @@ GENERAL_ADMIN_IDS = [
 GOOGLE_SHEETS_ID = os.getenv("GOOGLE_SHEETS_ID", "1kbQ_WuZy79xwGRXgCSIp-unBiGY42YQLH9V3zbqnoXo")
 GOOGLE_SHEET_ID = GOOGLE_SHEETS_ID  # Альтернативна назва (для сумісності)
 GOOGLE_SHEETS_CREDENTIALS_FILE = BASE_DIR / "integrations/google_sheets/credentials.json"
+SHEETS_HTTP_POOL_SIZE = int(os.getenv("SHEETS_HTTP_POOL_SIZE", "10"))
+SHEETS_HTTP_TIMEOUT_SEC = int(os.getenv("SHEETS_HTTP_TIMEOUT_SEC", "20"))
 
 # ===============================================
 # 4. ЛОГУВАННЯ
 # ===============================================
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
 LOG_FILE = BASE_DIR / "logs" / "bot.log"
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text").lower()  # "text" або "json"
+# Семплінг "гучних" DEBUG/INFO логів гарячих шляхів (extra={"log_key": ...}): не більше N записів з ключем за вікно
+LOG_SAMPLE_WINDOW_SEC = float(os.getenv("LOG_SAMPLE_WINDOW_SEC", "10"))
+LOG_SAMPLE_MAX_PER_WINDOW = int(os.getenv("LOG_SAMPLE_MAX_PER_WINDOW", "20"))
 FEEDBACK_SYNC_INTERVAL_MIN = int(os.getenv("FEEDBACK_SYNC_INTERVAL_MIN", "15"))
 
 # ===============================================
@@ -60,9 +78,7 @@ DOCUMENTS_PATH = BASE_DIR / "documents"
 # Зображення для квитків
 TICKET_PASSES_IMAGE_1 = IMAGES_PATH / "passes_part_1.png"
 TICKET_PASSES_IMAGE_2 = IMAGES_PATH / "passes_part_2.png"
-
-TICKET_PASSES_FILE_ID_1 = "AgACAgIAAxkBAAIEL2kMn2UoUM2r0dc0GvTlXCax0L9hAAKJDWsbLpppSAxixJcLi4gSAQADAgADeQADNgQ"
-TICKET_PASSES_FILE_ID_2 = "AgACAgIAAxkBAAIEMWkMn4t4dEJ9rOyVA-95XzsgsewJAAKSDWsbLpppSEMR6et11IqTAQADAgADeQADNgQ"
+# file_id цих файлів кешуються автоматично (services/file_id_cache.py)
 
 # PDF та інші документи
 RULES_PDF_PATH = DOCUMENTS_PATH / "rules_of_use.pdf"
@@ -72,7 +88,7 @@ RENTAL_SERVICE_IMAGE = IMAGES_PATH / "rental_service.jpg"
 # ===============================================
 # 6. EASYWAY API НАЛАШТУВАННЯ
 # ===============================================
-EASYWAY_API_URL = "https://api.easyway.info"
+EASYWAY_API_URL = os.getenv("EASYWAY_API_URL", "https://api.easyway.info")
 EASYWAY_LOGIN = "odesainclusive"
 EASYWAY_PASSWORD = "ndHdy2Ytw2Ois"
 EASYWAY_CITY = "odesa"
@@ -83,14 +99,108 @@ EASYWAY_STOP_CACHE_TTL = int(os.getenv("EASYWAY_STOP_CACHE_TTL", "30"))
 EASYWAY_PLACES_CACHE_TTL = int(os.getenv("EASYWAY_PLACES_CACHE_TTL", "120"))
 EASYWAY_ROUTES_CACHE_TTL = int(os.getenv("EASYWAY_ROUTES_CACHE_TTL", "1800"))
 EASYWAY_ROUTE_GPS_CACHE_TTL = int(os.getenv("EASYWAY_ROUTE_GPS_CACHE_TTL", "15"))
+# Скільки секунд після закінчення TTL свого кешу відповідь ще віддається, якщо EasyWay недоступний
+# (сторінка зупинки тоді позначається як застаріла)
+EASYWAY_STALE_TTL = int(os.getenv("EASYWAY_STALE_TTL", "600"))
+
+# Захист викликів EasyWay (utils/circuit_breaker.py)
+# Невдач поспіль, після яких endpoint "відкривається", і скільки секунд до пробного запиту
+EASYWAY_BREAKER_FAILURES = int(os.getenv("EASYWAY_BREAKER_FAILURES", "5"))
+EASYWAY_BREAKER_RESET_SEC = float(os.getenv("EASYWAY_BREAKER_RESET_SEC", "15"))
+# Таймаут = p99 успішних відповідей * множник, але не менше мінімуму
+EASYWAY_TIMEOUT_MIN_SEC = float(os.getenv("EASYWAY_TIMEOUT_MIN_SEC", "1.0"))
+EASYWAY_TIMEOUT_MULTIPLIER = float(os.getenv("EASYWAY_TIMEOUT_MULTIPLIER", "3"))
+# Повтори: не більше цієї частки від запитів; пауза між спробами — з джитером
+EASYWAY_RETRY_BUDGET_RATIO = float(os.getenv("EASYWAY_RETRY_BUDGET_RATIO", "0.2"))
+EASYWAY_BACKOFF_BASE_SEC = float(os.getenv("EASYWAY_BACKOFF_BASE_SEC", "0.2"))
 
 # Синхронізація звернень
 FEEDBACK_SYNC_BATCH_SIZE = int(os.getenv("FEEDBACK_SYNC_BATCH_SIZE", "100"))
 FEEDBACK_SYNC_MAX_ROWS = int(os.getenv("FEEDBACK_SYNC_MAX_ROWS", "500"))
 
-# Розсилка
+# Outbox для Google Sheets (фоновий відправник)
+SHEETS_OUTBOX_INTERVAL_SEC = int(os.getenv("SHEETS_OUTBOX_INTERVAL_SEC", "30"))
+SHEETS_OUTBOX_CONCURRENCY = int(os.getenv("SHEETS_OUTBOX_CONCURRENCY", "2"))
+SHEETS_OUTBOX_BASE_BACKOFF_SEC = int(os.getenv("SHEETS_OUTBOX_BASE_BACKOFF_SEC", "5"))
+SHEETS_OUTBOX_MAX_BACKOFF_SEC = int(os.getenv("SHEETS_OUTBOX_MAX_BACKOFF_SEC", "900"))
+# Скільки днів зберігати вже відправлені рядки outbox (для розбору інцидентів), потім видаляти
+SHEETS_OUTBOX_RETENTION_DAYS = float(os.getenv("SHEETS_OUTBOX_RETENTION_DAYS", "7"))
+
+# Статистика адміна (звірка лічильників з БД)
+STATS_RECOUNT_INTERVAL_MIN = int(os.getenv("STATS_RECOUNT_INTERVAL_MIN", "30"))
+
+# Метрики: як часто вимірюємо затримку event loop
+LOOP_MONITOR_INTERVAL_SEC = float(os.getenv("LOOP_MONITOR_INTERVAL_SEC", "0.5"))
+# Поріг "зависання" loop, після якого watchdog знімає стек (0 — вимкнено)
+LOOP_STALL_THRESHOLD_SEC = float(os.getenv("LOOP_STALL_THRESHOLD_SEC", "0.25"))
+
+# Стан користувачів (user_data): прибирання неактивних і ліміт розміру на користувача
+USER_STATE_TTL_SEC = int(os.getenv("USER_STATE_TTL_SEC", str(6 * 3600)))
+USER_STATE_MAX_BYTES = int(os.getenv("USER_STATE_MAX_BYTES", str(64 * 1024)))
+USER_STATE_SWEEP_INTERVAL_SEC = int(os.getenv("USER_STATE_SWEEP_INTERVAL_SEC", "300"))
+
+# Збереження user_data і станів діалогів у БД (переживають перезапуск)
+PERSISTENCE_ENABLED = os.getenv("PERSISTENCE_ENABLED", "True") == "True"
+PERSISTENCE_UPDATE_INTERVAL_SEC = float(os.getenv("PERSISTENCE_UPDATE_INTERVAL_SEC", "30"))
+
+# Старт: довідники зі знімків у БД, оновлення з upstream у фоні з повторами (bot/startup.py)
+STARTUP_REFRESH_RETRY_MIN_SEC = float(os.getenv("STARTUP_REFRESH_RETRY_MIN_SEC", "5"))
+STARTUP_REFRESH_RETRY_MAX_SEC = float(os.getenv("STARTUP_REFRESH_RETRY_MAX_SEC", "300"))
+# Звіт про час імпорту модулів при старті (utils/import_profiler.py)
+STARTUP_IMPORT_PROFILE = os.getenv("STARTUP_IMPORT_PROFILE", "False") == "True"
+
+# Діагностика на вимогу (/profile, /memory)
+DIAG_PROFILE_INTERVAL_MS = float(os.getenv("DIAG_PROFILE_INTERVAL_MS", "5"))
+DIAG_PROFILE_MAX_SEC = int(os.getenv("DIAG_PROFILE_MAX_SEC", "300"))
+DIAG_TRACEMALLOC_FRAMES = int(os.getenv("DIAG_TRACEMALLOC_FRAMES", "10"))
+
+# Запис трафіку для відтворення (benchmarks/replay.py); порожньо — вимкнено
+TRAFFIC_RECORD_FILE = os.getenv("TRAFFIC_RECORD_FILE", "")
+TRAFFIC_RECORD_MAX_MB = float(os.getenv("TRAFFIC_RECORD_MAX_MB", "200"))
+# Сіль для анонімізації id; без неї — випадкова на кожен запуск
+TRAFFIC_RECORD_SALT = os.getenv("TRAFFIC_RECORD_SALT", "")
+
+# Розсилка: скільки copyMessage в дорозі одночасно (темп задає планувальник Telegram API)
 BROADCAST_BATCH_SIZE = int(os.getenv("BROADCAST_BATCH_SIZE", "50"))
-BROADCAST_PAUSE_SEC = float(os.getenv("BROADCAST_PAUSE_SEC", "0.2"))
+
+# Ліміти запитів користувачів (utils/rate_limit.py): token bucket на користувача й клас дії
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "True") == "True"
+# Будь-які апдейти від одного користувача (захист від флуду)
+RATE_LIMIT_UPDATES_PER_SEC = float(os.getenv("RATE_LIMIT_UPDATES_PER_SEC", "3"))
+RATE_LIMIT_UPDATES_BURST = int(os.getenv("RATE_LIMIT_UPDATES_BURST", "15"))
+# Пошук зупинок EasyWay (текстом, швидкими кнопками, повтор)
+RATE_LIMIT_SEARCH_PER_MIN = float(os.getenv("RATE_LIMIT_SEARCH_PER_MIN", "20"))
+RATE_LIMIT_SEARCH_BURST = int(os.getenv("RATE_LIMIT_SEARCH_BURST", "5"))
+# Вибір зупинки та "Оновити дані"
+RATE_LIMIT_STOP_PER_MIN = float(os.getenv("RATE_LIMIT_STOP_PER_MIN", "30"))
+RATE_LIMIT_STOP_BURST = int(os.getenv("RATE_LIMIT_STOP_BURST", "6"))
+# Спільний бюджет на EasyWay для всіх користувачів (дій за секунду)
+EASYWAY_GLOBAL_RATE_PER_SEC = float(os.getenv("EASYWAY_GLOBAL_RATE_PER_SEC", "20"))
+EASYWAY_GLOBAL_BURST = int(os.getenv("EASYWAY_GLOBAL_BURST", "40"))
+
+# Планувальник вихідних запитів до Telegram (bot/rate_limiter.py)
+TELEGRAM_GLOBAL_RATE_PER_SEC = float(os.getenv("TELEGRAM_GLOBAL_RATE_PER_SEC", "30"))
+# Скільки з глобального запасу розсилка не може зайняти — на відповіді користувачам
+TELEGRAM_INTERACTIVE_RESERVE = int(os.getenv("TELEGRAM_INTERACTIVE_RESERVE", "5"))
+TELEGRAM_CHAT_RATE_PER_SEC = float(os.getenv("TELEGRAM_CHAT_RATE_PER_SEC", "1"))
+TELEGRAM_CHAT_BURST = int(os.getenv("TELEGRAM_CHAT_BURST", "5"))
+TELEGRAM_GROUP_RATE_PER_MIN = float(os.getenv("TELEGRAM_GROUP_RATE_PER_MIN", "20"))
+TELEGRAM_RETRY_AFTER_MAX_RETRIES = int(os.getenv("TELEGRAM_RETRY_AFTER_MAX_RETRIES", "3"))
+
+# HTTP-клієнти Telegram (bot/telegram_request.py): окремий пул для getUpdates і для решти викликів.
+# Типовий розмір пулу викликів — під паралельні апдейти (кілька запитів на кожен) і пачку розсилки
+TELEGRAM_POOL_SIZE = int(os.getenv("TELEGRAM_POOL_SIZE", str(UPDATE_CONCURRENCY * 2 + BROADCAST_BATCH_SIZE)))
+TELEGRAM_POOL_TIMEOUT_SEC = float(os.getenv("TELEGRAM_POOL_TIMEOUT_SEC", "3"))
+TELEGRAM_CONNECT_TIMEOUT_SEC = float(os.getenv("TELEGRAM_CONNECT_TIMEOUT_SEC", "5"))
+TELEGRAM_READ_TIMEOUT_SEC = float(os.getenv("TELEGRAM_READ_TIMEOUT_SEC", "10"))
+# Запис довший: sendDocument/sendPhoto вантажать файли з диска
+TELEGRAM_WRITE_TIMEOUT_SEC = float(os.getenv("TELEGRAM_WRITE_TIMEOUT_SEC", "20"))
+TELEGRAM_UPDATES_POOL_SIZE = int(os.getenv("TELEGRAM_UPDATES_POOL_SIZE", "2"))
+# "2" — HTTP/2 (потрібен python-telegram-bot[http2]); без пакета h2 лишається 1.1
+TELEGRAM_HTTP_VERSION = os.getenv("TELEGRAM_HTTP_VERSION", "1.1")
+
+# Видалення повідомлень: id збираються по чатах і йдуть одним deleteMessages
+MESSAGE_DELETE_WINDOW_SEC = float(os.getenv("MESSAGE_DELETE_WINDOW_SEC", "0.3"))
 
 # Іконки для джерел часу
 TIME_SOURCE_ICONS = {
@@ -1,11 +1,14 @@
 import asyncio
+import time
 import uuid
 import datetime
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker, declarative_base
-from sqlalchemy import Column, Integer, String, DateTime, func, Boolean, BigInteger, select, update, Index, text
+from sqlalchemy import Column, Integer, String, DateTime, func, Boolean, BigInteger, select, update, Index, text, Text, LargeBinary
 from config.settings import DATABASE_URL
 from sqlalchemy.exc import OperationalError
+from sqlalchemy import event
+from utils.metrics import REGISTRY
 
 Base = declarative_base()
 
@@ -17,6 +20,36 @@ print(f"🔗 DATABASE_URL: {DATABASE_URL}")
 engine = create_async_engine(DATABASE_URL, echo=False)
 AsyncSessionLocal = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
+# --- Метрики запитів (події SQLAlchemy, без змін у сервісах) ---
+DB_QUERY_DURATION = REGISTRY.histogram(
+    "bot_db_query_duration_seconds", "Тривалість SQL-запитів", ("operation",),
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+DB_POOL_CHECKED_OUT = REGISTRY.gauge("bot_db_pool_checked_out", "З'єднання БД, видані з пулу")
+DB_POOL_CHECKED_OUT.set_function(lambda: engine.pool.checkedout() if hasattr(engine.pool, "checkedout") else 0)
+
+
+@event.listens_for(engine.sync_engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+@event.listens_for(engine.sync_engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("query_start")
+    if not starts:
+        return
+    operation = statement.lstrip().split(None, 1)[0].upper() if statement else "UNKNOWN"
+    DB_QUERY_DURATION.observe(time.perf_counter() - starts.pop(), operation=operation)
+
+
+@event.listens_for(engine.sync_engine, "handle_error")
+def _on_query_error(context):
+    conn = context.connection
+    starts = conn.info.get("query_start") if conn is not None else None
+    if starts:
+        starts.pop()
+
 
 async def init_db():
     """Створює таблиці, якщо їх немає, з механізмом очікування"""
@@ -112,11 +145,72 @@ class Feedback(Base):
     reason = Column(String, nullable=True)  # За що вдячні
 
 
+# --- 4. Outbox для Google Sheets (усі записи, що мають потрапити в таблицю) ---
+class SheetOutbox(Base):
+    __tablename__ = "sheet_outbox"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    created_at = Column(DateTime, default=func.now())
+    target_sheet = Column(String, nullable=False)  # Назва вкладки ("Скарги", "MuseumBookings" ...)
+    idempotency_key = Column(String, unique=True, nullable=False)  # "feedback:<ticket_id>", "museum_booking:<id>"
+    payload = Column(Text, nullable=False)  # JSON-рядок таблиці
+    match_columns = Column(String, nullable=True)  # Колонки для перевірки дублів, напр. "1" або "1,3"
+
+    # Запис-джерело, якому після відправки ставимо status="synced"
+    source_table = Column(String, nullable=True)
+    source_id = Column(Integer, nullable=True)
+
+    status = Column(String, default="pending")  # "pending" -> "sending" -> "sent"
+    attempts = Column(Integer, default=0)
+    next_attempt_at = Column(DateTime, nullable=True)
+    last_error = Column(String, nullable=True)
+    sent_at = Column(DateTime, nullable=True)
+
+
+# --- 5. Стан діалогів між перезапусками (database/persistence.py) ---
+class UserState(Base):
+    __tablename__ = "user_states"
+
+    user_id = Column(BigInteger, primary_key=True, autoincrement=False)
+    data = Column(LargeBinary, nullable=False)  # user_data: pickle (+ zlib, якщо великий)
+    updated_at = Column(DateTime, nullable=False)
+
+
+class ConversationState(Base):
+    __tablename__ = "conversation_states"
+
+    name = Column(String, primary_key=True)  # ConversationHandler.name
+    key = Column(String, primary_key=True)  # ключ розмови, напр. "[123, 123]"
+    state = Column(LargeBinary, nullable=False)
+    updated_at = Column(DateTime, nullable=False)
+
+
+# --- 6. Знімки довідників для швидкого старту (database/snapshots.py) ---
+class BootstrapSnapshot(Base):
+    __tablename__ = "bootstrap_snapshots"
+
+    name = Column(String, primary_key=True)  # "easyway_routes", "gtfs_static"
+    data = Column(LargeBinary, nullable=False)
+    updated_at = Column(DateTime, nullable=False)
+
+
+# --- 7. file_id завантажених у Telegram файлів (services/file_id_cache.py) ---
+class TelegramFile(Base):
+    __tablename__ = "telegram_files"
+
+    path = Column(String, primary_key=True)  # шлях відносно кореня проєкту
+    sha256 = Column(String, nullable=False)  # хеш вмісту: змінився файл — file_id недійсний
+    file_id = Column(String, nullable=False)
+    updated_at = Column(DateTime, nullable=False)
+
+
 # --- Індекси ---
 Index("ix_feedbacks_status", Feedback.status)
 Index("ix_feedbacks_created_at", Feedback.created_at)
 Index("ix_users_telegram_id", BotUser.telegram_id)
 Index("ix_users_is_subscribed", BotUser.is_subscribed)
+Index("ix_sheet_outbox_status_next", SheetOutbox.status, SheetOutbox.next_attempt_at)
+Index("ix_user_states_updated_at", UserState.updated_at)
 
 
 # ================= ГОЛОВНИЙ КЛАС DATABASE =================
@@ -184,11 +278,20 @@ class Database:
                 transport_type=data.get('transport_type'),
                 driver_name=data.get('driver_name'),
                 reason=data.get('reason'),
-                status="new"
+                status="new",
+                created_at=datetime.datetime.utcnow()
             )
             session.add(feedback)
+
+            # Рядок для Google Sheets кладемо в outbox у тій самій транзакції
+            from services.sheets_outbox import enqueue_feedback, sheets_outbox
+            from services.stats_service import stats_service
+            await enqueue_feedback(session, feedback)
             await session.commit()
-            return ticket_id
+
+        sheets_outbox.notify()
+        stats_service.on_feedback_created(category)
+        return ticket_id
 
     async def get_unsynced_feedbacks(self):
         """Отримує всі записи, які ще не відправлені в Гугл Таблиці."""
@@ -0,0 +1,246 @@
+# database/persistence.py
+"""Persistence для PTB у нашій БД: user_data і стани ConversationHandler переживають перезапуск."""
+import asyncio
+import datetime
+import json
+import pickle
+import zlib
+
+from sqlalchemy import delete, insert, select
+from telegram.ext import BasePersistence, PersistenceInput
+
+from config.settings import PERSISTENCE_UPDATE_INTERVAL_SEC, USER_STATE_TTL_SEC
+from database.db import AsyncSessionLocal, ConversationState, UserState
+from utils.logger import logger
+from utils.metrics import REGISTRY
+
+COMPRESS_MIN_BYTES = 256
+WRITE_CHUNK = 500
+
+# warning_active — прапорець показаного попередження (знімається фоновою задачею цього процесу)
+TRANSIENT_KEYS = ("warning_active",)
+
+PERSISTENCE_ROWS = REGISTRY.counter(
+    "bot_persistence_rows_total", "Записи persistence у БД", ("table", "op")
+)
+PERSISTENCE_ERRORS = REGISTRY.counter("bot_persistence_errors_total", "Помилки запису persistence")
+
+
+def dumps(obj) -> bytes:
+    raw = pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)
+    if len(raw) >= COMPRESS_MIN_BYTES:
+        return b"z" + zlib.compress(raw)
+    return b"p" + raw
+
+
+def loads(blob: bytes):
+    if blob[:1] == b"z":
+        return pickle.loads(zlib.decompress(blob[1:]))
+    return pickle.loads(blob[1:])
+
+
+def _encode_key(key: tuple) -> str:
+    return json.dumps(list(key))
+
+
+def _decode_key(key: str) -> tuple:
+    return tuple(json.loads(key))
+
+
+class DatabasePersistence(BasePersistence):
+    def __init__(self, session_factory=AsyncSessionLocal,
+                 update_interval: float = PERSISTENCE_UPDATE_INTERVAL_SEC, ttl_sec: float = USER_STATE_TTL_SEC):
+        super().__init__(
+            store_data=PersistenceInput(bot_data=False, chat_data=False, user_data=True, callback_data=False),
+            update_interval=update_interval,
+        )
+        self.session_factory = session_factory
+        self.ttl_sec = ttl_sec
+        self._loaded = set()  # користувачі, чий user_data вже прочитано з БД
+        self._written = {}  # {user_id: crc32 останнього записаного blob}
+        self._pending_users = {}  # {user_id: blob | None (видалити)}
+        self._pending_conversations = {}  # {(name, key): blob | None}
+        self._write_lock = asyncio.Lock()
+        self._write_task = None
+
+    def _cutoff(self) -> datetime.datetime:
+        return datetime.datetime.now() - datetime.timedelta(seconds=self.ttl_sec)
+
+    # ---------- читання ----------
+
+    async def get_user_data(self) -> dict:
+        """При старті нічого не вантажимо (див. refresh_user_data), лише прибираємо застарілі рядки."""
+        cutoff = self._cutoff()
+        async with self.session_factory() as session:
+            async with session.begin():
+                users = await session.execute(delete(UserState).where(UserState.updated_at < cutoff))
+                conversations = await session.execute(
+                    delete(ConversationState).where(ConversationState.updated_at < cutoff)
+                )
+        if users.rowcount or conversations.rowcount:
+            logger.info(f"💾 Persistence: removed {users.rowcount} stale user states, "
+                        f"{conversations.rowcount} stale conversations")
+        return {}
+
+    async def refresh_user_data(self, user_id: int, user_data: dict) -> None:
+        if user_id in self._loaded:
+            return
+        if user_id in self._pending_users:
+            # У буфері новіший стан (або видалення, яке ще не записане) — рядок у БД застарів
+            self._loaded.add(user_id)
+            return
+        try:
+            async with self.session_factory() as session:
+                result = await session.execute(
+                    select(UserState.data).where(UserState.user_id == user_id, UserState.updated_at >= self._cutoff())
+                )
+                blob = result.scalar_one_or_none()
+        except Exception as e:
+            # Не позначаємо як завантаженого — спробуємо на наступному апдейті
+            logger.warning(f"💾 Persistence: failed to load state of user {user_id}: {e}")
+            return
+
+        self._loaded.add(user_id)
+        if blob is None:
+            return
+        PERSISTENCE_ROWS.inc(table="user_states", op="load")
+        self._written[user_id] = zlib.crc32(blob)
+        for key, value in loads(blob).items():
+            user_data.setdefault(key, value)  # те, що хендлери вже встигли записати, не перетираємо
+
+    async def get_conversations(self, name: str) -> dict:
+        async with self.session_factory() as session:
+            result = await session.execute(
+                select(ConversationState.key, ConversationState.state).where(
+                    ConversationState.name == name, ConversationState.updated_at >= self._cutoff()
+                )
+            )
+            rows = result.all()
+        if rows:
+            logger.info(f"💾 Persistence: restored {len(rows)} '{name}' conversations")
+        return {_decode_key(key): loads(state) for key, state in rows}
+
+    async def get_chat_data(self) -> dict:
+        return {}
+
+    async def get_bot_data(self) -> dict:
+        return {}
+
+    async def get_callback_data(self):
+        return None
+
+    # ---------- запис (буфер + пакетний запис) ----------
+
+    async def update_user_data(self, user_id: int, data: dict) -> None:
+        data = {key: value for key, value in data.items() if key not in TRANSIENT_KEYS}
+        if not data:
+            if user_id in self._written:
+                self._written.pop(user_id)
+                self._pending_users[user_id] = None
+                self._schedule_write()
+            return
+        try:
+            blob = dumps(data)
+        except Exception as e:
+            logger.warning(f"💾 Persistence: user {user_id} state is not serializable: {e}")
+            return
+        crc = zlib.crc32(blob)
+        if self._written.get(user_id) == crc:
+            return
+        self._written[user_id] = crc
+        self._pending_users[user_id] = blob
+        self._schedule_write()
+
+    async def drop_user_data(self, user_id: int) -> None:
+        self._loaded.discard(user_id)
+        self._written.pop(user_id, None)
+        self._pending_users[user_id] = None
+        self._schedule_write()
+
+    async def update_conversation(self, name: str, key: tuple, new_state) -> None:
+        self._pending_conversations[(name, _encode_key(key))] = None if new_state is None else dumps(new_state)
+        self._schedule_write()
+
+    async def flush(self) -> None:
+        if self._write_task is not None:
+            await self._write_task
+        await self._write_pending()
+
+    def _schedule_write(self):
+        # PTB викликає update_* для всіх змінених записів через gather — усі вони потрапляють
+        # у буфер раніше, ніж стартує ця задача, і йдуть однією транзакцією
+        if self._write_task is None or self._write_task.done():
+            self._write_task = asyncio.create_task(self._write_pending())
+
+    async def _write_pending(self):
+        async with self._write_lock:
+            if not self._pending_users and not self._pending_conversations:
+                return
+            users, self._pending_users = self._pending_users, {}
+            conversations, self._pending_conversations = self._pending_conversations, {}
+            try:
+                await self._write(users, conversations)
+            except Exception as e:
+                PERSISTENCE_ERRORS.inc()
+                logger.error(f"💾 Persistence write failed ({len(users)} users, "
+                             f"{len(conversations)} conversations): {e}")
+                # Повертаємо в буфер (якщо за цей час не з'явилось новіше) — піде з наступним інтервалом
+                for user_id, blob in users.items():
+                    if user_id not in self._pending_users:
+                        self._pending_users[user_id] = blob
+                for key, blob in conversations.items():
+                    self._pending_conversations.setdefault(key, blob)
+
+    async def _write(self, users: dict, conversations: dict):
+        now = datetime.datetime.now()
+        user_ids = list(users)
+        user_rows = [{"user_id": user_id, "data": blob, "updated_at": now}
+                     for user_id, blob in users.items() if blob is not None]
+        by_name = {}
+        for (name, key), blob in conversations.items():
+            by_name.setdefault(name, []).append((key, blob))
+
+        async with self.session_factory() as session:
+            async with session.begin():
+                # Delete + insert в одній транзакції: однаково працює в PostgreSQL і SQLite
+                for i in range(0, len(user_ids), WRITE_CHUNK):
+                    await session.execute(delete(UserState).where(UserState.user_id.in_(user_ids[i:i + WRITE_CHUNK])))
+                for i in range(0, len(user_rows), WRITE_CHUNK):
+                    await session.execute(insert(UserState), user_rows[i:i + WRITE_CHUNK])
+
+                for name, items in by_name.items():
+                    keys = [key for key, _ in items]
+                    for i in range(0, len(keys), WRITE_CHUNK):
+                        await session.execute(delete(ConversationState).where(
+                            ConversationState.name == name, ConversationState.key.in_(keys[i:i + WRITE_CHUNK])
+                        ))
+                    rows = [{"name": name, "key": key, "state": blob, "updated_at": now}
+                            for key, blob in items if blob is not None]
+                    for i in range(0, len(rows), WRITE_CHUNK):
+                        await session.execute(insert(ConversationState), rows[i:i + WRITE_CHUNK])
+
+        conversation_rows = sum(1 for blob in conversations.values() if blob is not None)
+        PERSISTENCE_ROWS.inc(len(user_rows), table="user_states", op="write")
+        PERSISTENCE_ROWS.inc(len(users) - len(user_rows), table="user_states", op="delete")
+        PERSISTENCE_ROWS.inc(conversation_rows, table="conversation_states", op="write")
+        PERSISTENCE_ROWS.inc(len(conversations) - conversation_rows, table="conversation_states", op="delete")
+
+    # ---------- не використовуються (store_data їх вимикає) ----------
+
+    async def update_chat_data(self, chat_id: int, data: dict) -> None:
+        pass
+
+    async def update_bot_data(self, data: dict) -> None:
+        pass
+
+    async def update_callback_data(self, data) -> None:
+        pass
+
+    async def drop_chat_data(self, chat_id: int) -> None:
+        pass
+
+    async def refresh_chat_data(self, chat_id: int, chat_data: dict) -> None:
+        pass
+
+    async def refresh_bot_data(self, bot_data: dict) -> None:
+        pass
@@ -0,0 +1,33 @@
+# database/snapshots.py
+"""Знімки довідників із зовнішніх API (маршрути EasyWay, статичний GTFS) у БД."""
+import datetime
+from typing import Optional, Tuple
+
+from sqlalchemy import delete, insert, select
+
+from database.db import AsyncSessionLocal, BootstrapSnapshot
+from database.persistence import dumps, loads
+from utils.logger import logger
+
+
+async def save_snapshot(name: str, obj, session_factory=AsyncSessionLocal):
+    blob = dumps(obj)
+    async with session_factory() as session:
+        async with session.begin():
+            await session.execute(delete(BootstrapSnapshot).where(BootstrapSnapshot.name == name))
+            await session.execute(insert(BootstrapSnapshot).values(
+                name=name, data=blob, updated_at=datetime.datetime.now()
+            ))
+    logger.info(f"📸 Snapshot '{name}' saved ({len(blob) / 1024:.1f}KiB)")
+
+
+async def load_snapshot(name: str, session_factory=AsyncSessionLocal) -> Optional[Tuple[object, datetime.datetime]]:
+    """Повертає (дані, час збереження) або None, якщо знімка ще немає."""
+    async with session_factory() as session:
+        result = await session.execute(
+            select(BootstrapSnapshot.data, BootstrapSnapshot.updated_at).where(BootstrapSnapshot.name == name)
+        )
+        row = result.first()
+    if row is None:
+        return None
+    return loads(row.data), row.updated_at
@@ -1,18 +1,21 @@
+from handlers.common import rate_limited
 from handlers.menu_handlers import main_menu
 from utils.logger import logger
 import re
 import asyncio
 import html
-import time
+import zlib
+from cachetools import TTLCache
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.constants import ParseMode
 from telegram.ext import ContextTypes, ConversationHandler, Application
 import telegram.error
-from rapidfuzz import fuzz
 
 from bot.states import States
-from services.easyway_service import easyway_service
+from config.settings import EASYWAY_STOP_CACHE_TTL, EASYWAY_ROUTE_GPS_CACHE_TTL
+from services.easyway_service import easyway_service, stale_age
 from services.gtfs_service import gtfs_service
+from utils.metrics import REGISTRY
 from utils.text_formatter import format_stop_name
 
 # === КОНФІГУРАЦІЯ ПОШУКУ ===
@@ -40,6 +43,19 @@ SEARCH_SYNONYMS = {
 }
 
 FUZZY_SEARCH_THRESHOLD = 80
+# Скільки зупинок показуємо кнопками (і зберігаємо в user_data для "Назад до списку")
+STOPS_PER_PAGE = 10
+
+REFRESH_BUTTON = "🔄 Оновити дані"
+
+# Готові тексти сторінок зупинок: {stop_id: (stop_info, списки GPS, текст)}.
+# "Версія" даних — самі об'єкти з кешів EasyWayService: поки їхній TTL не минув, сервіс віддає
+# ті самі dict/list, і текст не формується заново. Запис тримає посилання на них, тож id не переюзаються.
+_render_cache = TTLCache(maxsize=500, ttl=max(EASYWAY_STOP_CACHE_TTL, EASYWAY_ROUTE_GPS_CACHE_TTL))
+
+ACCESSIBLE_RENDERS = REGISTRY.counter(
+    "bot_accessible_renders_total", "Сторінки зупинок: з кешу, сформовані, пропущені редагування", ("result",)
+)
 
 
 # === ЗАВАНТАЖЕННЯ ДАНИХ ===
@@ -51,7 +67,8 @@ async def load_easyway_route_ids(application: Application) -> bool:
 
     if data.get("error"):
         logger.error(f"Не вдалося завантажити EasyWay Route IDs: {data['error']}")
-        application.bot_data['easyway_structured_map'] = {"tram": [], "trolley": []}
+        # Мапа зі знімка (bot/startup.py), якщо вона є, краща за порожню
+        application.bot_data.setdefault('easyway_structured_map', {"tram": [], "trolley": []})
         return False
 
     structured_route_map = {"tram": [], "trolley": []}
@@ -120,6 +137,7 @@ async def accessible_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     return States.ACCESSIBLE_SEARCH_STOP
 
 
+@rate_limited("search")
 async def accessible_search_stop(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = update.effective_user.id
     original_input = update.message.text.strip()
@@ -161,13 +179,6 @@ async def accessible_search_stop(update: Update, context: ContextTypes.DEFAULT_T
 
     # --- КІНЕЦЬ ЛОГІКИ "ЧИСТОГО ЧАТУ" ---
 
-    last_ts = context.user_data.get('easyway_search_ts', 0)
-    now_ts = time.monotonic()
-    if now_ts - last_ts < 0.5:
-        await edit_root_message(text="⏳ Зачекайте секунду перед наступним запитом...")
-        return States.ACCESSIBLE_SEARCH_STOP
-    context.user_data['easyway_search_ts'] = now_ts
-
     context.user_data['last_search_term'] = original_input
 
     normalized_input = original_input.lower()
@@ -177,6 +188,9 @@ async def accessible_search_stop(update: Update, context: ContextTypes.DEFAULT_T
         search_term = SEARCH_SYNONYMS[normalized_input]
 
     if not search_term:
+        # rapidfuzz потрібен лише тут — імпортується при першому нечіткому пошуку, а не при старті
+        from rapidfuzz import fuzz
+
         best_match_key = None
         best_score = 0
         for key in SEARCH_SYNONYMS.keys():
@@ -217,7 +231,7 @@ async def accessible_search_stop(update: Update, context: ContextTypes.DEFAULT_T
             )
             return States.ACCESSIBLE_SEARCH_STOP
 
-        context.user_data["search_results"] = places
+        _remember_search_results(context, places, search_term)
 
         # Оновлюємо виклик клавіатури, передаючи main_msg_id
         await _show_stops_keyboard(update, places, context)  # <-- Зверніть увагу, ми змінили сигнатуру функції
@@ -229,17 +243,11 @@ async def accessible_search_stop(update: Update, context: ContextTypes.DEFAULT_T
         return States.ACCESSIBLE_SEARCH_STOP
 
 
+@rate_limited("search")
 async def accessible_stop_quick_search(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
     await query.answer()
 
-    last_ts = context.user_data.get('easyway_search_ts', 0)
-    now_ts = time.monotonic()
-    if now_ts - last_ts < 0.5:
-        await query.edit_message_text("⏳ Зачекайте секунду перед наступним запитом...", parse_mode="HTML")
-        return States.ACCESSIBLE_SELECT_STOP
-    context.user_data['easyway_search_ts'] = now_ts
-
     search_term = query.data.split("stop_search_")[-1]
 
     await query.edit_message_text(f"🔄 Пошук: <b>'{search_term}'</b>...", parse_mode="HTML")
@@ -260,7 +268,7 @@ async def accessible_stop_quick_search(update: Update, context: ContextTypes.DEF
             await query.edit_message_text(f"❌ Зупинок не знайдено.", parse_mode="HTML")
             return States.ACCESSIBLE_SEARCH_STOP
 
-        context.user_data["search_results"] = places
+        _remember_search_results(context, places, search_term)
         await _show_stops_keyboard(update, places)
         return States.ACCESSIBLE_SELECT_STOP
 
@@ -272,23 +280,31 @@ async def accessible_stop_quick_search(update: Update, context: ContextTypes.DEF
 
 # === ГОЛОВНА ЛОГІКА (Крок 3: Збір даних) ===
 
+@rate_limited("stop")
 async def accessible_stop_selected(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """
     Крок 3: Отримання даних.
     """
     query = update.callback_query
-    await query.answer()
+    # "Оновити дані" на вже показаній сторінці: без проміжного "Сканую...", щоб незмінну
+    # сторінку можна було не редагувати. На колбек відповідаємо після рендера.
+    refresh = _is_refresh(query)
+    if not refresh:
+        await query.answer()
 
     try:
         stop_id = int(query.data.split("stop_")[-1])
-        logger.info(f"User {query.from_user.id} selected stop_id: {stop_id}")
+        logger.info(f"User {query.from_user.id} selected stop_id: {stop_id}" + (" (refresh)" if refresh else ""))
 
-        await query.edit_message_text("🔄 Сканую маршрути та шукаю транспорт...")
+        if not refresh:
+            await query.edit_message_text("🔄 Сканую маршрути та шукаю транспорт...")
 
         # 1. Отримуємо дані про зупинку
         stop_info = await easyway_service.get_stop_info_v12(stop_id=stop_id)
 
         if stop_info.get("error"):
+            if refresh:
+                await query.answer()
             await query.edit_message_text(f"❌ Помилка API: {stop_info['error']}")
             return States.ACCESSIBLE_SEARCH_STOP
 
@@ -343,7 +359,8 @@ async def accessible_stop_selected(update: Update, context: ContextTypes.DEFAULT
                 if unique_key not in seen_routes:
                     target_id = name_to_main_id.get(unique_key, local_id)
 
-                    logger.info(f"🔎 Scanning {api_transport_key.upper()} {r_title} (ID: {target_id})")
+                    logger.info(f"🔎 Scanning {api_transport_key.upper()} {r_title} (ID: {target_id})",
+                                extra={"log_key": "accessible_scan"})
 
                     routes_to_scan.append((r_title, target_id, api_transport_key, r_direction))
                     seen_routes.add(unique_key)
@@ -362,7 +379,8 @@ async def accessible_stop_selected(update: Update, context: ContextTypes.DEFAULT
                 raw_vehicles = global_results[i] if i < len(global_results) else []
 
                 logger.info(
-                    f"[DEBUG] Route {r_name} ({r_type}): Service returned {len(raw_vehicles) if raw_vehicles else 0} items")
+                    f"[DEBUG] Route {r_name} ({r_type}): Service returned {len(raw_vehicles) if raw_vehicles else 0} items",
+                    extra={"log_key": "accessible_route_gps"})
 
                 unique_key = f"{r_name}_{r_type}"
                 global_route_data[unique_key] = raw_vehicles
@@ -373,7 +391,10 @@ async def accessible_stop_selected(update: Update, context: ContextTypes.DEFAULT
                 }
 
             # 6. Рендеримо
-            await _render_accessible_response(query, stop_title, stop_info, global_route_data, routes_meta_info)
+            await _render_accessible_response(query, stop_title, stop_info, global_route_data, routes_meta_info,
+                                              context=context, refresh=refresh)
+        elif refresh:
+            await query.answer()
 
         return States.ACCESSIBLE_SHOWING_RESULTS
 
@@ -382,6 +403,8 @@ async def accessible_stop_selected(update: Update, context: ContextTypes.DEFAULT
     except Exception as e:
         logger.error(f"Error in accessible_stop_selected: {e}", exc_info=True)
         try:
+            if refresh:
+                await query.answer()
             await query.edit_message_text(f"❌ Помилка: {str(e)}")
         except:
             pass
@@ -391,7 +414,72 @@ async def accessible_stop_selected(update: Update, context: ContextTypes.DEFAULT
 # === ЛОГІКА ВІДОБРАЖЕННЯ (ФІНАЛЬНА) ===
 
 async def _render_accessible_response(query, stop_title: str, stop_info: dict, global_route_data: dict,
-                                      routes_meta: dict):
+                                      routes_meta: dict, context: ContextTypes.DEFAULT_TYPE = None,
+                                      refresh: bool = False):
+    """
+    Показує сторінку зупинки.
+    Текст береться з кешу, якщо дані EasyWay ті самі. При оновленні (refresh), якщо повідомлення
+    вже показує саме цей вміст (хеш у user_data), редагування пропускається — колбек отримує "без змін".
+    """
+    stop_id = query.data.split('_')[-1]
+    vehicles = tuple(global_route_data.values())
+    cached = _render_cache.get(stop_id)
+    if cached and cached[0] is stop_info and len(cached[1]) == len(vehicles) \
+            and all(a is b for a, b in zip(cached[1], vehicles)):
+        message = cached[2]
+        ACCESSIBLE_RENDERS.inc(result="cache_hit")
+    else:
+        message = _build_accessible_message(stop_title, stop_info, global_route_data, routes_meta)
+        _render_cache[stop_id] = (stop_info, vehicles, message)
+        ACCESSIBLE_RENDERS.inc(result="rendered")
+
+    age = stale_age(stop_info, *vehicles)
+    if age is not None:
+        message = (
+            f"⚠️ <b>EasyWay зараз не відповідає.</b> Показано дані, отримані {max(1, round(age / 60))} хв тому — "
+            f"розташування і час прибуття можуть бути неточними.\n\n" + message
+        )
+
+    message_id = query.message.message_id if query.message else None
+    content_hash = zlib.crc32(f"{stop_id}\n{message}".encode())
+    if refresh and context is not None and context.user_data.get("accessible_rendered") == (message_id, content_hash):
+        ACCESSIBLE_RENDERS.inc(result="edit_skipped")
+        await query.answer("✅ Даних без змін")
+        return
+
+    keyboard = [
+        [InlineKeyboardButton(REFRESH_BUTTON, callback_data=f"stop_{stop_id}")],
+        [InlineKeyboardButton("⬅️ До списку зупинок", callback_data="accessible_back_to_list")],
+        [InlineKeyboardButton("🏠 Головне меню", callback_data="main_menu")]
+    ]
+
+    try:
+        await query.edit_message_text(
+            text=message,
+            reply_markup=InlineKeyboardMarkup(keyboard),
+            parse_mode=ParseMode.HTML
+        )
+    except telegram.error.BadRequest as e:
+        # Напр. після перезапуску без збереженого хешу: вміст той самий — це не помилка
+        if "not modified" not in str(e).lower():
+            raise
+        ACCESSIBLE_RENDERS.inc(result="edit_skipped")
+    if context is not None:
+        context.user_data["accessible_rendered"] = (message_id, content_hash)
+    if refresh:
+        await query.answer()
+
+
+def _is_refresh(query) -> bool:
+    """Колбек прийшов з кнопки "Оновити дані" сторінки тієї самої зупинки."""
+    markup = query.message.reply_markup if query.message else None
+    if not markup or not markup.inline_keyboard:
+        return False
+    button = markup.inline_keyboard[0][0]
+    return button.text == REFRESH_BUTTON and button.callback_data == query.data
+
+
+def _build_accessible_message(stop_title: str, stop_info: dict, global_route_data: dict, routes_meta: dict) -> str:
     """
     Формує повідомлення.
     Показує всі машини та коректні типи транспорту.
@@ -534,17 +622,7 @@ async def _render_accessible_response(query, stop_title: str, stop_info: dict, g
     if len(message) > 4000:
         message = message[:3900] + "\n\n...(повідомлення скорочено)..."
 
-    keyboard = [
-        [InlineKeyboardButton("🔄 Оновити дані", callback_data=f"stop_{query.data.split('_')[-1]}")],
-        [InlineKeyboardButton("⬅️ До списку зупинок", callback_data="accessible_back_to_list")],
-        [InlineKeyboardButton("🏠 Головне меню", callback_data="main_menu")]
-    ]
-
-    await query.edit_message_text(
-        text=message,
-        reply_markup=InlineKeyboardMarkup(keyboard),
-        parse_mode=ParseMode.HTML
-    )
+    return message
 
 
 # === ДОПОМІЖНІ ФУНКЦІЇ ===
@@ -556,7 +634,7 @@ async def _show_stops_keyboard(update: Update, places: list, context: ContextTyp
     keyboard = []
 
     # Беремо перші 10 результатів
-    for place in places[:10]:
+    for place in places[:STOPS_PER_PAGE]:
         # 1. Використовуємо наш новий форматер для назви
         raw_title = place['title']
         display_title = format_stop_name(raw_title)
@@ -616,7 +694,12 @@ async def _show_stops_keyboard(update: Update, places: list, context: ContextTyp
 async def accessible_back_to_list(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
     await query.answer()
-    places = context.user_data.get("search_results")
+    stop_ids = context.user_data.get("search_results") or []
+    places = easyway_service.get_indexed_stops(stop_ids)
+    if len(places) < len(stop_ids) and context.user_data.get("search_term"):
+        # Індекс зупинок — у пам'яті процесу: після перезапуску повторюємо пошук за збереженим запитом
+        data = await easyway_service.get_places_by_name(search_term=context.user_data["search_term"])
+        places = easyway_service.get_indexed_stops(stop_ids) or data.get("stops", [])[:STOPS_PER_PAGE]
     if not places: return await accessible_start(update, context)
     await _show_stops_keyboard(update, places)
     return States.ACCESSIBLE_SELECT_STOP
@@ -628,6 +711,7 @@ async def accessible_text_cancel(update: Update, context: ContextTypes.DEFAULT_T
     return ConversationHandler.END
 
 
+@rate_limited("search")
 async def accessible_retry_manual_search(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
     await query.answer()
@@ -645,11 +729,20 @@ async def accessible_retry_manual_search(update: Update, context: ContextTypes.D
         return States.ACCESSIBLE_SEARCH_STOP
 
     places = data.get("stops", [])
-    context.user_data["search_results"] = places
+    _remember_search_results(context, places, last_query)
     await _show_stops_keyboard(update, places)
     return States.ACCESSIBLE_SELECT_STOP
 
 
+def _remember_search_results(context: ContextTypes.DEFAULT_TYPE, places: list, search_term: str):
+    """
+    У user_data — лише id показаних зупинок і пошуковий запит; самі зупинки беруться з індексу
+    EasyWayService, а якщо його немає (перезапуск) — запит повторюється.
+    """
+    context.user_data["search_results"] = [place["id"] for place in places[:STOPS_PER_PAGE]]
+    context.user_data["search_term"] = search_term
+
+
 def _get_error_keyboard(retry_callback_data: str) -> InlineKeyboardMarkup:
     keyboard = [
         [InlineKeyboardButton("🔄 Повторити пошук", callback_data=retry_callback_data)],
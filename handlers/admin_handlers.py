@@ -1,4 +1,5 @@
 import asyncio
+import io
 import logging
 import re
 import html
@@ -7,20 +8,33 @@ from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.constants import ParseMode
 from telegram.ext import (ContextTypes, ConversationHandler, CommandHandler, CallbackQueryHandler, MessageHandler,
                           filters)
-from config.settings import MUSEUM_ADMIN_ID, MUSEUM_ADMIN_IDS, GOOGLE_SHEETS_ID, GENERAL_ADMIN_IDS, BROADCAST_BATCH_SIZE, BROADCAST_PAUSE_SEC
-from integrations.google_sheets.client import GoogleSheetsClient
+from config.settings import MUSEUM_ADMIN_ID, MUSEUM_ADMIN_IDS, GENERAL_ADMIN_IDS, BROADCAST_BATCH_SIZE
+from integrations.google_sheets.client import sheets_client
 from utils.logger import logger
 from bot.states import States
-from handlers.command_handlers import get_admin_main_menu_keyboard
+from handlers.keyboards import MENUS
 
 from services.user_service import UserService
 from services.tickets_service import TicketsService
-from services.museum_service import MuseumService
+from services.museum_service import museum_service
+from services.stats_service import stats_service
+from bot.middleware import handler_report, UPDATES_TOTAL
+from utils.metrics import REGISTRY
+from services.loop_monitor import loop_monitor, LOOP_STALLS, LOOP_STALL_SECONDS
+from services.diagnostics_service import diagnostics_service
+from services.message_deleter import message_deleter
+from bot.rate_limiter import BACKGROUND
+
+BROADCAST_MESSAGES = REGISTRY.counter(
+    "bot_broadcast_messages_total", "Повідомлення розсилки за результатом", ("result",)
+)
+BROADCAST_RATE = REGISTRY.gauge(
+    "bot_broadcast_last_rate_per_second", "Швидкість останньої розсилки (повідомлень/сек)"
+)
 
 
 user_service = UserService()
 tickets_service = TicketsService()
-museum_service = MuseumService()
 
 
 
@@ -48,14 +62,7 @@ async def show_general_admin_menu(update: Update, context: ContextTypes.DEFAULT_
         f"👋 Вітаю, {update.effective_user.first_name}!"
     )
 
-    keyboard = [
-        [InlineKeyboardButton("📢 Зробити розсилку (Новини)", callback_data="admin_broadcast_start")],
-        [InlineKeyboardButton("🔄 Синхронізувати БД -> Sheets", callback_data="admin_sync_db")],
-        [InlineKeyboardButton("📊 Статистика", callback_data="admin_stats")],
-        [InlineKeyboardButton("🏠 В режим користувача", callback_data="main_menu")]
-    ]
-
-    reply_markup = InlineKeyboardMarkup(keyboard)
+    reply_markup = MENUS["general_admin"].keyboard
 
     if query:
         await query.edit_message_text(text, reply_markup=reply_markup, parse_mode=ParseMode.HTML)
@@ -94,28 +101,36 @@ async def admin_show_stats(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if update.effective_user.id not in GENERAL_ADMIN_IDS:
         return
 
-    user_stats = await user_service.get_stats()
-    feedback_stats = await tickets_service.get_feedback_stats()
-    by_category = feedback_stats.get("by_category", {})
+    # Лічильники в пам'яті (звіряються з БД у фоні); перерахунок лише якщо ще не було жодного
+    if not stats_service.ready:
+        await stats_service.recount()
+    stats = stats_service.snapshot()
+    by_category = stats["by_category"]
 
     def _cat_count(key: str) -> int:
         return by_category.get(key, 0)
 
     known_total = _cat_count("complaint") + _cat_count("thanks") + _cat_count("suggestion")
-    other_count = max(0, feedback_stats["total"] - known_total)
+    other_count = max(0, stats["feedback_total"] - known_total)
+
+    trends = stats["trends"]
+    days_line = " · ".join(f"{d.strftime('%d.%m')}: {b['users']}/{b['feedback']}" for d, b in trends["by_day"])
 
     text = (
         "📊 <b>Статистика бота</b>\n\n"
-        f"👥 Всього користувачів: <b>{user_stats['total_users']}</b>\n"
-        f"🔔 Підписані на розсилку: <b>{user_stats['subscribed_users']}</b>\n\n"
-        f"📩 Всього звернень: <b>{feedback_stats['total']}</b>\n"
-        f"🆕 Нових (не синхр.): <b>{feedback_stats['new']}</b>\n"
-        f"✅ Синхронізованих: <b>{feedback_stats['synced']}</b>\n\n"
+        f"👥 Всього користувачів: <b>{stats['total_users']}</b>\n"
+        f"🔔 Підписані на розсилку: <b>{stats['subscribed_users']}</b>\n\n"
+        f"📩 Всього звернень: <b>{stats['feedback_total']}</b>\n"
+        f"🆕 Нових (не синхр.): <b>{stats['feedback_new']}</b>\n"
+        f"✅ Синхронізованих: <b>{stats['feedback_synced']}</b>\n\n"
         "📂 Розподіл за категоріями:\n"
         f"• Скарги: <b>{_cat_count('complaint')}</b>\n"
         f"• Подяки: <b>{_cat_count('thanks')}</b>\n"
         f"• Пропозиції: <b>{_cat_count('suggestion')}</b>\n"
-        f"• Інше: <b>{other_count}</b>\n"
+        f"• Інше: <b>{other_count}</b>\n\n"
+        "📈 За останні 24 год: "
+        f"<b>+{trends['last_24h']['users']}</b> користувачів, <b>+{trends['last_24h']['feedback']}</b> звернень\n"
+        f"🗓 По днях (користувачі/звернення):\n{days_line}\n"
     )
 
     keyboard = [
@@ -126,6 +141,98 @@ async def admin_show_stats(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await query.edit_message_text(text, reply_markup=back_btn, parse_mode=ParseMode.HTML)
 
 
+async def admin_show_metrics(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """/metrics — найповільніші хендлери з моменту запуску (для загального адміна)"""
+    if update.effective_user.id not in GENERAL_ADMIN_IDS:
+        return
+
+    rows = handler_report(limit=10)
+    total_updates = sum(value for _, value in UPDATES_TOTAL.items())
+    lines = [f"⏱ <b>Латентність хендлерів</b> (апдейтів: {int(total_updates)})\n"]
+    if not rows:
+        lines.append("Даних ще немає.")
+    for name, pattern, count, total, p50, p95, errors, upstream_share in rows:
+        lines.append(
+            f"• <code>{html.escape(name)}</code> [{html.escape(pattern[:30])}]\n"
+            f"  n={count}, Σ={total:.1f}s, p50={p50 * 1000:.0f}ms, p95={p95 * 1000:.0f}ms, "
+            f"помилок={int(errors)}, зовн.={upstream_share:.0%}"
+        )
+
+    stalls = sorted(LOOP_STALL_SECONDS.items(), key=lambda kv: kv[1], reverse=True)[:5]
+    if stalls:
+        lines.append(f"\n🐢 <b>Блокування event loop</b> (макс. lag {loop_monitor.max_lag:.2f}s)")
+        for (location,), seconds in stalls:
+            lines.append(
+                f"• <code>{html.escape(location)}</code>: "
+                f"{int(LOOP_STALLS.value(location=location))} раз, Σ={seconds:.1f}s"
+            )
+
+    await update.message.reply_text("\n".join(lines), parse_mode=ParseMode.HTML)
+
+
+def _report_document(prefix: str, text: str):
+    document = io.BytesIO(text.encode("utf-8"))
+    return document, f"{prefix}-{datetime.now().strftime('%Y%m%d-%H%M%S')}.txt"
+
+
+async def _send_profile(bot, chat_id: int, seconds: float):
+    try:
+        report = await diagnostics_service.profile(seconds)
+        document, filename = _report_document("profile", report)
+        await bot.send_document(chat_id=chat_id, document=document, filename=filename,
+                                caption="🔬 CPU-профіль бота (self/inclusive + collapsed stacks)")
+    except Exception as e:
+        logger.error(f"Profiling failed: {e}", exc_info=True)
+        await bot.send_message(chat_id=chat_id, text=f"❌ Профілювання не вдалося: {e}")
+
+
+async def admin_profile(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """/profile [секунд|stop] — семплюючий CPU-профіль, звіт приходить документом"""
+    if update.effective_user.id not in GENERAL_ADMIN_IDS:
+        return
+
+    arg = context.args[0].lower() if context.args else "30"
+    if arg == "stop":
+        stopped = diagnostics_service.stop_profile()
+        await update.message.reply_text("⏹ Зупиняю профілювання, звіт зараз прийде." if stopped
+                                        else "ℹ️ Профілювання не запущено.")
+        return
+    if diagnostics_service.profiling:
+        await update.message.reply_text("ℹ️ Профілювання вже йде. Зупинити: /profile stop")
+        return
+    try:
+        seconds = float(arg)
+    except ValueError:
+        await update.message.reply_text("Використання: /profile [секунд] або /profile stop")
+        return
+
+    # Профіль збирається у фоні: хендлер не тримає чергу апдейтів адміна N секунд
+    await update.message.reply_text(f"🔬 Профілюю ~{seconds:.0f} с. Звіт прийде документом.")
+    context.application.create_task(_send_profile(context.bot, update.effective_chat.id, seconds))
+
+
+async def admin_memory(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """/memory [stop] — знімок tracemalloc (різниця з попереднім) і найбільші user_data/bot_data"""
+    if update.effective_user.id not in GENERAL_ADMIN_IDS:
+        return
+
+    if context.args and context.args[0].lower() == "stop":
+        stopped = diagnostics_service.stop_memory()
+        await update.message.reply_text("⏹ tracemalloc вимкнено." if stopped else "ℹ️ tracemalloc не був увімкнений.")
+        return
+
+    try:
+        report = await diagnostics_service.memory_report(context.application)
+        document, filename = _report_document("memory", report)
+        await update.message.reply_document(
+            document=document, filename=filename,
+            caption="🧠 Пам'ять: топ алокацій і приріст з попереднього /memory. Вимкнути: /memory stop"
+        )
+    except Exception as e:
+        logger.error(f"Memory report failed: {e}", exc_info=True)
+        await update.message.reply_text(f"❌ Не вдалося зняти знімок пам'яті: {e}")
+
+
 async def admin_export_users(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Експортує список усіх користувачів у CSV файл та надсилає його"""
     query = update.callback_query
@@ -136,7 +243,6 @@ async def admin_export_users(update: Update, context: ContextTypes.DEFAULT_TYPE)
     try:
         users = await user_service.get_all_users()
         
-        import io
         import csv
         from datetime import timezone
         from zoneinfo import ZoneInfo
@@ -220,10 +326,7 @@ async def admin_broadcast_preview(update: Update, context: ContextTypes.DEFAULT_
         # Очищення стартового повідомлення, якщо користувачів немає
         start_msg_id = context.user_data.pop('broadcast_start_msg_id', None)
         if start_msg_id:
-            try:
-                await context.bot.delete_message(chat_id=msg.chat_id, message_id=start_msg_id)
-            except Exception:
-                pass
+            message_deleter.delete(context.bot, msg.chat_id, [start_msg_id])
 
         await msg.reply_text(
             "🤷‍♂️ Немає підписаних користувачів для розсилки.",
@@ -326,27 +429,34 @@ async def admin_broadcast_send_confirm(update: Update, context: ContextTypes.DEF
             [InlineKeyboardButton("🗑 Зрозуміло (Приховати)", callback_data="broadcast_dismiss")]
         ])
 
-        # Цикл розсилки
-        for index, user_id in enumerate(users, start=1):
+        async def send_copy(user_id) -> bool:
             try:
                 await context.bot.copy_message(
                     chat_id=user_id,
                     from_chat_id=from_chat_id,
                     message_id=msg_id,
-                    reply_markup=user_close_btn  # Додаємо кнопку тільки тут
+                    reply_markup=user_close_btn,  # Додаємо кнопку тільки тут
+                    rate_limit_args=BACKGROUND,  # поступається відповідям користувачам
                 )
-                count += 1
-                if index % BROADCAST_BATCH_SIZE == 0:
-                    await asyncio.sleep(BROADCAST_PAUSE_SEC)
+                BROADCAST_MESSAGES.inc(result="sent")
+                return True
             except Exception as e:
                 logger.warning(f"Failed to send broadcast to {user_id}: {e}")
-                blocked += 1
+                BROADCAST_MESSAGES.inc(result="failed")
+                return False
+
+        # Цикл розсилки: темп (30/с, RetryAfter) тримає планувальник bot/rate_limiter.py
+        for start in range(0, len(users), BROADCAST_BATCH_SIZE):
+            results = await asyncio.gather(*(send_copy(user_id) for user_id in users[start:start + BROADCAST_BATCH_SIZE]))
+            count += sum(results)
+            blocked += len(results) - sum(results)
 
         # Видаляємо повідомлення "Розсилка розпочалась..."
         #await status_msg.delete()
 
         # Фінальний звіт
         duration = (datetime.now() - start_time).total_seconds()
+        BROADCAST_RATE.set(count / duration if duration else count)
         await context.bot.send_message(
             chat_id=chat_id,
             text=(
@@ -365,13 +475,8 @@ async def admin_broadcast_send_confirm(update: Update, context: ContextTypes.DEF
         await context.bot.send_message(chat_id=chat_id, text="⚠️ Виникла помилка при розсилці.")
 
     finally:
-        # --- ОЧИЩЕННЯ ЧАТУ (Видалення технічних повідомлень) ---
-        for mid in msgs_to_delete:
-            try:
-                await context.bot.delete_message(chat_id=chat_id, message_id=mid)
-            except Exception as e:
-                # Повідомлення може бути вже видалене або застаріле
-                logger.debug(f"Could not delete message {mid}: {e}")
+        # --- ОЧИЩЕННЯ ЧАТУ (Видалення технічних повідомлень) одним запитом ---
+        message_deleter.delete(context.bot, chat_id, msgs_to_delete)
 
         # Очищаємо дані сесії
         context.user_data.pop('broadcast_msg_id', None)
@@ -391,8 +496,7 @@ async def admin_museum_menu_show(update: Update, context: ContextTypes.DEFAULT_T
     if update.effective_user.id not in MUSEUM_ADMIN_IDS:
         return ConversationHandler.END
 
-    keyboard = await get_admin_main_menu_keyboard()
-    text = "👋 Вітаємо в адмін-панелі Музею!"
+    text, keyboard = MENUS["museum_admin"]
 
     if query:
         await query.edit_message_text(text, reply_markup=keyboard)
@@ -481,9 +585,8 @@ async def admin_add_date_save(update: Update, context: ContextTypes.DEFAULT_TYPE
             raise ValueError("Дата не може бути у минулому.")
 
         # --- ВАЛІДАЦІЯ ПРОЙДЕНА ---
-        sheets = GoogleSheetsClient(GOOGLE_SHEETS_ID)
-        sheets.append_row(sheet_name="MuseumDates", values=[date_text])
-        museum_service.invalidate_dates_cache()
+        if not await museum_service.add_date(date_text):
+            raise RuntimeError("Google Sheets недоступна")
 
         logger.info(f"✅ Admin added new date: {date_text}")
         await update.message.reply_text(f"✅ Дату '<b>{date_text}</b>' успішно додано.", parse_mode=ParseMode.HTML)
@@ -525,15 +628,7 @@ async def admin_del_date_menu(update: Update, context: ContextTypes.DEFAULT_TYPE
     await query.edit_message_text("⏳ Завантажую список дат...")
 
     try:
-        sheets = GoogleSheetsClient(GOOGLE_SHEETS_ID)
-        loop = asyncio.get_running_loop()
-
-        # Асинхронне читання
-        dates_data = await loop.run_in_executor(
-            None,
-            sheets.read_range,
-            "MuseumDates!A1:A100"
-        )
+        dates_data = await sheets_client.read_range("MuseumDates!A1:A100")
 
         if not dates_data:
             await query.edit_message_text("Немає дат для видалення.", reply_markup=InlineKeyboardMarkup(
@@ -583,10 +678,7 @@ async def admin_del_date_confirm(update: Update, context: ContextTypes.DEFAULT_T
     # --- КІНЕЦЬ ВИПРАВЛЕННЯ ---
 
     try:
-        sheets = GoogleSheetsClient(GOOGLE_SHEETS_ID)
-        ok = sheets.clear_cell(sheet_name="MuseumDates", cell=cell_to_delete)
-        if ok:
-            museum_service.invalidate_dates_cache()
+        ok = await museum_service.delete_date(cell_to_delete, date_str)
 
         # --- ПОЧАТОК ВИПРАВЛЕННЯ 2 ---
         if ok:
@@ -722,8 +814,7 @@ async def admin_menu_show(update: Update, context: ContextTypes.DEFAULT_TYPE):
     Повертає адміна до ПОВНОГО головного меню адмін-панелі.
     Працює і з командами (/admin_museum), і з кнопками (Назад).
     """
-    keyboard = await get_admin_main_menu_keyboard()
-    text = "👋 Вітаємо в адмін-панелі Музею!"
+    text, keyboard = MENUS["museum_admin"]
 
     if update.callback_query:
         # Якщо це натискання кнопки
@@ -796,30 +887,9 @@ async def admin_add_holiday_date_save(update: Update, context: ContextTypes.DEFA
             raise ValueError("Дата не може бути у минулому.")
 
         # --- ВАЛІДАЦІЯ ПРОЙДЕНА ---
-        sheets = GoogleSheetsClient(GOOGLE_SHEETS_ID)
-        
-        loop = asyncio.get_running_loop()
-        dates_data = await loop.run_in_executor(
-            None,
-            sheets.read_range,
-            "MuseumDates!B1:B100"
-        )
-        
-        first_empty_row = 1
-        if dates_data:
-            first_empty_row = len(dates_data) + 1
-        
-        cell_ref = f"B{first_empty_row}"
-        
-        await loop.run_in_executor(
-            None,
-            sheets.update_cell,
-            "MuseumDates",
-            cell_ref,
-            date_text
-        )
-        
-        museum_service.invalidate_holiday_dates_cache()
+        cell_ref = await museum_service.add_holiday_date(date_text)
+        if not cell_ref:
+            raise RuntimeError("Google Sheets недоступна")
 
         logger.info(f"✅ Admin added new holiday date: {date_text} in {cell_ref}")
         await update.message.reply_text(f"✅ Святкову дату '<b>{date_text}</b>' успішно додано.", parse_mode=ParseMode.HTML)
@@ -853,14 +923,7 @@ async def admin_del_holiday_date_menu(update: Update, context: ContextTypes.DEFA
     await query.edit_message_text("⏳ Завантажую список святкових дат...")
 
     try:
-        sheets = GoogleSheetsClient(GOOGLE_SHEETS_ID)
-        loop = asyncio.get_running_loop()
-
-        dates_data = await loop.run_in_executor(
-            None,
-            sheets.read_range,
-            "MuseumDates!B1:B100"
-        )
+        dates_data = await sheets_client.read_range("MuseumDates!B1:B100")
 
         keyboard = []
         for i, row in enumerate(dates_data):
@@ -900,10 +963,7 @@ async def admin_del_holiday_date_confirm(update: Update, context: ContextTypes.D
             break
 
     try:
-        sheets = GoogleSheetsClient(GOOGLE_SHEETS_ID)
-        ok = sheets.clear_cell(sheet_name="MuseumDates", cell=cell_to_delete)
-        if ok:
-            museum_service.invalidate_holiday_dates_cache()
+        ok = await museum_service.delete_date(cell_to_delete, date_str)
 
         if ok:
             await query.edit_message_text(
@@ -1,8 +1,8 @@
-from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
+from telegram import Update
 from telegram.ext import ContextTypes
 from config.messages import MESSAGES
 from utils.logger import logger
-from config.settings import MUSEUM_ADMIN_IDS, GENERAL_ADMIN_IDS
+from handlers.keyboards import MENUS, main_menu_keyboard
 from services.user_service import UserService
 
 # Ініціалізація
@@ -10,45 +10,13 @@ user_service = UserService()
 
 
 async def get_main_menu_keyboard(user_id: int):
-    """Повертає клавіатуру головного меню з урахуванням прав доступу"""
-    keyboard = [
-        [InlineKeyboardButton("📍 Де мій транспорт? (Real-time)", callback_data="realtime_transport")],
-        [InlineKeyboardButton("♿ Пошук низькопідлогового транспорту", callback_data="accessible_start")],
-        [InlineKeyboardButton("🎫 Квитки та тарифи", callback_data="tickets_menu")],
-        [InlineKeyboardButton("✍️ Звернення та пропозиції", callback_data="feedback_menu")],
-        [InlineKeyboardButton("🔍 Загублені речі", callback_data="lost_items")],
-        [InlineKeyboardButton("ℹ️ Довідкова інформація", callback_data="info_menu")],
-        [InlineKeyboardButton("👔 Вакансії", callback_data="vacancies_menu")],
-        [InlineKeyboardButton("🎓 Учбово-курсовий комбінат", callback_data="education_menu")],
-        [InlineKeyboardButton("🏛️ Музей КП 'ОМЕТ'", callback_data="museum_menu")],
-        [InlineKeyboardButton("🏢 Про підприємство", callback_data="company_menu")],
-        [InlineKeyboardButton("🔔 Сповіщення від бота", callback_data="subscription_menu")]
-    ]
-    # 1. Якщо це Максим -> Додаємо кнопку Музею
-    if user_id in MUSEUM_ADMIN_IDS:
-        keyboard.append([InlineKeyboardButton("🏛️ Адмін-панель (Музей)", callback_data="admin_museum_menu")])
-
-    # 2. Якщо це Ви або Тетяна -> Додаємо кнопку Загальної Адмінки
-    if user_id in GENERAL_ADMIN_IDS:
-        keyboard.append(
-            [InlineKeyboardButton("📢 Адмін-панель (Новини/Стат)", callback_data="general_admin_menu")]
-        )
-
-    return InlineKeyboardMarkup(keyboard)
+    """Повертає клавіатуру головного меню з урахуванням прав доступу (готова, з реєстру)."""
+    return main_menu_keyboard(user_id)
 
 
 async def get_admin_main_menu_keyboard():
     """Повертає клавіатуру головного меню для Адміна Музею."""
-    keyboard = [
-        [InlineKeyboardButton("➕ Додати дату екскурсії", callback_data="admin_add_date")],
-        [InlineKeyboardButton("➖ Видалити дату екскурсії", callback_data="admin_del_date_menu")],
-        [InlineKeyboardButton("📋 Перелік зареєстрованих", callback_data="admin_show_bookings")],
-        [InlineKeyboardButton("🎉➕ Додати дату святкової екскурсії", callback_data="admin_add_holiday_date")],
-        [InlineKeyboardButton("🎉➖ Видалити дату святкової екскурсії", callback_data="admin_del_holiday_date_menu")],
-        [InlineKeyboardButton("🎉📋 Перелік зареєстрованих (святкові)", callback_data="admin_show_holiday_bookings")],
-        [InlineKeyboardButton("👤 Режим користувача", callback_data="main_menu")],
-    ]
-    return InlineKeyboardMarkup(keyboard)
+    return MENUS["museum_admin"].keyboard
 
 
 async def cmd_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -1,11 +1,16 @@
 import asyncio
+import functools
+import math
 from typing import Optional
-from telegram import InlineKeyboardButton, InlineKeyboardMarkup
+from telegram import InlineKeyboardMarkup
 from telegram import Update
-from telegram.ext import ContextTypes
+from telegram.ext import ApplicationHandlerStop, ContextTypes
 from telegram.constants import ParseMode
+from handlers import keyboards
 from handlers.command_handlers import get_main_menu_keyboard
+from services.message_deleter import message_deleter
 from utils.logger import logger  # Додати імпорт нагорі
+from utils.rate_limit import Denial, rate_limiter
 
 
 
@@ -29,19 +34,12 @@ async def dismiss_broadcast_message(update: Update, context: ContextTypes.DEFAUL
 
 async def get_back_keyboard(callback_data: str = "main_menu") -> InlineKeyboardMarkup:
     """Повертає клавіатуру з кнопками навігації."""
-    keyboard = [
-        [InlineKeyboardButton("⬅️ Назад", callback_data=callback_data)],
-        [InlineKeyboardButton("🏠 Головне меню", callback_data="main_menu")]
-    ]
-    return InlineKeyboardMarkup(keyboard)
+    return keyboards.back_keyboard(callback_data)
 
 
 async def get_back_button_only(callback_data: str = "main_menu") -> InlineKeyboardMarkup:
     """Повертає клавіатуру тільки з кнопкою 'Назад'."""
-    keyboard = [
-        [InlineKeyboardButton("⬅️ Назад", callback_data=callback_data)]
-    ]
-    return InlineKeyboardMarkup(keyboard)
+    return keyboards.back_button_only(callback_data)
 
 
 async def get_cancel_keyboard(cancel_callback: str = "museum_menu") -> InlineKeyboardMarkup:
@@ -49,22 +47,14 @@ async def get_cancel_keyboard(cancel_callback: str = "museum_menu") -> InlineKey
     Повертає клавіатуру для скасування поточного діалогу.
     'cancel_callback' - це куди поверне кнопка "Скасувати" (за замовчуванням - меню музею).
     """
-    keyboard = [
-        [InlineKeyboardButton("🚫 Скасувати реєстрацію", callback_data=cancel_callback)],
-        [InlineKeyboardButton("🏠 Головне меню", callback_data="main_menu")]
-    ]
-    return InlineKeyboardMarkup(keyboard)
+    return keyboards.cancel_keyboard(cancel_callback)
 
 
 async def get_feedback_cancel_keyboard(cancel_callback: str = "feedback_menu") -> InlineKeyboardMarkup:
     """
     Повертає клавіатуру для скасування діалогів зворотнього зв'язку.
     """
-    keyboard = [
-        [InlineKeyboardButton("🚫 Скасувати", callback_data=cancel_callback)],
-        [InlineKeyboardButton("🏠 Головне меню", callback_data="main_menu")]
-    ]
-    return InlineKeyboardMarkup(keyboard)
+    return keyboards.feedback_cancel_keyboard(cancel_callback)
 
 
 async def handle_unexpected_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -93,7 +83,7 @@ async def handle_unexpected_message(update: Update, context: ContextTypes.DEFAUL
 
     # Логування (опціонально)
     user = update.effective_user
-    logger.info(f"User {user.id} triggered Anti-Spam.")
+    logger.info(f"User {user.id} triggered Anti-Spam.", extra={"log_key": "anti_spam"})
 
     warning_text = (
         "🧐 <b>Я Вас не розумію...</b>\n\n"
@@ -118,6 +108,75 @@ async def handle_unexpected_message(update: Update, context: ContextTypes.DEFAUL
         context.user_data['warning_active'] = False
 
 
+def _rate_limit_text(denial: Denial) -> str:
+    seconds = max(1, math.ceil(denial.retry_after))
+    if denial.scope == "user":
+        return f"⏳ Забагато запитів. Спробуйте через {seconds} с."
+    return f"🚦 Сервіс зараз перевантажений. Спробуйте через {seconds} с."
+
+
+async def notify_rate_limited(update: Update, context: ContextTypes.DEFAULT_TYPE, denial: Denial):
+    """
+    Повідомляє користувача про ліміт, не змінюючи екран:
+    кнопка — коротким сповіщенням, текст — видаляємо і показуємо тимчасове попередження.
+    """
+    text = _rate_limit_text(denial)
+    query = update.callback_query
+    if query:
+        try:
+            await query.answer(text)
+        except Exception:
+            pass
+        return
+
+    if update.message:
+        message_deleter.delete(context.bot, update.effective_chat.id, [update.message.message_id])
+        # Як і в антиспамі: одне попередження на раз, далі лише мовчки видаляємо
+        if context.user_data.get('warning_active'):
+            return
+        context.user_data['warning_active'] = True
+        try:
+            sent = await context.bot.send_message(chat_id=update.effective_chat.id, text=text)
+            asyncio.create_task(cleanup_warning_task(context, sent.message_id, update.effective_chat.id))
+        except Exception:
+            context.user_data['warning_active'] = False
+
+
+def rate_limited(action: str):
+    """
+    Декоратор обробника: дія проходить лише з токеном з utils.rate_limit (клас дії action).
+    Відхилений виклик повертає None — ConversationHandler лишається в поточному стані.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(update: Update, context: ContextTypes.DEFAULT_TYPE, *args, **kwargs):
+            user = update.effective_user
+            denial = rate_limiter.check(user.id, action) if user else None
+            if denial is not None:
+                logger.info(f"🚦 User {user.id} rate limited on '{action}' ({denial.scope})",
+                            extra={"log_key": "rate_limited"})
+                await notify_rate_limited(update, context, denial)
+                return None
+            return await func(update, context, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+async def flood_guard(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """
+    Загальний захист від флуду (TypeHandler у групі FLOOD_GUARD_GROUP, раніше за всі обробники):
+    апдейти понад ліміт "update" не доходять до обробників і не звертаються до EasyWay/БД.
+    Слот UpdateProcessor такий апдейт все ж займає, але лише на час перевірки ліміту.
+    """
+    user = update.effective_user if isinstance(update, Update) else None
+    if user is None:
+        return
+    denial = rate_limiter.check(user.id, "update")
+    if denial is not None:
+        await notify_rate_limited(update, context, denial)
+        raise ApplicationHandlerStop
+
+
 async def cleanup_warning_task(context, message_id, chat_id):
     """
     Ця функція працює у фоновому режимі паралельно з основним ботом.
@@ -125,13 +184,10 @@ async def cleanup_warning_task(context, message_id, chat_id):
     """
     await asyncio.sleep(5)  # Чекаємо тут, нікому не заважаючи
 
-    try:
-        await context.bot.delete_message(chat_id=chat_id, message_id=message_id)
-    except Exception:
-        pass  # Повідомлення могло бути видалене вручну
-    finally:
-        # Знімаємо прапорець - тепер можна надсилати нове попередження
-        context.user_data['warning_active'] = False
+    # Разом з іншими видаленнями в цьому чаті; якщо повідомлення вже видалене вручну — лише debug-лог
+    message_deleter.delete(context.bot, chat_id, [message_id])
+    # Знімаємо прапорець - тепер можна надсилати нове попередження
+    context.user_data['warning_active'] = False
 
 
 async def safe_delete_prev_message(context: ContextTypes.DEFAULT_TYPE, chat_id: int):
@@ -144,13 +200,10 @@ async def safe_delete_prev_message(context: ContextTypes.DEFAULT_TYPE, chat_id:
         msg_id = context.user_data.get('dialog_message_id')
 
     if msg_id:
-        try:
-            await context.bot.delete_message(chat_id=chat_id, message_id=msg_id)
-        except Exception as e:
-            logger.warning(f"Could not delete message {msg_id}: {e}")
-        finally:
-            context.user_data['last_bot_msg_id'] = None
-            context.user_data['dialog_message_id'] = None
+        # Видалення йде пакетом у фоні (message_deleter), обробник не чекає на Telegram
+        message_deleter.delete(context.bot, chat_id, [msg_id])
+        context.user_data['last_bot_msg_id'] = None
+        context.user_data['dialog_message_id'] = None
 
 
 async def safe_edit_prev_message(
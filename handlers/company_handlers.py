@@ -3,9 +3,12 @@ from telegram.ext import ContextTypes
 from telegram.constants import ParseMode
 from config.messages import MESSAGES
 from handlers.common import get_back_keyboard
+from handlers.keyboards import MENUS
+from services.message_deleter import message_deleter
 from utils.logger import logger
 from telegram.constants import ParseMode
 from config.settings import RENTAL_SERVICE_IMAGE
+from services.file_id_cache import file_id_cache
 
 
 # База даних вакансій (з досвідом)
@@ -33,16 +36,7 @@ async def show_company_menu(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
     await query.answer()
 
-    keyboard = [
-        # Припускаю, що "Вакансії" та "Навчання" вже перенесені
-        [InlineKeyboardButton("🏛️ Історія та сучасність", callback_data="company:history")],
-        [InlineKeyboardButton("🚌 Оренда та послуги", callback_data="company:services")],
-        [InlineKeyboardButton("📰 Новини / Соц. мережі", callback_data="company:socials")],
-        [InlineKeyboardButton("⬅️ Назад", callback_data="main_menu")],
-        [InlineKeyboardButton("🏠 Головне меню", callback_data="main_menu")]
-    ]
-    reply_markup = InlineKeyboardMarkup(keyboard)
-    text = "🏢 Розділ 'Про підприємство'. Оберіть опцію:"
+    text, reply_markup = MENUS["company"]
 
     # 1. Спроба "м'якого" редагування (якщо ми переходимо з текстового розділу)
     try:
@@ -68,12 +62,7 @@ async def show_company_menu(update: Update, context: ContextTypes.DEFAULT_TYPE):
         pass
 
     if 'media_message_ids' in context.user_data:
-        for msg_id in context.user_data['media_message_ids']:
-            try:
-                await context.bot.delete_message(chat_id=update.effective_chat.id, message_id=msg_id)
-            except Exception:
-                pass
-        del context.user_data['media_message_ids']
+        message_deleter.delete(context.bot, update.effective_chat.id, context.user_data.pop('media_message_ids'))
 
 
 
@@ -129,15 +118,14 @@ async def show_services_menu(update: Update, context: ContextTypes.DEFAULT_TYPE)
         loading_msg = await query.message.reply_text("⏳ Завантажую...")
 
     try:
-        # 2. Відкриваємо і надсилаємо фото
-        with open(RENTAL_SERVICE_IMAGE, 'rb') as photo:
-            sent_msg = await context.bot.send_photo(
-                chat_id=chat_id,
-                photo=photo,
-                caption=caption_text,
-                reply_markup=reply_markup,
-                parse_mode=ParseMode.HTML
-            )
+        # 2. Надсилаємо фото (після першого разу — за file_id, без завантаження)
+        sent_msg = await file_id_cache.send(
+            context.bot.send_photo, "photo", RENTAL_SERVICE_IMAGE,
+            chat_id=chat_id,
+            caption=caption_text,
+            reply_markup=reply_markup,
+            parse_mode=ParseMode.HTML
+        )
 
         # 3. Зберігаємо ID фото (щоб кнопка "Назад" могла його видалити, як в інших меню)
         context.user_data['media_message_ids'] = [sent_msg.message_id]
@@ -1,5 +1,6 @@
-from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
+from telegram import Update
 from telegram.ext import ContextTypes, ConversationHandler
+from handlers.keyboards import MENUS
 from utils.logger import logger
 
 
@@ -8,15 +9,7 @@ async def show_feedback_menu(update: Update, context: ContextTypes.DEFAULT_TYPE)
     query = update.callback_query
     await query.answer()
 
-    keyboard = [
-        [InlineKeyboardButton("😞 Залишити скаргу", callback_data="complaint")],
-        [InlineKeyboardButton("❤️ Висловити подяку", callback_data="thanks")],
-        [InlineKeyboardButton("💡 Залишити пропозицію", callback_data="suggestion")],
-        [InlineKeyboardButton("⬅️ Назад", callback_data="main_menu")],
-        [InlineKeyboardButton("🏠 Головне меню", callback_data="main_menu")]
-    ]
-    reply_markup = InlineKeyboardMarkup(keyboard)
-    text = "✍️ Оберіть опцію зворотнього зв'язку:"
+    text, reply_markup = MENUS["feedback"]
 
     # --- ПОЧАТОК ВИПРАВЛЕННЯ: Логіка Edit/Delete ---
     # (Потрібно, бо ми можемо прийти сюди з текстового повідомлення)
@@ -1,10 +1,12 @@
-from telegram import Update, InlineKeyboardMarkup, InlineKeyboardButton
+from telegram import Update
 from telegram.constants import ParseMode
 from telegram.ext import ContextTypes
 from config.messages import MESSAGES
 from handlers.common import get_back_keyboard
+from handlers.keyboards import MENUS
 from utils.logger import logger
 from config.settings import RULES_PDF_PATH
+from services.file_id_cache import file_id_cache
 
 
 
@@ -14,17 +16,7 @@ async def show_info_menu(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
     await query.answer()
 
-    keyboard = [
-        [InlineKeyboardButton("📜 Правила користування", callback_data="info:rules")],
-        [InlineKeyboardButton("♿ Доступність (Інклюзивність)", callback_data="info:accessibility")],
-        [InlineKeyboardButton("📞 Контакти", callback_data="info:contacts")],
-        [InlineKeyboardButton("⬅️ Назад", callback_data="main_menu")],
-        [InlineKeyboardButton("🏠 Головне меню", callback_data="main_menu")]
-    ]
-
-    # Визначаємо текст та клавіатуру заздалегідь
-    reply_markup = InlineKeyboardMarkup(keyboard)
-    text = "ℹ️ Розділ 'Довідкова інформація'. Оберіть опцію:"
+    text, reply_markup = MENUS["info"]
 
     # --- ПОЧАТОК ВИПРАВЛЕННЯ --- 03.11.2025 10:01
 
@@ -63,14 +55,13 @@ async def send_rules_pdf(update: Update, context: ContextTypes.DEFAULT_TYPE):
     caption_text = MESSAGES.get("info_rules")
 
     try:
-        # 1. Спочатку надсилаємо документ користувачу
-        with open(RULES_PDF_PATH, 'rb') as document:
-            await query.message.reply_document(
-                document=document,
-                filename="Pravyla_OMET.pdf",  # Назва файлу, яку побачить користувач
-                caption=caption_text,
-                reply_markup=keyboard
-            )
+        # 1. Спочатку надсилаємо документ користувачу (після першого разу — за file_id, без завантаження)
+        await file_id_cache.send(
+            query.message.reply_document, "document", RULES_PDF_PATH,
+            filename="Pravyla_OMET.pdf",  # Назва файлу, яку побачить користувач
+            caption=caption_text,
+            reply_markup=keyboard
+        )
 
         # 2. Після цього пробуємо видалити старе меню \"Довідка\",
         # щоб уникнути короткого періоду без жодного повідомлення.
@@ -0,0 +1,135 @@
+# handlers/keyboards.py
+"""Реєстр статичних меню: тексти й клавіатури будуються один раз при імпорті."""
+from functools import lru_cache
+from typing import NamedTuple
+
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup
+
+from config.messages import MESSAGES
+from config.settings import GENERAL_ADMIN_IDS, MUSEUM_ADMIN_IDS
+
+BACK = "⬅️ Назад"
+HOME = "🏠 Головне меню"
+
+
+class Menu(NamedTuple):
+    text: str
+    keyboard: InlineKeyboardMarkup
+
+
+def _markup(*rows) -> InlineKeyboardMarkup:
+    """Кожен рядок — одна кнопка (текст, callback_data)."""
+    return InlineKeyboardMarkup([[InlineKeyboardButton(text, callback_data=data)] for text, data in rows])
+
+
+_NAV = ((BACK, "main_menu"), (HOME, "main_menu"))
+
+_MAIN_MENU_ROWS = (
+    ("📍 Де мій транспорт? (Real-time)", "realtime_transport"),
+    ("♿ Пошук низькопідлогового транспорту", "accessible_start"),
+    ("🎫 Квитки та тарифи", "tickets_menu"),
+    ("✍️ Звернення та пропозиції", "feedback_menu"),
+    ("🔍 Загублені речі", "lost_items"),
+    ("ℹ️ Довідкова інформація", "info_menu"),
+    ("👔 Вакансії", "vacancies_menu"),
+    ("🎓 Учбово-курсовий комбінат", "education_menu"),
+    ("🏛️ Музей КП 'ОМЕТ'", "museum_menu"),
+    ("🏢 Про підприємство", "company_menu"),
+    ("🔔 Сповіщення від бота", "subscription_menu"),
+)
+_MUSEUM_ADMIN_ROW = ("🏛️ Адмін-панель (Музей)", "admin_museum_menu")
+_GENERAL_ADMIN_ROW = ("📢 Адмін-панель (Новини/Стат)", "general_admin_menu")
+
+# {(адмін музею?, загальний адмін?): клавіатура} — усі чотири ролі будуються одразу
+_MAIN_MENUS = {
+    (museum_admin, general_admin): _markup(
+        *_MAIN_MENU_ROWS,
+        *((_MUSEUM_ADMIN_ROW,) if museum_admin else ()),
+        *((_GENERAL_ADMIN_ROW,) if general_admin else ()),
+    )
+    for museum_admin in (False, True)
+    for general_admin in (False, True)
+}
+
+MENUS = {
+    "main": Menu(MESSAGES["menu_main"], _MAIN_MENUS[(False, False)]),
+    "tickets": Menu(MESSAGES["menu_tickets"], _markup(
+        ("💰 Вартість проїзду", "tickets:cost"),
+        ("💳 Способи оплати", "tickets:payment"),
+        ("🧾 Види проїзних", "tickets:passes"),
+        ("🏪 Де придбати?", "tickets:purchase"),
+        ("👵 Пільговий проїзд", "tickets:benefits"),
+        *_NAV,
+    )),
+    "info": Menu(MESSAGES["menu_info"], _markup(
+        ("📜 Правила користування", "info:rules"),
+        ("♿ Доступність (Інклюзивність)", "info:accessibility"),
+        ("📞 Контакти", "info:contacts"),
+        *_NAV,
+    )),
+    "company": Menu(MESSAGES["menu_company"], _markup(
+        ("🏛️ Історія та сучасність", "company:history"),
+        ("🚌 Оренда та послуги", "company:services"),
+        ("📰 Новини / Соц. мережі", "company:socials"),
+        *_NAV,
+    )),
+    "museum": Menu(MESSAGES["menu_museum"], _markup(
+        ("🖼️ Інфо про музей", "museum:info"),
+        ("📱 Соц. мережі музею", "museum:socials"),
+        ("🗓️ Запис на екскурсію", "museum:register_start"),
+        ("🎉 Запис на святкову екскурсію", "museum:holiday_register_start"),
+        *_NAV,
+    )),
+    "feedback": Menu(MESSAGES["menu_feedback"], _markup(
+        ("😞 Залишити скаргу", "complaint"),
+        ("❤️ Висловити подяку", "thanks"),
+        ("💡 Залишити пропозицію", "suggestion"),
+        *_NAV,
+    )),
+    "subscription": Menu(MESSAGES["menu_subscription"], _markup(
+        ("✅ Так, я згоден", "sub:yes"),
+        ("🔕 Ні, не потрібно", "sub:no"),
+        (BACK, "main_menu"),
+    )),
+    "museum_admin": Menu(MESSAGES["menu_museum_admin"], _markup(
+        ("➕ Додати дату екскурсії", "admin_add_date"),
+        ("➖ Видалити дату екскурсії", "admin_del_date_menu"),
+        ("📋 Перелік зареєстрованих", "admin_show_bookings"),
+        ("🎉➕ Додати дату святкової екскурсії", "admin_add_holiday_date"),
+        ("🎉➖ Видалити дату святкової екскурсії", "admin_del_holiday_date_menu"),
+        ("🎉📋 Перелік зареєстрованих (святкові)", "admin_show_holiday_bookings"),
+        ("👤 Режим користувача", "main_menu"),
+    )),
+    "general_admin": Menu("", _markup(  # текст зі статистикою формується в обробнику
+        ("📢 Зробити розсилку (Новини)", "admin_broadcast_start"),
+        ("🔄 Синхронізувати БД -> Sheets", "admin_sync_db"),
+        ("📊 Статистика", "admin_stats"),
+        ("🏠 В режим користувача", "main_menu"),
+    )),
+}
+
+
+def main_menu_keyboard(user_id: int) -> InlineKeyboardMarkup:
+    """Клавіатура головного меню для ролі користувача (адмінські кнопки — лише адмінам)."""
+    return _MAIN_MENUS[(user_id in MUSEUM_ADMIN_IDS, user_id in GENERAL_ADMIN_IDS)]
+
+
+# Навігаційні клавіатури: callback_data — скінченний набір рядків з коду, тож кеш не росте
+@lru_cache(maxsize=256)
+def back_keyboard(callback_data: str = "main_menu") -> InlineKeyboardMarkup:
+    return _markup((BACK, callback_data), (HOME, "main_menu"))
+
+
+@lru_cache(maxsize=256)
+def back_button_only(callback_data: str = "main_menu") -> InlineKeyboardMarkup:
+    return _markup((BACK, callback_data))
+
+
+@lru_cache(maxsize=256)
+def cancel_keyboard(cancel_callback: str = "museum_menu") -> InlineKeyboardMarkup:
+    return _markup(("🚫 Скасувати реєстрацію", cancel_callback), (HOME, "main_menu"))
+
+
+@lru_cache(maxsize=256)
+def feedback_cancel_keyboard(cancel_callback: str = "feedback_menu") -> InlineKeyboardMarkup:
+    return _markup(("🚫 Скасувати", cancel_callback), (HOME, "main_menu"))
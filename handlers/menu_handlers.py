@@ -2,7 +2,8 @@ from telegram import Update
 from telegram.constants import ParseMode
 from telegram.ext import ContextTypes, ConversationHandler
 from utils.logger import logger
-from handlers.command_handlers import get_main_menu_keyboard  # Перевірте правильність імпорту
+from handlers.keyboards import MENUS, main_menu_keyboard
+from services.message_deleter import message_deleter
 
 
 async def main_menu(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -10,20 +11,14 @@ async def main_menu(update: Update, context: ContextTypes.DEFAULT_TYPE):
     Повернення в головне меню.
     Єдина точка входу для відображення меню.
     """
-    logger.info(f"User {update.effective_user.id} returned to main menu")
+    logger.info(f"User {update.effective_user.id} returned to main menu", extra={"log_key": "main_menu"})
 
-    keyboard = await get_main_menu_keyboard(update.effective_user.id)
-    text = "🚊 <b>Вас вітає бот Одеського міського електротранспорту!</b>\n\nОберіть потрібну опцію:"
+    keyboard = main_menu_keyboard(update.effective_user.id)
+    text = MENUS["main"].text
 
-    # --- 1. Очищення старих медіа (залишаємо як було) ---
+    # --- 1. Очищення старих медіа (одним запитом, у фоні) ---
     if 'media_message_ids' in context.user_data:
-        chat_id = update.effective_chat.id
-        for msg_id in context.user_data['media_message_ids']:
-            try:
-                await context.bot.delete_message(chat_id=chat_id, message_id=msg_id)
-            except Exception:
-                pass
-        del context.user_data['media_message_ids']
+        message_deleter.delete(context.bot, update.effective_chat.id, context.user_data.pop('media_message_ids'))
 
     # --- 2. Логіка відображення ---
 
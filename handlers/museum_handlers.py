@@ -8,14 +8,15 @@ from telegram.constants import ParseMode
 from config.messages import MESSAGES
 from config.settings import MUSEUM_LOGO_IMAGE, MUSEUM_ADMIN_ID, MUSEUM_ADMIN_IDS # GOOGLE_SHEETS_ID вже не потрібен тут
 from handlers.common import get_back_keyboard, get_cancel_keyboard
+from handlers.keyboards import MENUS
 from bot.states import States
 from utils.logger import logger
 
 # Імпорт  нового сервісу
-from services.museum_service import MuseumService
+from services.museum_service import museum_service
+from services.message_deleter import message_deleter
 
 # Ініціалізація сервісу (один раз)
-museum_service = MuseumService()
 
 
 async def _edit_museum_dialog_message(
@@ -161,50 +162,18 @@ async def show_museum_menu(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
     await query.answer()
 
-    # --- ВИДАЛЯЄМО ПОВІДОМЛЕННЯ З КНОПКОЮ "СКАСУВАТИ" ---
-    if 'cancel_message_id' in context.user_data:
-        try:
-            await context.bot.delete_message(
-                chat_id=update.effective_chat.id,
-                message_id=context.user_data['cancel_message_id']
-            )
-            logger.info(f"✅ Deleted cancel button message: {context.user_data['cancel_message_id']}")
-        except Exception as e:
-            logger.warning(f"Could not delete cancel message: {e}")
-        del context.user_data['cancel_message_id']
-
-    # --- ВИДАЛЯЄМО ФОТО ---
-    if 'media_message_ids' in context.user_data:
-        chat_id = update.effective_chat.id
-        for msg_id in context.user_data['media_message_ids']:
-            try:
-                await context.bot.delete_message(chat_id=chat_id, message_id=msg_id)
-            except Exception as e:
-                logger.warning(f"Could not delete message {msg_id}: {e}")
-        del context.user_data['media_message_ids']
-
-    # Видаляємо останнє повідомлення-запитання з діалогу (якщо воно є)
-    if 'dialog_message_id' in context.user_data:
-        try:
-            await context.bot.delete_message(
-                chat_id=update.effective_chat.id,
-                message_id=context.user_data['dialog_message_id']
-            )
-        except Exception as e:
-            logger.warning(f"Could not delete dialog message on cancel (museum): {e}")
-        del context.user_data['dialog_message_id']
-
-    # --- ВИДАЛЯЄМО ПОВІДОМЛЕННЯ З ДАТАМИ ---
-    if 'dates_message_id' in context.user_data:
-        try:
-            await context.bot.delete_message(
-                chat_id=update.effective_chat.id,
-                message_id=context.user_data['dates_message_id']
-            )
-            logger.info(f"✅ Deleted dates message: {context.user_data['dates_message_id']}")
-        except Exception as e:
-            logger.warning(f"Could not delete dates message: {e}")
-        del context.user_data['dates_message_id']
+    # --- ВИДАЛЯЄМО "СКАСУВАТИ", ФОТО, ПИТАННЯ ДІАЛОГУ ТА ДАТИ — одним запитом ---
+    to_delete = [
+        context.user_data.pop('cancel_message_id', None),
+        *context.user_data.pop('media_message_ids', []),
+        context.user_data.pop('dialog_message_id', None),
+        context.user_data.pop('dates_message_id', None),
+    ]
+    # Повідомлення з натиснутою кнопкою не видаляємо — нижче воно стане меню музею
+    message_deleter.delete(
+        context.bot, update.effective_chat.id,
+        [msg_id for msg_id in to_delete if msg_id and msg_id != query.message.message_id]
+    )
 
     # Очищуємо всі дані реєстрації
     context.user_data.pop('museum_date', None)
@@ -214,16 +183,7 @@ async def show_museum_menu(update: Update, context: ContextTypes.DEFAULT_TYPE):
     context.user_data.pop('museum_edit_mode', None)
     context.user_data.pop('museum_edit_field', None)
 
-    keyboard = [
-        [InlineKeyboardButton("🖼️ Інфо про музей", callback_data="museum:info")],
-        [InlineKeyboardButton("📱 Соц. мережі музею", callback_data="museum:socials")],
-        [InlineKeyboardButton("🗓️ Запис на екскурсію", callback_data="museum:register_start")],
-        [InlineKeyboardButton("🎉 Запис на святкову екскурсію", callback_data="museum:holiday_register_start")],
-        [InlineKeyboardButton("⬅️ Назад", callback_data="main_menu")],
-        [InlineKeyboardButton("🏠 Головне меню", callback_data="main_menu")]
-    ]
-    reply_markup = InlineKeyboardMarkup(keyboard)
-    text = "🏛️ Розділ 'Музей КП 'ОМЕТ''. Оберіть опцію:"
+    text, reply_markup = MENUS["museum"]
 
     # --- ВИПРАВЛЕННЯ: РЕДАГУВАННЯ ЗАМІСТЬ ВИДАЛЕННЯ ---
     try:
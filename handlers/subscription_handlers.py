@@ -1,9 +1,9 @@
 # handlers/subscription_handlers.py
-from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
+from telegram import Update
 from telegram.ext import ContextTypes
 from telegram.constants import ParseMode
 from services.user_service import UserService
-from handlers.command_handlers import get_main_menu_keyboard  # Імпорт для повернення в меню
+from handlers.keyboards import MENUS, main_menu_keyboard
 
 user_service = UserService()
 
@@ -13,24 +13,11 @@ async def show_subscription_menu(update: Update, context: ContextTypes.DEFAULT_T
     query = update.callback_query
     await query.answer()
 
-    text = (
-        "🔔 <b>Налаштування сповіщень</b>\n\n"
-        "Чи бажаєте Ви отримувати важливі повідомлення про:\n"
-        "🚋 Зміни в роботі транспорту\n"
-        "🗞 Актуальні новини КП «ОМЕТ»\n"
-        "🚨 Екстрені ситуації\n\n"
-        "<i>Ми не надсилаємо спам, лише важливу інформацію!</i>"
-    )
-
-    keyboard = [
-        [InlineKeyboardButton("✅ Так, я згоден", callback_data="sub:yes")],
-        [InlineKeyboardButton("🔕 Ні, не потрібно", callback_data="sub:no")],
-        [InlineKeyboardButton("⬅️ Назад", callback_data="main_menu")]
-    ]
+    text, reply_markup = MENUS["subscription"]
 
     await query.edit_message_text(
         text=text,
-        reply_markup=InlineKeyboardMarkup(keyboard),
+        reply_markup=reply_markup,
         parse_mode=ParseMode.HTML
     )
 
@@ -59,7 +46,7 @@ async def handle_subscription_choice(update: Update, context: ContextTypes.DEFAU
         )
 
     # Повертаємо в головне меню з новим текстом
-    main_keyboard = await get_main_menu_keyboard(user_id)
+    main_keyboard = main_menu_keyboard(user_id)
 
     # Показуємо результат БЕЗ «порожнього» екрану:
     # спочатку пробуємо відредагувати поточне повідомлення,
@@ -1,9 +1,12 @@
-from telegram import Update, InlineKeyboardMarkup, InlineKeyboardButton
+from telegram import Update
 from telegram.ext import ContextTypes
 from config.messages import MESSAGES
+from handlers.keyboards import MENUS
+from services.message_deleter import message_deleter
 from config.settings import (
-    TICKET_PASSES_FILE_ID_1, TICKET_PASSES_FILE_ID_2
+    TICKET_PASSES_IMAGE_1, TICKET_PASSES_IMAGE_2
 )
+from services.file_id_cache import file_id_cache
 from handlers.common import get_back_keyboard
 from telegram.constants import ParseMode
 from utils.logger import logger
@@ -48,26 +51,10 @@ async def show_tickets_menu(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     # --- 1. Очищення медіа (фото проїзних), якщо вони є ---
     if 'media_message_ids' in context.user_data:
-        chat_id = update.effective_chat.id
-        for msg_id in context.user_data['media_message_ids']:
-            try:
-                await context.bot.delete_message(chat_id=chat_id, message_id=msg_id)
-            except Exception as e:
-                logger.warning(f"Could not delete media message {msg_id}: {e}")
-        del context.user_data['media_message_ids']
+        message_deleter.delete(context.bot, update.effective_chat.id, context.user_data.pop('media_message_ids'))
 
     # --- 2. Формування меню ---
-    keyboard = [
-        [InlineKeyboardButton("💰 Вартість проїзду", callback_data="tickets:cost")],
-        [InlineKeyboardButton("💳 Способи оплати", callback_data="tickets:payment")],
-        [InlineKeyboardButton("🧾 Види проїзних", callback_data="tickets:passes")],
-        [InlineKeyboardButton("🏪 Де придбати?", callback_data="tickets:purchase")],
-        [InlineKeyboardButton("👵 Пільговий проїзд", callback_data="tickets:benefits")],
-        [InlineKeyboardButton("⬅️ Назад", callback_data="main_menu")],
-        [InlineKeyboardButton("🏠 Головне меню", callback_data="main_menu")]
-    ]
-    reply_markup = InlineKeyboardMarkup(keyboard)
-    text = "🎫 Розділ 'Квитки та тарифи'. Оберіть опцію:"
+    text, reply_markup = MENUS["tickets"]
 
     # --- 3. Відображення (редагування або нове) ---
     try:
@@ -118,15 +105,15 @@ async def show_passes_list(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     try:
         # 2. Надсилаємо зображення
-        sent_photo_1 = await context.bot.send_photo(
+        sent_photo_1 = await file_id_cache.send(
+            context.bot.send_photo, "photo", TICKET_PASSES_IMAGE_1,
             chat_id=chat_id,
-            photo=TICKET_PASSES_FILE_ID_1,
             caption="Види проїзних (Частина 1)"
         )
 
-        sent_photo_2 = await context.bot.send_photo(
+        sent_photo_2 = await file_id_cache.send(
+            context.bot.send_photo, "photo", TICKET_PASSES_IMAGE_2,
             chat_id=chat_id,
-            photo=TICKET_PASSES_FILE_ID_2,
             caption="Види проїзних (Частина 2)"
         )
 
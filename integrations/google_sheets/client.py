@@ -1,81 +1,197 @@
+import asyncio
 import os
+import time
 from typing import Optional
+from urllib.parse import quote
 import logging
-from google.oauth2.service_account import Credentials
-from googleapiclient.discovery import build
-from config.settings import GOOGLE_SHEETS_CREDENTIALS_FILE, GOOGLE_SHEET_ID
+
+import aiohttp
+
+from config.settings import (
+    GOOGLE_SHEETS_CREDENTIALS_FILE,
+    GOOGLE_SHEET_ID,
+    SHEETS_HTTP_POOL_SIZE,
+    SHEETS_HTTP_TIMEOUT_SEC,
+)
+from utils.metrics import record_upstream
 
 logger = logging.getLogger(__name__)
 
+SHEETS_API_URL = "https://sheets.googleapis.com/v4/spreadsheets"
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+# Статуси, за яких запит точно не виконано: безпечно повторити навіть неідемпотентний append
+NOT_APPLIED_STATUSES = (429,)
+
+
+class SheetsApiError(Exception):
+    """Помилка Google Sheets API (HTTP-статус != 200 або мережа)."""
+
 
-class GoogleSheetsClient:
+def quote_sheet_name(sheet_name: str) -> str:
+    """Додає лапки до назви аркуша, щоб уникнути помилок з кирилицею та пробілами."""
+    if (" " in sheet_name or not sheet_name.isascii()) and not sheet_name.startswith("'"):
+        return f"'{sheet_name}'"
+    return sheet_name
+
+
+class AsyncSheetsClient:
+    """
+    Асинхронний клієнт Google Sheets (REST v4 поверх aiohttp).
+
+    - Один спільний пул з'єднань на весь процес (замість discovery + httplib2 на кожен екземпляр).
+    - Облікові дані сервісного акаунта завантажуються один раз; токен — self-signed JWT,
+      оновлюється локально під локом (без мережевого запиту і без потоків).
+    - Однакові паралельні читання об'єднуються в один HTTP-запит.
+    """
     SCOPES = ['https://www.googleapis.com/auth/spreadsheets']
 
     def __init__(self, spreadsheet_id=None):
         """
-        Ініціалізація клієнта.
         :param spreadsheet_id: (Опціонально) ID таблиці. Якщо не передано, береться з конфігу.
         """
-        self.creds = None
-        self.service = None
-        # Якщо передали ID — беремо його, якщо ні — беремо з settings.py
         self.spreadsheet_id = spreadsheet_id or GOOGLE_SHEET_ID
-        self._authenticate()
+        self.creds = None
+        self._creds_failed = False
+        self._token_lock = asyncio.Lock()
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._session_loop = None
+        self._inflight_reads = {}
 
-    def _authenticate(self):
-        if os.path.exists(GOOGLE_SHEETS_CREDENTIALS_FILE):
-            try:
-                self.creds = Credentials.from_service_account_file(
-                    GOOGLE_SHEETS_CREDENTIALS_FILE, scopes=self.SCOPES)
-                self.service = build('sheets', 'v4', credentials=self.creds)
-                logger.info("✅ Google Sheets authenticated")
-            except Exception as e:
-                logger.error(f"❌ Auth Error: {e}")
-        else:
-            logger.error(f"❌ Credentials file not found: {GOOGLE_SHEETS_CREDENTIALS_FILE}")
+    # ---------- Авторизація ----------
 
-    def append_row(self, sheet_name: str, values: list):
-        """
-        Додає рядок у вказаний аркуш.
-        Автоматично додає лапки до назви аркуша, щоб уникнути помилок з кирилицею.
-        """
-        if not self.service:
-            logger.error("❌ Google Sheets service not initialized")
-            return False
+    def _load_credentials(self):
+        if self.creds is not None or self._creds_failed:
+            return self.creds
 
-        try:
-            # Безпечне форматування range з лапками для кирилиці
-            safe_sheet_name = sheet_name
-            if " " in sheet_name or not sheet_name.isascii():
-                if not sheet_name.startswith("'"):
-                    safe_sheet_name = f"'{sheet_name}'"
-
-            range_name = f"{safe_sheet_name}!A1"
-
-            body = {
-                'values': [values]
-            }
-
-            self.service.spreadsheets().values().append(
-                spreadsheetId=self.spreadsheet_id,
-                range=range_name,
-                valueInputOption="USER_ENTERED",
-                body=body
-            ).execute()
-
-            logger.info(f"✅ Row appended to {sheet_name}")
-            return True
+        if not os.path.exists(GOOGLE_SHEETS_CREDENTIALS_FILE):
+            logger.error(f"❌ Credentials file not found: {GOOGLE_SHEETS_CREDENTIALS_FILE}")
+            self._creds_failed = True
+            return None
 
+        try:
+            from google.oauth2.service_account import Credentials
+            self.creds = Credentials.from_service_account_file(
+                GOOGLE_SHEETS_CREDENTIALS_FILE, scopes=self.SCOPES
+            ).with_always_use_jwt_access(True)
+            logger.info("✅ Google Sheets authenticated")
         except Exception as e:
-            error_msg = str(e)
-            if "Unable to parse range" in error_msg:
-                logger.error(
-                    f"❌ Google Sheets Critical Error: Вкладка '{sheet_name}' не знайдена в таблиці! Створіть її.")
-            else:
-                logger.error(f"❌ Google Sheets error: {e}")
-            return False
-
-    def read_range(self, range_name: Optional[str] = None, sheet_range: Optional[str] = None):
+            logger.error(f"❌ Auth Error: {e}")
+            self._creds_failed = True
+        return self.creds
+
+    async def _get_token(self) -> str:
+        creds = self._load_credentials()
+        if creds is None:
+            raise SheetsApiError("Google Sheets credentials are not available")
+
+        if creds.valid:
+            return creds.token
+
+        async with self._token_lock:
+            # Інша корутина могла вже оновити токен, поки ми чекали на лок
+            if not creds.valid:
+                creds.refresh(None)  # self-signed JWT: підпис локально, без HTTP
+            return creds.token
+
+    # ---------- HTTP ----------
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._session_loop is not loop:
+            connector = aiohttp.TCPConnector(limit=SHEETS_HTTP_POOL_SIZE, ttl_dns_cache=300)
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=SHEETS_HTTP_TIMEOUT_SEC),
+            )
+            self._session_loop = loop
+        return self._session
+
+    async def close(self):
+        if self._session and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def _request(self, method: str, path: str, params=None, json_body=None, idempotent: bool = True) -> dict:
+        url = f"{SHEETS_API_URL}/{self.spreadsheet_id}{path}"
+        # "/values/A1:append" -> "append", "/values:batchGet" -> "batchGet"
+        operation = path.rsplit(":", 1)[-1]
+        start_ts = time.monotonic()
+        try:
+            result = await self._request_with_retries(method, url, params, json_body, idempotent)
+        except SheetsApiError:
+            record_upstream("google_sheets", operation, time.monotonic() - start_ts, error=True)
+            raise
+        record_upstream("google_sheets", operation, time.monotonic() - start_ts)
+        return result
+
+    async def _request_with_retries(self, method: str, url: str, params, json_body, idempotent: bool = True) -> dict:
+        """
+        Повтори з паузою 1, 2 с. Неідемпотентний запит (append) повторюється лише тоді, коли він
+        точно не виконаний (429, з'єднання не встановлено): таймаут чи 5xx могли вже дописати рядки,
+        тож такі помилки віддаються викликачу (outbox сам вирішує, що робити з рядками "під сумнівом").
+        """
+        retry_statuses = RETRY_STATUSES if idempotent else NOT_APPLIED_STATUSES
+        for attempt in range(3):
+            token = await self._get_token()
+            try:
+                session = self._get_session()
+                async with session.request(
+                    method,
+                    url,
+                    params=params,
+                    json=json_body,
+                    headers={"Authorization": f"Bearer {token}"},
+                ) as response:
+                    if response.status == 200:
+                        return await response.json()
+
+                    body = await response.text()
+                    if response.status in retry_statuses and attempt < 2:
+                        await asyncio.sleep(2 ** attempt)
+                        continue
+                    raise SheetsApiError(f"HTTP {response.status}: {body[:300]}")
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                not_sent = isinstance(e, aiohttp.ClientConnectorError)
+                if attempt < 2 and (idempotent or not_sent):
+                    await asyncio.sleep(2 ** attempt)
+                    continue
+                raise SheetsApiError(f"Network error: {e!r}") from e
+
+        raise SheetsApiError("Google Sheets request failed")
+
+    # ---------- Читання ----------
+
+    async def batch_get(self, ranges: list) -> list:
+        """
+        Читає кілька діапазонів ОДНИМ запитом (values:batchGet).
+        Повертає список значень у тому ж порядку, що й ranges. Помилка -> SheetsApiError.
+        Однакові паралельні виклики чекають на один і той самий запит.
+        """
+        key = tuple(ranges)
+        inflight = self._inflight_reads.get(key)
+        if inflight is not None:
+            return await asyncio.shield(inflight)
+
+        task = asyncio.ensure_future(self._batch_get(list(ranges)))
+        self._inflight_reads[key] = task
+        task.add_done_callback(lambda _: self._inflight_reads.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def _batch_get(self, ranges: list) -> list:
+        start_ts = time.monotonic()
+        params = [("ranges", r) for r in ranges] + [
+            # Як у інтерфейсі таблиці (не серійні числа для дат/часу)
+            ("valueRenderOption", "FORMATTED_VALUE"),
+            ("dateTimeRenderOption", "FORMATTED_STRING"),
+        ]
+        data = await self._request("GET", "/values:batchGet", params=params)
+        value_ranges = data.get("valueRanges", [])
+        result = [vr.get("values", []) for vr in value_ranges]
+        result += [[] for _ in range(len(ranges) - len(result))]
+        logger.info(f"✅ batchGet {len(ranges)} ranges in {time.monotonic() - start_ts:.2f}s")
+        return result
+
+    async def read_range(self, range_name: Optional[str] = None, sheet_range: Optional[str] = None):
         """
         Читає діапазон клітинок з таблиці та повертає список списків значень.
 
@@ -83,135 +199,88 @@ class GoogleSheetsClient:
         - range_name: стандартний A1-діапазон (наприклад, \"MuseumDates!A1:A50\").
         - sheet_range: те саме, що range_name (залишено для зворотної сумісності з існуючими викликами).
         """
-        if not self.service:
-            logger.error("❌ Google Sheets service not initialized")
-            return []
-
-        # Підтримуємо обидва варіанти імені аргументу
         final_range = sheet_range or range_name
         if not final_range:
             logger.error("❌ Google Sheets read_range: не передано діапазон")
             return []
 
         try:
-            result = (
-                self.service.spreadsheets()
-                .values()
-                .get(
-                    spreadsheetId=self.spreadsheet_id,
-                    range=final_range,
-                    # Як у інтерфейсі таблиці (не серійні числа для дат/часу)
-                    valueRenderOption="FORMATTED_VALUE",
-                    dateTimeRenderOption="FORMATTED_STRING",
-                )
-                .execute()
-            )
-            values = result.get("values", [])
+            values = (await self.batch_get([final_range]))[0]
             logger.info(f"✅ Read {len(values)} rows from range {final_range}")
             return values
         except Exception as e:
             logger.error(f"❌ Google Sheets read_range error ({final_range}): {e}")
             return []
 
-    def clear_cell(self, sheet_name: str, cell: str) -> bool:
-        """
-        Очищає одну клітинку (наприклад, A5) на вказаному аркуші.
-        sheet_name — назва вкладки (\"MuseumDates\" тощо),
-        cell — адреса клітинки у форматі A1 (\"A5\").
-        """
-        if not self.service:
-            logger.error("❌ Google Sheets service not initialized")
-            return False
-
-        try:
-            safe_sheet_name = sheet_name
-            if " " in sheet_name or not sheet_name.isascii():
-                if not sheet_name.startswith("'"):
-                    safe_sheet_name = f"'{sheet_name}'"
-
-            range_name = f"{safe_sheet_name}!{cell}"
-
-            (
-                self.service.spreadsheets()
-                .values()
-                .clear(
-                    spreadsheetId=self.spreadsheet_id,
-                    range=range_name,
-                    body={},
-                )
-                .execute()
-            )
-
-            logger.info(f"✅ Cleared cell {range_name}")
-            return True
-        except Exception as e:
-            logger.error(f"❌ Google Sheets clear_cell error ({sheet_name}!{cell}): {e}")
-            return False
+    # ---------- Запис ----------
 
-    def update_cell(self, sheet_name: str, cell: str, value: str) -> bool:
+    async def batch_update(self, data: list) -> bool:
         """
-        Записує значення в одну клітинку (наприклад, B5) на вказаному аркуші.
+        Записує кілька діапазонів одним запитом (values:batchUpdate).
+        :param data: список пар (range, values), напр. [("MuseumDates!B5", [["01.01.2026 10:00"]])]
         """
-        if not self.service:
-            logger.error("❌ Google Sheets service not initialized")
-            return False
-
+        body = {
+            "valueInputOption": "USER_ENTERED",
+            "data": [{"range": r, "values": v} for r, v in data],
+        }
         try:
-            safe_sheet_name = sheet_name
-            if " " in sheet_name or not sheet_name.isascii():
-                if not sheet_name.startswith("'"):
-                    safe_sheet_name = f"'{sheet_name}'"
-
-            range_name = f"{safe_sheet_name}!{cell}"
-            body = {'values': [[value]]}
-
-            self.service.spreadsheets().values().update(
-                spreadsheetId=self.spreadsheet_id,
-                range=range_name,
-                valueInputOption="USER_ENTERED",
-                body=body
-            ).execute()
-
-            logger.info(f"✅ Updated cell {range_name} with value {value}")
+            await self._request("POST", "/values:batchUpdate", json_body=body)
+            logger.info(f"✅ batchUpdate: {len(data)} ranges")
             return True
         except Exception as e:
-            logger.error(f"❌ Google Sheets update_cell error ({sheet_name}!{cell}): {e}")
+            logger.error(f"❌ Google Sheets batch_update error: {e}")
             return False
 
-    def append_rows(self, sheet_name: str, values: list):
+    async def append_rows(self, sheet_name: str, values: list) -> bool:
         """
         Додає декілька рядків у вказаний аркуш.
         Автоматично додає лапки до назви аркуша, щоб уникнути помилок з кирилицею.
         """
-        if not self.service:
-            logger.error("❌ Google Sheets service not initialized")
-            return False
-
+        range_name = quote(f"{quote_sheet_name(sheet_name)}!A1", safe="")
         try:
-            safe_sheet_name = sheet_name
-            if " " in sheet_name or not sheet_name.isascii():
-                if not sheet_name.startswith("'"):
-                    safe_sheet_name = f"'{sheet_name}'"
-
-            range_name = f"{safe_sheet_name}!A1"
-            body = {'values': values}
-
-            self.service.spreadsheets().values().append(
-                spreadsheetId=self.spreadsheet_id,
-                range=range_name,
-                valueInputOption="USER_ENTERED",
-                body=body
-            ).execute()
-
+            await self._request(
+                "POST",
+                f"/values/{range_name}:append",
+                params={"valueInputOption": "USER_ENTERED"},
+                json_body={"values": values},
+                idempotent=False,
+            )
             logger.info(f"✅ Rows appended to {sheet_name}: {len(values)}")
             return True
-
         except Exception as e:
-            error_msg = str(e)
-            if "Unable to parse range" in error_msg:
+            if "Unable to parse range" in str(e):
                 logger.error(
                     f"❌ Google Sheets Critical Error: Вкладка '{sheet_name}' не знайдена в таблиці! Створіть її."
                 )
             else:
                 logger.error(f"❌ Google Sheets error: {e}")
-            return False
\ No newline at end of file
+            return False
+
+    async def append_row(self, sheet_name: str, values: list) -> bool:
+        """Додає один рядок у вказаний аркуш."""
+        return await self.append_rows(sheet_name, [values])
+
+    async def update_cell(self, sheet_name: str, cell: str, value: str) -> bool:
+        """
+        Записує значення в одну клітинку (наприклад, B5) на вказаному аркуші.
+        """
+        return await self.batch_update([(f"{quote_sheet_name(sheet_name)}!{cell}", [[value]])])
+
+    async def clear_cell(self, sheet_name: str, cell: str) -> bool:
+        """
+        Очищає одну клітинку (наприклад, A5) на вказаному аркуші.
+        sheet_name — назва вкладки (\"MuseumDates\" тощо),
+        cell — адреса клітинки у форматі A1 (\"A5\").
+        """
+        range_name = quote(f"{quote_sheet_name(sheet_name)}!{cell}", safe="")
+        try:
+            await self._request("POST", f"/values/{range_name}:clear", json_body={})
+            logger.info(f"✅ Cleared cell {sheet_name}!{cell}")
+            return True
+        except Exception as e:
+            logger.error(f"❌ Google Sheets clear_cell error ({sheet_name}!{cell}): {e}")
+            return False
+
+
+# Єдиний клієнт на процес (спільні облікові дані, токен і пул з'єднань)
+sheets_client = AsyncSheetsClient()
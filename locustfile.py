@@ -1,7 +1,13 @@
 import json
+import os
 import random
 from locust import HttpUser, task, between
 
+# Той самий secret token, що й у бота (WEBHOOK_SECRET_TOKEN), інакше сервер відповість 403
+WEBHOOK_HEADERS = {}
+if os.getenv("WEBHOOK_SECRET_TOKEN"):
+    WEBHOOK_HEADERS["X-Telegram-Bot-Api-Secret-Token"] = os.getenv("WEBHOOK_SECRET_TOKEN")
+
 
 # Приклад JSON-апдейту від Telegram
 def generate_telegram_update(update_id, user_id, text):
@@ -57,7 +63,7 @@ def generate_callback_update(update_id, user_id, callback_data, message_id=None)
 
 class TransportBotUser(HttpUser):
     # 👇 ДОДАЙТЕ ЦЕЙ РЯДОК ОБОВ'ЯЗКОВО 👇
-    host = "http://localhost:8001"
+    host = os.getenv("LOAD_TEST_HOST", "http://localhost:8001")
 
     wait_time = between(1, 5)  # Пауза між діями користувача (1-5 сек)
 
@@ -70,7 +76,7 @@ class TransportBotUser(HttpUser):
         """Сценарій: Перевірка транспорту (EasyWay)"""
         payload = generate_telegram_update(self.update_id, self.user_id, "Трамвай 10")
         # Надсилаємо POST на ендпоінт вашого бота
-        self.client.post("/webhook", json=payload)
+        self.client.post("/webhook", json=payload, headers=WEBHOOK_HEADERS)
         self.update_id += 1
 
     @task(1)
@@ -78,21 +84,21 @@ class TransportBotUser(HttpUser):
         """Сценарій: Бронювання музею (DB Write + Google Sheets)"""
         # Крок 1: Відкриття меню музею
         payload_menu = generate_callback_update(self.update_id, self.user_id, "museum_menu")
-        self.client.post("/webhook", json=payload_menu)
+        self.client.post("/webhook", json=payload_menu, headers=WEBHOOK_HEADERS)
         self.update_id += 1
 
         # Крок 2: Старт реєстрації
         payload_start = generate_callback_update(self.update_id, self.user_id, "museum:register_start")
-        self.client.post("/webhook", json=payload_start)
+        self.client.post("/webhook", json=payload_start, headers=WEBHOOK_HEADERS)
         self.update_id += 1
 
     @task(1)
     def feedback(self):
         """Сценарій: Відгук (Google Sheets)"""
         payload_menu = generate_callback_update(self.update_id, self.user_id, "feedback_menu")
-        self.client.post("/webhook", json=payload_menu)
+        self.client.post("/webhook", json=payload_menu, headers=WEBHOOK_HEADERS)
         self.update_id += 1
 
         payload = generate_telegram_update(self.update_id, self.user_id, "Тестове звернення для перевірки")
-        self.client.post("/webhook", json=payload)
+        self.client.post("/webhook", json=payload, headers=WEBHOOK_HEADERS)
         self.update_id += 1
\ No newline at end of file
@@ -1,12 +1,27 @@
 
 import asyncio
-from config.settings import TELEGRAM_BOT_TOKEN
+from config.settings import STARTUP_IMPORT_PROFILE
+from utils.import_profiler import import_profiler
+
+# Профайлер імпортів ставиться до решти імпортів, інакше їх не виміряти
+if STARTUP_IMPORT_PROFILE:
+    import_profiler.install()
+
+from telegram import Update
+from config.settings import TELEGRAM_BOT_TOKEN, BOT_MODE, WEBHOOK_URL, WEBHOOK_PATH, WEBHOOK_SECRET_TOKEN
 from bot.bot import TransportBot
+from bot.web_server import start_web_server
+from bot.startup import StartupError, build_startup
 from utils.logger import logger
-from handlers.accessible_transport_handlers import load_easyway_route_ids
-from database.db import init_db
 from services.monitoring_service import monitoring_service
-from services.gtfs_service import gtfs_service
+from services.sheets_outbox import sheets_outbox
+from services.museum_service import museum_service
+from services.stats_service import stats_service
+from services.loop_monitor import loop_monitor
+from services.traffic_recorder import traffic_recorder
+from services.user_state import user_state_janitor
+from services.message_deleter import message_deleter
+from integrations.google_sheets.client import sheets_client
 
 
 
@@ -17,37 +32,58 @@ async def main():
     if not TELEGRAM_BOT_TOKEN:
         logger.error("❌ TELEGRAM_BOT_TOKEN не встановлено в .env")
         return
+    if BOT_MODE == "webhook" and not WEBHOOK_URL:
+        logger.error("❌ BOT_MODE=webhook, але WEBHOOK_URL не встановлено в .env")
+        return
 
     logger.info("🚀 Запуск Telegram бота...")
     bot = TransportBot(TELEGRAM_BOT_TOKEN)
 
 
-    # Завантаження GTFS
-    # Переконайтеся, що папка gtfs_static_data існує і містить файли
-    logger.info("🚀 Запуск GTFS Service...")
-    gtfs_service.load_data()  # Це синхронний виклик, але швидкий.
-
-    # Ініціалізація Бази Даних
-    logger.info("📂 Ініціалізація бази даних SQLite...")
-    await init_db()
-
-    # Завантажуємо маршрути з EasyWay
-    logger.info("--- [MAIN] Викликаю load_easyway_route_ids ---")
+    # БД, Telegram і довідники (зі знімків) — паралельно; свіжі дані з EasyWay/GTFS — у фоні
+    startup = build_startup(bot)
     try:
-        await load_easyway_route_ids(bot.app)
-        # ЗАПУСК МОНІТОРИНГУ (фонова задача)
-        asyncio.create_task(monitoring_service.start())
-        logger.info("--- [MAIN] load_easyway_route_ids ЗАВЕРШЕНО ---")
-    except Exception as e:
-        logger.error(f"--- [MAIN] КРИТИЧНА ПОМИЛКА: {e} ---", exc_info=True)
-        logger.error("--- [MAIN] Бот не буде запущений. ---")
+        await startup.run()
+    except StartupError as e:
+        logger.error(f"❌ {e}. Бот не буде запущений.")
+        await bot.app.shutdown()
         return
 
+    if import_profiler.installed:
+        import_profiler.uninstall()
+        logger.info(import_profiler.report())
+
+    # Фоновий відправник outbox -> Google Sheets
+    asyncio.create_task(sheets_outbox.start())
+    # Прогрів і фонове оновлення дат музею (юзер не чекає на Google Sheets)
+    asyncio.create_task(museum_service.start())
+    # Лічильники статистики адміна + періодична звірка з БД
+    asyncio.create_task(stats_service.start())
+    # Затримка event loop для /metrics
+    asyncio.create_task(loop_monitor.start())
+    # Прибирання user_data неактивних користувачів і ліміт розміру стану
+    asyncio.create_task(user_state_janitor.start())
+    # Запис трафіку для benchmarks/replay.py (лише якщо задано TRAFFIC_RECORD_FILE)
+    traffic_recorder.start()
+
+    # Моніторинг GTFS-RT; статичний GTFS для нього відновлює/оновлює startup
+    asyncio.create_task(monitoring_service.start(load_static=False))
+
     # Запускаємо бота
+    web_runner = None
     try:
-        await bot.app.initialize()
-        await bot.app.updater.start_polling()
         await bot.app.start()
+        web_runner = await start_web_server(bot.app, bot.update_processor)
+
+        if BOT_MODE == "webhook":
+            await bot.app.bot.set_webhook(
+                url=f"{WEBHOOK_URL.rstrip('/')}{WEBHOOK_PATH}",
+                secret_token=WEBHOOK_SECRET_TOKEN or None,
+                allowed_updates=Update.ALL_TYPES,
+            )
+            logger.info(f"🔗 Webhook встановлено: {WEBHOOK_URL.rstrip('/')}{WEBHOOK_PATH}")
+        else:
+            await bot.start_polling()
 
         logger.info("✅ Бот успішно запущений. Натисніть Ctrl+C для зупинки.")
         await asyncio.Event().wait()
@@ -57,12 +93,22 @@ async def main():
     except Exception as e:
         logger.error(f"❌ Критична помилка: {e}", exc_info=True)
     finally:
-        if bot.app.updater and bot.app.updater.running:
-            await bot.app.updater.stop()
+        startup.cancel()
+        sheets_outbox.stop()
+        loop_monitor.stop()
+        user_state_janitor.stop()
+        if BOT_MODE != "webhook":
+            await bot.stop_polling()
+        if web_runner:
+            await web_runner.cleanup()
+        await bot.update_processor.join()
+        await message_deleter.flush()
+        traffic_recorder.stop()
         if bot.app.running:
             await bot.app.stop()
 
         await bot.app.shutdown()
+        await sheets_client.close()
         logger.info("✅ Бот зупинено.")
 
 
@@ -0,0 +1,237 @@
+# services/diagnostics_service.py
+"""Діагностика "на вимогу" для адмінських команд /profile і /memory."""
+import asyncio
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+
+from config.settings import DIAG_PROFILE_INTERVAL_MS, DIAG_PROFILE_MAX_SEC, DIAG_TRACEMALLOC_FRAMES
+from services.loop_monitor import PROJECT_ROOT, _is_project_frame
+from utils.logger import logger
+
+STACK_DEPTH = 64
+TOP_LIMIT = 25
+DATA_REPORT_CHUNK = 200  # записів user_data між поверненнями керування в event loop
+
+
+def _frame_label(code, lineno: int) -> str:
+    filename = code.co_filename
+    if _is_project_frame(filename):
+        filename = os.path.relpath(filename, PROJECT_ROOT)
+    else:
+        filename = os.path.basename(filename)
+    return f"{code.co_name} ({filename}:{lineno})"
+
+
+def deep_sizeof(obj, seen: set = None, depth: int = 0, max_depth: int = 8) -> int:
+    """Приблизний розмір об'єкта разом із вкладеними контейнерами (без подвійного підрахунку)."""
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+
+    size = sys.getsizeof(obj, 0)
+    if depth >= max_depth:
+        return size
+    if isinstance(obj, dict):
+        for key, value in list(obj.items()):
+            size += deep_sizeof(key, seen, depth + 1, max_depth) + deep_sizeof(value, seen, depth + 1, max_depth)
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        for item in list(obj):
+            size += deep_sizeof(item, seen, depth + 1, max_depth)
+    elif hasattr(obj, "__dict__"):
+        size += deep_sizeof(vars(obj), seen, depth + 1, max_depth)
+    return size
+
+
+class SamplingProfiler:
+    """Збирає стеки всіх потоків з фіксованою частотою (collapsed stacks, як для flamegraph)."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.stacks = Counter()  # {(потік, кадр_корінь, ..., кадр_лист): кількість семплів}
+        self.samples = 0
+        self.started_at = 0.0
+        self.duration = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, seconds: float):
+        self.started_at = time.monotonic()
+        self._thread = threading.Thread(target=self._run, args=(seconds,), name="diag-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self, seconds: float):
+        own_id = threading.get_ident()
+        names = {}
+        deadline = time.monotonic() + seconds
+        while not self._stop.is_set() and time.monotonic() < deadline:
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                if thread_id not in names:
+                    names = {t.ident: t.name for t in threading.enumerate()}
+                stack = []
+                while frame is not None and len(stack) < STACK_DEPTH:
+                    stack.append(_frame_label(frame.f_code, frame.f_lineno))
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, str(thread_id)))
+                self.stacks[tuple(reversed(stack))] += 1
+            self.samples += 1
+            self._stop.wait(self.interval)
+        self.duration = time.monotonic() - self.started_at
+
+    def report(self, limit: int = TOP_LIMIT) -> str:
+        own, inclusive, threads = Counter(), Counter(), Counter()
+        for stack, count in self.stacks.items():
+            threads[stack[0]] += count
+            own[stack[-1]] += count
+            for label in set(stack[1:]):
+                inclusive[label] += count
+
+        def percent(count: int) -> str:
+            return f"{count / self.samples:6.1%}" if self.samples else "   n/a"
+
+        lines = [
+            f"CPU profile: {self.samples} samples over {self.duration:.1f}s "
+            f"(interval {self.interval * 1000:.0f}ms)",
+            "",
+            "== Threads (samples) ==",
+        ]
+        lines += [f"{percent(count)}  {name}" for name, count in threads.most_common()]
+        lines += ["", "== Self time (where the thread was when sampled) =="]
+        lines += [f"{percent(count)}  {label}" for label, count in own.most_common(limit)]
+        lines += ["", "== Inclusive time (function or its callees on stack) =="]
+        lines += [f"{percent(count)}  {label}" for label, count in inclusive.most_common(limit)]
+        lines += ["", "== Collapsed stacks (flamegraph.pl / speedscope) =="]
+        lines += [f"{';'.join(stack)} {count}" for stack, count in self.stacks.most_common()]
+        return "\n".join(lines) + "\n"
+
+
+class DiagnosticsService:
+    def __init__(self):
+        self.profiler = None
+        self._last_snapshot = None
+
+    # ---------- CPU ----------
+
+    @property
+    def profiling(self) -> bool:
+        return self.profiler is not None and self.profiler.running
+
+    async def profile(self, seconds: float) -> str:
+        """Профілює seconds секунд (або до stop_profile()) і повертає текстовий звіт."""
+        if self.profiling:
+            raise RuntimeError("Профілювання вже запущено")
+        seconds = max(1.0, min(float(seconds), DIAG_PROFILE_MAX_SEC))
+        self.profiler = SamplingProfiler(DIAG_PROFILE_INTERVAL_MS / 1000)
+        self.profiler.start(seconds)
+        logger.info(f"🔬 CPU profiling started for {seconds:.0f}s")
+
+        while self.profiler.running:
+            await asyncio.sleep(0.2)
+        logger.info(f"🔬 CPU profiling finished: {self.profiler.samples} samples")
+        return self.profiler.report()
+
+    def stop_profile(self) -> bool:
+        if not self.profiling:
+            return False
+        self.profiler.stop()
+        return True
+
+    # ---------- пам'ять ----------
+
+    async def memory_report(self, application=None, limit: int = TOP_LIMIT) -> str:
+        """Знімок tracemalloc (+ різниця з попереднім) і найбільші записи *_data."""
+        lines = []
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(DIAG_TRACEMALLOC_FRAMES)
+            self._last_snapshot = None
+            logger.info("🧠 tracemalloc started")
+            lines.append("tracemalloc щойно ввімкнено: алокації, зроблені раніше, не відстежуються.\n"
+                         "Повторіть команду пізніше, щоб побачити приріст.\n")
+
+        # Знімок і порівняння — важкі; робимо поза event loop
+        snapshot, text = await asyncio.to_thread(self._snapshot_report, self._last_snapshot, limit)
+        self._last_snapshot = snapshot
+        lines.append(text)
+
+        if application is not None:
+            lines.append(await self.data_report(application, limit))
+        return "\n".join(lines)
+
+    def stop_memory(self) -> bool:
+        self._last_snapshot = None
+        if not tracemalloc.is_tracing():
+            return False
+        tracemalloc.stop()
+        logger.info("🧠 tracemalloc stopped")
+        return True
+
+    @staticmethod
+    def _snapshot_report(previous, limit: int):
+        current, peak = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            tracemalloc.Filter(False, "<unknown>"),
+        ))
+        lines = [f"Traced memory: {current / 1024 / 1024:.1f}MiB (peak {peak / 1024 / 1024:.1f}MiB)", ""]
+
+        if previous is not None:
+            lines.append("== Growth since previous snapshot (by line) ==")
+            for stat in snapshot.compare_to(previous, "lineno")[:limit]:
+                lines.append(f"{stat.size_diff / 1024:+10.1f}KiB {stat.count_diff:+8d} blocks  "
+                             f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}")
+            lines.append("")
+
+        lines.append("== Top allocation sites (by line) ==")
+        for stat in snapshot.statistics("lineno")[:limit]:
+            lines.append(f"{stat.size / 1024:10.1f}KiB {stat.count:8d} blocks  "
+                         f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}")
+
+        lines += ["", "== Largest tracebacks =="]
+        for stat in snapshot.statistics("traceback")[:5]:
+            lines.append(f"{stat.size / 1024:.1f}KiB in {stat.count} blocks:")
+            lines += [f"    {line}" for line in stat.traceback.format(limit=DIAG_TRACEMALLOC_FRAMES)]
+        return snapshot, "\n".join(lines) + "\n"
+
+    @staticmethod
+    async def data_report(application, limit: int = TOP_LIMIT) -> str:
+        """
+        Найбільші записи bot_data, user_data і chat_data (приблизний розмір).
+        Обхід — у event loop (хендлери змінюють ці dict), але порціями по DATA_REPORT_CHUNK записів.
+        """
+        lines = []
+        sections = (
+            ("bot_data (by key)", dict(application.bot_data)),
+            ("user_data (by user)", dict(application.user_data)),
+            ("chat_data (by chat)", dict(application.chat_data)),
+        )
+        for title, mapping in sections:
+            sizes = []
+            for index, (key, value) in enumerate(mapping.items()):
+                sizes.append((deep_sizeof(value), key))
+                if index % DATA_REPORT_CHUNK == DATA_REPORT_CHUNK - 1:
+                    await asyncio.sleep(0)
+            sizes.sort(reverse=True)
+            total = sum(size for size, _ in sizes)
+            lines.append(f"== {title}: {len(sizes)} entries, ~{total / 1024:.1f}KiB ==")
+            for size, key in sizes[:limit]:
+                lines.append(f"{size / 1024:10.1f}KiB  {key}")
+            lines.append("")
+        return "\n".join(lines)
+
+
+diagnostics_service = DiagnosticsService()
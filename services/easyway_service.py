@@ -11,11 +11,16 @@ from config.settings import (
     EASYWAY_API_URL, EASYWAY_LOGIN, EASYWAY_PASSWORD, EASYWAY_CITY,
     EASYWAY_STOP_INFO_VERSION, TIME_SOURCE_ICONS,
     EASYWAY_STOP_CACHE_TTL, EASYWAY_PLACES_CACHE_TTL,
-    EASYWAY_ROUTES_CACHE_TTL, EASYWAY_ROUTE_GPS_CACHE_TTL
+    EASYWAY_ROUTES_CACHE_TTL, EASYWAY_ROUTE_GPS_CACHE_TTL, EASYWAY_STALE_TTL,
+    EASYWAY_BREAKER_FAILURES, EASYWAY_BREAKER_RESET_SEC, EASYWAY_TIMEOUT_MIN_SEC,
+    EASYWAY_TIMEOUT_MULTIPLIER, EASYWAY_RETRY_BUDGET_RATIO, EASYWAY_BACKOFF_BASE_SEC,
 )
 from config.accessible_vehicles import ACCESSIBLE_TRAMS, ACCESSIBLE_TROLS
 
-from geopy.distance import geodesic
+
+from utils.circuit_breaker import CircuitBreaker, RetryBudget, backoff
+from utils.metrics import REGISTRY, record_upstream
+from services.traffic_recorder import traffic_recorder
 
 from config.vehicle_mapping import VEHICLE_ID_MAP
 
@@ -36,6 +41,39 @@ except ImportError:
 
 logger = logging.getLogger("transport_bot")
 
+CACHE_REQUESTS = REGISTRY.counter(
+    "bot_easyway_cache_requests_total", "Звернення до кешів EasyWay", ("cache", "result")
+)
+CACHE_SIZE = REGISTRY.gauge("bot_easyway_cache_entries", "Кількість записів у кешах EasyWay", ("cache",))
+
+# {endpoint: (найбільший таймаут, с; спроб)} — таймаут далі підлаштовується під латентність
+ENDPOINTS = {
+    "GetRoutesList": (20, 3),
+    "GetPlacesByName": (10, 3),
+    "GetStopInfo": (10, 3),
+    "GetRouteGPS": (8, 1),
+}
+BACKOFF_CAP_SEC = 2.0
+# Скільки живе свіжа відповідь кожного виду; застаріла віддається ще EASYWAY_STALE_TTL після цього
+FRESH_TTLS = {
+    "routes": EASYWAY_ROUTES_CACHE_TTL,
+    "places": EASYWAY_PLACES_CACHE_TTL,
+    "stop": EASYWAY_STOP_CACHE_TTL,
+    "route_gps": EASYWAY_ROUTE_GPS_CACHE_TTL,
+}
+
+
+class StaleList(list):
+    """Застарілий список машин (GetRouteGPS): stale_age — вік даних у секундах."""
+    stale_age = None
+
+
+def stale_age(*results) -> Optional[float]:
+    """Найбільший вік застарілих даних серед результатів сервісу (None — усі свіжі)."""
+    ages = [r.get("stale_age") if isinstance(r, dict) else getattr(r, "stale_age", None) for r in results]
+    ages = [age for age in ages if age is not None]
+    return max(ages) if ages else None
+
 
 class EasyWayService:
     """Сервіс для роботи з API EasyWay v1.2"""
@@ -57,24 +95,125 @@ class EasyWayService:
         self.places_cache = TTLCache(maxsize=2000, ttl=EASYWAY_PLACES_CACHE_TTL)
         self.routes_cache = TTLCache(maxsize=1, ttl=EASYWAY_ROUTES_CACHE_TTL)
         self.route_gps_cache = TTLCache(maxsize=2000, ttl=EASYWAY_ROUTE_GPS_CACHE_TTL)
+        # Усі зупинки, що траплялися в пошуку: {stop_id: {"id", "title", "routes_summary"}}.
+        # Зупинок у місті скінченна кількість, тож індекс не росте безмежно; у user_data — лише id.
+        self.stop_index = {}
+        # Остання вдала відповідь кожного запиту живе довше за TTL кешів: її віддаємо одразу,
+        # коли EasyWay не відповів або circuit breaker endpoint'а відкритий
+        # {(вид, ключ): (відповідь, time.monotonic() запису)}; строк — свій для кожного виду (FRESH_TTLS)
+        self.stale_cache = TTLCache(maxsize=5000, ttl=max(FRESH_TTLS.values()) + EASYWAY_STALE_TTL)
+        self.breakers = {
+            name: CircuitBreaker(
+                f"easyway:{name}", EASYWAY_BREAKER_FAILURES, EASYWAY_BREAKER_RESET_SEC,
+                min_timeout=EASYWAY_TIMEOUT_MIN_SEC, max_timeout=max_timeout,
+                multiplier=EASYWAY_TIMEOUT_MULTIPLIER,
+            )
+            for name, (max_timeout, _) in ENDPOINTS.items()
+        }
+        self.retry_budget = RetryBudget("easyway", EASYWAY_RETRY_BUDGET_RATIO)
         logger.info(
             "✅ EasyWay Cache initialized "
             f"(stop={EASYWAY_STOP_CACHE_TTL}s, places={EASYWAY_PLACES_CACHE_TTL}s, "
             f"routes={EASYWAY_ROUTES_CACHE_TTL}s, gps={EASYWAY_ROUTE_GPS_CACHE_TTL}s)"
         )
-
-    def _log_api_duration(self, name: str, start_ts: float, extra: str = ""):
+        CACHE_SIZE.set_function(lambda: {
+            ("stop",): len(self.stop_cache),
+            ("places",): len(self.places_cache),
+            ("routes",): len(self.routes_cache),
+            ("route_gps",): len(self.route_gps_cache),
+            ("stale",): len(self.stale_cache),
+        })
+
+    @staticmethod
+    def _count_cache(cache_name: str, hit: bool):
+        CACHE_REQUESTS.inc(cache=cache_name, result="hit" if hit else "miss")
+
+    def _log_api_duration(self, name: str, start_ts: float, extra: str = "", error: bool = False):
         duration = time.monotonic() - start_ts
+        record_upstream("easyway", name, duration, error=error)
         if duration >= 1.0:
-            logger.info(f"⏱️ EasyWay {name} took {duration:.2f}s {extra}".strip())
+            logger.info(f"⏱️ EasyWay {name} took {duration:.2f}s {extra}".strip(), extra={"log_key": "easyway_slow"})
+
+    @staticmethod
+    def _record_response(params: Dict, start_ts: float, status: int, data):
+        """Сира відповідь API — у запис трафіку (якщо ввімкнено), для відтворення офлайн."""
+        if traffic_recorder.enabled:
+            traffic_recorder.record_upstream("easyway", params, status, time.monotonic() - start_ts, data)
+
+    async def _call(self, name: str, params: Dict, extra: str = ""):
+        """
+        GET до EasyWay через circuit breaker endpoint'а: адаптивний таймаут, повтори в межах
+        бюджету з паузою з джитером. Повертає JSON або None (невдача / breaker відкритий).
+        """
+        breaker = self.breakers[name]
+        if not breaker.allow():
+            return None
+
+        url = self._build_url(params)
+        start_ts = time.monotonic()
+        self.retry_budget.record_request()
+        for attempt in range(ENDPOINTS[name][1]):
+            if attempt:
+                if not breaker.allow() or not self.retry_budget.try_retry():
+                    break
+                await asyncio.sleep(backoff(attempt - 1, EASYWAY_BACKOFF_BASE_SEC, BACKOFF_CAP_SEC))
+
+            attempt_ts = time.monotonic()
+            try:
+                async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(ssl=False)) as session:
+                    timeout = aiohttp.ClientTimeout(total=breaker.timeout())
+                    async with session.get(url, timeout=timeout) as response:
+                        if response.status != 200:
+                            raise aiohttp.ClientError(f"HTTP {response.status}")
+                        data = await response.json(content_type=None)
+            except asyncio.CancelledError:
+                breaker.release()  # звільняє пробний запит half-open, невдачею не рахується
+                raise
+            except Exception as e:
+                breaker.record_failure()
+                logger.warning(f"EasyWay {name} error {extra}: {type(e).__name__} {e}".strip())
+                continue
+
+            breaker.record_success(time.monotonic() - attempt_ts)
+            self._record_response(params, start_ts, response.status, data)
+            self._log_api_duration(name, start_ts, extra)
+            return data
+
+        self._log_api_duration(name, start_ts, extra, error=True)
+        return None
+
+    def _remember(self, key: tuple, value):
+        self.stale_cache[key] = (value, time.monotonic())
+        return value
+
+    def _stale(self, key: tuple, fallback, mark: bool = False):
+        """
+        Остання вдала відповідь замість помилки — поки вона не старша за TTL свого кешу + EASYWAY_STALE_TTL.
+        mark: повернути копію з віком даних (stale_age), щоб сторінка показала, що дані не живі.
+        """
+        entry = self.stale_cache.get(key)
+        age = time.monotonic() - entry[1] if entry else None
+        if age is not None and age > FRESH_TTLS[key[0]] + EASYWAY_STALE_TTL:
+            entry = None
+        self._count_cache("stale", entry is not None)
+        if entry is None:
+            return fallback
+        value = entry[0]
+        if not mark:
+            return value
+        if isinstance(value, dict):
+            return {**value, "stale_age": age}
+        marked = StaleList(value)
+        marked.stale_age = age
+        return marked
 
     async def get_routes_list(self) -> dict:
         """Отримує список маршрутів"""
         cached = self.routes_cache.get("routes_list")
+        self._count_cache("routes", bool(cached))
         if cached:
             return cached
 
-        start_ts = time.monotonic()
         params = {
             "login": self.login,
             "password": self.password,
@@ -82,31 +221,20 @@ class EasyWayService:
             "city": self.city,
             "format": self.config.DEFAULT_FORMAT
         }
-        url = self._build_url(params)
-        timeout = aiohttp.ClientTimeout(total=20)
-
-        for attempt in range(3):
-            try:
-                async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(ssl=False)) as session:
-                    async with session.get(url, timeout=timeout) as response:
-                        if response.status == 200:
-                            data = await response.json(content_type=None)
-                            self.routes_cache["routes_list"] = data
-                            self._log_api_duration("GetRoutesList", start_ts)
-                            return data
-            except Exception as e:
-                logger.warning(f"GetRoutesList error: {e}")
-                if attempt < 2: await asyncio.sleep(2)
-        return {"error": "Не вдалося завантажити список маршрутів."}
+        data = await self._call("GetRoutesList", params)
+        if data is not None:
+            self.routes_cache["routes_list"] = self._remember(("routes",), data)
+            return data
+        return self._stale(("routes",), {"error": "Не вдалося завантажити список маршрутів."})
 
     async def get_places_by_name(self, search_term: str) -> dict:
         """Пошук зупинок за назвою"""
         cache_key = search_term.strip().lower()
         cached = self.places_cache.get(cache_key)
+        self._count_cache("places", bool(cached))
         if cached:
             return cached
 
-        start_ts = time.monotonic()
         params = {
             "login": self.config.LOGIN,
             "password": self.config.PASSWORD,
@@ -115,30 +243,27 @@ class EasyWayService:
             "term": search_term,
             "format": self.config.DEFAULT_FORMAT,
         }
-        url = self._build_url(params)
-        timeout = aiohttp.ClientTimeout(total=10)
+        data = await self._call("GetPlacesByName", params, f"(term={cache_key})")
+        if data is not None:
+            parsed = self._parse_places_response(data)
+            if not parsed.get("error"):
+                self.places_cache[cache_key] = self._remember(("places", cache_key), parsed)
+                for stop in parsed["stops"]:
+                    self.stop_index[stop["id"]] = stop
+            return parsed
+        return self._stale(("places", cache_key), {"error": "Сервер не відповів."})
 
-        for attempt in range(3):
-            try:
-                async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(ssl=False)) as session:
-                    async with session.get(url, timeout=timeout) as response:
-                        if response.status == 200:
-                            parsed = self._parse_places_response(await response.json(content_type=None))
-                            if not parsed.get("error"):
-                                self.places_cache[cache_key] = parsed
-                            self._log_api_duration("GetPlacesByName", start_ts, f"(term={cache_key})")
-                            return parsed
-            except Exception as e:
-                logger.warning(f"Search error: {e}")
-                if attempt < 2: await asyncio.sleep(1)
-        return {"error": "Сервер не відповів."}
+    def get_indexed_stops(self, stop_ids: List[int]) -> List[dict]:
+        """Відновлює результати пошуку за id (у тому ж порядку); невідомі id пропускаються."""
+        return [self.stop_index[stop_id] for stop_id in stop_ids if stop_id in self.stop_index]
 
     async def get_stop_info_v12(self, stop_id: int) -> dict:
         """Отримання інформації про зупинку"""
-        if stop_id in self.stop_cache:
-            return self.stop_cache[stop_id]
+        cached = self.stop_cache.get(stop_id)
+        self._count_cache("stop", cached is not None)
+        if cached is not None:
+            return cached
 
-        start_ts = time.monotonic()
         params = {
             "login": self.config.LOGIN,
             "password": self.config.PASSWORD,
@@ -148,24 +273,14 @@ class EasyWayService:
             "v": self.config.STOP_INFO_VERSION,
             "format": self.config.DEFAULT_FORMAT,
         }
-        url = self._build_url(params)
-        timeout = aiohttp.ClientTimeout(total=10)
-
-        for attempt in range(3):
-            try:
-                async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(ssl=False)) as session:
-                    logger.info(f"EasyWay API Call v1.2 (REAL REQUEST): {url}")
-                    async with session.get(url, timeout=timeout) as response:
-                        if response.status == 200:
-                            parsed = self._parse_stop_info_v12(await response.json(content_type=None))
-                            if not parsed.get("error"):
-                                self.stop_cache[stop_id] = parsed
-                            self._log_api_duration("GetStopInfo", start_ts, f"(stop_id={stop_id})")
-                            return parsed
-            except Exception as e:
-                logger.warning(f"StopInfo error: {e}")
-                if attempt < 2: await asyncio.sleep(0.5)
-        return {"error": "Сервер не відповів."}
+        logger.debug(f"EasyWay API Call v1.2 (REAL REQUEST): stop_id={stop_id}")
+        data = await self._call("GetStopInfo", params, f"(stop_id={stop_id})")
+        if data is not None:
+            parsed = self._parse_stop_info_v12(data)
+            if not parsed.get("error"):
+                self.stop_cache[stop_id] = self._remember(("stop", stop_id), parsed)
+            return parsed
+        return self._stale(("stop", stop_id), {"error": "Сервер не відповів."}, mark=True)
 
     async def get_vehicles_on_route(self, route_id: int) -> List[dict]:
         """
@@ -173,10 +288,10 @@ class EasyWayService:
         Ми прибрали фільтрацію, щоб показувати реальну кількість машин.
         """
         cached = self.route_gps_cache.get(route_id)
+        self._count_cache("route_gps", cached is not None)
         if cached is not None:
             return cached
 
-        start_ts = time.monotonic()
         params = {
             "login": self.config.LOGIN,
             "password": self.config.PASSWORD,
@@ -185,24 +300,12 @@ class EasyWayService:
             "id": route_id,
             "format": self.config.DEFAULT_FORMAT,
         }
-
-        url = self._build_url(params)
-
-        try:
-            async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(ssl=False)) as session:
-                async with session.get(url, timeout=8) as response:
-                    if response.status == 200:
-                        data = await response.json(content_type=None)
-                        parsed = self._parse_route_gps(data)
-                        self.route_gps_cache[route_id] = parsed
-                        self._log_api_duration("GetRouteGPS", start_ts, f"(route_id={route_id})")
-                        return parsed
-                    else:
-                        logger.warning(f"API returned status {response.status} for GetRouteGPS")
-        except Exception as e:
-            logger.error(f"Error getting route GPS: {e}")
-
-        return []
+        data = await self._call("GetRouteGPS", params, f"(route_id={route_id})")
+        if data is not None:
+            parsed = self._parse_route_gps(data)
+            self.route_gps_cache[route_id] = self._remember(("route_gps", route_id), parsed)
+            return parsed
+        return self._stale(("route_gps", route_id), [], mark=True)
 
     def _parse_route_gps(self, data: dict) -> List[dict]:
         """Парсить відповідь routes.GetRouteGPS. Повертає ВСІ активні машини."""
@@ -215,12 +318,10 @@ class EasyWayService:
             elif not isinstance(vehicles, list):
                 vehicles = []
 
-            # Лог для відладки
-            if vehicles:
-                logger.info(f"🔍 RAW VEHICLE DATA (First item): {vehicles[0]}")
-
-            all_ids = [str(v.get("id")) for v in vehicles]
-            logger.info(f"📋 Всі ID на маршруті: {all_ids}")
+            # Лог для відладки (hot path: лише на DEBUG, рядки не форматуються зайвий раз)
+            if vehicles and logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"🔍 RAW VEHICLE DATA (First item): {vehicles[0]}")
+                logger.debug(f"📋 Всі ID на маршруті: {[str(v.get('id')) for v in vehicles]}")
 
             for v in vehicles:
                 if v.get('data_relevance') == 0: continue
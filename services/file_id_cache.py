@@ -0,0 +1,125 @@
+# services/file_id_cache.py
+"""Кеш file_id для файлів, які бот надсилає з диска (documents/, assets/images/)."""
+import asyncio
+import datetime
+import hashlib
+import os
+
+from sqlalchemy import delete, insert, select
+from telegram.error import BadRequest
+
+from config.settings import BASE_DIR
+from database.db import AsyncSessionLocal, TelegramFile
+from utils.logger import logger
+from utils.metrics import REGISTRY
+
+FILE_ID_CACHE = REGISTRY.counter(
+    "bot_file_id_cache_total", "Надсилання файлів: з кешу file_id чи з завантаженням", ("result",)
+)
+
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _file_id_from(message, kind: str) -> str:
+    if kind == "photo":
+        return message.photo[-1].file_id  # найбільший розмір
+    return getattr(message, kind).file_id
+
+
+class FileIdCache:
+    def __init__(self, session_factory=AsyncSessionLocal):
+        self.session_factory = session_factory
+        self._digests = {}  # {шлях: (mtime_ns, розмір, sha256)} — щоб не хешувати файл щоразу
+        self._entries = {}  # {шлях: (sha256, file_id) | None (у БД немає)}
+        self._locks = {}
+
+    async def send(self, send_func, kind: str, path, **kwargs):
+        """
+        Надсилає файл через send_func (напр. bot.send_photo, message.reply_document),
+        передаючи його як аргумент kind ("photo", "document", ...). Повертає Message.
+        FileNotFoundError, якщо файлу немає.
+        """
+        key = self._key(path)
+        digest = await self._digest(path)
+        rejected = None
+        entry = await self._entry(key)
+        if entry is not None and entry[0] == digest:
+            message = await self._send_file_id(send_func, kind, key, entry[1], **kwargs)
+            if message is not None:
+                return message
+            rejected = entry[1]
+
+        # Холодний шлях: завантажує лише один запит, решта чекають і беруть його file_id
+        async with self._locks.setdefault(key, asyncio.Lock()):
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == digest and entry[1] != rejected:
+                message = await self._send_file_id(send_func, kind, key, entry[1], **kwargs)
+                if message is not None:
+                    return message
+
+            with open(path, "rb") as f:
+                message = await send_func(**{kind: f}, **kwargs)
+            FILE_ID_CACHE.inc(result="upload")
+            await self._remember(key, digest, _file_id_from(message, kind))
+            return message
+
+    async def _send_file_id(self, send_func, kind: str, key: str, file_id: str, **kwargs):
+        try:
+            message = await send_func(**{kind: file_id}, **kwargs)
+        except BadRequest as e:
+            logger.warning(f"📎 Cached file_id for {key} rejected ({e}), uploading again")
+            FILE_ID_CACHE.inc(result="rejected")
+            return None
+        FILE_ID_CACHE.inc(result="hit")
+        return message
+
+    def _key(self, path) -> str:
+        path = os.path.abspath(path)
+        # Відносний шлях: однаковий у Docker (/app) і локально
+        return os.path.relpath(path, BASE_DIR) if path.startswith(str(BASE_DIR)) else path
+
+    async def _digest(self, path) -> str:
+        stat = os.stat(path)
+        cached = self._digests.get(path)
+        if cached and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+            return cached[2]
+        digest = await asyncio.to_thread(_sha256, path)
+        self._digests[path] = (stat.st_mtime_ns, stat.st_size, digest)
+        return digest
+
+    async def _entry(self, key: str):
+        if key not in self._entries:
+            try:
+                async with self.session_factory() as session:
+                    result = await session.execute(
+                        select(TelegramFile.sha256, TelegramFile.file_id).where(TelegramFile.path == key)
+                    )
+                    row = result.first()
+            except Exception as e:
+                logger.warning(f"📎 file_id lookup failed for {key}: {e}")
+                return None
+            self._entries[key] = tuple(row) if row else None
+        return self._entries[key]
+
+    async def _remember(self, key: str, digest: str, file_id: str):
+        self._entries[key] = (digest, file_id)
+        try:
+            async with self.session_factory() as session:
+                async with session.begin():
+                    await session.execute(delete(TelegramFile).where(TelegramFile.path == key))
+                    await session.execute(insert(TelegramFile).values(
+                        path=key, sha256=digest, file_id=file_id, updated_at=datetime.datetime.now()
+                    ))
+            logger.info(f"📎 Uploaded {key}, file_id cached")
+        except Exception as e:
+            # У пам'яті file_id вже є; після перезапуску файл просто завантажиться ще раз
+            logger.warning(f"📎 file_id for {key} not saved: {e}")
+
+
+file_id_cache = FileIdCache()
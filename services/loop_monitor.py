@@ -0,0 +1,122 @@
+# services/loop_monitor.py
+"""Затримка event loop (loop lag) і watchdog, що знімає стек коду, який блокує loop."""
+import asyncio
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+
+from config.settings import LOOP_MONITOR_INTERVAL_SEC, LOOP_STALL_THRESHOLD_SEC
+from utils.logger import logger
+from utils.metrics import REGISTRY
+
+LOOP_LAG = REGISTRY.gauge("bot_event_loop_lag_seconds", "Остання виміряна затримка event loop")
+LOOP_LAG_HISTOGRAM = REGISTRY.histogram(
+    "bot_event_loop_lag_distribution_seconds", "Розподіл затримки event loop",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+LOOP_TASKS = REGISTRY.gauge("bot_event_loop_tasks", "Кількість asyncio-задач")
+LOOP_STALLS = REGISTRY.counter(
+    "bot_event_loop_stalls_total", "Зависання loop понад поріг, за місцем у коді", ("location",)
+)
+LOOP_STALL_SECONDS = REGISTRY.counter(
+    "bot_event_loop_stall_seconds_total", "Сумарний час зависань loop, за місцем у коді", ("location",)
+)
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STACK_LIMIT = 25
+
+
+def _is_project_frame(filename: str) -> bool:
+    filename = os.path.abspath(filename)
+    return filename.startswith(PROJECT_ROOT) and "site-packages" not in filename
+
+
+def describe_stack(frame) -> tuple:
+    """(місце в коді проєкту, текст стека). Місце — найглибший кадр з нашого коду."""
+    stack = traceback.extract_stack(frame, limit=STACK_LIMIT)
+    location = "unknown"
+    for entry in reversed(stack):
+        if _is_project_frame(entry.filename):
+            location = f"{os.path.relpath(entry.filename, PROJECT_ROOT)}:{entry.lineno} {entry.name}"
+            break
+    return location, "".join(traceback.format_list(stack))
+
+
+class LoopMonitor:
+    def __init__(self, interval: float = LOOP_MONITOR_INTERVAL_SEC,
+                 stall_threshold: float = LOOP_STALL_THRESHOLD_SEC):
+        self.interval = interval
+        self.stall_threshold = stall_threshold
+        self.max_lag = 0.0
+        self.recent_stalls = deque(maxlen=20)  # [{"at", "lag", "location", "stack"}]
+        self.is_running = False
+        self._expected_wakeup = None
+        self._loop_thread_id = None
+        self._captured = None  # (expected_wakeup, location, stack) — пише watchdog, читає loop
+        self._watchdog = None
+
+    async def start(self):
+        if self.is_running:
+            return
+        self.is_running = True
+        self._loop_thread_id = threading.get_ident()
+        LOOP_TASKS.set_function(lambda: len(asyncio.all_tasks()))
+
+        if self.stall_threshold > 0:
+            self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+            self._watchdog.start()
+        logger.info(f"⏱️ Loop monitor started (interval={self.interval}s, stall>{self.stall_threshold}s)")
+
+        while self.is_running:
+            expected = time.perf_counter() + self.interval
+            self._expected_wakeup = expected
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, time.perf_counter() - expected)
+            self._expected_wakeup = None
+            self._record(expected, lag)
+
+    def stop(self):
+        self.is_running = False
+
+    def _record(self, expected: float, lag: float):
+        LOOP_LAG.set(lag)
+        LOOP_LAG_HISTOGRAM.observe(lag)
+        self.max_lag = max(self.max_lag, lag)
+
+        if self.stall_threshold <= 0 or lag < self.stall_threshold:
+            return
+
+        captured, self._captured = self._captured, None
+        if captured and captured[0] == expected:
+            location, stack = captured[1], captured[2]
+        else:
+            # Зависання коротше за період опитування watchdog — місце невідоме
+            location, stack = "unknown", ""
+
+        LOOP_STALLS.inc(location=location)
+        LOOP_STALL_SECONDS.inc(lag, location=location)
+        self.recent_stalls.append({"at": time.time(), "lag": lag, "location": location, "stack": stack})
+        logger.warning(f"🐢 Event loop blocked for {lag:.2f}s at {location}" + (f"\n{stack}" if stack else ""))
+
+    def _watch(self):
+        """Потік-watchdog: опитує частіше за поріг і знімає стек, поки loop ще заблокований."""
+        poll = max(0.01, self.stall_threshold / 2)
+        while self.is_running:
+            time.sleep(poll)
+            expected = self._expected_wakeup
+            if expected is None or time.perf_counter() - expected < self.stall_threshold:
+                continue
+            if self._captured and self._captured[0] == expected:
+                continue  # це зависання вже зафіксоване
+
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            location, stack = describe_stack(frame)
+            self._captured = (expected, location, stack)
+
+
+loop_monitor = LoopMonitor()
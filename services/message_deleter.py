@@ -0,0 +1,106 @@
+# services/message_deleter.py
+"""Пакетне видалення повідомлень через deleteMessages (до 100 id одним запитом)."""
+import asyncio
+from typing import Iterable
+
+from telegram.error import TelegramError
+
+from config.settings import MESSAGE_DELETE_WINDOW_SEC
+from utils.logger import logger
+from utils.metrics import REGISTRY
+
+MAX_IDS_PER_CALL = 100  # ліміт deleteMessages
+
+DELETE_CALLS = REGISTRY.counter(
+    "bot_message_delete_calls_total", "Запити на видалення повідомлень", ("method", "result")
+)
+DELETED_MESSAGES = REGISTRY.counter("bot_deleted_messages_total", "Повідомлення, передані на видалення")
+
+
+class MessageDeleter:
+    def __init__(self, window_sec: float = MESSAGE_DELETE_WINDOW_SEC):
+        self.window_sec = window_sec
+        self._pending = {}  # {chat_id: (bot, {message_id: None}, [future, ...])}
+        self._tasks = set()
+
+    def delete(self, bot, chat_id: int, message_ids: Iterable[int]) -> asyncio.Future:
+        """
+        Ставить повідомлення в чергу на видалення. Повертає future -> True, якщо всі видалено.
+        Future ніколи не завершується помилкою, тож його можна не чекати.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        ids = [int(message_id) for message_id in message_ids if message_id]
+        if not ids:
+            future.set_result(True)
+            return future
+
+        DELETED_MESSAGES.inc(len(ids))
+        entry = self._pending.get(chat_id)
+        if entry is None:
+            entry = self._pending[chat_id] = (bot, {}, [])
+            self._spawn(self._flush_later(chat_id))
+        entry[1].update(dict.fromkeys(ids))
+        entry[2].append(future)
+        if len(entry[1]) >= MAX_IDS_PER_CALL:
+            self._spawn(self._flush_chat(chat_id))
+        return future
+
+    async def flush(self):
+        """Відправляє все, що чекає (зупинка бота, тести)."""
+        await asyncio.gather(*(self._flush_chat(chat_id) for chat_id in list(self._pending)))
+
+    def _spawn(self, coro):
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _flush_later(self, chat_id: int):
+        await asyncio.sleep(self.window_sec)
+        await self._flush_chat(chat_id)
+
+    async def _flush_chat(self, chat_id: int):
+        entry = self._pending.pop(chat_id, None)
+        if entry is None:
+            return
+        bot, ids, futures = entry
+        ids = list(ids)
+        ok = True
+        for start in range(0, len(ids), MAX_IDS_PER_CALL):
+            ok &= await self._delete_batch(bot, chat_id, ids[start:start + MAX_IDS_PER_CALL])
+        for future in futures:
+            if not future.done():
+                future.set_result(ok)
+
+    async def _delete_batch(self, bot, chat_id: int, ids: list) -> bool:
+        if len(ids) > 1:
+            try:
+                await bot._post("deleteMessages", {"chat_id": chat_id, "message_ids": ids})
+                DELETE_CALLS.inc(method="deleteMessages", result="ok")
+                return True
+            except TelegramError as e:
+                # Напр. "message can't be deleted" — серед id є надто старі; решту видалимо поштучно
+                DELETE_CALLS.inc(method="deleteMessages", result="error")
+                logger.debug(f"🧹 deleteMessages failed for chat {chat_id} ({len(ids)} ids): {e}")
+            except Exception as e:
+                DELETE_CALLS.inc(method="deleteMessages", result="error")
+                logger.warning(f"🧹 deleteMessages failed for chat {chat_id}: {e}")
+
+        results = await asyncio.gather(*(self._delete_one(bot, chat_id, message_id) for message_id in ids))
+        return all(results)
+
+    @staticmethod
+    async def _delete_one(bot, chat_id: int, message_id: int) -> bool:
+        try:
+            await bot.delete_message(chat_id=chat_id, message_id=message_id)
+            DELETE_CALLS.inc(method="deleteMessage", result="ok")
+            return True
+        except Exception as e:
+            # Повідомлення вже видалене або старше 48 год — чистити нічого
+            DELETE_CALLS.inc(method="deleteMessage", result="error")
+            logger.debug(f"🧹 Could not delete message {message_id} in chat {chat_id}: {e}",
+                         extra={"log_key": "delete_message"})
+            return False
+
+
+message_deleter = MessageDeleter()
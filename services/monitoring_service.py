@@ -1,15 +1,14 @@
 # services/monitoring_service.py
 import asyncio
+import time
 import aiohttp
 import logging
 import io
 import csv
 import zipfile
-import requests
 import html
-import urllib3
-from google.transit import gtfs_realtime_pb2
 from services.stop_matcher import stop_matcher
+from utils.metrics import REGISTRY, record_upstream
 
 logger = logging.getLogger("transport_bot")
 
@@ -18,6 +17,14 @@ API_KEY = "a8c6d35e-f2c1-4f72-b902-831fa9215009"
 REALTIME_URL = "https://gw.x24.digital/api/od/gtfs/v1/download/gtfs-rt-vehicles-pr.pb"
 STATIC_URL = "https://gw.x24.digital/api/od/gtfs/v1/download/static"
 
+TICK_DURATION = REGISTRY.histogram(
+    "bot_gtfs_rt_tick_duration_seconds", "Тривалість оновлення GTFS-RT за фазами", ("phase",)
+)
+TICK_ERRORS = REGISTRY.counter("bot_gtfs_rt_tick_errors_total", "Невдалі оновлення GTFS-RT")
+FEED_ENTITIES = REGISTRY.gauge("bot_gtfs_rt_feed_entities", "Кількість сутностей в останньому фіді")
+ACCESSIBLE_VEHICLES = REGISTRY.gauge("bot_gtfs_rt_accessible_vehicles", "Інклюзивний транспорт на лінії")
+LAST_SUCCESS = REGISTRY.gauge("bot_gtfs_rt_last_success_timestamp", "Unix-час останнього успішного оновлення")
+
 
 class MonitoringService:
     _instance = None
@@ -31,15 +38,16 @@ class MonitoringService:
             cls._instance.running = False
         return cls._instance
 
-    async def start(self):
-        """Запускає фоновий цикл"""
+    async def start(self, load_static: bool = True):
+        """Запускає фоновий цикл. load_static=False — статичний GTFS оновлює bot/startup.py."""
         if self.running: return
         self.running = True
         logger.info("🚀 Monitoring Service started (Trip-based Logic).")
 
-        import threading
-        t = threading.Thread(target=self._load_static_data)
-        t.start()
+        if load_static:
+            import threading
+            t = threading.Thread(target=self._load_static_data)
+            t.start()
 
         while self.running:
             try:
@@ -48,139 +56,177 @@ class MonitoringService:
                 logger.error(f"Monitoring update failed: {e}")
             await asyncio.sleep(15)
 
-    def _load_static_data(self):
-        """Завантажує routes.txt та trips.txt"""
+    async def refresh_static(self) -> bool:
+        """Оновлює статичний GTFS у потоці (мережа + розбір zip не блокують event loop)."""
+        return await asyncio.to_thread(self._load_static_data)
+
+    def export_static(self) -> dict:
+        """Знімок статичних довідників для database/snapshots.py."""
+        return {
+            "routes_map": self.routes_map,
+            "trips_accessibility": self.trips_accessibility,
+            "stops": stop_matcher.stops,
+        }
+
+    def restore_static(self, snapshot: dict):
+        self.routes_map = snapshot.get("routes_map", {})
+        self.trips_accessibility = snapshot.get("trips_accessibility", {})
+        stop_matcher.stops = snapshot.get("stops", [])
+
+    def _load_static_data(self) -> bool:
+        """Завантажує routes.txt, trips.txt і stops.txt одним запитом. Повертає True при успіху."""
         logger.info("🔄 Loading GTFS Static data...")
 
+        # requests/urllib3 потрібні лише для цього завантаження (у потоці) — не тягнемо їх при старті
+        import requests
         import urllib3
         urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
-        stop_matcher.load_stops_from_static(API_KEY)
-
         try:
             headers = {'ApiKey': API_KEY}
             resp = requests.get(STATIC_URL, headers=headers, timeout=60, verify=False)
 
-            if resp.status_code == 200:
-                with zipfile.ZipFile(io.BytesIO(resp.content)) as z:
-
-                    # 1. Парсимо routes.txt (RouteID -> Human Name)
-                    if 'routes.txt' in z.namelist():
-                        with z.open('routes.txt') as f:
-                            reader = csv.DictReader(io.TextIOWrapper(f, encoding='utf-8'))
-                            for row in reader:
-                                r_id = row.get('route_id')
-                                r_name = row.get('route_short_name')
-                                if r_id and r_name:
-                                    self.routes_map[str(r_id)] = str(r_name).strip()
-                        logger.info(f"✅ Routes map loaded: {len(self.routes_map)} routes.")
-
-                    # 2. Парсимо trips.txt (Trip ID -> Accessibility)
-                    if 'trips.txt' in z.namelist():
-                        with z.open('trips.txt') as f:
-                            reader = csv.DictReader(io.TextIOWrapper(f, encoding='utf-8'))
-
-                            # Перевіряємо наявність колонки 'wheelchair_accessible'
-                            fieldnames = reader.fieldnames if reader.fieldnames else []
-                            has_accessibility_info = 'wheelchair_accessible' in fieldnames
-
-                            #if not has_accessibility_info:
-                                #logger.warning(
-                            #        "⚠️ 'wheelchair_accessible' column NOT FOUND in trips.txt! All trips will be treated as unknown.")
-
-                            count_accessible = 0
-                            for row in reader:
-                                t_id = row.get('trip_id')
-                                # Якщо колонки немає, get поверне None, і ми запишемо '0' (невідомо)
-                                wheelchair = row.get('wheelchair_accessible', '0')
-
-                                if t_id:
-                                    self.trips_accessibility[str(t_id)] = str(wheelchair)
-                                    if str(wheelchair) == '1':
-                                        count_accessible += 1
-
-                        #logger.info(
-                        #    f"✅ Trips map loaded: {len(self.trips_accessibility)} trips. (Accessible marked: {count_accessible})")
-                    else:
-                        logger.warning("⚠️ 'trips.txt' not found.")
-
-            else:
+            if resp.status_code != 200:
                 logger.warning(f"Failed to load Static GTFS: {resp.status_code}")
+                return False
+
+            # Нові довідники будуються окремо й підміняють старі цілком (старт міг бути зі знімка)
+            routes_map = {}
+            trips_accessibility = {}
+            with zipfile.ZipFile(io.BytesIO(resp.content)) as z:
+
+                # 0. Зупинки для stop_matcher — з того ж архіву, без повторного завантаження
+                if 'stops.txt' in z.namelist():
+                    stop_matcher.load_stops_from_zip(z)
+
+                # 1. Парсимо routes.txt (RouteID -> Human Name)
+                if 'routes.txt' in z.namelist():
+                    with z.open('routes.txt') as f:
+                        reader = csv.DictReader(io.TextIOWrapper(f, encoding='utf-8'))
+                        for row in reader:
+                            r_id = row.get('route_id')
+                            r_name = row.get('route_short_name')
+                            if r_id and r_name:
+                                routes_map[str(r_id)] = str(r_name).strip()
+                    self.routes_map = routes_map
+                    logger.info(f"✅ Routes map loaded: {len(self.routes_map)} routes.")
+
+                # 2. Парсимо trips.txt (Trip ID -> Accessibility)
+                if 'trips.txt' in z.namelist():
+                    with z.open('trips.txt') as f:
+                        reader = csv.DictReader(io.TextIOWrapper(f, encoding='utf-8'))
+                        for row in reader:
+                            t_id = row.get('trip_id')
+                            # Якщо колонки немає, get поверне None, і ми запишемо '0' (невідомо)
+                            wheelchair = row.get('wheelchair_accessible', '0')
+
+                            if t_id:
+                                trips_accessibility[str(t_id)] = str(wheelchair)
+                    self.trips_accessibility = trips_accessibility
+                else:
+                    logger.warning("⚠️ 'trips.txt' not found.")
+            return True
 
         except Exception as e:
             logger.error(f"Error loading static data: {e}", exc_info=True)
+            return False
 
-    async def _update_data(self):
-        headers = {'ApiKey': API_KEY}
-        connector = aiohttp.TCPConnector(ssl=False)
+    def _parse_feed(self, content: bytes) -> tuple:
+        """
+        Розбирає GTFS-RT (protobuf) у {номер маршруту: [інклюзивний транспорт]}.
+        Чиста CPU-робота без мережі — окремо, щоб її можна було міряти офлайн.
+        Повертає (дані, кількість сутностей у фіді).
+        """
+        from google.transit import gtfs_realtime_pb2  # protobuf — лише коли прийшов перший фід
 
-        try:
-            async with aiohttp.ClientSession(connector=connector) as session:
-                async with session.get(REALTIME_URL, headers=headers) as resp:
-                    if resp.status != 200:
-                        return
-                    content = await resp.read()
+        feed = gtfs_realtime_pb2.FeedMessage()
+        feed.ParseFromString(content)
 
-            feed = gtfs_realtime_pb2.FeedMessage()
-            feed.ParseFromString(content)
+        new_data = {}
+        debug_log_counter = 0
 
-            new_data = {}
-            debug_log_counter = 0
+        for entity in feed.entity:
+            if not entity.HasField('vehicle'): continue
 
-            for entity in feed.entity:
-                if not entity.HasField('vehicle'): continue
+            veh = entity.vehicle
 
-                veh = entity.vehicle
+            # Отримуємо інформацію про маршрут
+            raw_route_id = str(veh.trip.route_id).strip()
+            # Перетворюємо ID маршруту в номер (напр. 113 -> 5)
+            route_num = self.routes_map.get(raw_route_id, raw_route_id)
 
-                # Отримуємо інформацію про маршрут
-                raw_route_id = str(veh.trip.route_id).strip()
-                # Перетворюємо ID маршруту в номер (напр. 113 -> 5)
-                route_num = self.routes_map.get(raw_route_id, raw_route_id)
+            # Отримуємо інформацію про рейс (Trip)
+            trip_id = str(veh.trip.trip_id).strip()
 
-                # Отримуємо інформацію про рейс (Trip)
-                trip_id = str(veh.trip.trip_id).strip()
+            # Перевіряємо доступність через Trip
+            # '1' = доступно, '2' = ні, '0' = невідомо
+            accessibility_status = self.trips_accessibility.get(trip_id, '0')
 
-                # Перевіряємо доступність через Trip
-                # '1' = доступно, '2' = ні, '0' = невідомо
-                accessibility_status = self.trips_accessibility.get(trip_id, '0')
+            # === ЛОГІКА ВИЗНАЧЕННЯ ІНКЛЮЗИВНОСТІ ===
+            # Якщо trips.txt містить '1', то це точно інклюзивний транспорт.
+            # Якщо ми не знайшли інформації ('0'), ми поки що ІГНОРУЄМО такий транспорт,
+            # щоб не показувати старі вагони як інклюзивні.
+            is_accessible = (accessibility_status == '1')
 
-                # === ЛОГІКА ВИЗНАЧЕННЯ ІНКЛЮЗИВНОСТІ ===
-                # Якщо trips.txt містить '1', то це точно інклюзивний транспорт.
-                # Якщо ми не знайшли інформації ('0'), ми поки що ІГНОРУЄМО такий транспорт,
-                # щоб не показувати старі вагони як інклюзивні.
-                is_accessible = (accessibility_status == '1')
+            # Отримуємо назву для відображення (Бортовий номер)
+            raw_id = str(veh.vehicle.id).strip()
+            label = str(veh.vehicle.label).strip()
+            plate = str(veh.vehicle.license_plate).strip()
 
-                # Отримуємо назву для відображення (Бортовий номер)
-                raw_id = str(veh.vehicle.id).strip()
-                label = str(veh.vehicle.label).strip()
-                plate = str(veh.vehicle.license_plate).strip()
+            # Вибираємо найкращу назву для відображення
+            bort_number = label if label else (plate if plate else raw_id)
 
-                # Вибираємо найкращу назву для відображення
-                bort_number = label if label else (plate if plate else raw_id)
+            # ЛОГ ДІАГНОСТИКИ (Перші 5 елементів)
+            #if debug_log_counter < 5:
+               # logger.info(
+               #     f"🔍 TRIP CHECK: Route {route_num} | TripID='{trip_id}' -> Acc='{accessibility_status}' -> IsAcc? {is_accessible}")
+                #debug_log_counter += 1
 
-                # ЛОГ ДІАГНОСТИКИ (Перші 5 елементів)
-                #if debug_log_counter < 5:
-                   # logger.info(
-                   #     f"🔍 TRIP CHECK: Route {route_num} | TripID='{trip_id}' -> Acc='{accessibility_status}' -> IsAcc? {is_accessible}")
-                    #debug_log_counter += 1
+            if is_accessible:
+                lat = veh.position.latitude
+                lon = veh.position.longitude
+                stop_name = stop_matcher.find_nearest_stop_name(lat, lon)
 
-                if is_accessible:
-                    lat = veh.position.latitude
-                    lon = veh.position.longitude
-                    stop_name = stop_matcher.find_nearest_stop_name(lat, lon)
+                vehicle_data = {
+                    "bort": html.escape(bort_number),
+                    "stop_name": html.escape(stop_name)
+                }
 
-                    vehicle_data = {
-                        "bort": html.escape(bort_number),
-                        "stop_name": html.escape(stop_name)
-                    }
+                if route_num not in new_data:
+                    new_data[route_num] = []
+                new_data[route_num].append(vehicle_data)
 
-                    if route_num not in new_data:
-                        new_data[route_num] = []
-                    new_data[route_num].append(vehicle_data)
+        return new_data, len(feed.entity)
 
+    async def _update_data(self):
+        headers = {'ApiKey': API_KEY}
+        connector = aiohttp.TCPConnector(ssl=False)
+
+        tick_start = time.perf_counter()
+        try:
+            async with aiohttp.ClientSession(connector=connector) as session:
+                async with session.get(REALTIME_URL, headers=headers) as resp:
+                    if resp.status != 200:
+                        TICK_ERRORS.inc()
+                        record_upstream("gtfs_rt", "download", time.perf_counter() - tick_start, error=True)
+                        return
+                    content = await resp.read()
+            download_sec = time.perf_counter() - tick_start
+            TICK_DURATION.observe(download_sec, phase="download")
+            record_upstream("gtfs_rt", "download", download_sec)
+
+            parse_start = time.perf_counter()
+            new_data, entities_count = self._parse_feed(content)
             self.data = new_data
 
+            TICK_DURATION.observe(time.perf_counter() - parse_start, phase="parse")
+            TICK_DURATION.observe(time.perf_counter() - tick_start, phase="total")
+            FEED_ENTITIES.set(entities_count)
+            ACCESSIBLE_VEHICLES.set(sum(len(v) for v in new_data.values()))
+            LAST_SUCCESS.set(time.time())
+
         except Exception as e:
+            TICK_ERRORS.inc()
             logger.error(f"Error in _update_data: {e}")
 
     def get_accessible_on_route(self, route_num: str) -> list:
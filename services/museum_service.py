@@ -1,89 +1,184 @@
 
 from sqlalchemy import select
 from database.db import AsyncSessionLocal, MuseumBooking, MuseumHolidayBooking
-from integrations.google_sheets.client import GoogleSheetsClient
+from integrations.google_sheets.client import sheets_client
+from services.sheets_outbox import sheets_outbox, enqueue_booking, enqueue_unsynced_sources
 
 from utils.logger import logger
+from utils.metrics import REGISTRY
 import asyncio
+import datetime
 import time
 
 
+DATES_RANGE = "MuseumDates!A2:A50"
+HOLIDAY_DATES_RANGE = "MuseumDates!B2:B50"
+
+SNAPSHOT_READS = REGISTRY.counter(
+    "bot_museum_snapshot_reads_total", "Читання знімка дат музею", ("result",)
+)
+SNAPSHOT_REFRESH = REGISTRY.histogram(
+    "bot_museum_snapshot_refresh_seconds", "Тривалість оновлення знімка дат", ("result",)
+)
+SNAPSHOT_AGE = REGISTRY.gauge("bot_museum_snapshot_age_seconds", "Вік знімка дат музею")
+
+
 class MuseumService:
+    """
+    Дати екскурсій тримаються в одному знімку (snapshot), який завантажується
+    ОДНИМ batchGet для обох колонок (A — звичайні, B — святкові).
+
+    - Паралельні виклики чекають на одне й те саме оновлення (single-flight).
+    - Якщо знімок старіє — віддаємо його одразу, а оновлюємо у фоні (stale-while-revalidate),
+      тож користувач, що обирає дату, не чекає на Google Sheets.
+    - Зміни адміна записуються в таблицю і одразу ж у знімок (write-through). Кожен запис збільшує
+      покоління знімка: оновлення, що почалося до запису, відкидається, щоб не повернути стару дату.
+    - Холодний старт чекає на таблицю не довше _cold_start_wait; якщо Sheets недоступні — дат поки немає,
+      а завантаження продовжується у фоні (і не повторюється частіше, ніж раз на _retry_after_error).
+    """
+
     def __init__(self):
-        self.sheets = GoogleSheetsClient()
+        self.sheets = sheets_client
         self._dates_cache = []
-        self._last_cache_update = 0
         self._holiday_dates_cache = []
-        self._last_holiday_cache_update = 0
+        self._last_cache_update = 0
         self._cache_ttl = 300  # Кеш живе 5 хвилин (300 сек)
+        self._refresh_ahead = 60  # Фонове оновлення за хвилину до завершення TTL
+        self._refresh_task = None
+        self._generation = 0  # +1 після кожної зміни адміна
+        self._cold_start_wait = 3
+        self._retry_after_error = 30
+        self._last_error_at = 0.0
+        self.is_running = False
+        SNAPSHOT_AGE.set_function(lambda: self._snapshot_age() if self._last_cache_update else -1)
+
+    # ---------- Знімок дат ----------
+
+    def _snapshot_age(self) -> float:
+        return time.time() - self._last_cache_update
+
+    async def _load_snapshot(self) -> bool:
+        logger.info("🔄 Museum dates: Updating snapshot from Google Sheets...")
+        start_ts = time.perf_counter()
+        generation = self._generation
+        try:
+            dates_raw, holiday_raw = await self.sheets.batch_get([DATES_RANGE, HOLIDAY_DATES_RANGE])
+        except Exception as e:
+            SNAPSHOT_REFRESH.observe(time.perf_counter() - start_ts, result="error")
+            self._last_error_at = time.monotonic()
+            logger.error(f"❌ Museum dates snapshot refresh failed: {e}")
+            return False
+        if generation != self._generation:
+            # Поки читали, адмін змінив дати: прочитане могло бути ще без його зміни
+            SNAPSHOT_REFRESH.observe(time.perf_counter() - start_ts, result="discarded")
+            logger.info("🔄 Museum dates: snapshot changed during refresh, result discarded")
+            self.invalidate_dates_cache()
+            return False
+        SNAPSHOT_REFRESH.observe(time.perf_counter() - start_ts, result="ok")
+
+        self._dates_cache = [row[0] for row in dates_raw if row]
+        self._holiday_dates_cache = [row[0] for row in holiday_raw if row]
+        self._last_cache_update = time.time()
+        return True
+
+    def refresh_snapshot(self) -> asyncio.Task:
+        """Запускає оновлення знімка; якщо воно вже триває — повертає ту саму задачу."""
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._load_snapshot())
+        return self._refresh_task
+
+    def _recently_failed(self) -> bool:
+        """Sheets щойно не відповіли: не смикаємо їх знову раніше за _retry_after_error."""
+        return bool(self._last_error_at) and time.monotonic() - self._last_error_at < self._retry_after_error
+
+    async def _get_snapshot(self):
+        if not self._last_cache_update:
+            # Холодний старт: чекаємо (разом з усіма іншими викликами) на одне завантаження, але недовго
+            SNAPSHOT_READS.inc(result="cold")
+            if self._recently_failed():
+                return self._dates_cache, self._holiday_dates_cache
+            try:
+                await asyncio.wait_for(asyncio.shield(self.refresh_snapshot()), timeout=self._cold_start_wait)
+            except asyncio.TimeoutError:
+                logger.warning("⚠️ Museum dates: Google Sheets is slow, answering without dates")
+        elif self._snapshot_age() >= self._cache_ttl - self._refresh_ahead:
+            # Віддаємо те, що є, а свіжі дані підтягуємо у фоні
+            SNAPSHOT_READS.inc(result="stale")
+            if not self._recently_failed():
+                self.refresh_snapshot()
+        else:
+            SNAPSHOT_READS.inc(result="hit")
+            logger.debug("💎 Museum dates: Cache HIT", extra={"log_key": "museum_cache_hit"})
+        return self._dates_cache, self._holiday_dates_cache
+
+    async def start(self):
+        """Фоновий цикл: прогріває знімок на старті і оновлює його до завершення TTL."""
+        if self.is_running:
+            return
+        self.is_running = True
+        interval = max(30, self._cache_ttl - self._refresh_ahead)
+        while self.is_running:
+            await asyncio.shield(self.refresh_snapshot())
+            await asyncio.sleep(interval)
 
     def invalidate_dates_cache(self) -> None:
-        """Скидає кеш дат після змін у Google Sheets (адмін: додавання/видалення)."""
-        self._dates_cache = []
-        self._last_cache_update = 0
+        """Позначає знімок застарілим: наступний запит віддасть поточні дані і оновить їх у фоні."""
+        if self._last_cache_update:
+            self._last_cache_update = time.time() - self._cache_ttl
         logger.info("🗑️ Museum dates cache invalidated")
 
-    def invalidate_holiday_dates_cache(self) -> None:
-        """Скидає кеш святкових дат після змін у Google Sheets."""
-        self._holiday_dates_cache = []
-        self._last_holiday_cache_update = 0
-        logger.info("🗑️ Museum holiday dates cache invalidated")
+    invalidate_holiday_dates_cache = invalidate_dates_cache
 
     async def get_available_dates(self) -> list:
-        """
-        Отримує дати звичайних екскурсій.
-        Спочатку дивиться в кеш. Якщо кеш старий -> читає з Google Sheets.
-        """
-        current_time = time.time()
-
-        # Якщо кеш свіжий і не пустий - віддаємо його
-        if self._dates_cache and (current_time - self._last_cache_update < self._cache_ttl):
-            logger.info("💎 Museum dates: Cache HIT")
-            return self._dates_cache
-
-        logger.info("🔄 Museum dates: Updating from Google Sheets...")
-
-        # Читаємо з Google Sheets (в окремому потоці, щоб не блокувати)
-        loop = asyncio.get_running_loop()
-        raw_dates = await loop.run_in_executor(
-            None,
-            self.sheets.read_range,
-            "MuseumDates!A2:A50"
-        )
-
-        if raw_dates:
-            # Оновлюємо кеш
-            self._dates_cache = [row[0] for row in raw_dates if row]
-            self._last_cache_update = current_time
-            return self._dates_cache
-
-        return []
+        """Дати звичайних екскурсій (колонка A) зі знімка."""
+        dates, _ = await self._get_snapshot()
+        return list(dates)
 
     async def get_available_holiday_dates(self) -> list:
+        """Дати святкових екскурсій (колонка B) зі знімка."""
+        _, holiday_dates = await self._get_snapshot()
+        return list(holiday_dates)
+
+    # ---------- Зміни дат адміном (write-through) ----------
+
+    async def add_date(self, date_text: str) -> bool:
+        """Додає дату звичайної екскурсії в кінець колонки A і одразу в знімок."""
+        ok = await self.sheets.append_row(sheet_name="MuseumDates", values=[date_text])
+        if ok:
+            self._generation += 1
+            if date_text not in self._dates_cache:
+                self._dates_cache = self._dates_cache + [date_text]
+        return ok
+
+    async def add_holiday_date(self, date_text: str):
         """
-        Отримує дати святкових екскурсій з колонки B.
+        Записує святкову дату в першу вільну клітинку колонки B.
+        Повертає адресу клітинки (напр. "B7") або None при помилці.
         """
-        current_time = time.time()
-
-        if self._holiday_dates_cache and (current_time - self._last_holiday_cache_update < self._cache_ttl):
-            logger.info("💎 Museum holiday dates: Cache HIT")
-            return self._holiday_dates_cache
-
-        logger.info("🔄 Museum holiday dates: Updating from Google Sheets...")
-
-        loop = asyncio.get_running_loop()
-        raw_dates = await loop.run_in_executor(
-            None,
-            self.sheets.read_range,
-            "MuseumDates!B2:B50"
-        )
-
-        if raw_dates:
-            self._holiday_dates_cache = [row[0] for row in raw_dates if row]
-            self._last_holiday_cache_update = current_time
-            return self._holiday_dates_cache
-
-        return []
+        dates_data = await self.sheets.read_range("MuseumDates!B1:B100")
+        cell_ref = f"B{len(dates_data) + 1 if dates_data else 1}"
+
+        ok = await self.sheets.update_cell("MuseumDates", cell_ref, date_text)
+        if not ok:
+            return None
+        self._generation += 1
+        if date_text not in self._holiday_dates_cache:
+            self._holiday_dates_cache = self._holiday_dates_cache + [date_text]
+        return cell_ref
+
+    async def delete_date(self, cell: str, date_text: str = "") -> bool:
+        """Очищає клітинку з датою (A* — звичайна, B* — святкова) і прибирає дату зі знімка."""
+        ok = await self.sheets.clear_cell(sheet_name="MuseumDates", cell=cell)
+        if ok:
+            self._generation += 1
+        if ok and date_text:
+            if cell.upper().startswith("B"):
+                self._holiday_dates_cache = [d for d in self._holiday_dates_cache if d != date_text]
+            else:
+                self._dates_cache = [d for d in self._dates_cache if d != date_text]
+        if ok and not date_text:
+            self.invalidate_dates_cache()
+        return ok
 
     def _to_kyiv_time(self, dt_value):
         if not dt_value: return None
@@ -139,92 +234,32 @@ class MuseumService:
                     user_name=name,
                     user_phone=phone
                 )
+                booking.created_at = datetime.datetime.utcnow()
                 session.add(booking)
+                # Рядок для Google Sheets — в outbox у тій самій транзакції
+                await enqueue_booking(session, booking)
                 await session.commit()
-                await session.refresh(booking)
                 logger.info(f"✅ Booking saved to SQLite: {name}, {date}")
 
-                # Запускаємо фонову задачу для відправки в Sheets
-                asyncio.create_task(self._sync_to_sheets_task(booking.id))
-
-                return True
+            sheets_outbox.notify()
+            return True
         except Exception as e:
             logger.error(f"❌ Failed to save booking to DB: {e}")
             return False
 
-    async def _sync_to_sheets_task(self, booking_id: int):
-        """Фонова задача для синхронізації 1 запису в Google Sheets"""
-        try:
-            from datetime import datetime
-            import asyncio
-            
-            async with AsyncSessionLocal() as session:
-                booking = await session.get(MuseumBooking, booking_id)
-                if not booking or booking.status == "synced":
-                    return
-
-                local_created_at = self._to_kyiv_time(booking.created_at)
-                reg_date = local_created_at.strftime("%d.%m.%Y %H:%M") if local_created_at else ""
-                row = [
-                    reg_date,
-                    booking.excursion_date,
-                    str(booking.people_count),
-                    booking.user_name,
-                    booking.user_phone
-                ]
-
-                # Відправляємо в Google Sheets
-                loop = asyncio.get_running_loop()
-                success = await loop.run_in_executor(
-                    None,
-                    self.sheets.append_row,
-                    "MuseumBookings",
-                    row
-                )
-
-                if success:
-                    booking.status = "synced"
-                    await session.commit()
-                    logger.info(f"✅ Sync to Sheets successful for booking ID {booking_id}")
-        except Exception as e:
-            logger.error(f"❌ Background sync failed: {e}")
-
     async def sync_unsynced_bookings(self):
         """
         Цю функцію можна викликати окремо (напр. адмін-командою),
-        щоб вивантажити всі нові записи з БД в Google Sheets.
+        щоб вивантажити всі нові записи з БД в Google Sheets (через outbox).
         """
         try:
-            async with AsyncSessionLocal() as session:
-                result = await session.execute(
-                    select(MuseumBooking).where(MuseumBooking.status == "new")
-                )
-                bookings = result.scalars().all()
-                if not bookings: return
-                
-                rows = []
-                for b in bookings:
-                    local_dt = self._to_kyiv_time(b.created_at)
-                    reg_date = local_dt.strftime("%d.%m.%Y %H:%M") if local_dt else ""
-                    rows.append([reg_date, b.excursion_date, str(b.people_count), b.user_name, b.user_phone])
-                
-                # Відправляємо всі пакетом
-                loop = asyncio.get_running_loop()
-                success = await loop.run_in_executor(
-                    None,
-                    self.sheets.append_rows,
-                    "MuseumBookings",
-                    rows
-                )
-                
-                if success:
-                    for b in bookings:
-                        b.status = "synced"
-                    await session.commit()
-                    logger.info(f"✅ Synced {len(rows)} past museum bookings to Google Sheets")
-                    
+            await enqueue_unsynced_sources()
+            count = await sheets_outbox.drain()
+            logger.info(f"✅ Synced {count} rows to Google Sheets via outbox")
+            return count
         except Exception as e:
             logger.error(f"❌ Failed to sync past bookings: {e}")
+            return 0
 
     async def get_last_holiday_bookings(self, limit: int = 15, offset: int = 0) -> list:
         """
@@ -271,53 +306,18 @@ class MuseumService:
                     user_name=name,
                     user_phone=phone
                 )
+                booking.created_at = datetime.datetime.utcnow()
                 session.add(booking)
+                await enqueue_booking(session, booking, holiday=True)
                 await session.commit()
-                await session.refresh(booking)
                 logger.info(f"✅ Holiday booking saved to SQLite: {name}, {date}")
 
-                # Запускаємо фонову задачу для відправки в Sheets
-                asyncio.create_task(self._sync_holiday_to_sheets_task(booking.id))
-
-                return True
+            sheets_outbox.notify()
+            return True
         except Exception as e:
             logger.error(f"❌ Failed to save holiday booking to DB: {e}")
             return False
 
-    async def _sync_holiday_to_sheets_task(self, booking_id: int):
-        """Фонова задача для синхронізації 1 запису святкового бронювання в Google Sheets"""
-        try:
-            async with AsyncSessionLocal() as session:
-                booking = await session.get(MuseumHolidayBooking, booking_id)
-                if not booking or booking.status == "synced":
-                    return
-
-                local_created_at = self._to_kyiv_time(booking.created_at)
-                reg_date = local_created_at.strftime("%d.%m.%Y %H:%M") if local_created_at else ""
-                row = [
-                    reg_date,
-                    booking.excursion_date,
-                    str(booking.people_count),
-                    booking.user_name,
-                    booking.user_phone
-                ]
-
-                # Відправляємо в Google Sheets у лист "Holiday excursion list"
-                loop = asyncio.get_running_loop()
-                success = await loop.run_in_executor(
-                    None,
-                    self.sheets.append_row,
-                    "Holiday excursion list",
-                    row
-                )
-
-                if success:
-                    booking.status = "synced"
-                    await session.commit()
-                    logger.info(f"✅ Sync to Sheets successful for holiday booking ID {booking_id}")
-        except Exception as e:
-            logger.error(f"❌ Background holiday sync failed: {e}")
-
     async def get_holiday_bookings_count(self, excursion_date: str) -> int:
         """
         Повертає кількість наявних святкових заявок на певну дату.
@@ -331,4 +331,7 @@ class MuseumService:
                 return result.scalar() or 0
         except Exception as e:
             logger.error(f"❌ Error counting holiday bookings: {e}")
-            return 0
\ No newline at end of file
+            return 0
+
+
+museum_service = MuseumService()
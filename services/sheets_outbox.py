@@ -0,0 +1,495 @@
+# services/sheets_outbox.py
+"""
+Transactional outbox для Google Sheets: рядок кладеться в sheet_outbox у тій самій транзакції,
+що й основний запис, а фоновий відправник шле їх пачками без дублів.
+"""
+import asyncio
+import datetime
+import json
+import random
+import time
+from datetime import timezone
+from typing import Optional
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import select, update, delete, and_, or_, func
+
+from config.constants import SHEET_NAMES
+from config.settings import (
+    FEEDBACK_SYNC_BATCH_SIZE,
+    FEEDBACK_SYNC_MAX_ROWS,
+    SHEETS_OUTBOX_INTERVAL_SEC,
+    SHEETS_OUTBOX_CONCURRENCY,
+    SHEETS_OUTBOX_BASE_BACKOFF_SEC,
+    SHEETS_OUTBOX_MAX_BACKOFF_SEC,
+    SHEETS_OUTBOX_RETENTION_DAYS,
+)
+from database.db import AsyncSessionLocal, SheetOutbox, Feedback, MuseumBooking, MuseumHolidayBooking
+from integrations.google_sheets.client import sheets_client, quote_sheet_name
+from services.stats_service import stats_service
+from utils.logger import logger
+from utils.metrics import REGISTRY
+
+KYIV_TZ = ZoneInfo("Europe/Kyiv")
+
+MUSEUM_BOOKINGS_SHEET = "MuseumBookings"
+MUSEUM_HOLIDAY_BOOKINGS_SHEET = "Holiday excursion list"
+
+# Таблиці-джерела, яким після відправки ставимо status="synced"
+SOURCE_MODELS = {
+    "feedbacks": Feedback,
+    "museum_bookings": MuseumBooking,
+    "museum_holiday_bookings": MuseumHolidayBooking,
+}
+
+# Колонки, по яких шукаємо вже відправлений рядок у вкладці
+FEEDBACK_MATCH_COLUMNS = (1,)  # ID звернення
+BOOKING_MATCH_COLUMNS = (1, 3)  # Дата екскурсії + ПІБ
+
+OUTBOX_ENQUEUED = REGISTRY.counter("bot_sheets_outbox_enqueued_total", "Рядки, поставлені в outbox", ("sheet",))
+OUTBOX_SENT = REGISTRY.counter("bot_sheets_outbox_sent_total", "Рядки, відправлені в таблицю", ("sheet",))
+OUTBOX_FAILED = REGISTRY.counter("bot_sheets_outbox_failed_total", "Невдалі спроби відправки рядків", ("sheet",))
+OUTBOX_LAG = REGISTRY.histogram(
+    "bot_sheets_sync_lag_seconds", "Час від створення запису до появи в таблиці",
+    buckets=(1, 5, 15, 30, 60, 120, 300, 900, 1800, 3600),
+)
+OUTBOX_BACKLOG = REGISTRY.gauge("bot_sheets_outbox_backlog", "Невідправлені рядки outbox")
+OUTBOX_OLDEST_AGE = REGISTRY.gauge("bot_sheets_outbox_oldest_pending_seconds", "Вік найстарішого невідправленого рядка")
+OUTBOX_PRUNED = REGISTRY.counter("bot_sheets_outbox_pruned_total", "Видалені старі відправлені рядки outbox")
+
+PRUNE_INTERVAL_SEC = 3600
+
+
+# ================= ФОРМУВАННЯ РЯДКІВ =================
+
+def to_kyiv_time(dt_value):
+    if not dt_value:
+        return None
+    if dt_value.tzinfo is None:
+        dt_value = dt_value.replace(tzinfo=timezone.utc)
+    return dt_value.astimezone(KYIV_TZ)
+
+
+def format_phone_for_sheet(phone_value: Optional[str]):
+    if not phone_value:
+        return ""
+    phone_str = str(phone_value).strip()
+    if not phone_str:
+        return ""
+    if phone_str.startswith("'"):
+        return phone_str
+    if phone_str.startswith("0") or phone_str.startswith("+"):
+        return f"'{phone_str}'"
+    return phone_str
+
+
+def feedback_sheet_name(category: Optional[str]) -> str:
+    """Назва вкладки для категорії звернення."""
+    category_key = f"{category}s"  # За замовчуванням (complaint -> complaints)
+
+    # Подяки з thanks_handlers записані кирилицею
+    if category in ('Подяки', 'thanks'):
+        category_key = 'thanks'
+    elif category == 'Скарги':
+        category_key = 'complaints'
+    elif category == 'Пропозиції':
+        category_key = 'suggestions'
+
+    return SHEET_NAMES.get(category_key, "Інше")
+
+
+def feedback_sheet_row(item) -> list:
+    """
+    Рядок для вкладки звернень (порядок полів має збігатися з шапкою таблиці!):
+    Дата | ID | Статус | Пріоритет | Маршрут | Проблема | Борт | Ім'я | Телефон | Email
+    """
+    created_at_kyiv = to_kyiv_time(item.created_at)
+    created_at_str = created_at_kyiv.strftime("%d.%m.%Y %H:%M") if created_at_kyiv else ""
+
+    route_val = item.route or "N/A"
+    if item.category == "complaint" and item.transport_type:
+        t_prefix = "Трамвай" if item.transport_type == "tram" else "Тролейбус"
+        if item.route and item.route not in ("Загальна скарга", "N/A"):
+            route_val = f"{t_prefix} № {item.route}"
+
+    return [
+        created_at_str,
+        item.ticket_id,
+        "🆕 Нова (БД)",
+        "БД",
+        route_val,
+        item.text,
+        item.board_number or "N/A",
+        item.user_name,
+        format_phone_for_sheet(item.user_phone),
+        item.user_email or ""
+    ]
+
+
+def booking_sheet_row(booking) -> list:
+    """Рядок для вкладок бронювань музею: Дата реєстрації | Дата екскурсії | Кількість | ПІБ | Телефон"""
+    local_created_at = to_kyiv_time(booking.created_at)
+    reg_date = local_created_at.strftime("%d.%m.%Y %H:%M") if local_created_at else ""
+    return [
+        reg_date,
+        booking.excursion_date,
+        str(booking.people_count),
+        booking.user_name,
+        booking.user_phone
+    ]
+
+
+# ================= ПОСТАНОВКА В ЧЕРГУ (в транзакції викликача) =================
+
+def enqueue_row(session, target_sheet: str, row: list, idempotency_key: str,
+                source_table: Optional[str] = None, source_id: Optional[int] = None,
+                match_columns=FEEDBACK_MATCH_COLUMNS) -> SheetOutbox:
+    """
+    Додає рядок в outbox у ПЕРЕДАНІЙ сесії. Commit робить викликач —
+    тоді запис-джерело і рядок outbox з'являються атомарно.
+    """
+    entry = SheetOutbox(
+        target_sheet=target_sheet,
+        idempotency_key=idempotency_key,
+        payload=json.dumps(row, ensure_ascii=False, default=str),
+        match_columns=",".join(str(c) for c in match_columns),
+        source_table=source_table,
+        source_id=source_id,
+        status="pending",
+        attempts=0,
+    )
+    session.add(entry)
+    OUTBOX_ENQUEUED.inc(sheet=target_sheet)
+    return entry
+
+
+async def enqueue_feedback(session, feedback: Feedback) -> SheetOutbox:
+    """Ставить звернення в outbox (потрібен flush, щоб знати feedback.id)."""
+    await session.flush()
+    return enqueue_row(
+        session,
+        feedback_sheet_name(feedback.category),
+        feedback_sheet_row(feedback),
+        f"feedback:{feedback.ticket_id}",
+        source_table="feedbacks",
+        source_id=feedback.id,
+        match_columns=FEEDBACK_MATCH_COLUMNS,
+    )
+
+
+async def enqueue_booking(session, booking, holiday: bool = False) -> SheetOutbox:
+    """Ставить бронювання музею (звичайне або святкове) в outbox."""
+    await session.flush()
+    if holiday:
+        sheet, source_table = MUSEUM_HOLIDAY_BOOKINGS_SHEET, "museum_holiday_bookings"
+    else:
+        sheet, source_table = MUSEUM_BOOKINGS_SHEET, "museum_bookings"
+    return enqueue_row(
+        session,
+        sheet,
+        booking_sheet_row(booking),
+        f"{source_table}:{booking.id}",
+        source_table=source_table,
+        source_id=booking.id,
+        match_columns=BOOKING_MATCH_COLUMNS,
+    )
+
+
+async def enqueue_unsynced_sources(session_factory=AsyncSessionLocal) -> int:
+    """
+    Підхоплює старі записи зі status="new", яких ще немає в outbox
+    (створені до появи outbox). Повертає кількість доданих рядків.
+    """
+    added = 0
+    async with session_factory() as session:
+        for source_table, model in SOURCE_MODELS.items():
+            queued_ids = select(SheetOutbox.source_id).where(SheetOutbox.source_table == source_table)
+            result = await session.execute(
+                select(model)
+                .where(model.status == "new", model.id.not_in(queued_ids))
+                .order_by(model.id)
+                .limit(FEEDBACK_SYNC_MAX_ROWS)
+            )
+            for item in result.scalars().all():
+                if source_table == "feedbacks":
+                    await enqueue_feedback(session, item)
+                else:
+                    await enqueue_booking(session, item, holiday=(source_table == "museum_holiday_bookings"))
+                added += 1
+        if added:
+            await session.commit()
+    if added:
+        logger.info(f"📥 Sheets outbox: {added} legacy rows enqueued")
+    return added
+
+
+# ================= ВІДПРАВНИК =================
+
+def _column_letter(index: int) -> str:
+    """0 -> A, 25 -> Z, 26 -> AA"""
+    letters = ""
+    index += 1
+    while index:
+        index, rem = divmod(index - 1, 26)
+        letters = chr(65 + rem) + letters
+    return letters
+
+
+def _normalize_cell(value) -> str:
+    # USER_ENTERED прибирає апостроф-префікс, тож порівнюємо "чисті" значення
+    return str(value if value is not None else "").strip().strip("'").strip()
+
+
+def _match_key(row: list, columns: tuple) -> tuple:
+    return tuple(_normalize_cell(row[c]) if c < len(row) else "" for c in columns)
+
+
+def backoff_delay(attempts: int) -> float:
+    """Експоненційна затримка з джитером: 5, 10, 20, ... (але не більше MAX)."""
+    delay = min(SHEETS_OUTBOX_MAX_BACKOFF_SEC, SHEETS_OUTBOX_BASE_BACKOFF_SEC * (2 ** max(0, attempts - 1)))
+    return delay * random.uniform(0.8, 1.2)
+
+
+class SheetsOutbox:
+    def __init__(self, session_factory=AsyncSessionLocal):
+        self.session_factory = session_factory
+        self._sheets = None
+        self._wakeup = asyncio.Event()
+        self._drain_lock = asyncio.Lock()
+        self._last_prune = 0.0
+        self.is_running = False
+
+    @property
+    def sheets(self):
+        return self._sheets or sheets_client
+
+    def notify(self) -> None:
+        """Будить відправник одразу після нового запису (не чекаючи інтервалу)."""
+        self._wakeup.set()
+
+    async def start(self):
+        """Фоновий цикл: відправка при notify() або раз на SHEETS_OUTBOX_INTERVAL_SEC."""
+        if self.is_running:
+            return
+        self.is_running = True
+        logger.info("📤 Sheets outbox started")
+
+        await self._recover_in_flight()
+
+        while self.is_running:
+            self._wakeup.clear()
+            try:
+                await self.drain()
+                if time.monotonic() - self._last_prune >= PRUNE_INTERVAL_SEC:
+                    self._last_prune = time.monotonic()
+                    await self.prune_sent()
+            except Exception as e:
+                logger.error(f"❌ Sheets outbox drain error: {e}")
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=SHEETS_OUTBOX_INTERVAL_SEC)
+            except asyncio.TimeoutError:
+                pass
+
+    def stop(self):
+        self.is_running = False
+        self._wakeup.set()
+
+    async def drain(self) -> int:
+        """Відправляє всі рядки, час яких настав. Повертає кількість відправлених."""
+        async with self._drain_lock:
+            total_sent = 0
+            start_ts = datetime.datetime.now()
+            while True:
+                claimed = await self._claim_batch()
+                if not claimed:
+                    break
+
+                sent, failed = await self._push(claimed)
+                await self._finalize(sent, failed)
+                total_sent += len(sent)
+
+                if len(claimed) < FEEDBACK_SYNC_MAX_ROWS:
+                    break
+
+            if total_sent:
+                duration = (datetime.datetime.now() - start_ts).total_seconds()
+                logger.info(f"✅ Sheets outbox: {total_sent} rows sent in {duration:.1f}s")
+            await self._update_backlog_metrics()
+            return total_sent
+
+    async def prune_sent(self, retention_days: float = SHEETS_OUTBOX_RETENTION_DAYS) -> int:
+        """Видаляє відправлені рядки, старші за retention_days (невідправлені не чіпаємо ніколи)."""
+        cutoff = datetime.datetime.utcnow() - datetime.timedelta(days=retention_days)
+        async with self.session_factory() as session:
+            result = await session.execute(
+                delete(SheetOutbox).where(SheetOutbox.status == "sent", SheetOutbox.sent_at < cutoff)
+            )
+            await session.commit()
+        if result.rowcount:
+            OUTBOX_PRUNED.inc(result.rowcount)
+            logger.info(f"🧹 Sheets outbox: {result.rowcount} sent rows older than {retention_days:g} days pruned")
+        return result.rowcount or 0
+
+    async def _update_backlog_metrics(self):
+        """Один агрегатний запит після кожного проходу: розмір черги та вік найстарішого рядка."""
+        async with self.session_factory() as session:
+            result = await session.execute(
+                select(func.count(SheetOutbox.id), func.min(SheetOutbox.created_at))
+                .where(SheetOutbox.status != "sent")
+            )
+            count, oldest = result.one()
+        OUTBOX_BACKLOG.set(count or 0)
+        OUTBOX_OLDEST_AGE.set((datetime.datetime.utcnow() - oldest).total_seconds() if oldest else 0)
+
+    async def _recover_in_flight(self):
+        """Після рестарту рядки "sending" повертаємо в чергу як in doubt (attempts+1)."""
+        async with self.session_factory() as session:
+            result = await session.execute(
+                update(SheetOutbox)
+                .where(SheetOutbox.status == "sending")
+                .values(status="pending", attempts=SheetOutbox.attempts + 1, next_attempt_at=None)
+            )
+            await session.commit()
+            if result.rowcount:
+                logger.warning(f"⚠️ Sheets outbox: {result.rowcount} in-flight rows recovered")
+
+    async def _claim_batch(self) -> list:
+        """Коротка сесія: забираємо до FEEDBACK_SYNC_MAX_ROWS рядків і ставимо їм "sending"."""
+        now = datetime.datetime.utcnow()
+        async with self.session_factory() as session:
+            result = await session.execute(
+                select(SheetOutbox)
+                .where(and_(
+                    SheetOutbox.status == "pending",
+                    or_(SheetOutbox.next_attempt_at.is_(None), SheetOutbox.next_attempt_at <= now),
+                ))
+                .order_by(SheetOutbox.id)
+                .limit(FEEDBACK_SYNC_MAX_ROWS)
+            )
+            entries = result.scalars().all()
+            if not entries:
+                return []
+
+            claimed = []
+            for entry in entries:
+                entry.status = "sending"
+                claimed.append({
+                    "id": entry.id,
+                    "sheet": entry.target_sheet,
+                    "row": json.loads(entry.payload),
+                    "match_columns": tuple(int(c) for c in (entry.match_columns or "1").split(",")),
+                    "attempts": entry.attempts or 0,
+                    "source_table": entry.source_table,
+                    "source_id": entry.source_id,
+                    "created_at": entry.created_at,
+                })
+            await session.commit()
+            return claimed
+
+    async def _push(self, claimed: list):
+        """Мережева частина: по одній задачі на вкладку, не більше SHEETS_OUTBOX_CONCURRENCY одночасно."""
+        by_sheet = {}
+        for item in claimed:
+            by_sheet.setdefault(item["sheet"], []).append(item)
+
+        semaphore = asyncio.Semaphore(max(1, SHEETS_OUTBOX_CONCURRENCY))
+        results = await asyncio.gather(
+            *(self._push_sheet(semaphore, sheet, items) for sheet, items in by_sheet.items())
+        )
+
+        sent, failed = [], []
+        for sheet_sent, sheet_failed in results:
+            sent.extend(sheet_sent)
+            failed.extend(sheet_failed)
+        return sent, failed
+
+    async def _push_sheet(self, semaphore, sheet_name: str, items: list):
+        async with semaphore:
+            sent, failed = [], []
+            try:
+                to_send = items
+                in_doubt = [i for i in items if i["attempts"] > 0]
+                if in_doubt:
+                    already = await self._find_already_appended(sheet_name, in_doubt)
+                    if already:
+                        logger.info(f"♻️ Sheets outbox: {len(already)} rows already in '{sheet_name}', skip append")
+                        sent.extend(i for i in items if i["id"] in already)
+                        to_send = [i for i in items if i["id"] not in already]
+
+                for start in range(0, len(to_send), FEEDBACK_SYNC_BATCH_SIZE):
+                    batch = to_send[start:start + FEEDBACK_SYNC_BATCH_SIZE]
+                    success = await self.sheets.append_rows(sheet_name, [i["row"] for i in batch])
+                    if not success:
+                        # Далі в цю вкладку не пишемо — решта піде в наступну спробу
+                        failed.extend((i, "append_rows failed") for i in to_send[start:])
+                        break
+                    sent.extend(batch)
+            except Exception as e:
+                done_ids = {i["id"] for i in sent} | {i["id"] for i, _ in failed}
+                failed.extend((i, str(e)) for i in items if i["id"] not in done_ids)
+            return sent, failed
+
+    async def _find_already_appended(self, sheet_name: str, items: list) -> set:
+        """Читає вкладку і повертає id тих in-doubt рядків, які вже є в таблиці."""
+        max_col = max(max(i["match_columns"]) for i in items)
+        range_name = f"{quote_sheet_name(sheet_name)}!A:{_column_letter(max_col)}"
+
+        # batch_get кидає SheetsApiError — тоді рядки підуть у повтор, а не в append наосліп
+        existing_rows = (await self.sheets.batch_get([range_name]))[0]
+
+        found = set()
+        keys_cache = {}
+        for item in items:
+            cols = item["match_columns"]
+            if cols not in keys_cache:
+                keys_cache[cols] = {_match_key(r, cols) for r in existing_rows or []}
+            if _match_key(item["row"], cols) in keys_cache[cols]:
+                found.add(item["id"])
+        return found
+
+    async def _finalize(self, sent: list, failed: list):
+        """Коротка сесія: фіксуємо результат відправки."""
+        now = datetime.datetime.utcnow()
+        async with self.session_factory() as session:
+            if sent:
+                await session.execute(
+                    update(SheetOutbox)
+                    .where(SheetOutbox.id.in_([i["id"] for i in sent]))
+                    .values(status="sent", sent_at=now, last_error=None)
+                )
+                by_source = {}
+                for item in sent:
+                    if item["source_table"] in SOURCE_MODELS and item["source_id"]:
+                        by_source.setdefault(item["source_table"], []).append(item["source_id"])
+                for source_table, ids in by_source.items():
+                    model = SOURCE_MODELS[source_table]
+                    await session.execute(update(model).where(model.id.in_(ids)).values(status="synced"))
+
+            for item, error in failed:
+                attempts = item["attempts"] + 1
+                await session.execute(
+                    update(SheetOutbox)
+                    .where(SheetOutbox.id == item["id"])
+                    .values(
+                        status="pending",
+                        attempts=attempts,
+                        next_attempt_at=now + datetime.timedelta(seconds=backoff_delay(attempts)),
+                        last_error=error[:500],
+                    )
+                )
+            await session.commit()
+
+        stats_service.on_feedback_synced(sum(1 for i in sent if i["source_table"] == "feedbacks"))
+
+        for item in sent:
+            OUTBOX_SENT.inc(sheet=item["sheet"])
+            if item.get("created_at"):
+                OUTBOX_LAG.observe(max(0.0, (now - item["created_at"]).total_seconds()))
+        for item, _ in failed:
+            OUTBOX_FAILED.inc(sheet=item["sheet"])
+
+        if failed:
+            logger.warning(f"⚠️ Sheets outbox: {len(failed)} rows postponed (backoff)")
+
+
+sheets_outbox = SheetsOutbox()
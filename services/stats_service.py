@@ -0,0 +1,161 @@
+# services/stats_service.py
+"""Лічильники для екрана статистики адміна: оновлюються інкрементально і звіряються з БД."""
+import asyncio
+import datetime
+from datetime import timezone
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import select
+
+from config.settings import STATS_RECOUNT_INTERVAL_MIN
+from database.db import AsyncSessionLocal, BotUser, Feedback
+from utils.logger import logger
+
+TREND_DAYS = 7
+KYIV_TZ = ZoneInfo("Europe/Kyiv")
+
+
+def _hour_bucket(ts: datetime.datetime = None) -> datetime.datetime:
+    """Початок години в UTC (naive, як func.now() у SQLite)."""
+    ts = ts or datetime.datetime.utcnow()
+    if ts.tzinfo is not None:
+        ts = ts.astimezone(timezone.utc).replace(tzinfo=None)
+    return ts.replace(minute=0, second=0, microsecond=0)
+
+
+class StatsService:
+    def __init__(self, session_factory=AsyncSessionLocal):
+        self.session_factory = session_factory
+        self.users_total = 0
+        self.users_subscribed = 0
+        self.feedback_total = 0
+        self.feedback_new = 0
+        self.feedback_synced = 0
+        self.by_category = {}
+        self._hourly = {}  # {початок години (UTC): {"users": n, "feedback": n}}
+        self.last_recount = None
+        self._recount_lock = asyncio.Lock()
+        self.is_running = False
+
+    @property
+    def ready(self) -> bool:
+        return self.last_recount is not None
+
+    # ---------- Інкрементальні оновлення ----------
+
+    def _bump(self, kind: str, ts: datetime.datetime = None, n: int = 1):
+        bucket = self._hourly.setdefault(_hour_bucket(ts), {"users": 0, "feedback": 0})
+        bucket[kind] += n
+
+    def on_user_registered(self, is_subscribed: bool = False):
+        self.users_total += 1
+        if is_subscribed:
+            self.users_subscribed += 1
+        self._bump("users")
+
+    def on_subscription_changed(self, is_subscribed: bool):
+        """Викликати лише коли статус підписки справді змінився."""
+        self.users_subscribed = max(0, self.users_subscribed + (1 if is_subscribed else -1))
+
+    def on_feedback_created(self, category: str):
+        self.feedback_total += 1
+        self.feedback_new += 1
+        self.by_category[category] = self.by_category.get(category, 0) + 1
+        self._bump("feedback")
+
+    def on_feedback_synced(self, count: int):
+        if count <= 0:
+            return
+        moved = min(count, self.feedback_new)
+        self.feedback_new -= moved
+        self.feedback_synced += moved
+
+    # ---------- Звірка з БД ----------
+
+    async def recount(self):
+        """Повний перерахунок з БД (ті самі запити, що раніше виконувались на кожен показ)."""
+        from services.user_service import UserService
+        from services.tickets_service import TicketsService
+
+        async with self._recount_lock:
+            start_ts = datetime.datetime.now()
+            user_stats = await UserService(self.session_factory).get_stats()
+            feedback_stats = await TicketsService(self.session_factory).get_feedback_stats()
+
+            since = _hour_bucket() - datetime.timedelta(days=TREND_DAYS)
+            hourly = {}
+            async with self.session_factory() as session:
+                joined = await session.execute(select(BotUser.joined_at).where(BotUser.joined_at >= since))
+                for (ts,) in joined.all():
+                    hourly.setdefault(_hour_bucket(ts), {"users": 0, "feedback": 0})["users"] += 1
+                created = await session.execute(select(Feedback.created_at).where(Feedback.created_at >= since))
+                for (ts,) in created.all():
+                    hourly.setdefault(_hour_bucket(ts), {"users": 0, "feedback": 0})["feedback"] += 1
+
+            self.users_total = user_stats["total_users"] or 0
+            self.users_subscribed = user_stats["subscribed_users"] or 0
+            self.feedback_total = feedback_stats["total"]
+            self.feedback_new = feedback_stats["new"]
+            self.feedback_synced = feedback_stats["synced"]
+            self.by_category = dict(feedback_stats["by_category"])
+            self._hourly = hourly
+            self.last_recount = datetime.datetime.now()
+
+            duration = (self.last_recount - start_ts).total_seconds()
+            logger.info(f"📊 Stats recount finished in {duration:.2f}s")
+
+    async def start(self):
+        """Фоновий цикл звірки лічильників з БД."""
+        if self.is_running:
+            return
+        self.is_running = True
+        while self.is_running:
+            try:
+                await self.recount()
+            except Exception as e:
+                logger.error(f"❌ Stats recount error: {e}")
+            await asyncio.sleep(max(1, STATS_RECOUNT_INTERVAL_MIN) * 60)
+
+    # ---------- Читання (O(1) відносно розміру таблиць) ----------
+
+    def _trends(self) -> dict:
+        now_hour = _hour_bucket()
+        cutoff_day = now_hour - datetime.timedelta(days=TREND_DAYS)
+        cutoff_24h = now_hour - datetime.timedelta(hours=23)
+
+        # Прибираємо старі кошики, щоб словник не ріс
+        for hour in [h for h in self._hourly if h < cutoff_day]:
+            del self._hourly[hour]
+
+        last_24h = {"users": 0, "feedback": 0}
+        by_day = {}
+        for hour, bucket in self._hourly.items():
+            if hour >= cutoff_24h:
+                last_24h["users"] += bucket["users"]
+                last_24h["feedback"] += bucket["feedback"]
+            day = hour.replace(tzinfo=timezone.utc).astimezone(KYIV_TZ).date()
+            day_bucket = by_day.setdefault(day, {"users": 0, "feedback": 0})
+            day_bucket["users"] += bucket["users"]
+            day_bucket["feedback"] += bucket["feedback"]
+
+        today = datetime.datetime.now(KYIV_TZ).date()
+        days = [today - datetime.timedelta(days=i) for i in range(TREND_DAYS - 1, -1, -1)]
+        return {
+            "last_24h": last_24h,
+            "by_day": [(d, by_day.get(d, {"users": 0, "feedback": 0})) for d in days],
+        }
+
+    def snapshot(self) -> dict:
+        return {
+            "total_users": self.users_total,
+            "subscribed_users": self.users_subscribed,
+            "feedback_total": self.feedback_total,
+            "feedback_new": self.feedback_new,
+            "feedback_synced": self.feedback_synced,
+            "by_category": dict(self.by_category),
+            "trends": self._trends(),
+            "last_recount": self.last_recount,
+        }
+
+
+stats_service = StatsService()
@@ -2,9 +2,7 @@ import csv
 import math
 import io
 import zipfile
-import requests
 import logging
-from config.settings import EASYWAY_API_URL  # Або URL для static, якщо є окремий
 
 logger = logging.getLogger("transport_bot")
 
@@ -18,42 +16,23 @@ class StopMatcher:
             cls._instance.stops = []  # Список словників {'lat', 'lon', 'name'}
         return cls._instance
 
-    def load_stops_from_static(self, api_key: str):
-        """Завантажує stops.txt з GTFS Static (один раз при старті)"""
-        if self.stops:
-            return  # Вже завантажено
-
-        url = "https://gw.x24.digital/api/od/gtfs/v1/download/static"
-        headers = {'ApiKey': api_key}
-
-        # === ДОДАНО: Вимкнення попереджень SSL ===
-        import urllib3
-        urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
-        # =========================================
-
-        logger.info("🗺️ Завантаження бази зупинок (Static GTFS)...")
-        try:
-            resp = requests.get(url, headers=headers, timeout=30, verify=False)
-            if resp.status_code != 200:
-                logger.error(f"Failed to download static GTFS: {resp.status_code}")
-                return
-
-            with zipfile.ZipFile(io.BytesIO(resp.content)) as z:
-                with z.open('stops.txt') as f:
-                    reader = csv.DictReader(io.TextIOWrapper(f, encoding='utf-8'))
-                    for row in reader:
-                        try:
-                            self.stops.append({
-                                'name': row['stop_name'],
-                                'lat': float(row['stop_lat']),
-                                'lon': float(row['stop_lon'])
-                            })
-                        except (ValueError, KeyError):
-                            continue
-            logger.info(f"✅ База зупинок завантажена: {len(self.stops)} об'єктів.")
-
-        except Exception as e:
-            logger.error(f"Error loading stops: {e}")
+    def load_stops_from_zip(self, z: zipfile.ZipFile):
+        """stops.txt з архіву GTFS Static, який завантажує monitoring_service. Список підміняється
+        цілком — читачі в event loop ніколи не бачать його наполовину заповненим."""
+        stops = []
+        with z.open('stops.txt') as f:
+            reader = csv.DictReader(io.TextIOWrapper(f, encoding='utf-8'))
+            for row in reader:
+                try:
+                    stops.append({
+                        'name': row['stop_name'],
+                        'lat': float(row['stop_lat']),
+                        'lon': float(row['stop_lon'])
+                    })
+                except (ValueError, KeyError):
+                    continue
+        self.stops = stops
+        logger.info(f"✅ База зупинок завантажена: {len(self.stops)} об'єктів.")
 
     def find_nearest_stop_name(self, lat: float, lon: float) -> str:
         """Знаходить найближчу зупинку (Оптимізовано)"""
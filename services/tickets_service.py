@@ -1,51 +1,29 @@
 # services/tickets_service.py
-from datetime import datetime, timezone
 from sqlalchemy import select, func
 from database.db import AsyncSessionLocal, Feedback
-from config.constants import SHEET_NAMES
-from integrations.google_sheets.client import GoogleSheetsClient
-from config.settings import GOOGLE_SHEETS_ID, FEEDBACK_SYNC_BATCH_SIZE, FEEDBACK_SYNC_MAX_ROWS
+from services.sheets_outbox import sheets_outbox, enqueue_feedback, enqueue_unsynced_sources
+from services.stats_service import stats_service
 from utils.logger import logger
 from utils.text_formatter import format_ticket_id
-import asyncio
 import datetime
 import random
-from typing import Optional
-from zoneinfo import ZoneInfo
 
 
 class TicketsService:
-    def __init__(self):
-        self.sheets_client = GoogleSheetsClient(GOOGLE_SHEETS_ID)
-        self._kyiv_tz = ZoneInfo("Europe/Kyiv")
-
-    def _to_kyiv_time(self, dt_value):
-        if not dt_value:
-            return None
-        if dt_value.tzinfo is None:
-            dt_value = dt_value.replace(tzinfo=timezone.utc)
-        return dt_value.astimezone(self._kyiv_tz)
-
-    def _format_phone_for_sheet(self, phone_value: Optional[str]):
-        if not phone_value:
-            return ""
-        phone_str = str(phone_value).strip()
-        if not phone_str:
-            return ""
-        if phone_str.startswith("'"):
-            return phone_str
-        if phone_str.startswith("0") or phone_str.startswith("+"):
-            return f"'{phone_str}'"
-        return phone_str
+    def __init__(self, session_factory=AsyncSessionLocal):
+        self.session_factory = session_factory
 
     async def _save_to_db(self, data: dict):
-        """Універсальний метод збереження в БД"""
+        """Універсальний метод збереження в БД (разом з рядком для Google Sheets в outbox)"""
         try:
-            async with AsyncSessionLocal() as session:
-                feedback = Feedback(**data)
+            async with self.session_factory() as session:
+                feedback = Feedback(**data, created_at=datetime.datetime.utcnow())
                 session.add(feedback)
+                await enqueue_feedback(session, feedback)
                 await session.commit()
-                return True
+            sheets_outbox.notify()
+            stats_service.on_feedback_created(data.get("category"))
+            return True
         except Exception as e:
             logger.error(f"❌ DB Save Error: {e}")
             return False
@@ -108,91 +86,12 @@ class TicketsService:
 
     # --- СИНХРОНІЗАЦІЯ (Для Адмінки) ---
     async def sync_new_feedbacks_to_sheets(self):
-        """Читає всі 'new' записи з БД і вантажить в Google Sheets"""
-        count = 0
-        start_ts = datetime.datetime.now()
-        async with AsyncSessionLocal() as session:
-            # Отримуємо всі несинхронізовані записи
-            result = await session.execute(select(Feedback).where(Feedback.status == "new"))
-            feedbacks = result.scalars().all()
-
-            if not feedbacks:
-                return 0
-
-            loop = asyncio.get_running_loop()
-            rows_by_sheet = {}
-
-            for item in feedbacks[:FEEDBACK_SYNC_MAX_ROWS]:
-                # Визначаємо ключ для SHEET_NAMES
-                category_key = f"{item.category}s"  # За замовчуванням (complaint -> complaints)
-
-                # Виправляємо для Подяк (бо в базі вони записані кирилицею "Подяки")
-                if item.category == 'Подяки':
-                    category_key = 'thanks'
-                elif item.category == 'Скарги':  # Про всяк випадок
-                    category_key = 'complaints'
-                elif item.category == 'Пропозиції':  # Про всяк випадок
-                    category_key = 'suggestions'
-
-                # Отримуємо назву листа (напр. "Подяки")
-                sheet_name = SHEET_NAMES.get(category_key, "Інше")
-
-                # Формуємо рядок (порядок полів має збігатися з шапкою вашої таблиці!)
-                # Приклад для Скарги: Дата | ID | Статус | Пріоритет | Маршрут | Проблема | Борт | Ім'я | Телефон | Email
-                created_at_kyiv = self._to_kyiv_time(item.created_at)
-                created_at_str = (
-                    created_at_kyiv.strftime("%d.%m.%Y %H:%M")
-                    if created_at_kyiv
-                    else ""
-                )
-
-                route_val = item.route or "N/A"
-                if item.category == "complaint" and item.transport_type:
-                    t_prefix = "Трамвай" if item.transport_type == "tram" else "Тролейбус"
-                    if item.route and item.route not in ("Загальна скарга", "N/A"):
-                        route_val = f"{t_prefix} № {item.route}"
-
-                row = [
-                    created_at_str,
-                    item.ticket_id,
-                    "🆕 Нова (БД)",
-                    "БД",
-                    route_val,
-                    item.text,
-                    item.board_number or "N/A",
-                    item.user_name,
-                    self._format_phone_for_sheet(item.user_phone),
-                    item.user_email or ""
-                ]
-
-                rows_by_sheet.setdefault(sheet_name, []).append((item, row))
-
-            for sheet_name, items_rows in rows_by_sheet.items():
-                for i in range(0, len(items_rows), FEEDBACK_SYNC_BATCH_SIZE):
-                    batch = items_rows[i:i + FEEDBACK_SYNC_BATCH_SIZE]
-                    rows = [r for _, r in batch]
-
-                    success = False
-                    for attempt in range(3):
-                        success = await loop.run_in_executor(
-                            None,
-                            self.sheets_client.append_rows,
-                            sheet_name,
-                            rows
-                        )
-                        if success:
-                            break
-                        await asyncio.sleep(2 ** attempt)
-
-                    if success:
-                        for item, _ in batch:
-                            item.status = "synced"
-                            count += 1
-
-            await session.commit()
-            duration = (datetime.datetime.now() - start_ts).total_seconds()
-            logger.info(f"✅ Sheets sync finished: {count} rows in {duration:.1f}s")
-            return count
+        """
+        Примусово відправляє outbox в Google Sheets.
+        Старі 'new' записи (без рядка в outbox) спочатку ставляться в чергу.
+        """
+        await enqueue_unsynced_sources(self.session_factory)
+        return await sheets_outbox.drain()
 
     def generate_ticket_id(self):
         """Генерує випадковий ID для подяки"""
@@ -200,7 +99,7 @@ class TicketsService:
         return f"#THX-{random.randint(10000, 99999)}"
 
     async def get_feedback_stats(self):
-        async with AsyncSessionLocal() as session:
+        async with self.session_factory() as session:
             total = await session.scalar(select(func.count(Feedback.id)))
             new_count = await session.scalar(
                 select(func.count(Feedback.id)).where(Feedback.status == "new")
@@ -0,0 +1,155 @@
+# services/traffic_recorder.py
+"""Запис анонімізованого трафіку (апдейти Telegram, відповіді EasyWay) у JSONL для benchmarks/replay.py."""
+import hashlib
+import hmac
+import json
+import os
+import queue
+import re
+import threading
+import time
+from pathlib import Path
+
+from config.settings import TRAFFIC_RECORD_FILE, TRAFFIC_RECORD_MAX_MB, TRAFFIC_RECORD_SALT
+from utils.logger import logger
+
+FORMAT_VERSION = 1
+
+# Об'єкти Telegram з id людини/чату
+_IDENTITY_KEYS = {"from", "chat", "user", "sender_chat", "forward_from", "forward_from_chat", "contact"}
+# Поля, які можуть ідентифікувати людину: обов'язкові для Telegram замінюються заглушкою, решта прибирається
+_PII_PLACEHOLDERS = {"first_name": "User", "title": "Chat", "phone_number": "+380000000000"}
+_PII_FIELDS = {"last_name", "username", "vcard", "bio", "invite_link"} | set(_PII_PLACEHOLDERS)
+_SECRET_PARAMS = {"login", "password"}
+
+_PHONE_RE = re.compile(r"\+?\d[\d\s\-()]{7,}\d")
+_EMAIL_RE = re.compile(r"[\w.+-]+@[\w-]+\.[\w.-]+")
+
+
+def redact_text(text: str) -> str:
+    return _PHONE_RE.sub("<phone>", _EMAIL_RE.sub("<email>", text))
+
+
+class TrafficRecorder:
+    def __init__(self, salt: str = TRAFFIC_RECORD_SALT):
+        # Без явної солі — випадкова на кожен запуск: анонімні id різних записів не зіставити
+        self._salt = (salt or os.urandom(16).hex()).encode()
+        self.enabled = False
+        self.path = None
+        self.max_bytes = 0
+        self.events = 0
+        self._written = 0
+        self._started = 0.0
+        self._queue = queue.SimpleQueue()
+        self._writer = None
+
+    # ---------- життєвий цикл ----------
+
+    def start(self, path=TRAFFIC_RECORD_FILE, max_mb: float = TRAFFIC_RECORD_MAX_MB):
+        if self.enabled or not path:
+            return
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.events = 0
+        self._written = 0
+        self._started = time.monotonic()
+        self._writer = threading.Thread(target=self._write_loop, name="traffic-recorder", daemon=True)
+        self._writer.start()
+        self.enabled = True
+        self._put({"kind": "meta", "version": FORMAT_VERSION,
+                   "started_at": time.strftime("%Y-%m-%dT%H:%M:%S")})
+        logger.info(f"🎙️ Traffic recording started: {self.path}")
+
+    def stop(self):
+        if not self.enabled:
+            return
+        self.enabled = False
+        self._queue.put(None)
+        self._writer.join(timeout=5)
+        logger.info(f"🎙️ Traffic recording stopped: {self.events} events, {self._written / 1024:.0f}KiB")
+
+    # ---------- запис подій ----------
+
+    def record_update(self, update):
+        """Апдейт Telegram (telegram.Update або dict) — у момент надходження."""
+        if not self.enabled:
+            return
+        data = update.to_dict() if hasattr(update, "to_dict") else update
+        self._put({"kind": "update", "t": self._now(), "update": self.anonymize(data)})
+
+    def record_upstream(self, upstream: str, params: dict, status: int, duration: float, body):
+        """Відповідь зовнішнього API разом із часом, який вона зайняла."""
+        if not self.enabled:
+            return
+        self._put({
+            "kind": "upstream",
+            "t": self._now(),
+            "upstream": upstream,
+            "function": params.get("function", ""),
+            "params": {k: v for k, v in params.items() if k not in _SECRET_PARAMS},
+            "status": status,
+            "duration_ms": round(duration * 1000, 1),
+            "body": body,
+        })
+
+    # ---------- анонімізація ----------
+
+    def _digest(self, value) -> str:
+        return hmac.new(self._salt, str(value).encode(), hashlib.sha256).hexdigest()
+
+    def anonymize_id(self, value: int) -> int:
+        digest = self._digest(value)
+        anon = 1_000_000_000 + int(digest[:12], 16) % 8_000_000_000
+        # Групи/канали в Telegram мають від'ємні id — знак зберігаємо
+        return -anon if value < 0 else anon
+
+    def anonymize(self, data, parent_key: str = ""):
+        if isinstance(data, list):
+            return [self.anonymize(item, parent_key) for item in data]
+        if not isinstance(data, dict):
+            return data
+
+        result = {}
+        for key, value in data.items():
+            if parent_key in _IDENTITY_KEYS and key in _PII_FIELDS:
+                if key in _PII_PLACEHOLDERS:
+                    result[key] = _PII_PLACEHOLDERS[key]
+                continue
+            if parent_key in _IDENTITY_KEYS and key in ("id", "user_id") and isinstance(value, int):
+                result[key] = self.anonymize_id(value)
+            elif key == "chat_instance":
+                result[key] = self._digest(value)[:16]
+            elif key in ("text", "caption") and isinstance(value, str):
+                result[key] = redact_text(value)
+            else:
+                result[key] = self.anonymize(value, key)
+        return result
+
+    # ---------- внутрішнє ----------
+
+    def _now(self) -> float:
+        return round(time.monotonic() - self._started, 4)
+
+    def _put(self, event: dict):
+        self.events += 1
+        self._queue.put(event)
+
+    def _write_loop(self):
+        with open(self.path, "a", encoding="utf-8") as f:
+            while True:
+                event = self._queue.get()
+                if event is None:
+                    break
+                line = json.dumps(event, ensure_ascii=False) + "\n"
+                f.write(line)
+                self._written += len(line.encode())
+                if self._queue.empty():
+                    f.flush()
+                if self.max_bytes and self._written >= self.max_bytes:
+                    self.enabled = False
+                    logger.warning(f"🎙️ Traffic recording reached {self.max_bytes // 1024 // 1024}MB limit, stopped")
+                    break
+
+
+traffic_recorder = TrafficRecorder()
@@ -1,17 +1,21 @@
 # services/user_service.py
 from sqlalchemy import select, func, update
 from database.db import AsyncSessionLocal, BotUser
+from services.stats_service import stats_service
 from utils.logger import logger
 
 
 class UserService:
+    def __init__(self, session_factory=AsyncSessionLocal):
+        self.session_factory = session_factory
+
     async def register_user(self, user_data):
         """Зберігає користувача (якщо новий)"""
         telegram_id = user_data.id
         username = user_data.username
         first_name = user_data.first_name
 
-        async with AsyncSessionLocal() as session:
+        async with self.session_factory() as session:
             result = await session.execute(select(BotUser).where(BotUser.telegram_id == telegram_id))
             existing_user = result.scalar_one_or_none()
 
@@ -31,32 +35,41 @@ class UserService:
 
             await session.commit()
 
+        if not existing_user:
+            stats_service.on_user_registered(is_subscribed=False)
+
     async def set_subscription(self, telegram_id: int, is_subscribed: bool):
         """Змінює статус підписки користувача"""
-        async with AsyncSessionLocal() as session:
-            await session.execute(
+        # NULL у старих записах означає "не підписаний": у SQL "NULL != x" — NULL, тож порівнюємо через IS
+        changed = BotUser.is_subscribed.is_not(True) if is_subscribed else BotUser.is_subscribed.is_(True)
+        async with self.session_factory() as session:
+            result = await session.execute(
                 update(BotUser)
-                .where(BotUser.telegram_id == telegram_id)
+                .where(BotUser.telegram_id == telegram_id, changed)
                 .values(is_subscribed=is_subscribed)
             )
             await session.commit()
 
+        # Лічильник змінюємо лише якщо статус справді змінився
+        if result.rowcount:
+            stats_service.on_subscription_changed(is_subscribed)
+
     async def get_subscribed_users_ids(self):
         """Повертає ID ТІЛЬКИ підписаних користувачів"""
-        async with AsyncSessionLocal() as session:
+        async with self.session_factory() as session:
             # Фільтруємо по is_subscribed == True
             result = await session.execute(select(BotUser.telegram_id).where(BotUser.is_subscribed == True))
             return result.scalars().all()
 
     async def get_stats(self):
         """Статистика для адміна"""
-        async with AsyncSessionLocal() as session:
+        async with self.session_factory() as session:
             total = await session.scalar(select(func.count(BotUser.id)))
             subscribed = await session.scalar(select(func.count(BotUser.id)).where(BotUser.is_subscribed == True))
             return {"total_users": total, "subscribed_users": subscribed}
 
     async def get_all_users(self):
         """Повертає список усіх зареєстрованих користувачів"""
-        async with AsyncSessionLocal() as session:
+        async with self.session_factory() as session:
             result = await session.execute(select(BotUser).order_by(BotUser.joined_at.asc()))
             return result.scalars().all()
\ No newline at end of file
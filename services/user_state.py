@@ -0,0 +1,138 @@
+# services/user_state.py
+"""Обмежений стан користувачів (PTB user_data): облік активності, прибирання неактивних і ліміт розміру."""
+import asyncio
+import time
+
+from telegram import Update
+from telegram.ext import Application, ConversationHandler, TypeHandler
+
+from config.settings import USER_STATE_MAX_BYTES, USER_STATE_SWEEP_INTERVAL_SEC, USER_STATE_TTL_SEC
+from services.diagnostics_service import deep_sizeof
+from utils.logger import logger
+from utils.metrics import REGISTRY
+
+ACTIVITY_GROUP = -2
+SWEEP_CHUNK = 500
+
+# Ключі-кеші: при перевищенні ліміту їх можна скинути, хендлери відновлять або почнуть крок заново
+EVICTABLE_KEYS = ("search_results", "search_term", "failed_search_query", "msgs_to_delete")
+
+USER_STATE_USERS = REGISTRY.gauge("bot_user_state_users", "Користувачі зі станом у user_data")
+USER_STATE_BYTES = REGISTRY.gauge("bot_user_state_bytes", "Приблизний обсяг user_data (останній прохід)")
+USER_STATE_EVICTIONS = REGISTRY.counter(
+    "bot_user_state_evictions_total", "Витіснення стану користувачів", ("reason",)
+)
+
+
+class UserStateJanitor:
+    def __init__(self, ttl_sec: float = USER_STATE_TTL_SEC, max_bytes: int = USER_STATE_MAX_BYTES,
+                 interval_sec: float = USER_STATE_SWEEP_INTERVAL_SEC):
+        self.ttl_sec = ttl_sec
+        self.max_bytes = max_bytes
+        self.interval_sec = interval_sec
+        self.application = None
+        self.is_running = False
+        self._last_seen = {}  # {user_id: monotonic}
+        self._sizes = {}  # {user_id: байти на момент останнього підрахунку}
+        self._dirty = set()  # активні з минулого проходу — їх розмір треба перерахувати
+
+    def setup(self, application: Application):
+        """Підключає облік активності (ідемпотентно)."""
+        if self.application is application:
+            return
+        self.application = application
+        application.add_handler(TypeHandler(Update, self._touch), group=ACTIVITY_GROUP)
+        USER_STATE_USERS.set_function(lambda: len(application.user_data))
+
+    async def _touch(self, update: Update, context):
+        user = update.effective_user
+        if user:
+            self._last_seen[user.id] = time.monotonic()
+            self._dirty.add(user.id)
+
+    async def start(self):
+        if self.is_running or self.application is None:
+            return
+        self.is_running = True
+        logger.info(f"🧹 User state janitor started (ttl={self.ttl_sec:.0f}s, cap={self.max_bytes // 1024}KiB)")
+        while self.is_running:
+            await asyncio.sleep(self.interval_sec)
+            try:
+                await self.sweep()
+            except Exception as e:
+                logger.error(f"User state sweep failed: {e}", exc_info=True)
+
+    def stop(self):
+        self.is_running = False
+
+    async def sweep(self) -> dict:
+        """Один прохід: TTL, потім ліміт розміру. Повертає кількість витіснень за причиною."""
+        app = self.application
+        now = time.monotonic()
+        evicted = {"idle": 0, "size": 0, "trimmed": 0}
+
+        # Стан без жодної активності з моменту запуску (напр. з persistence) старіє від старту
+        idle = {user_id for user_id in app.user_data
+                if now - self._last_seen.setdefault(user_id, now) >= self.ttl_sec}
+        idle |= {user_id for user_id, seen in self._last_seen.items() if now - seen >= self.ttl_sec}
+        if idle:
+            self.drop_users(idle)
+            evicted["idle"] = len(idle)
+
+        dirty, self._dirty = self._dirty, set()
+        for index, user_id in enumerate(dirty):
+            data = app.user_data.get(user_id)
+            if data is None:
+                self._sizes.pop(user_id, None)
+                continue
+            size = deep_sizeof(data)
+            if size > self.max_bytes:
+                for key in EVICTABLE_KEYS:
+                    data.pop(key, None)
+                size = deep_sizeof(data)
+                if size > self.max_bytes:
+                    logger.warning(f"🧹 User {user_id} state is {size // 1024}KiB, over the cap — resetting")
+                    self.drop_users({user_id})
+                    evicted["size"] += 1
+                    continue
+                evicted["trimmed"] += 1
+            self._sizes[user_id] = size
+            if index % SWEEP_CHUNK == SWEEP_CHUNK - 1:
+                await asyncio.sleep(0)
+
+        USER_STATE_BYTES.set(sum(self._sizes.values()))
+        for reason, count in evicted.items():
+            if count:
+                USER_STATE_EVICTIONS.inc(count, reason=reason)
+        if evicted["idle"] or evicted["size"]:
+            logger.info(f"🧹 User state sweep: {evicted}, users with state: {len(app.user_data)}")
+        return evicted
+
+    def drop_users(self, user_ids: set):
+        """Видаляє user_data і незавершені розмови користувачів."""
+        app = self.application
+        for user_id in user_ids:
+            if user_id in app.user_data:
+                app.drop_user_data(user_id)
+            self._forget(user_id)
+        for conversation in self._conversations(app.handlers.values()):
+            # У PTB 20.3 немає публічного API, а conversation_timeout потребує JobQueue (вимкнено)
+            for key in [k for k in conversation._conversations if any(part in user_ids for part in k)]:
+                conversation._conversations.pop(key, None)
+
+    def _forget(self, user_id: int):
+        self._last_seen.pop(user_id, None)
+        self._sizes.pop(user_id, None)
+        self._dirty.discard(user_id)
+
+    @classmethod
+    def _conversations(cls, handler_groups):
+        for handlers in handler_groups:
+            for handler in handlers:
+                if isinstance(handler, ConversationHandler):
+                    yield handler
+                    for state_handlers in handler.states.values():
+                        yield from cls._conversations([state_handlers])
+
+
+user_state_janitor = UserStateJanitor()
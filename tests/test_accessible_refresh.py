@@ -0,0 +1,83 @@
+from types import SimpleNamespace
+
+import pytest
+
+from handlers import accessible_transport_handlers as handlers
+
+
+class FakeQuery:
+    def __init__(self, data, reply_markup=None):
+        self.data = data
+        self.from_user = SimpleNamespace(id=1)
+        self.message = SimpleNamespace(message_id=7, reply_markup=reply_markup)
+        self.edits = []
+        self.answers = []
+
+    async def answer(self, text=None, **kwargs):
+        self.answers.append(text)
+
+    async def edit_message_text(self, text, reply_markup=None, **kwargs):
+        self.edits.append(text)
+        if reply_markup is not None:
+            self.message.reply_markup = reply_markup
+
+
+@pytest.mark.asyncio
+async def test_unchanged_refresh_skips_edit(monkeypatch):
+    stop_info = {"title": "Привоз", "routes": [{"title": "5", "id": 11, "transportKey": "tram", "direction": 1}]}
+    vehicles = {11: [{"bort": "4001"}]}
+
+    async def get_stop_info(stop_id):
+        return stop_info
+
+    async def get_vehicles(route_id):
+        return vehicles[route_id]
+
+    monkeypatch.setattr(handlers.easyway_service, "get_stop_info_v12", get_stop_info)
+    monkeypatch.setattr(handlers.easyway_service, "get_vehicles_on_route", get_vehicles)
+    handlers._render_cache.clear()
+    context = SimpleNamespace(user_data={}, bot_data={})
+
+    query = FakeQuery("stop_1501")
+    await handlers.accessible_stop_selected(SimpleNamespace(callback_query=query, effective_user=query.from_user), context)
+    assert query.edits[0].startswith("🔄 Сканую") and "Привоз" in query.edits[-1]
+
+    # "Оновити дані" з тими самими даними EasyWay: без редагування, відповідь "без змін"
+    refresh = FakeQuery("stop_1501", reply_markup=query.message.reply_markup)
+    await handlers.accessible_stop_selected(SimpleNamespace(callback_query=refresh, effective_user=refresh.from_user), context)
+    assert refresh.edits == [] and refresh.answers == ["✅ Даних без змін"]
+
+    # Нові дані (інший об'єкт з кешу сервісу) — сторінка перемальовується
+    vehicles[11] = []
+    await handlers.accessible_stop_selected(SimpleNamespace(callback_query=refresh, effective_user=refresh.from_user), context)
+    assert len(refresh.edits) == 1 and "Інформація наразі відсутня" in refresh.edits[0]
+    assert refresh.answers[-1] is None
+
+
+@pytest.mark.asyncio
+async def test_back_to_list_after_restart_repeats_search(monkeypatch):
+    stops = [{"id": 1501, "title": "Привоз", "routes_summary": "🚋 5"},
+             {"id": 1502, "title": "Новий ринок", "routes_summary": "🚎 9"}]
+    searches = []
+
+    async def get_places_by_name(search_term):
+        searches.append(search_term)
+        for stop in stops:
+            handlers.easyway_service.stop_index[stop["id"]] = stop
+        return {"stops": stops}
+
+    shown = []
+
+    async def show_stops_keyboard(update, places, context=None):
+        shown.append([place["id"] for place in places])
+
+    monkeypatch.setattr(handlers.easyway_service, "stop_index", {})  # перезапуск: індекс порожній
+    monkeypatch.setattr(handlers.easyway_service, "get_places_by_name", get_places_by_name)
+    monkeypatch.setattr(handlers, "_show_stops_keyboard", show_stops_keyboard)
+    context = SimpleNamespace(user_data={"search_results": [1502, 1501], "search_term": "Привоз"}, bot_data={})
+    query = FakeQuery("accessible_back_to_list")
+
+    state = await handlers.accessible_back_to_list(SimpleNamespace(callback_query=query), context)
+
+    assert state == handlers.States.ACCESSIBLE_SELECT_STOP
+    assert searches == ["Привоз"] and shown == [[1502, 1501]]
@@ -0,0 +1,69 @@
+import aiohttp
+import pytest
+
+from benchmarks.fake_easyway import FakeEasyWay
+from benchmarks.run_e2e import compare_with_baseline, meta_mismatch, percentile
+
+
+@pytest.mark.asyncio
+async def test_fake_easyway_replays_fixtures_for_real_service():
+    from services.easyway_service import EasyWayService
+
+    server = FakeEasyWay(latency_ms=1, jitter_ms=0)
+    service = EasyWayService()
+    service.base_url = await server.start()
+    try:
+        places = await service.get_places_by_name("Привоз")
+        stop = await service.get_stop_info_v12(1501)
+        vehicles = await service.get_vehicles_on_route(100)
+        async with aiohttp.ClientSession() as session:
+            async with session.get(f"{service.base_url}/?function=unknown") as response:
+                assert response.status == 404
+    finally:
+        await server.stop()
+
+    assert [s["id"] for s in places["stops"]] == [1501, 1502, 1503, 1504]
+    assert stop["title"] == "Привоз" and stop["routes"]
+    assert vehicles and all(v["is_accessible_api"] == 1 for v in vehicles)
+    assert server.requests["stops.GetStopInfo"] == 1
+
+
+def test_compare_with_baseline():
+    baseline = {"scenarios": {"search": {"throughput_ups": 100, "latency": {"p95_ms": 200}, "error_replies": 0}}}
+
+    ok = {"scenarios": {"search": {"throughput_ups": 90, "latency": {"p95_ms": 230}, "error_replies": 0}}}
+    assert compare_with_baseline(ok, baseline, tolerance=0.25) == []
+
+    slow = {"scenarios": {"search": {"throughput_ups": 60, "latency": {"p95_ms": 400}, "error_replies": 2}}}
+    assert len(compare_with_baseline(slow, baseline, tolerance=0.25)) == 3
+
+    assert percentile([5, 1, 3, 2, 4], 0.5) == 3
+
+
+def test_baseline_with_other_parameters_is_not_comparable():
+    meta = {"users": 50, "iterations": 3, "concurrency": 32, "easyway_latency_ms": 80, "easyway_jitter_ms": 40,
+            "telegram_latency_ms": 30, "telegram_jitter_ms": 10, "python": "3.11.7"}
+    baseline = {"meta": meta}
+
+    assert meta_mismatch({"meta": dict(meta, python="3.12.0")}, baseline) == []
+    assert meta_mismatch({"meta": dict(meta, users=5)}, baseline) == ["users=5 (baseline 50)"]
+
+
+def test_micro_feed_fixture_is_reproducible():
+    from benchmarks import micro
+
+    trips, stops = micro.read_csv("trips.txt"), micro.read_csv("stops.txt")
+    assert micro.build_feed(trips, stops) == micro.FEED_FIXTURE.read_bytes()
+
+
+def test_micro_benchmarks_measure_time_and_allocations():
+    from benchmarks import micro
+
+    report = micro.run(["monitoring_parse_feed", "render_accessible_response", "format_stop_name"], rounds=1)
+    for result in report["benchmarks"].values():
+        assert result["median_us"] > 0
+        assert result["peak_bytes"] >= 0
+
+    baseline = {"benchmarks": {"format_stop_name": {"median_us": 1.0, "peak_bytes": 0}}}
+    slow = {"benchmarks": {"format_stop_name": {"median_us": 2.0, "peak_bytes": 0}}}
+    assert micro.compare_with_baseline(slow, baseline, tolerance=0.3)
@@ -0,0 +1,84 @@
+import time
+
+import pytest
+
+from benchmarks.fake_easyway import FakeEasyWay
+from config.settings import EASYWAY_STALE_TTL, EASYWAY_STOP_CACHE_TTL
+from services.easyway_service import stale_age
+from utils.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, RetryBudget
+
+
+def test_breaker_states_and_adaptive_timeout(monkeypatch):
+    breaker = CircuitBreaker("test", failure_threshold=2, reset_sec=10,
+                             min_timeout=0.5, max_timeout=10, multiplier=3, min_samples=5)
+    assert breaker.timeout() == 10
+    for _ in range(5):
+        breaker.record_success(0.1)
+    assert breaker.timeout() == pytest.approx(0.5)  # p99 * 3 = 0.3 -> не менше мінімуму
+
+    breaker.record_failure()
+    assert breaker.state == CLOSED and breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == OPEN and not breaker.allow()
+
+    real_monotonic = time.monotonic
+    monkeypatch.setattr(time, "monotonic", lambda: real_monotonic() + 11)
+    assert breaker.allow() and breaker.state == HALF_OPEN
+    assert not breaker.allow()  # лише один пробний запит
+    breaker.release()  # пробу скасував викликач: ланцюг лишається half-open, наступна проба дозволена
+    assert breaker.state == HALF_OPEN and breaker.allow()
+    breaker.record_success(0.1)
+    assert breaker.state == CLOSED and breaker.allow()
+
+    # Скасування в закритому стані не наближають відкриття
+    for _ in range(5):
+        assert breaker.allow()
+        breaker.release()
+    assert breaker.state == CLOSED
+
+    budget = RetryBudget("test", ratio=0.5, cap=1)
+    assert budget.try_retry() and not budget.try_retry()
+    budget.record_request()
+    budget.record_request()
+    assert budget.try_retry()
+
+
+@pytest.mark.asyncio
+async def test_outage_fails_fast_to_stale_data(monkeypatch):
+    from cachetools import TTLCache
+    from services.easyway_service import easyway_service as service
+
+    server = FakeEasyWay(latency_ms=1, jitter_ms=0)
+    monkeypatch.setattr(service, "base_url", await server.start())
+    monkeypatch.setattr(service, "stop_cache", TTLCache(maxsize=10, ttl=60))
+    monkeypatch.setattr(service, "stale_cache", TTLCache(maxsize=10, ttl=60))
+    monkeypatch.setattr(service, "breakers", {
+        "GetStopInfo": CircuitBreaker("test:GetStopInfo", 3, 60, min_timeout=0.1, max_timeout=0.2)
+    })
+    try:
+        stop = await service.get_stop_info_v12(1501)
+        assert stop["routes"]
+
+        # EasyWay "зависає": кеш протух, кілька запитів впираються в таймаут і відкривають ланцюг
+        server.latency_ms = 1000
+        service.stop_cache.clear()
+        for _ in range(service.breakers["GetStopInfo"].failure_threshold):
+            stale = await service.get_stop_info_v12(1501)
+            assert stale["routes"] is stop["routes"] and stale_age(stale) is not None
+        assert service.breakers["GetStopInfo"].state == OPEN
+
+        requests_before = server.requests["stops.GetStopInfo"]
+        started = time.monotonic()
+        assert stale_age(await service.get_stop_info_v12(1501)) is not None
+        assert (await service.get_stop_info_v12(999))["error"]
+        assert time.monotonic() - started < 0.05
+        assert server.requests["stops.GetStopInfo"] == requests_before
+
+        # Застарілу відповідь віддаємо ще EASYWAY_STALE_TTL після TTL її власного кешу
+        old = time.monotonic() - EASYWAY_STOP_CACHE_TTL - EASYWAY_STALE_TTL - 1
+        service.stale_cache[("stop", 1501)] = (stop, old)
+        service.stale_cache[("routes",)] = ({"route": []}, old)
+        assert (await service.get_stop_info_v12(1501))["error"]
+        assert service._stale(("routes",), None) == {"route": []}
+    finally:
+        await server.stop()
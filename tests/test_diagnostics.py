@@ -0,0 +1,51 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from services.diagnostics_service import DiagnosticsService
+
+
+def _busy_loop_work(seconds: float):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        sum(range(1000))
+
+
+@pytest.mark.asyncio
+async def test_profile_finds_code_blocking_the_loop():
+    service = DiagnosticsService()
+    task = asyncio.create_task(service.profile(1))
+    await asyncio.sleep(0.1)
+    assert service.profiling
+    _busy_loop_work(0.5)
+    assert service.stop_profile()
+
+    report = await task
+    assert "_busy_loop_work (tests/test_diagnostics.py" in report
+    assert "== Collapsed stacks" in report
+    assert not service.profiling
+
+
+@pytest.mark.asyncio
+async def test_memory_report_diffs_snapshots_and_ranks_user_data():
+    service = DiagnosticsService()
+    app = SimpleNamespace(
+        bot_data={"easyway_structured_map": {"tram": [{"id": i, "name": str(i)} for i in range(500)]}, "flag": 1},
+        user_data={1: {"draft": "x" * 10_000}, 2: {}},
+        chat_data={},
+    )
+    try:
+        first = await service.memory_report(app)
+        retained = [bytearray(1024) for _ in range(200)]
+        second = await service.memory_report(app)
+    finally:
+        service.stop_memory()
+
+    assert "Growth since previous snapshot" not in first
+    assert "Growth since previous snapshot" in second and "test_diagnostics.py" in second
+    user_section = second.split("== user_data")[1]
+    assert user_section.index("KiB  1") < user_section.index("KiB  2")
+    assert "easyway_structured_map" in second.split("== bot_data")[1].splitlines()[1]
+    assert retained
@@ -0,0 +1,67 @@
+import io
+import os
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from telegram.error import BadRequest
+
+from database.db import Base
+from services.file_id_cache import FileIdCache
+
+
+class FakeBot:
+    def __init__(self):
+        self.uploads = 0
+        self.sent = []
+        self.valid_ids = set()
+
+    async def send_document(self, chat_id, document, caption=None):
+        if isinstance(document, io.IOBase):
+            self.uploads += 1
+            file_id = f"doc-{self.uploads}"
+            self.valid_ids.add(file_id)
+        elif document in self.valid_ids:
+            file_id = document
+        else:
+            raise BadRequest("Wrong file identifier/http url specified")
+        self.sent.append(file_id)
+        return SimpleNamespace(document=SimpleNamespace(file_id=file_id))
+
+
+@pytest.mark.asyncio
+async def test_file_is_uploaded_once_and_reuploaded_when_changed(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'files.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    pdf = tmp_path / "rules.pdf"
+    pdf.write_bytes(b"%PDF-1.4 rules v1" * 1000)
+    bot = FakeBot()
+
+    cache = FileIdCache(session_factory)
+    for _ in range(3):
+        await cache.send(bot.send_document, "document", pdf, chat_id=1, caption="Правила")
+    assert bot.uploads == 1 and bot.sent == ["doc-1"] * 3
+
+    # Після перезапуску file_id береться з БД
+    restarted = FileIdCache(session_factory)
+    await restarted.send(bot.send_document, "document", pdf, chat_id=1)
+    assert bot.uploads == 1
+
+    # Файл змінився — завантажуємо знову
+    pdf.write_bytes(b"%PDF-1.4 rules v2" * 1000)
+    os.utime(pdf, ns=(1, 1))
+    await restarted.send(bot.send_document, "document", pdf, chat_id=1)
+    assert bot.uploads == 2 and bot.sent[-1] == "doc-2"
+
+    # Telegram не приймає збережений file_id (інший бот) — завантаження замість помилки
+    other_bot = FakeBot()
+    await FileIdCache(session_factory).send(other_bot.send_document, "document", pdf, chat_id=1)
+    assert other_bot.uploads == 1
+
+    with pytest.raises(FileNotFoundError):
+        await cache.send(bot.send_document, "document", tmp_path / "missing.pdf", chat_id=1)
+
+    await engine.dispose()
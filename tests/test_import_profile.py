@@ -0,0 +1,44 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from utils.import_profiler import ImportProfiler
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+
+
+def test_rare_dependencies_are_not_imported_with_the_bot():
+    code = ("import json, sys; import bot.bot, bot.startup; "
+            "print(json.dumps([m for m in ('rapidfuzz', 'google.transit.gtfs_realtime_pb2', 'requests', "
+            "'google.oauth2.service_account') if m in sys.modules]))")
+    env = dict(os.environ, DATABASE_URL=os.environ.get("DATABASE_URL", "sqlite+aiosqlite://"))
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT_DIR, env=env,
+                            capture_output=True, text=True, timeout=120)
+
+    assert result.returncode == 0, result.stderr
+    assert json.loads(result.stdout.strip().splitlines()[-1]) == []
+
+
+def test_import_profiler_measures_nested_imports(tmp_path, monkeypatch):
+    package = tmp_path / "slowpkg"
+    package.mkdir()
+    (package / "__init__.py").write_text("import time\ntime.sleep(0.02)\nfrom slowpkg import child\n")
+    (package / "child.py").write_text("import time\ntime.sleep(0.05)\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    profiler = ImportProfiler()
+    profiler.install()
+    try:
+        import slowpkg  # noqa: F401
+    finally:
+        profiler.uninstall()
+        sys.modules.pop("slowpkg", None)
+        sys.modules.pop("slowpkg.child", None)
+
+    inclusive, own, _ = profiler.records["slowpkg"]
+    assert inclusive >= 0.07 and 0.02 <= own < 0.05
+    assert profiler.records["slowpkg.child"][1] >= 0.05
+    assert not any(type(finder).__name__ == "_TimingFinder" for finder in sys.meta_path)
+    assert "slowpkg (2 modules)" in profiler.report()
@@ -0,0 +1,28 @@
+import pytest
+
+from handlers import keyboards
+from handlers.common import get_back_keyboard
+from handlers.command_handlers import get_main_menu_keyboard
+
+
+def _callbacks(markup):
+    return [button.callback_data for row in markup.inline_keyboard for button in row]
+
+
+@pytest.mark.asyncio
+async def test_menus_are_built_once_and_admin_buttons_follow_role(monkeypatch):
+    monkeypatch.setattr(keyboards, "MUSEUM_ADMIN_IDS", [10])
+    monkeypatch.setattr(keyboards, "GENERAL_ADMIN_IDS", [20, 10])
+
+    user = await get_main_menu_keyboard(1)
+    assert user is await get_main_menu_keyboard(2) is keyboards.MENUS["main"].keyboard
+    assert "admin_museum_menu" not in _callbacks(user) and "general_admin_menu" not in _callbacks(user)
+
+    general = keyboards.main_menu_keyboard(20)
+    assert _callbacks(general)[-1] == "general_admin_menu" and "admin_museum_menu" not in _callbacks(general)
+    assert _callbacks(keyboards.main_menu_keyboard(10))[-2:] == ["admin_museum_menu", "general_admin_menu"]
+
+    back = await get_back_keyboard("museum_menu")
+    assert back is await get_back_keyboard("museum_menu")
+    assert _callbacks(back) == ["museum_menu", "main_menu"]
+    assert keyboards.MENUS["tickets"].text.startswith("🎫")
@@ -0,0 +1,43 @@
+import json
+import logging
+
+from utils.logger import SamplingFilter, JsonFormatter
+
+
+def make_record(msg, level=logging.INFO, lineno=10, **extra):
+    record = logging.LogRecord("transport_bot", level, "services/easyway_service.py", lineno, msg, None, None)
+    for key, value in extra.items():
+        setattr(record, key, value)
+    return record
+
+
+def test_sampling_filter_is_opt_in_per_key():
+    sampling = SamplingFilter(window_sec=60, max_per_window=3)
+
+    passed = [sampling.filter(make_record(f"vehicle {i}", log_key="gps")) for i in range(10)]
+    assert passed.count(True) == 3
+
+    # Інший ключ, звичайні INFO без ключа та попередження не обмежуються
+    assert sampling.filter(make_record("other", log_key="search"))
+    assert all(sampling.filter(make_record(f"broadcast {i}")) for i in range(50))
+    assert all(sampling.filter(make_record("warn", level=logging.WARNING, log_key="gps")) for _ in range(10))
+
+
+def test_sampling_filter_reports_suppressed_in_next_window():
+    sampling = SamplingFilter(window_sec=60, max_per_window=1)
+    sampling.filter(make_record("a", log_key="gps"))
+    assert not sampling.filter(make_record("b", log_key="gps"))
+    assert not sampling.filter(make_record("c", log_key="gps"))
+
+    sampling.window_sec = 0  # вікно закінчилось
+    record = make_record("d", log_key="gps")
+    assert sampling.filter(record)
+    assert record.getMessage() == "d (+2 similar suppressed)"
+
+
+def test_json_formatter():
+    line = JsonFormatter().format(make_record("Привіт %s", log_key="k"))
+    payload = json.loads(line)
+    assert payload["level"] == "INFO"
+    assert payload["message"] == "Привіт %s"
+    assert payload["key"] == "k"
@@ -0,0 +1,50 @@
+import asyncio
+
+import pytest
+from telegram.error import BadRequest
+
+from services.message_deleter import MessageDeleter
+
+
+class FakeBot:
+    def __init__(self, bulk_error=None):
+        self.bulk_error = bulk_error
+        self.bulk_calls = []
+        self.single_calls = []
+
+    async def _post(self, endpoint, data):
+        self.bulk_calls.append((endpoint, data["chat_id"], list(data["message_ids"])))
+        if self.bulk_error:
+            raise self.bulk_error
+        return True
+
+    async def delete_message(self, chat_id, message_id):
+        self.single_calls.append((chat_id, message_id))
+        if message_id == 1:
+            raise BadRequest("Message can't be deleted")
+        return True
+
+
+@pytest.mark.asyncio
+async def test_deletes_are_coalesced_per_chat_with_fallback():
+    bot = FakeBot()
+    deleter = MessageDeleter(window_sec=0.05)
+
+    first = deleter.delete(bot, 10, [101, 102])
+    deleter.delete(bot, 10, [103, 102])
+    deleter.delete(bot, 20, [201, 202])
+    assert await asyncio.wait_for(first, 1) is True
+    await deleter.flush()
+    assert sorted(bot.bulk_calls) == [("deleteMessages", 10, [101, 102, 103]), ("deleteMessages", 20, [201, 202])]
+    assert bot.single_calls == []
+
+    # Bulk відхилено (є надто старе повідомлення) — поштучно, без винятків назовні
+    old_bot = FakeBot(bulk_error=BadRequest("Message can't be deleted"))
+    result = deleter.delete(old_bot, 10, [1, 2])
+    await deleter.flush()
+    assert await result is False
+    assert sorted(old_bot.single_calls) == [(10, 1), (10, 2)]
+
+    # Сотня id — окремий запит одразу, без очікування вікна
+    many = deleter.delete(bot, 30, range(1000, 1100))
+    assert await asyncio.wait_for(many, 0.04) is True
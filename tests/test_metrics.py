@@ -0,0 +1,143 @@
+import datetime
+import pytest
+from telegram import Update, User, Chat, Message, CallbackQuery
+from telegram.ext import Application, CallbackQueryHandler, ConversationHandler, MessageHandler, filters
+
+import bot.middleware as middleware
+from utils.metrics import MetricsRegistry, record_upstream
+
+
+def make_message_update(update_id, text="hi"):
+    user = User(id=1, first_name="Test", is_bot=False)
+    chat = Chat(id=1, type="private")
+    message = Message(message_id=update_id, date=datetime.datetime.now(datetime.timezone.utc),
+                      chat=chat, from_user=user, text=text)
+    return Update(update_id=update_id, message=message)
+
+
+def make_callback_update(update_id, data):
+    user = User(id=1, first_name="Test", is_bot=False)
+    message = make_message_update(update_id, "menu").message
+    query = CallbackQuery(id=str(update_id), from_user=user, chat_instance="1", data=data, message=message)
+    return Update(update_id=update_id, callback_query=query)
+
+
+def test_histogram_quantile_and_render():
+    registry = MetricsRegistry()
+    hist = registry.histogram("test_seconds", "test", ("handler",), buckets=(0.1, 1.0))
+    for _ in range(9):
+        hist.observe(0.05, handler="a")
+    hist.observe(0.5, handler="a")
+
+    assert hist.quantile(0.5, handler="a") <= 0.1
+    assert 0.1 < hist.quantile(0.95, handler="a") <= 1.0
+
+    text = registry.render()
+    assert 'test_seconds_bucket{handler="a",le="0.1"} 9' in text
+    assert 'test_seconds_bucket{handler="a",le="+Inf"} 10' in text
+    assert 'test_seconds_count{handler="a"} 10' in text
+
+
+@pytest.mark.asyncio
+async def test_middleware_records_handlers_inside_conversations(monkeypatch):
+    calls = []
+
+    async def fake_get_me(self, *args, **kwargs):
+        return User(id=123, first_name="Bot", is_bot=True, username="test_bot")
+
+    async def slow_search(update, context):
+        record_upstream("easyway", "GetPlacesByName", 0.2)
+        calls.append("search")
+        return 1
+
+    async def museum_menu(update, context):
+        calls.append("museum")
+
+    async def broken(update, context):
+        raise RuntimeError("boom")
+
+    app = Application.builder().token("123:TEST").updater(None).build()
+    conv = ConversationHandler(
+        entry_points=[CallbackQueryHandler(slow_search, pattern="^accessible_start$")],
+        states={1: [MessageHandler(filters.TEXT, broken)]},
+        fallbacks=[],
+        per_message=False,
+    )
+    monkeypatch.setattr(type(app.bot), "get_me", fake_get_me)
+    await app.initialize()
+    app.add_handler(conv)
+    app.add_handler(CallbackQueryHandler(museum_menu, pattern="^museum_menu$"))
+    middleware.setup_middleware(app)
+    # Повторний виклик не обгортає колбеки вдруге
+    middleware.setup_middleware(app)
+
+    await app.process_update(make_callback_update(1, "accessible_start"))
+    await app.process_update(make_callback_update(2, "museum_menu"))
+    await app.process_update(make_message_update(3, "Центр"))
+
+    assert calls == ["search", "museum"]
+    # Стан розмови збережено: колбек-обгортка повертає результат оригіналу
+    assert middleware.HANDLER_ERRORS.value(handler="broken", pattern="MessageHandler") == 1
+
+    report = {row[0]: row for row in middleware.handler_report(limit=50)}
+    assert report["slow_search"][1] == "^accessible_start$"
+    assert report["slow_search"][7] > 0.9  # час хендлера — це час EasyWay
+    assert report["museum_menu"][2] >= 1
+    assert middleware.UPDATES_IN_FLIGHT.value() == 0
+    assert middleware.UPDATES_TOTAL.value(type="callback_query") >= 2
+    await app.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_loop_monitor_attributes_blocking_call():
+    import asyncio
+    import time
+    from services.loop_monitor import LoopMonitor, LOOP_STALLS
+
+    def blocking_export():
+        time.sleep(0.2)  # синхронна робота в loop, як CSV-експорт
+
+    monitor = LoopMonitor(interval=0.01, stall_threshold=0.05)
+    task = asyncio.create_task(monitor.start())
+    await asyncio.sleep(0.03)
+    blocking_export()
+    await asyncio.sleep(0.03)
+    monitor.stop()
+    await task
+
+    assert monitor.max_lag >= 0.15
+    stall = monitor.recent_stalls[-1]
+    assert stall["location"].startswith("tests/test_metrics.py:")
+    assert stall["location"].endswith("blocking_export")
+    assert "time.sleep(0.2)" in stall["stack"]
+    assert LOOP_STALLS.value(location=stall["location"]) == 1
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint_exposes_db_and_cache_metrics():
+    from aiohttp.test_utils import TestClient, TestServer
+    from sqlalchemy import text
+    import bot.web_server as web_server
+    from bot.update_processor import UpdateProcessor
+    from database.db import AsyncSessionLocal
+    from services.easyway_service import easyway_service
+
+    async with AsyncSessionLocal() as session:
+        await session.execute(text("SELECT 1"))
+    easyway_service.stop_cache[42] = {"stop": "cached"}
+    assert await easyway_service.get_stop_info_v12(42) == {"stop": "cached"}
+
+    class App:
+        running = True
+        bot = None
+
+    processor = UpdateProcessor(App())
+    async with TestClient(TestServer(web_server.create_web_app(App(), processor, mode="polling"))) as client:
+        response = await client.get("/metrics")
+        assert response.status == 200
+        assert response.headers["Content-Type"].startswith("text/plain")
+        body = await response.text()
+
+    assert 'bot_db_query_duration_seconds_count{operation="SELECT"}' in body
+    assert 'bot_easyway_cache_requests_total{cache="stop",result="hit"}' in body
+    assert 'bot_easyway_cache_entries{cache="stop"} 1' in body
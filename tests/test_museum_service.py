@@ -0,0 +1,105 @@
+import asyncio
+import pytest
+from services.museum_service import MuseumService
+
+
+class FakeSheets:
+    def __init__(self):
+        self.batch_calls = 0
+        self.cleared = []
+
+    async def batch_get(self, ranges):
+        self.batch_calls += 1
+        await asyncio.sleep(0.01)
+        return [[["01.06.2030 10:00"], [], ["02.06.2030 12:00"]], [["Святкові дати"], ["25.12.2030 11:00"]]]
+
+    async def append_row(self, sheet_name, values):
+        return True
+
+    async def clear_cell(self, sheet_name, cell):
+        self.cleared.append(cell)
+        return True
+
+
+@pytest.mark.asyncio
+async def test_dates_snapshot_single_batch_get():
+    service = MuseumService()
+    service.sheets = fake = FakeSheets()
+
+    results = await asyncio.gather(
+        service.get_available_dates(),
+        service.get_available_holiday_dates(),
+        service.get_available_dates(),
+    )
+
+    assert fake.batch_calls == 1
+    assert results[0] == ["01.06.2030 10:00", "02.06.2030 12:00"]
+    assert results[1] == ["Святкові дати", "25.12.2030 11:00"]
+
+
+@pytest.mark.asyncio
+async def test_admin_changes_are_written_through():
+    service = MuseumService()
+    service.sheets = fake = FakeSheets()
+    await service.get_available_dates()
+
+    assert await service.add_date("03.06.2030 09:00") is True
+    assert "03.06.2030 09:00" in await service.get_available_dates()
+
+    assert await service.delete_date("A2", "01.06.2030 10:00") is True
+    assert await service.get_available_dates() == ["02.06.2030 12:00", "03.06.2030 09:00"]
+    assert fake.cleared == ["A2"]
+    assert fake.batch_calls == 1
+
+
+@pytest.mark.asyncio
+async def test_refresh_started_before_admin_write_is_discarded():
+    service = MuseumService()
+    service.sheets = fake = FakeSheets()
+    await service.get_available_dates()
+
+    # Оновлення читає таблицю ще без нової дати, а адмін тим часом її додає
+    refresh = service.refresh_snapshot()
+    await asyncio.sleep(0)  # оновлення вже чекає на batch_get
+    assert await service.add_date("03.06.2030 09:00") is True
+    assert await refresh is False
+
+    assert "03.06.2030 09:00" in await service.get_available_dates()
+    assert fake.batch_calls == 2
+
+
+@pytest.mark.asyncio
+async def test_cold_start_fails_fast_when_sheets_down():
+    class SlowSheets(FakeSheets):
+        async def batch_get(self, ranges):
+            self.batch_calls += 1
+            await asyncio.sleep(10)
+
+    service = MuseumService()
+    service.sheets = fake = SlowSheets()
+    service._cold_start_wait = 0.05
+    try:
+        assert await asyncio.wait_for(service.get_available_dates(), timeout=1) == []
+        assert fake.batch_calls == 1
+    finally:
+        service._refresh_task.cancel()
+
+
+@pytest.mark.asyncio
+async def test_stale_reads_back_off_after_refresh_error():
+    class DownSheets(FakeSheets):
+        async def batch_get(self, ranges):
+            self.batch_calls += 1
+            raise RuntimeError("503")
+
+    service = MuseumService()
+    service.sheets = FakeSheets()
+    await service.get_available_dates()
+    service.sheets = fake = DownSheets()
+    service.invalidate_dates_cache()
+
+    # Перше застаріле читання пробує оновитись, наступні не смикають Sheets до _retry_after_error
+    for _ in range(5):
+        assert await service.get_available_dates() == ["01.06.2030 10:00", "02.06.2030 12:00"]
+        await asyncio.sleep(0)
+    assert fake.batch_calls == 1
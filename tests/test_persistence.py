@@ -0,0 +1,82 @@
+import datetime
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from telegram import Chat, Message, Update, User
+from telegram.ext import Application, ConversationHandler, MessageHandler, filters
+
+from database.db import Base
+from database.persistence import DatabasePersistence, dumps, loads
+
+
+def make_message_update(update_id, user_id, text):
+    user = User(id=user_id, first_name="Test", is_bot=False)
+    chat = Chat(id=user_id, type="private")
+    message = Message(message_id=update_id, date=datetime.datetime.now(datetime.timezone.utc),
+                      chat=chat, from_user=user, text=text)
+    return Update(update_id=update_id, message=message)
+
+
+async def build_app(monkeypatch, session_factory, seen: list):
+    async def fake_get_me(self, *args, **kwargs):
+        return User(id=123, first_name="Bot", is_bot=True, username="test_bot")
+
+    async def start_dialog(update, context):
+        context.user_data["main_message_id"] = update.message.message_id
+        context.user_data["warning_active"] = True
+        return 1
+
+    async def finish(update, context):
+        seen.append(dict(context.user_data))
+        return ConversationHandler.END
+
+    persistence = DatabasePersistence(session_factory=session_factory, update_interval=60, ttl_sec=3600)
+    app = Application.builder().token("123:TEST").updater(None).persistence(persistence).build()
+    monkeypatch.setattr(type(app.bot), "get_me", fake_get_me)
+    conv = ConversationHandler(entry_points=[MessageHandler(filters.Regex("^dialog"), start_dialog)],
+                               states={1: [MessageHandler(filters.TEXT, finish)]}, fallbacks=[],
+                               name="dialog", persistent=True)
+    app.add_handler(conv)
+    await app.initialize()
+    return app, conv, persistence
+
+
+@pytest.mark.asyncio
+async def test_dialog_survives_restart_and_user_data_loads_lazily(monkeypatch, tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'state.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    seen = []
+
+    # Перший "процес": користувач 7 почав діалог, і бот перезапустився
+    app, conv, persistence = await build_app(monkeypatch, session_factory, seen)
+    await app.process_update(make_message_update(41, 7, "dialog"))
+    await app.shutdown()  # update_persistence + flush
+
+    # Другий "процес": стан розмови відновлено при старті, а user_data — лише з першим апдейтом
+    app, conv, persistence = await build_app(monkeypatch, session_factory, seen)
+    assert conv._conversations == {(7, 7): 1}
+    assert 7 not in app.user_data
+    await app.process_update(make_message_update(42, 7, "next step"))
+
+    assert seen == [{"main_message_id": 41}]  # тимчасовий warning_active не збережено
+    assert (7, 7) not in conv._conversations
+
+    # Незмінений стан не переписується; завершена розмова видаляється з БД
+    await app.update_persistence()
+    await persistence.flush()
+    assert persistence._pending_users == {}
+    assert await persistence.get_conversations("dialog") == {}
+
+    await app.shutdown()
+    await engine.dispose()
+
+
+def test_serialization_is_compact():
+    small = {"main_message_id": 41}
+    large = {"search_results": list(range(1000, 1200))}
+
+    assert loads(dumps(small)) == small and dumps(small)[:1] == b"p"
+    assert loads(dumps(large)) == large and dumps(large)[:1] == b"z"
@@ -0,0 +1,64 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from handlers.common import rate_limited
+from utils.rate_limit import ActionLimit, RateLimiter
+
+
+def test_user_bucket_and_shared_upstream_budget(monkeypatch):
+    limiter = RateLimiter(
+        limits={"search": ActionLimit(rate=1.0, burst=2, upstream="easyway")},
+        upstreams={"easyway": (0.001, 3)},
+        enabled=True,
+    )
+
+    # Запас користувача — 2 запити, третій чекає ~1 с
+    assert limiter.check(1, "search") is None
+    assert limiter.check(1, "search") is None
+    denial = limiter.check(1, "search")
+    assert denial.scope == "user" and 0 < denial.retry_after <= 1.0
+
+    # Інший користувач бере останній токен спільного бюджету, наступний упирається в upstream
+    assert limiter.check(2, "search") is None
+    denial = limiter.check(3, "search")
+    assert denial.scope == "easyway"
+    # Токен користувача 3 повернуто: відмова upstream не з'їдає його власний ліміт
+    assert limiter._buckets[(3, "search")].tokens == pytest.approx(2, abs=0.01)
+
+    # Відро користувача 1 наповнюється з часом
+    real_monotonic = time.monotonic
+    monkeypatch.setattr(time, "monotonic", lambda: real_monotonic() + 1.5)
+    limiter.upstreams["easyway"].tokens = 3
+    assert limiter.check(1, "search") is None
+
+
+@pytest.mark.asyncio
+async def test_rate_limited_decorator_keeps_state_and_answers_callback(monkeypatch):
+    import handlers.common as common
+
+    limiter = RateLimiter(limits={"stop": ActionLimit(rate=0.01, burst=1)}, upstreams={}, enabled=True)
+    monkeypatch.setattr(common, "rate_limiter", limiter)
+
+    answers = []
+
+    async def answer(text=None, **kwargs):
+        answers.append(text)
+
+    update = SimpleNamespace(
+        effective_user=SimpleNamespace(id=42),
+        callback_query=SimpleNamespace(answer=answer),
+        message=None,
+    )
+    calls = []
+
+    @rate_limited("stop")
+    async def handler(update, context):
+        calls.append(1)
+        return "NEXT_STATE"
+
+    assert await handler(update, SimpleNamespace(user_data={})) == "NEXT_STATE"
+    assert await handler(update, SimpleNamespace(user_data={})) is None
+    assert calls == [1]
+    assert answers and answers[0].startswith("⏳ Забагато запитів")
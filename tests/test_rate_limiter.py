@@ -0,0 +1,57 @@
+import asyncio
+import time
+
+import pytest
+from telegram.error import RetryAfter
+
+from bot.rate_limiter import BACKGROUND, PriorityRateLimiter
+
+
+@pytest.mark.asyncio
+async def test_interactive_replies_are_not_stuck_behind_broadcast():
+    limiter = PriorityRateLimiter(global_rate=50, interactive_reserve=5, chat_rate=1, chat_burst=2)
+    sent = []
+
+    async def request(endpoint, data):
+        sent.append((endpoint, data["chat_id"]))
+        return True
+
+    async def send(chat_id, rate_limit_args=None):
+        data = {"chat_id": chat_id}
+        started = time.monotonic()
+        await limiter.process_request(request, ("sendMessage", data), {}, "sendMessage", data, rate_limit_args)
+        return time.monotonic() - started
+
+    started = time.monotonic()
+    broadcast = asyncio.gather(*(send(chat_id, BACKGROUND) for chat_id in range(1000, 1100)))
+    await asyncio.sleep(0.3)
+    assert len(sent) <= 65  # запас 50 мінус резерв 5, далі 50/с — а не всі 100 одразу
+
+    interactive_wait = await send(1)
+    assert interactive_wait < 0.05
+    await broadcast
+    assert time.monotonic() - started >= 1.0
+
+    # Ліміт одного чату: запас 2 повідомлення, далі 1/с
+    waits = [await send(7) for _ in range(3)]
+    assert waits[0] < 0.05 and waits[1] < 0.05 and waits[2] > 0.5
+
+
+@pytest.mark.asyncio
+async def test_retry_after_pauses_all_requests_and_retries():
+    limiter = PriorityRateLimiter()
+    calls = []
+
+    async def flood_once(endpoint, data):
+        calls.append((endpoint, time.monotonic()))
+        if len(calls) == 1:
+            raise RetryAfter(0.3)
+        return True
+
+    data = {"chat_id": 5}
+    first = asyncio.create_task(limiter.process_request(flood_once, ("editMessageText", data), {},
+                                                        "editMessageText", data, None))
+    await asyncio.sleep(0.05)
+    other = await limiter.process_request(flood_once, ("answerCallbackQuery", {}), {}, "answerCallbackQuery", {}, None)
+    assert other is True and await first is True
+    assert calls[1][1] - calls[0][1] >= 0.3  # навіть інший метод чекав паузу
@@ -0,0 +1,62 @@
+import asyncio
+import pytest
+from integrations.google_sheets.client import AsyncSheetsClient, quote_sheet_name
+
+
+def test_quote_sheet_name():
+    assert quote_sheet_name("MuseumDates") == "MuseumDates"
+    assert quote_sheet_name("Скарги") == "'Скарги'"
+    assert quote_sheet_name("Holiday excursion list") == "'Holiday excursion list'"
+
+
+@pytest.mark.asyncio
+async def test_concurrent_reads_are_coalesced():
+    client = AsyncSheetsClient("test-sheet")
+    calls = []
+
+    async def fake_request(method, path, params=None, json_body=None):
+        calls.append(path)
+        await asyncio.sleep(0.01)
+        return {"valueRanges": [{"values": [["01.01.2030 10:00"]]}, {}]}
+
+    client._request = fake_request
+    ranges = ["MuseumDates!A2:A50", "MuseumDates!B2:B50"]
+    results = await asyncio.gather(*(client.batch_get(ranges) for _ in range(5)))
+
+    assert len(calls) == 1
+    assert all(r == [[["01.01.2030 10:00"]], []] for r in results)
+
+
+@pytest.mark.asyncio
+async def test_append_is_not_retried_after_server_error(monkeypatch):
+    from aiohttp import web
+    import integrations.google_sheets.client as client_module
+
+    requests = []
+
+    async def handle(request):
+        requests.append(request.path)
+        return web.Response(status=503, text="backend error")
+
+    app = web.Application()
+    app.router.add_route("*", "/{tail:.*}", handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    monkeypatch.setattr(client_module, "SHEETS_API_URL", f"http://127.0.0.1:{port}")
+
+    client = AsyncSheetsClient("test-sheet")
+
+    async def fake_token():
+        return "token"
+
+    client._get_token = fake_token
+    try:
+        # 503 після append міг уже дописати рядки — повтор лише через outbox
+        assert await client.append_rows("Скарги", [["a", "b"]]) is False
+        assert len(requests) == 1
+    finally:
+        await client.close()
+        await runner.cleanup()
@@ -0,0 +1,120 @@
+import datetime
+import json
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from services.tickets_service import TicketsService
+from services.sheets_outbox import sheets_outbox, feedback_sheet_row
+from database.db import Base, Feedback, SheetOutbox
+
+
+class FakeSheets:
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.appends = []
+        self.rows = {}
+
+    async def append_rows(self, sheet_name, values):
+        if self.fail:
+            return False
+        self.appends.append((sheet_name, len(values)))
+        self.rows.setdefault(sheet_name, []).extend(values)
+        return True
+
+    async def batch_get(self, ranges):
+        return [self.rows.get(r.split("!")[0].strip("'"), []) for r in ranges]
+
+
+async def use_temp_db(monkeypatch, tmp_path, fake=None):
+    """Окрема SQLite-база для outbox, щоб тести не чіпали черги робочої БД."""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'outbox.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    monkeypatch.setattr(sheets_outbox, "session_factory", session_factory)
+    monkeypatch.setattr(sheets_outbox, "_sheets", fake)
+    return engine, session_factory
+
+
+@pytest.mark.asyncio
+async def test_outbox_batches_and_marks_synced(monkeypatch, tmp_path):
+    fake = FakeSheets()
+    engine, session_factory = await use_temp_db(monkeypatch, tmp_path, fake)
+    service = TicketsService(session_factory)
+
+    for i in range(3):
+        result = await service.create_complaint_ticket(77777, {"problem": f"Скарга {i}", "route": "5"})
+        assert result["success"] is True
+    await service.create_suggestion_ticket(77777, {"text": "Пропозиція"})
+
+    sent = await sheets_outbox.drain()
+    assert sent == 4
+    # Один append на вкладку, а не на кожен запис
+    assert sorted(fake.appends) == [("Пропозиції", 1), ("Скарги", 3)]
+
+    async with session_factory() as session:
+        statuses = (await session.execute(
+            select(Feedback.status).where(Feedback.user_id == 77777)
+        )).scalars().all()
+        assert set(statuses) == {"synced"}
+
+    # Повторний drain нічого не дублює
+    assert await sheets_outbox.drain() == 0
+    assert len(fake.rows["Скарги"]) == 3
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_outbox_in_doubt_row_is_not_appended_twice(monkeypatch, tmp_path):
+    fake = FakeSheets(fail=True)
+    engine, session_factory = await use_temp_db(monkeypatch, tmp_path, fake)
+    await TicketsService(session_factory).create_complaint_ticket(77777, {"problem": "Таймаут"})
+
+    assert await sheets_outbox.drain() == 0
+    async with session_factory() as session:
+        entry = (await session.execute(select(SheetOutbox))).scalars().one()
+        assert entry.status == "pending"
+        assert entry.attempts == 1
+        assert entry.next_attempt_at is not None
+        # Імітуємо: append насправді дійшов до таблиці, і настав час повтору
+        fake.rows["Скарги"] = [json.loads(entry.payload)]
+        entry.next_attempt_at = None
+        await session.commit()
+
+    fake.fail = False
+    assert await sheets_outbox.drain() == 1
+    assert fake.appends == []
+    assert len(fake.rows["Скарги"]) == 1
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_prune_removes_only_old_sent_rows(monkeypatch, tmp_path):
+    engine, session_factory = await use_temp_db(monkeypatch, tmp_path)
+    now = datetime.datetime.utcnow()
+    async with session_factory() as session:
+        session.add_all([
+            SheetOutbox(target_sheet="Скарги", idempotency_key="old-sent", payload="[]", status="sent",
+                        sent_at=now - datetime.timedelta(days=30)),
+            SheetOutbox(target_sheet="Скарги", idempotency_key="fresh-sent", payload="[]", status="sent",
+                        sent_at=now - datetime.timedelta(hours=1)),
+            SheetOutbox(target_sheet="Скарги", idempotency_key="old-pending", payload="[]", status="pending",
+                        created_at=now - datetime.timedelta(days=30)),
+        ])
+        await session.commit()
+
+    assert await sheets_outbox.prune_sent(retention_days=7) == 1
+    async with session_factory() as session:
+        keys = (await session.execute(select(SheetOutbox.idempotency_key))).scalars().all()
+    assert sorted(keys) == ["fresh-sent", "old-pending"]
+    await engine.dispose()
+
+
+def test_feedback_sheet_row_complaint_route():
+    item = Feedback(ticket_id="CMP-1", category="complaint", route="10", transport_type="tram",
+                    user_phone="0951234567", created_at=None)
+    row = feedback_sheet_row(item)
+    assert row[1] == "CMP-1"
+    assert row[4] == "Трамвай № 10"
+    assert row[8].startswith("'0951234567")
@@ -0,0 +1,79 @@
+import asyncio
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from bot.startup import StartupError, StartupOrchestrator
+from database.db import Base
+from database.snapshots import load_snapshot, save_snapshot
+from handlers import accessible_transport_handlers
+
+
+@pytest.mark.asyncio
+async def test_orchestrator_runs_independent_steps_concurrently():
+    events = []
+    refresh_done = asyncio.Event()
+
+    def step(name, delay):
+        async def run():
+            events.append(f"{name}:start")
+            await asyncio.sleep(delay)
+            events.append(f"{name}:end")
+        return run
+
+    async def slow_refresh():
+        await asyncio.sleep(0.3)
+        refresh_done.set()
+
+    startup = StartupOrchestrator()
+    startup.add("db", step("db", 0.05), critical=True)
+    startup.add("telegram", step("telegram", 0.1), requires=("db",), critical=True)
+    startup.add("snapshot", step("snapshot", 0.1), requires=("db",))
+    startup.add("refresh", slow_refresh, requires=("snapshot",), background=True)
+
+    ready = await startup.run()
+
+    # telegram і snapshot стартують одночасно після db; фоновий refresh старт не тримає
+    assert events[:3] == ["db:start", "db:end", "telegram:start"] and events[3] == "snapshot:start"
+    assert ready < 0.25 and not refresh_done.is_set()
+    await asyncio.wait_for(refresh_done.wait(), 1)
+
+    failing = StartupOrchestrator()
+
+    async def broken():
+        raise OSError("connection refused")
+
+    failing.add("db", broken, critical=True)
+    failing.add("telegram", step("telegram2", 0), requires=("db",), critical=True)
+    with pytest.raises(StartupError):
+        await failing.run()
+    assert "telegram2:start" not in events
+
+
+@pytest.mark.asyncio
+async def test_routes_snapshot_survives_easyway_outage(monkeypatch, tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'snap.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    route_map = {"tram": [{"id": 1, "name": "5"}], "trolley": [{"id": 2, "name": "10"}]}
+    assert await load_snapshot("easyway_routes", session_factory) is None
+    await save_snapshot("easyway_routes", route_map, session_factory)
+    await save_snapshot("easyway_routes", route_map, session_factory)  # перезапис, не дубль
+    restored, saved_at = await load_snapshot("easyway_routes", session_factory)
+    assert restored == route_map
+
+    async def easyway_down():
+        return {"error": "timeout"}
+
+    monkeypatch.setattr(accessible_transport_handlers.easyway_service, "get_routes_list", easyway_down)
+
+    class FakeApp:
+        bot_data = {"easyway_structured_map": restored}
+
+    assert await accessible_transport_handlers.load_easyway_route_ids(FakeApp) is False
+    assert FakeApp.bot_data["easyway_structured_map"] == route_map  # знімок не затерто порожньою мапою
+
+    await engine.dispose()
@@ -0,0 +1,72 @@
+import pytest
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from services.stats_service import StatsService, stats_service
+from services.tickets_service import TicketsService
+from services.user_service import UserService
+from database.db import Base, BotUser
+
+
+async def make_session_factory(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'stats.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    return engine, sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+
+@pytest.mark.asyncio
+async def test_counters_match_recount(tmp_path):
+    engine, session_factory = await make_session_factory(tmp_path)
+    stats = StatsService(session_factory)
+    await stats.recount()
+    before = stats.snapshot()
+
+    # Скарга і її рядок outbox лишаються в тимчасовій базі — у робочу таблицю нічого не піде
+    await TicketsService(session_factory).create_complaint_ticket(55555, {"problem": "Лічильник"})
+    stats.on_feedback_created("complaint")
+    incremental = stats.snapshot()
+
+    await stats.recount()
+    recounted = stats.snapshot()
+
+    assert incremental["feedback_total"] == before["feedback_total"] + 1
+    assert incremental["feedback_total"] == recounted["feedback_total"]
+    assert incremental["feedback_new"] == recounted["feedback_new"]
+    assert incremental["by_category"] == recounted["by_category"]
+    assert recounted["trends"]["last_24h"]["feedback"] >= 1
+    await engine.dispose()
+
+
+def test_sync_moves_new_to_synced():
+    stats = StatsService()
+    stats.on_feedback_created("thanks")
+    stats.on_feedback_created("thanks")
+    stats.on_feedback_synced(1)
+    snap = stats.snapshot()
+    assert snap["feedback_new"] == 1
+    assert snap["feedback_synced"] == 1
+    assert snap["by_category"] == {"thanks": 2}
+
+
+@pytest.mark.asyncio
+async def test_subscription_updates_legacy_null_rows(monkeypatch, tmp_path):
+    engine, session_factory = await make_session_factory(tmp_path)
+    async with session_factory() as session:
+        session.add(BotUser(telegram_id=55556, first_name="Legacy"))
+        await session.flush()
+        # Старі записи без значення (default ORM тут не спрацює)
+        await session.execute(update(BotUser).where(BotUser.telegram_id == 55556).values(is_subscribed=None))
+        await session.commit()
+
+    monkeypatch.setattr(stats_service, "users_subscribed", 0)
+    service = UserService(session_factory)
+    await service.set_subscription(55556, True)
+    await service.set_subscription(55556, True)  # повторна підписка лічильник не змінює
+
+    async with session_factory() as session:
+        subscribed = await session.scalar(select(BotUser.is_subscribed).where(BotUser.telegram_id == 55556))
+
+    assert subscribed is True
+    assert stats_service.users_subscribed == 1
+    await engine.dispose()
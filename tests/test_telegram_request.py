@@ -0,0 +1,43 @@
+import asyncio
+
+import pytest
+from aiohttp import web
+from telegram.error import TimedOut
+from telegram.request import RequestData
+
+from bot.telegram_request import POOL_TIMEOUTS, POOL_WAIT, InstrumentedHTTPXRequest
+
+
+@pytest.mark.asyncio
+async def test_pool_wait_and_pool_timeouts_are_measured():
+    async def slow(request):
+        await asyncio.sleep(0.2)
+        return web.json_response({"ok": True, "result": True})
+
+    app = web.Application()
+    app.router.add_post("/bot{token}/{method}", slow)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    url = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}/bot1:x/getMe"
+
+    request = InstrumentedHTTPXRequest("test", connection_pool_size=1, pool_timeout=2, read_timeout=2)
+    hasty = InstrumentedHTTPXRequest("test", connection_pool_size=1, pool_timeout=0.05, read_timeout=2)
+    await request.initialize()
+    await hasty.initialize()
+    try:
+        # Два запити на одне з'єднання: другий чекає ~0.2с у пулі
+        await asyncio.gather(request.post(url, RequestData()), request.post(url, RequestData()))
+        buckets, total, count = POOL_WAIT._series[("test",)]
+        assert count == 2 and total >= 0.15
+
+        # Другий не дочекається з'єднання — PoolTimeout, запит не відправлено
+        results = await asyncio.gather(hasty.post(url, RequestData()), hasty.post(url, RequestData()),
+                                       return_exceptions=True)
+        assert results[0] is True and isinstance(results[1], TimedOut)
+        assert POOL_TIMEOUTS.value(pool="test") == 1
+    finally:
+        await request.shutdown()
+        await hasty.shutdown()
+        await runner.cleanup()
@@ -0,0 +1,58 @@
+import aiohttp
+import pytest
+
+from benchmarks.replay import build_easyway, load_profile, load_recording
+from services.traffic_recorder import TrafficRecorder
+
+
+def _message_update(user_id: int, text: str) -> dict:
+    user = {"id": user_id, "is_bot": False, "first_name": "Олена", "username": "olena", "language_code": "uk"}
+    return {
+        "update_id": 1,
+        "message": {"message_id": 10, "date": 0, "chat": {"id": user_id, "type": "private", "first_name": "Олена"},
+                    "from": user, "text": text},
+    }
+
+
+def test_anonymize_hides_identity_but_keeps_users_apart():
+    recorder = TrafficRecorder(salt="test")
+
+    first = recorder.anonymize(_message_update(384349401, "Мій номер +380 67 123 45 67, пишіть a.b@mail.com"))
+    again = recorder.anonymize(_message_update(384349401, "/start"))
+    other = recorder.anonymize(_message_update(830196453, "/start"))
+
+    message = first["message"]
+    assert message["from"]["id"] != 384349401
+    assert message["from"]["id"] == message["chat"]["id"] == again["message"]["from"]["id"]
+    assert message["from"]["id"] != other["message"]["from"]["id"]
+    assert message["from"]["first_name"] == "User" and "username" not in message["from"]
+    assert message["text"] == "Мій номер <phone>, пишіть <email>"
+    assert again["message"]["text"] == "/start"
+
+
+@pytest.mark.asyncio
+async def test_recording_round_trip_and_replayed_upstream(tmp_path):
+    path = tmp_path / "traffic.jsonl"
+    recorder = TrafficRecorder(salt="test")
+    recorder.start(path)
+    for user_id in (1, 2, 3):
+        recorder.record_update(_message_update(user_id, "/start"))
+    recorder.record_upstream("easyway", {"function": "stops.GetStopInfo", "id": 77, "login": "l", "password": "p"},
+                             200, 0.005, {"id": 77, "title": "Записана"})
+    recorder.stop()
+
+    assert "password" not in path.read_text()
+    recording = load_recording(path)
+    assert len(recording["updates"]) == 3 and recording["meta"]["version"] == 1
+    assert load_profile(recording["updates"], speed=0)["peak_ups"] >= 1
+
+    easyway = build_easyway(recording, latency_ms=1, jitter_ms=0)
+    url = await easyway.start()
+    try:
+        async with aiohttp.ClientSession() as session:
+            async with session.get(f"{url}/?function=stops.GetStopInfo&id=77") as response:
+                assert (await response.json())["title"] == "Записана"
+            async with session.get(f"{url}/?function=stops.GetStopInfo&id=1501") as response:
+                assert (await response.json())["title"] == "Привоз"
+    finally:
+        await easyway.stop()
@@ -0,0 +1,82 @@
+import asyncio
+import datetime
+import pytest
+from aiohttp.test_utils import TestClient, TestServer
+from telegram import Update, User, Chat, Message
+import bot.web_server as web_server
+from bot.update_processor import UpdateProcessor
+
+
+class FakeApplication:
+    def __init__(self, delays):
+        self.delays = delays
+        self.processed = []
+        self.active = 0
+        self.max_active = 0
+        self.running = True
+        self.bot = None
+
+    async def process_update(self, update):
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        await asyncio.sleep(self.delays.get(update.update_id, 0))
+        self.processed.append(update.update_id)
+        self.active -= 1
+
+
+def make_update(update_id, user_id):
+    user = User(id=user_id, first_name="Test", is_bot=False)
+    chat = Chat(id=user_id, type="private")
+    message = Message(message_id=update_id, date=datetime.datetime.now(datetime.timezone.utc), chat=chat, from_user=user, text="hi")
+    return Update(update_id=update_id, message=message)
+
+
+@pytest.mark.asyncio
+async def test_per_user_order_and_cross_user_concurrency():
+    # Перший апдейт юзера 1 повільний: його другий апдейт чекає, а юзер 2 — ні
+    app = FakeApplication({1: 0.05})
+    processor = UpdateProcessor(app, max_concurrency=4)
+
+    processor.submit(make_update(1, user_id=1))
+    processor.submit(make_update(2, user_id=1))
+    processor.submit(make_update(3, user_id=2))
+    await processor.join()
+
+    assert app.processed.index(1) < app.processed.index(2)
+    assert app.processed.index(3) < app.processed.index(1)
+    assert processor.pending == 0
+    assert processor._user_locks == {}
+
+
+@pytest.mark.asyncio
+async def test_concurrency_is_bounded():
+    app = FakeApplication({i: 0.01 for i in range(20)})
+    processor = UpdateProcessor(app, max_concurrency=3)
+    for i in range(20):
+        processor.submit(make_update(i, user_id=100 + i))
+    await processor.join()
+    assert len(app.processed) == 20
+    assert app.max_active == 3
+
+
+@pytest.mark.asyncio
+async def test_webhook_rejects_wrong_secret(monkeypatch):
+    monkeypatch.setattr(web_server, "WEBHOOK_SECRET_TOKEN", "s3cret")
+    app = FakeApplication({})
+    processor = UpdateProcessor(app)
+    client = TestClient(TestServer(web_server.create_web_app(app, processor, mode="webhook")))
+    await client.start_server()
+    try:
+        payload = make_update(7, user_id=7).to_dict()
+        resp = await client.post("/webhook", json=payload, headers={web_server.SECRET_HEADER: "wrong"})
+        assert resp.status == 403
+
+        resp = await client.post("/webhook", json=payload, headers={web_server.SECRET_HEADER: "s3cret"})
+        assert resp.status == 200
+        await processor.join()
+        assert app.processed == [7]
+
+        resp = await client.get("/healthz")
+        assert (await resp.json())["status"] == "ok"
+    finally:
+        await client.close()
@@ -0,0 +1,92 @@
+import datetime
+import time
+
+import pytest
+from telegram import CallbackQuery, Chat, Message, Update, User
+from telegram.ext import Application, ConversationHandler, MessageHandler, filters
+
+from services.easyway_service import EasyWayService
+from services.user_state import UserStateJanitor
+
+
+def make_message_update(update_id, user_id, text):
+    user = User(id=user_id, first_name="Test", is_bot=False)
+    chat = Chat(id=user_id, type="private")
+    message = Message(message_id=update_id, date=datetime.datetime.now(datetime.timezone.utc),
+                      chat=chat, from_user=user, text=text)
+    return Update(update_id=update_id, message=message)
+
+
+@pytest.mark.asyncio
+async def test_janitor_evicts_idle_users_and_enforces_size_cap(monkeypatch):
+    async def fake_get_me(self, *args, **kwargs):
+        return User(id=123, first_name="Bot", is_bot=True, username="test_bot")
+
+    async def start_dialog(update, context):
+        context.user_data["draft"] = update.message.text
+        context.user_data["search_results"] = list(range(5000))
+        return 1
+
+    async def finish(update, context):
+        return ConversationHandler.END
+
+    app = Application.builder().token("123:TEST").updater(None).build()
+    monkeypatch.setattr(type(app.bot), "get_me", fake_get_me)
+    await app.initialize()
+    conv = ConversationHandler(entry_points=[MessageHandler(filters.Regex("^dialog"), start_dialog)],
+                               states={1: [MessageHandler(filters.TEXT, finish)]}, fallbacks=[])
+    app.add_handler(conv)
+    janitor = UserStateJanitor(ttl_sec=60, max_bytes=16 * 1024, interval_sec=1)
+    janitor.setup(app)
+
+    await app.process_update(make_message_update(1, 1, "dialog"))
+    await app.process_update(make_message_update(2, 2, "dialog " + "x" * 20_000))
+    await app.process_update(make_message_update(3, 3, "dialog"))
+    janitor._last_seen[3] -= 120  # користувач 3 покинув діалог дві хвилини тому
+
+    evicted = await janitor.sweep()
+
+    assert evicted == {"idle": 1, "size": 1, "trimmed": 1}
+    # 1: великий кеш пошуку скинуто, чернетка і розмова лишились
+    assert "search_results" not in app.user_data[1] and app.user_data[1]["draft"] == "dialog"
+    assert (1, 1) in conv._conversations
+    # 2: навіть без кешу стан більший за ліміт — скинуто все; 3: неактивний довше за TTL
+    assert 2 not in app.user_data and 3 not in app.user_data
+    assert (2, 2) not in conv._conversations and (3, 3) not in conv._conversations
+
+    await app.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_activity_is_tracked_in_assembled_bot(monkeypatch):
+    """Облік активності в зібраному боті: інші TypeHandler (flood_guard) не забирають його групу."""
+    from bot import bot as bot_module
+    from services.user_state import user_state_janitor
+
+    async def fake_get_me(self, *args, **kwargs):
+        return User(id=123, first_name="Bot", is_bot=True, username="test_bot")
+
+    # Без persistence: initialize() не повинен залежати від схеми робочої БД
+    monkeypatch.setattr(bot_module, "PERSISTENCE_ENABLED", False)
+    bot = bot_module.TransportBot("123:TEST")
+    monkeypatch.setattr(type(bot.app.bot), "get_me", fake_get_me)
+    monkeypatch.setattr(user_state_janitor, "_last_seen", {})
+    monkeypatch.setattr(user_state_janitor, "_dirty", set())
+    await bot.app.initialize()
+    try:
+        user = User(id=777, first_name="Test", is_bot=False)
+        message = Message(message_id=1, date=datetime.datetime.now(datetime.timezone.utc),
+                          chat=Chat(id=777, type="private"))
+        query = CallbackQuery(id="1", from_user=user, chat_instance="test", data="__unknown__", message=message)
+        await bot.app.process_update(Update(update_id=1, callback_query=query))
+    finally:
+        await bot.app.shutdown()
+
+    assert 777 in user_state_janitor._last_seen and 777 in user_state_janitor._dirty
+
+
+def test_search_results_rehydrate_from_stop_index():
+    service = EasyWayService()
+    service.stop_index = {1501: {"id": 1501, "title": "Привоз"}, 1502: {"id": 1502, "title": "Новий ринок"}}
+
+    assert [s["title"] for s in service.get_indexed_stops([1502, 999, 1501])] == ["Новий ринок", "Привоз"]
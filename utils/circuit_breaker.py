@@ -0,0 +1,120 @@
+# utils/circuit_breaker.py
+"""Circuit breaker з адаптивним таймаутом і бюджет повторів для викликів зовнішніх API."""
+import random
+import time
+from collections import deque
+
+from utils.logger import logger
+from utils.metrics import REGISTRY
+
+CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+BREAKER_STATE = REGISTRY.gauge(
+    "bot_circuit_breaker_state", "Стан circuit breaker: 0 closed, 1 half-open, 2 open", ("breaker",)
+)
+BREAKER_REJECTED = REGISTRY.counter(
+    "bot_circuit_breaker_rejected_total", "Запити, відхилені відкритим circuit breaker", ("breaker",)
+)
+BREAKER_TIMEOUT = REGISTRY.gauge(
+    "bot_circuit_breaker_timeout_seconds", "Поточний адаптивний таймаут запиту", ("breaker",)
+)
+RETRIES = REGISTRY.counter(
+    "bot_upstream_retries_total", "Повтори запитів до зовнішніх сервісів", ("breaker", "result")
+)
+
+
+class CircuitBreaker:
+    def __init__(self, name: str, failure_threshold: int, reset_sec: float,
+                 min_timeout: float, max_timeout: float, multiplier: float = 3.0,
+                 window: int = 200, min_samples: int = 20):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_sec = reset_sec
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.multiplier = multiplier
+        self.min_samples = min_samples
+        self._latencies = deque(maxlen=window)
+        self._timeout = max_timeout
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe = False  # пробний запит half-open уже в дорозі
+        self.state = CLOSED
+        BREAKER_STATE.set(0, breaker=name)
+        BREAKER_TIMEOUT.set(max_timeout, breaker=name)
+
+    def _set_state(self, state: str):
+        if state == OPEN:
+            logger.warning(f"⚡ Circuit breaker '{self.name}' open: failing fast for {self.reset_sec:g}s")
+        elif self.state == OPEN or state == CLOSED:
+            logger.info(f"⚡ Circuit breaker '{self.name}': {self.state} -> {state}")
+        self.state = state
+        BREAKER_STATE.set(_STATE_VALUES[state], breaker=self.name)
+
+    def allow(self) -> bool:
+        """Чи можна зараз іти в upstream. False — відповісти одразу (кеш/застарілі дані/помилка)."""
+        if self.state == OPEN:
+            if time.monotonic() - self._opened_at < self.reset_sec:
+                BREAKER_REJECTED.inc(breaker=self.name)
+                return False
+            self._set_state(HALF_OPEN)
+        if self.state == HALF_OPEN:
+            if self._probe:
+                BREAKER_REJECTED.inc(breaker=self.name)
+                return False
+            self._probe = True
+        return True
+
+    def timeout(self) -> float:
+        return self._timeout
+
+    def record_success(self, latency: float):
+        self._probe = False
+        self._failures = 0
+        if self.state != CLOSED:
+            self._set_state(CLOSED)
+        self._latencies.append(latency)
+        if len(self._latencies) >= self.min_samples:
+            ordered = sorted(self._latencies)
+            p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+            self._timeout = min(self.max_timeout, max(self.min_timeout, p99 * self.multiplier))
+            BREAKER_TIMEOUT.set(self._timeout, breaker=self.name)
+
+    def release(self):
+        """Запит скасовано викликачем (таймаут обробника, зупинка): не невдача upstream, лише звільняє пробу."""
+        self._probe = False
+
+    def record_failure(self):
+        self._probe = False
+        self._failures += 1
+        if self.state == HALF_OPEN or self._failures >= self.failure_threshold:
+            if self.state != OPEN:
+                self._set_state(OPEN)
+            self._opened_at = time.monotonic()
+
+
+class RetryBudget:
+    """Кожен запит додає ratio токена (не більше cap), кожен повтор забирає один."""
+
+    def __init__(self, name: str, ratio: float, cap: float = 10.0):
+        self.name = name
+        self.ratio = ratio
+        self.cap = cap
+        self._tokens = cap
+
+    def record_request(self):
+        self._tokens = min(self.cap, self._tokens + self.ratio)
+
+    def try_retry(self) -> bool:
+        if self._tokens >= 1:
+            self._tokens -= 1
+            RETRIES.inc(breaker=self.name, result="attempted")
+            return True
+        RETRIES.inc(breaker=self.name, result="budget_exhausted")
+        return False
+
+
+def backoff(attempt: int, base: float, cap: float) -> float:
+    """Експоненційна пауза з повним джитером: U(0, min(cap, base * 2^attempt))."""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
@@ -0,0 +1,117 @@
+# utils/import_profiler.py
+"""
+Профіль імпортів при старті (як `python -X importtime`, але в лог).
+Лише стандартна бібліотека — модуль має імпортуватися раніше за все інше.
+"""
+import sys
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+
+PROJECT_ROOT = str(Path(__file__).resolve().parent.parent)
+
+
+class _TimingLoader:
+    """Обгортка над справжнім loader: міряє exec_module, решту делегує."""
+
+    def __init__(self, loader, profiler: "ImportProfiler"):
+        self._loader = loader
+        self._profiler = profiler
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        self._profiler._measure(module, self._loader)
+
+    def __getattr__(self, name):
+        return getattr(self._loader, name)
+
+
+class _TimingFinder:
+    def __init__(self, profiler: "ImportProfiler"):
+        self._profiler = profiler
+
+    def find_spec(self, fullname, path=None, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                break
+        else:
+            return None
+        if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+            spec.loader = _TimingLoader(spec.loader, self._profiler)
+        return spec
+
+
+class ImportProfiler:
+    def __init__(self):
+        self.records = {}  # {модуль: (з вкладеними імпортами, власний час, файл проєкту?)}
+        self._local = threading.local()
+        self._finder = None
+        self._started = 0.0
+        self.duration = 0.0
+
+    @property
+    def installed(self) -> bool:
+        return self._finder is not None
+
+    def install(self):
+        if self.installed:
+            return
+        self._started = time.perf_counter()
+        self._finder = _TimingFinder(self)
+        sys.meta_path.insert(0, self._finder)
+
+    def uninstall(self):
+        if not self.installed:
+            return
+        sys.meta_path.remove(self._finder)
+        self._finder = None
+        self.duration = time.perf_counter() - self._started
+
+    def _measure(self, module, loader):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        stack.append(0.0)  # час вкладених імпортів
+        started = time.perf_counter()
+        try:
+            loader.exec_module(module)
+        finally:
+            elapsed = time.perf_counter() - started
+            children = stack.pop()
+            if stack:
+                stack[-1] += elapsed
+            filename = getattr(module, "__file__", None) or ""
+            self.records[module.__name__] = (elapsed, elapsed - children, filename.startswith(PROJECT_ROOT))
+
+    def report(self, limit: int = 15) -> str:
+        packages = defaultdict(lambda: [0.0, 0])
+        for name, (_, own, _) in self.records.items():
+            package = packages[name.split(".")[0]]
+            package[0] += own
+            package[1] += 1
+        total = sum(own for _, own, _ in self.records.values())
+
+        lines = [f"Import profile: {len(self.records)} modules, {total:.3f}s in module code"
+                 + (f" ({self.duration:.3f}s until startup was ready)" if self.duration else ""),
+                 "== By top-level package (own time) =="]
+        for name, (own, count) in sorted(packages.items(), key=lambda item: -item[1][0])[:limit]:
+            lines.append(f"{own:8.3f}s  {name} ({count} modules)")
+
+        lines.append("== Slowest modules (own time) ==")
+        for name, (_, own, _) in sorted(self.records.items(), key=lambda item: -item[1][1])[:limit]:
+            lines.append(f"{own:8.3f}s  {name}")
+
+        lines.append("== Project modules (including what they import) ==")
+        project = [(name, record) for name, record in self.records.items() if record[2]]
+        for name, (inclusive, _, _) in sorted(project, key=lambda item: -item[1][0])[:limit]:
+            lines.append(f"{inclusive:8.3f}s  {name}")
+        return "\n".join(lines)
+
+
+import_profiler = ImportProfiler()
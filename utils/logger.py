@@ -1,11 +1,75 @@
+import atexit
+import json
 import logging
 import logging.handlers
+import queue
+import time
 from pathlib import Path
-from config.settings import LOG_FILE, LOG_LEVEL
+from config.settings import (
+    LOG_FILE, LOG_LEVEL, LOG_FORMAT, LOG_SAMPLE_WINDOW_SEC, LOG_SAMPLE_MAX_PER_WINDOW
+)
 
 # Створення папки логів
 LOG_FILE.parent.mkdir(exist_ok=True)
 
+
+class SamplingFilter(logging.Filter):
+    """
+    Обмежує "гучні" логи гарячих шляхів: не більше max_per_window записів DEBUG/INFO з одним ключем за вікно.
+    Семплінг вмикається явно — extra={"log_key": "..."} у місці виклику; звичайні INFO (адмінські дії,
+    розсилки, старт, persistence) проходять завжди. WARNING і вище не відкидаються ніколи.
+    Перший запис нового вікна отримує приписку, скільки подібних було пропущено.
+    """
+
+    def __init__(self, window_sec: float = LOG_SAMPLE_WINDOW_SEC, max_per_window: int = LOG_SAMPLE_MAX_PER_WINDOW):
+        super().__init__()
+        self.window_sec = window_sec
+        self.max_per_window = max_per_window
+        self._windows = {}  # {ключ: [початок вікна, записано, пропущено]}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        key = getattr(record, "log_key", None)
+        if key is None or record.levelno >= logging.WARNING or self.max_per_window <= 0:
+            return True
+
+        now = time.monotonic()
+        window = self._windows.get(key)
+        if window is None or now - window[0] >= self.window_sec:
+            suppressed = window[2] if window else 0
+            self._windows[key] = [now, 1, 0]
+            if suppressed:
+                record.msg = f"{record.getMessage()} (+{suppressed} similar suppressed)"
+                record.args = None
+            if len(self._windows) > 10000:
+                self._windows.clear()
+            return True
+
+        if window[1] < self.max_per_window:
+            window[1] += 1
+            return True
+        window[2] += 1
+        return False
+
+
+class JsonFormatter(logging.Formatter):
+    """Один JSON-об'єкт на рядок (для збору логів у Loki/ELK)."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": self.formatTime(record, "%Y-%m-%dT%H:%M:%S"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "module": record.module,
+            "line": record.lineno,
+        }
+        if getattr(record, "log_key", None):
+            payload["key"] = record.log_key
+        if record.exc_info:
+            payload["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(payload, ensure_ascii=False)
+
+
 # Налаштування logger
 logger = logging.getLogger("transport_bot")
 logger.setLevel(getattr(logging, LOG_LEVEL))
@@ -19,7 +83,6 @@ file_handler = logging.handlers.RotatingFileHandler(
 file_formatter = logging.Formatter(
     '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
-file_handler.setFormatter(file_formatter)
 
 # Console handler
 console_handler = logging.StreamHandler()
@@ -27,7 +90,21 @@ console_formatter = logging.Formatter(
     '%(asctime)s - %(levelname)s - %(message)s',
     datefmt='%Y-%m-%d %H:%M:%S'
 )
+
+if LOG_FORMAT == "json":
+    file_formatter = console_formatter = JsonFormatter()
+file_handler.setFormatter(file_formatter)
 console_handler.setFormatter(console_formatter)
 
-logger.addHandler(file_handler)
-logger.addHandler(console_handler)
\ No newline at end of file
+# Запис у файл/консоль — у фоновому потоці; у event loop лишається тільки put() у чергу
+log_queue = queue.SimpleQueue()
+queue_handler = logging.handlers.QueueHandler(log_queue)
+queue_handler.addFilter(SamplingFilter())
+
+log_listener = logging.handlers.QueueListener(
+    log_queue, file_handler, console_handler, respect_handler_level=True
+)
+log_listener.start()
+atexit.register(log_listener.stop)
+
+logger.addHandler(queue_handler)
@@ -0,0 +1,243 @@
+# utils/metrics.py
+"""Мінімальний реєстр метрик у стилі Prometheus (без зовнішніх залежностей)."""
+import bisect
+import contextvars
+import math
+import time
+from contextlib import contextmanager
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labelnames: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(labelnames, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(labels.get(n, "") for n in self.labelnames)
+
+    def render(self) -> list:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def items(self):
+        return self._values.items()
+
+    def render(self) -> list:
+        lines = super().render()
+        for key, value in self._values.items():
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values = {}
+        self._function = None
+
+    def set(self, value: float, **labels):
+        self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def set_function(self, function):
+        """Значення рахується під час scrape: function() -> число або {tuple(labels): число}."""
+        self._function = function
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def _collect(self) -> dict:
+        if self._function is None:
+            return self._values
+        try:
+            result = self._function()
+        except Exception:
+            return self._values
+        if isinstance(result, dict):
+            return result
+        return {(): result}
+
+    def render(self) -> list:
+        lines = super().render()
+        for key, value in self._collect().items():
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}  # {labels: [лічильники по бакетах (+Inf останній), sum, count]}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect.bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start_ts = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start_ts, **labels)
+
+    def series(self):
+        """[(labels_dict, count, sum)] — для адмін-звітів."""
+        return [
+            (dict(zip(self.labelnames, key)), s[2], s[1])
+            for key, s in self._series.items()
+        ]
+
+    def quantile(self, q: float, **labels) -> float:
+        """Оцінка квантиля за бакетами (лінійна інтерполяція, як histogram_quantile)."""
+        series = self._series.get(self._key(labels))
+        if not series or not series[2]:
+            return 0.0
+        rank = q * series[2]
+        cumulative = 0
+        lower = 0.0
+        for i, count in enumerate(series[0]):
+            upper = self.buckets[i] if i < len(self.buckets) else (self.buckets[-1] if self.buckets else 0.0)
+            if cumulative + count >= rank and count:
+                if i >= len(self.buckets):
+                    return upper
+                return lower + (upper - lower) * (rank - cumulative) / count
+            cumulative += count
+            lower = upper
+        return lower
+
+    def render(self) -> list:
+        lines = super().render()
+        for key, (counts, total, count) in self._series.items():
+            cumulative = 0
+            for i, bucket_count in enumerate(counts):
+                cumulative += bucket_count
+                le = _format_value(self.buckets[i]) if i < len(self.buckets) else "+Inf"
+                labels = _format_labels(self.labelnames, key, 'le="' + le + '"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = {}
+
+    def _get_or_create(self, cls, name, documentation, labelnames, **kwargs):
+        metric = self._metrics.get(name)
+        if metric is None:
+            metric = self._metrics[name] = cls(name, documentation, labelnames, **kwargs)
+        return metric
+
+    def counter(self, name, documentation, labelnames=()) -> Counter:
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def gauge(self, name, documentation, labelnames=()) -> Gauge:
+        return self._get_or_create(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def get(self, name):
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+
+# ================= ЧАС У ЗОВНІШНІХ СЕРВІСАХ =================
+# Кожен хендлер отримує свій "акумулятор" у contextvar; задачі, створені всередині
+# (asyncio.gather тощо), успадковують його, тож час EasyWay/Sheets сумується на хендлер.
+
+_upstream_acc = contextvars.ContextVar("upstream_acc", default=None)
+
+UPSTREAM_DURATION = REGISTRY.histogram(
+    "bot_upstream_request_duration_seconds",
+    "Тривалість запитів до зовнішніх сервісів",
+    ("upstream", "operation"),
+)
+UPSTREAM_ERRORS = REGISTRY.counter(
+    "bot_upstream_errors_total",
+    "Помилки запитів до зовнішніх сервісів",
+    ("upstream", "operation"),
+)
+
+
+def start_upstream_accumulator() -> tuple:
+    acc = [0.0]
+    token = _upstream_acc.set(acc)
+    return acc, token
+
+
+def reset_upstream_accumulator(token):
+    _upstream_acc.reset(token)
+
+
+def record_upstream(upstream: str, operation: str, seconds: float, error: bool = False):
+    UPSTREAM_DURATION.observe(seconds, upstream=upstream, operation=operation)
+    if error:
+        UPSTREAM_ERRORS.inc(upstream=upstream, operation=operation)
+    acc = _upstream_acc.get()
+    if acc is not None:
+        acc[0] += seconds
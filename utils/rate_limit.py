@@ -0,0 +1,104 @@
+# utils/rate_limit.py
+"""Ліміти дій користувачів: token bucket на (користувач, клас дії) і спільний бюджет на upstream."""
+import time
+from typing import NamedTuple, Optional
+
+from cachetools import TTLCache
+
+from config.settings import (
+    RATE_LIMIT_ENABLED,
+    RATE_LIMIT_UPDATES_PER_SEC,
+    RATE_LIMIT_UPDATES_BURST,
+    RATE_LIMIT_SEARCH_PER_MIN,
+    RATE_LIMIT_SEARCH_BURST,
+    RATE_LIMIT_STOP_PER_MIN,
+    RATE_LIMIT_STOP_BURST,
+    EASYWAY_GLOBAL_RATE_PER_SEC,
+    EASYWAY_GLOBAL_BURST,
+)
+from utils.metrics import REGISTRY
+
+RATE_LIMITED = REGISTRY.counter(
+    "bot_rate_limited_total", "Відхилені лімітом дії користувачів", ("action", "scope")
+)
+
+
+class TokenBucket:
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    def take(self) -> float:
+        """Бере токен. 0 — взято, інакше скільки секунд до наступного токена."""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def refund(self):
+        self.tokens = min(self.capacity, self.tokens + 1)
+
+
+class ActionLimit(NamedTuple):
+    rate: float  # токенів за секунду
+    burst: int
+    upstream: Optional[str] = None
+
+
+class Denial(NamedTuple):
+    scope: str  # "user" | назва upstream
+    retry_after: float
+
+
+ACTION_LIMITS = {
+    "update": ActionLimit(RATE_LIMIT_UPDATES_PER_SEC, RATE_LIMIT_UPDATES_BURST),
+    "search": ActionLimit(RATE_LIMIT_SEARCH_PER_MIN / 60, RATE_LIMIT_SEARCH_BURST, "easyway"),
+    "stop": ActionLimit(RATE_LIMIT_STOP_PER_MIN / 60, RATE_LIMIT_STOP_BURST, "easyway"),
+}
+UPSTREAM_BUDGETS = {
+    "easyway": (EASYWAY_GLOBAL_RATE_PER_SEC, EASYWAY_GLOBAL_BURST),
+}
+
+
+class RateLimiter:
+    def __init__(self, limits: dict = None, upstreams: dict = None, enabled: bool = RATE_LIMIT_ENABLED,
+                 max_buckets: int = 100_000):
+        self.limits = ACTION_LIMITS if limits is None else limits
+        self.enabled = enabled
+        self.upstreams = {name: TokenBucket(rate, burst)
+                          for name, (rate, burst) in (UPSTREAM_BUDGETS if upstreams is None else upstreams).items()}
+        # Повне відро нічим не відрізняється від нового — неактивних користувачів можна забувати
+        idle_sec = max((limit.burst / limit.rate for limit in self.limits.values()), default=60)
+        self._buckets = TTLCache(maxsize=max_buckets, ttl=max(idle_sec, 60))
+
+    def check(self, user_id: int, action: str) -> Optional[Denial]:
+        if not self.enabled:
+            return None
+        limit = self.limits[action]
+        key = (user_id, action)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = TokenBucket(limit.rate, limit.burst)
+
+        wait = bucket.take()
+        if wait:
+            RATE_LIMITED.inc(action=action, scope="user")
+            return Denial("user", wait)
+
+        if limit.upstream:
+            wait = self.upstreams[limit.upstream].take()
+            if wait:
+                bucket.refund()  # користувач не винен — його токен повертаємо
+                RATE_LIMITED.inc(action=action, scope=limit.upstream)
+                return Denial(limit.upstream, wait)
+        return None
+
+
+rate_limiter = RateLimiter()